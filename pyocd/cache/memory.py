@@ -15,15 +15,24 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
 from intervaltree import (Interval, IntervalTree)
 import logging
+from typing import (Dict, List, Optional, Tuple, TYPE_CHECKING)
 
+from ..core.target import Target
 from ..utility import conversion
 from .metrics import CacheMetrics
 from ..core.exceptions import TransferFaultError
 
+if TYPE_CHECKING:
+    from ..core.memory_map import MemoryRegion
+
 LOG = logging.getLogger(__name__)
 
+## Default maximum number of bytes cached for each memory region.
+DEFAULT_MAX_SIZE = 1024 * 1024
+
 class MemoryCache(object):
     """@brief Memory cache.
 
@@ -37,192 +46,269 @@ class MemoryCache(object):
     memory region, or a TransferFaultError will be raised. However, if an access is outside of all regions,
     the access is passed to the underlying context unmodified. When an access is within a region, that
     region's cacheability flag is honoured.
+
+    Cached data is held in an interval tree of non-overlapping intervals, each with a bytearray of data.
+    Adjacent intervals within the same region are merged, so the tree holds one interval per contiguous
+    cached range. Cache misses are filled in units of the line size, aligned to the line size and clipped
+    to the region, so that many small reads turn into a few larger reads of the target.
+
+    The amount of data cached for each region is bounded by the max size. When the bound is exceeded,
+    the least recently used intervals of the region are evicted. Accesses larger than the max size are
+    passed to the underlying context.
+
+    If write-back is enabled, writes to cacheable regions only update the cache. The modified ranges are
+    written to the target when flush() is called, when the cache is invalidated, when modified data is
+    evicted, or when the target is about to run, reset, or disconnect. Otherwise writes are passed
+    through to the target and also update the cache.
     """
 
-    def __init__(self, context, core):
+    def __init__(self, context, core, line_size: int = 1, max_size: int = DEFAULT_MAX_SIZE,
+            write_back: bool = False):
+        """@brief Constructor.
+
+        @param self
+        @param context The context used to access target memory.
+        @param core The core associated with the context.
+        @param line_size Size in bytes of the aligned blocks in which cache misses are filled. Must be a
+            power of two. A line size of 1 reads exactly the uncached bytes.
+        @param max_size Maximum number of bytes cached for each memory region.
+        @param write_back Whether to defer writes to cacheable regions until the cache is flushed.
+        """
+        assert line_size > 0 and (line_size & (line_size - 1)) == 0, "line size must be a power of two"
+        assert max_size > 0
         self._context = context
         self._core = core
+        self._line_size = line_size
+        self._max_size = max_size
+        self._write_back = write_back
         self._run_token = -1
         self._reset_cache()
 
+        if write_back:
+            self._core.session.subscribe(self._flush_event_handler, (Target.Event.PRE_RUN,
+                    Target.Event.PRE_RESET, Target.Event.PRE_DISCONNECT, Target.Event.PRE_FLASH_PROGRAM))
+
     def _reset_cache(self):
         self._cache = IntervalTree()
+        ## Modified ranges not yet written to the target, when write-back is enabled.
+        self._dirty = IntervalTree()
+        ## Per-region LRU ordering of cached intervals, keyed by interval start address.
+        self._lru: Dict["MemoryRegion", "collections.OrderedDict[int, Interval]"] = {}
+        ## Per-region number of cached bytes.
+        self._region_sizes: Dict["MemoryRegion", int] = {}
+        ## Prefetched ranges that have not yet been read.
+        self._prefetched = IntervalTree()
         self._metrics = CacheMetrics()
 
     def _check_cache(self):
         """@brief Invalidates the cache if appropriate."""
         if self._core.is_running():
             LOG.debug("core is running; invalidating cache")
+            self._flush_dirty()
             self._reset_cache()
         elif self._run_token != self._core.run_token:
             self._dump_metrics()
             LOG.debug("out of date run token; invalidating cache")
+            self._flush_dirty()
             self._reset_cache()
             self._run_token = self._core.run_token
 
-    def _get_ranges(self, addr, count):
-        """@brief Splits a memory address range into cached and uncached subranges.
-        @return Returns a 2-tuple with the first element being a set of Interval objects for each
-          of the cached subranges. The second element is a set of Interval objects for each of the
-          non-cached subranges.
-        """
-        cached = self._cache.overlap(addr, addr + count)
-        uncached = {Interval(addr, addr + count)}
-        for cachedIv in cached:
-            newUncachedSet = set()
-            for uncachedIv in uncached:
-
-                # No overlap.
-                if cachedIv.end < uncachedIv.begin or cachedIv.begin > uncachedIv.end:
-                    newUncachedSet.add(uncachedIv)
-                    continue
-
-                # Begin segment.
-                if cachedIv.begin - uncachedIv.begin > 0:
-                    newUncachedSet.add(Interval(uncachedIv.begin, cachedIv.begin))
-
-                # End segment.
-                if uncachedIv.end - cachedIv.end > 0:
-                    newUncachedSet.add(Interval(cachedIv.end, uncachedIv.end))
-            uncached = newUncachedSet
-        return cached, uncached
+    def _flush_event_handler(self, notification):
+        self.flush()
 
-    def _read_uncached(self, uncached):
-        """"@brief Reads uncached memory ranges and updates the cache.
-        @return A list of Interval objects is returned. Each Interval has its @a data attribute set
-          to a bytearray of the data read from target memory.
+    def _get_gaps(self, addr: int, end: int) -> List[Tuple[int, int]]:
+        """@brief Returns the uncached subranges of an address range.
+        @return List of (begin, end) tuples sorted by address.
+        """
+        gaps = []
+        pos = addr
+        for iv in sorted(self._cache.overlap(addr, end)):
+            if iv.begin > pos:
+                gaps.append((pos, iv.begin))
+            pos = max(pos, iv.end)
+        if pos < end:
+            gaps.append((pos, end))
+        return gaps
+
+    def _touch(self, region: "MemoryRegion", iv: Interval) -> None:
+        """@brief Mark an interval as most recently used."""
+        self._lru[region].move_to_end(iv.begin)
+
+    def _remove_interval(self, region: "MemoryRegion", iv: Interval) -> None:
+        self._cache.remove(iv)
+        del self._lru[region][iv.begin]
+        self._region_sizes[region] -= iv.end - iv.begin
+
+    def _add_interval(self, region: "MemoryRegion", iv: Interval) -> None:
+        self._cache.add(iv)
+        self._lru.setdefault(region, collections.OrderedDict())[iv.begin] = iv
+        self._region_sizes[region] = self._region_sizes.get(region, 0) + iv.end - iv.begin
+
+    def _store(self, region: "MemoryRegion", addr: int, data,
+            keep: Optional[Tuple[int, int]] = None) -> Interval:
+        """@brief Insert data into the cache, merging with overlapping and adjacent intervals.
+
+        Data already cached in the range is replaced. Intervals are only merged if they are within
+        the same region.
+
+        @param keep Range, as a tuple of start and end address, whose cached data must not be evicted.
+            Defaults to the range of the stored data. Must not be larger than the max size.
+        @return The merged interval containing the data.
+        """
+        end = addr + len(data)
+        neighbours = sorted(iv for iv in self._cache.overlap(addr - 1, end + 1)
+                if region.contains_range(iv.begin, end=iv.end - 1))
+        begin = min(addr, neighbours[0].begin) if neighbours else addr
+        new_end = max(end, neighbours[-1].end) if neighbours else end
+
+        # Extend the data of an interval that starts at the merged start address in place, so that
+        # sequential fills don't copy all previously cached data.
+        if neighbours and neighbours[0].begin == begin:
+            merged = neighbours[0].data
+            merged.extend(bytes(new_end - neighbours[0].end))
+            others = neighbours[1:]
+        else:
+            merged = bytearray(new_end - begin)
+            others = neighbours
+        for iv in others:
+            merged[iv.begin - begin:iv.end - begin] = iv.data
+        merged[addr - begin:end - begin] = data
+
+        for iv in neighbours:
+            self._remove_interval(region, iv)
+        new_iv = Interval(begin, new_end, merged)
+        self._add_interval(region, new_iv)
+        keep_addr, keep_end = keep if keep is not None else (addr, end)
+        self._evict(region, new_iv, keep_addr, keep_end)
+        return new_iv
+
+    def _evict(self, region: "MemoryRegion", keep: Interval, addr: int, end: int) -> None:
+        """@brief Evict least recently used intervals until the region is within the max size.
+
+        The @a keep interval is evicted last. If it is larger than the max size on its own, it is
+        trimmed to a window of the max size that contains the @a addr to @a end range.
+        """
+        lru = self._lru[region]
+        while self._region_sizes[region] > self._max_size and len(lru) > 1:
+            oldest = next(iter(lru.values()))
+            if oldest is keep:
+                self._touch(region, keep)
+                continue
+            self._flush_dirty(oldest.begin, oldest.end)
+            self._remove_interval(region, oldest)
+            self._metrics.evictions += 1
+
+        if self._region_sizes[region] > self._max_size:
+            assert end - addr <= self._max_size
+            window_begin = max(keep.begin, min(addr, keep.end - self._max_size))
+            window_end = window_begin + self._max_size
+            self._flush_dirty(keep.begin, window_begin)
+            self._flush_dirty(window_end, keep.end)
+            self._remove_interval(region, keep)
+            self._add_interval(region, Interval(window_begin, window_end,
+                    keep.data[window_begin - keep.begin:window_end - keep.begin]))
+            self._metrics.evictions += 1
+
+    def _fill(self, region: "MemoryRegion", addr: int, end: int) -> None:
+        """@brief Reads uncached memory in a range and updates the cache.
+
+        Each uncached subrange is extended to line boundaries, clipped to the region, unless the
+        range extended to line boundaries is larger than the max size. If a read of an extended
+        subrange faults, it is retried with only the bytes that were requested.
         """
-        uncachedData = []
-        for uncachedIv in uncached:
-            data = self._context.read_memory_block8(uncachedIv.begin, uncachedIv.end - uncachedIv.begin)
-            iv = Interval(uncachedIv.begin, uncachedIv.end, bytearray(data))
-            self._cache.add(iv) # TODO merge contiguous cached intervals
-            uncachedData.append(iv)
-        return uncachedData
-
-    def _update_metrics(self, cached, uncached, addr, size):
-        cachedSize = 0
-        for iv in cached:
-            begin = iv.begin
-            end = iv.end
-            if iv.begin < addr:
-                begin = addr
-            if iv.end > addr + size:
-                end = addr + size
-            cachedSize += end - begin
-
-        uncachedSize = sum((iv.end - iv.begin) for iv in uncached)
+        gaps = self._get_gaps(addr, end)
+        if not gaps:
+            return
+        fills = gaps
+        if self._line_size > 1:
+            mask = self._line_size - 1
+            line_begin = max(region.start, addr & ~mask)
+            line_end = min(region.end + 1, (end + mask) & ~mask)
+            if line_end - line_begin <= self._max_size:
+                fills = self._get_gaps(line_begin, line_end)
+        for begin, fill_end in fills:
+            try:
+                data = bytearray(fill_end - begin)
+                self._context.read_memory_into(begin, data)
+            except TransferFaultError:
+                clipped_begin = max(begin, addr)
+                clipped_end = min(fill_end, end)
+                if (clipped_begin, clipped_end) == (begin, fill_end):
+                    raise
+                if clipped_begin >= clipped_end:
+                    continue
+                LOG.debug("fault reading cache line [%x:%x]; reading [%x:%x]",
+                        begin, fill_end, clipped_begin, clipped_end)
+                begin = clipped_begin
+                data = bytearray(clipped_end - clipped_begin)
+                self._context.read_memory_into(begin, data)
+            self._store(region, begin, data, keep=(addr, end))
+            self._metrics.fills += 1
+
+    def _flush_dirty(self, addr: int = 0, end: Optional[int] = None) -> None:
+        """@brief Write modified data within a range to the target."""
+        if not self._dirty:
+            return
+        if end is None:
+            dirty = sorted(self._dirty)
+            self._dirty.clear()
+        else:
+            if addr >= end:
+                return
+            dirty = sorted(self._dirty.overlap(addr, end))
+            self._dirty.chop(addr, end)
+            dirty = [Interval(max(iv.begin, addr), min(iv.end, end)) for iv in dirty]
+        for iv in dirty:
+            cached = next(iter(self._cache.at(iv.begin)))
+            offset = iv.begin - cached.begin
+            self._context.write_memory_from(iv.begin,
+                    memoryview(cached.data)[offset:offset + iv.end - iv.begin])
+
+    def _update_metrics(self, gaps, addr, size):
+        uncachedSize = sum((gap_end - gap_begin) for gap_begin, gap_end in gaps)
 
         self._metrics.reads += 1
-        self._metrics.hits += cachedSize
+        self._metrics.hits += size - uncachedSize
         self._metrics.misses += uncachedSize
 
+        # Count hits on prefetched data. Each prefetched byte is only counted once.
+        if self._prefetched:
+            end = addr + size
+            for iv in self._prefetched.overlap(addr, end):
+                begin = max(iv.begin, addr)
+                iv_end = min(iv.end, end)
+                uncached = sum(max(0, min(iv_end, gap_end) - max(begin, gap_begin)) for gap_begin, gap_end in gaps)
+                self._metrics.prefetch_hits += iv_end - begin - uncached
+            self._prefetched.chop(addr, end)
+
     def _dump_metrics(self):
         if self._metrics.total > 0:
-            LOG.debug("%d reads, %d bytes [%d%% hits, %d bytes]; %d bytes written",
+            LOG.debug("%d reads, %d bytes [%d%% hits, %d bytes]; %d fills, %d evictions; "
+                "%d prefetches, %d bytes [%d%% used]; %d bytes written",
                 self._metrics.reads, self._metrics.total, self._metrics.percent_hit,
-                self._metrics.hits, self._metrics.writes)
+                self._metrics.hits, self._metrics.fills, self._metrics.evictions,
+                self._metrics.prefetches, self._metrics.prefetched, self._metrics.percent_prefetch_hit,
+                self._metrics.writes)
         else:
             LOG.debug("no reads")
 
-    def _read(self, addr, size):
-        """@brief Performs a cached read operation of an address range.
-        @return A list of Interval objects sorted by address.
-        """
-        # Get the cached and uncached subranges of the requested read.
-        cached, uncached = self._get_ranges(addr, size)
-        self._update_metrics(cached, uncached, addr, size)
-
-        # Read any uncached ranges.
-        uncachedData = self._read_uncached(uncached)
-
-        # Merged cached with data we just read
-        combined = list(cached) + uncachedData
-        combined.sort(key=lambda x: x.begin)
-        return combined
-
-    def _merge_data(self, combined, addr, size):
-        """@brief Extracts data from the intersection of an address range across a list of interval objects.
-
-        The range represented by @a addr and @a size are assumed to overlap the intervals. The first
-        and last interval in the list may have ragged edges not fully contained in the address range, in
-        which case the correct slice of those intervals is extracted.
-
-        @param self
-        @param combined List of Interval objects forming a contiguous range. The @a data attribute of
-          each interval must be a bytearray.
-        @param addr Start address. Must be within the range of the first interval.
-        @param size Number of bytes. (@a addr + @a size) must be within the range of the last interval.
-        @return A single bytearray object with all data from the intervals that intersects the address
-          range.
-        """
-        result = bytearray()
-        resultAppend = bytearray()
-
-        # Check for fully contained subrange.
-        if len(combined) and combined[0].begin < addr and combined[0].end > addr + size:
-            offset = addr - combined[0].begin
-            endOffset = offset + size
-            result = combined[0].data[offset:endOffset]
-            return result
-
-        # Take slice of leading ragged edge.
-        if len(combined) and combined[0].begin < addr:
-            offset = addr - combined[0].begin
-            result += combined[0].data[offset:]
-            combined = combined[1:]
-        # Take slice of trailing ragged edge.
-        if len(combined) and combined[-1].end > addr + size:
-            offset = addr + size - combined[-1].begin
-            resultAppend = combined[-1].data[:offset]
-            combined = combined[:-1]
-
-        # Merge.
-        for iv in combined:
-            result += iv.data
-        result += resultAppend
-
-        return result
-
-    def _update_contiguous(self, cached, addr, value):
-        size = len(value)
-        end = addr + size
-        leadBegin = addr
-        leadData = bytearray()
-        trailData = bytearray()
-        trailEnd = end
-
-        if cached[0].begin < addr and cached[0].end > addr:
-            offset = addr - cached[0].begin
-            leadData = cached[0].data[:offset]
-            leadBegin = cached[0].begin
-        if cached[-1].begin < end and cached[-1].end > end:
-            offset = end - cached[-1].begin
-            trailData = cached[-1].data[offset:]
-            trailEnd = cached[-1].end
-
-        self._cache.remove_overlap(addr, end)
-
-        data = leadData + value + trailData
-        self._cache.addi(leadBegin, trailEnd, data)
-
-    def _check_regions(self, addr, count):
-        """@return A bool indicating whether the given address range is fully contained within
-              one known memory region, and that region is cacheable.
+    def _get_region(self, addr, count) -> Optional["MemoryRegion"]:
+        """@return The memory region fully containing the given address range if that region is
+              cacheable, otherwise None.
         @exception TransferFaultError Raised if the access is not entirely contained within a single region.
         """
         regions = self._core.memory_map.get_intersecting_regions(addr, length=count)
 
         # If no regions matched, then allow an uncached operation.
         if len(regions) == 0:
-            return False
+            return None
 
         # Raise if not fully contained within one region.
         if len(regions) > 1 or not regions[0].contains_range(addr, length=count):
             raise TransferFaultError("individual memory accesses must not cross memory region boundaries")
 
-        # Otherwise return whether the region is cacheable.
-        return regions[0].is_cacheable
+        # Otherwise return the region if it is cacheable.
+        return regions[0] if regions[0].is_cacheable else None
 
     def read_memory(self, addr, transfer_size=32, now=True):
         # TODO use more optimal underlying read_memory calls
@@ -239,24 +325,84 @@ class MemoryCache(object):
                 return data
             return read_cb
 
-    def read_memory_block8(self, addr, size):
+    def read_memory_into(self, addr, buf):
+        view = memoryview(buf).cast('B')
+        size = len(view)
         if size <= 0:
-            return []
+            return
 
         self._check_cache()
 
         # Validate memory regions.
-        if not self._check_regions(addr, size):
+        region = self._get_region(addr, size)
+        if region is None:
             LOG.debug("range [%x:%x] is not cacheable", addr, addr+size)
-            return self._context.read_memory_block8(addr, size)
+            self._context.read_memory_into(addr, view)
+            return
 
-        # Get the cached and uncached subranges of the requested read.
-        combined = self._read(addr, size)
+        end = addr + size
+        self._update_metrics(self._get_gaps(addr, end), addr, size)
 
-        # Extract data out of combined intervals.
-        result = list(self._merge_data(combined, addr, size))
-        assert len(result) == size, "result size ({}) != requested size ({})".format(len(result), size)
-        return result
+        # Reads larger than the cache can hold go to the target, after any modified data is written.
+        if size > self._max_size:
+            self._flush_dirty(addr, end)
+            self._context.read_memory_into(addr, view)
+            return
+
+        self._fill(region, addr, end)
+
+        # The requested range is now contained in a single merged interval.
+        iv = next(iter(self._cache.at(addr)))
+        assert iv.end >= end, "cached interval [{:x}:{:x}] doesn't contain read".format(iv.begin, iv.end)
+        self._touch(region, iv)
+        view[:] = memoryview(iv.data)[addr - iv.begin:end - iv.begin]
+
+    def prefetch(self, addr, size):
+        """@brief Speculatively read a memory range into the cache.
+
+        The range is clipped to the cacheable region containing @a addr, and only uncached parts of
+        the range are read. To keep read-ahead in reasonably large reads, nothing is read while the
+        first half of the range is fully cached. Nothing is read if the core is running. Faults are
+        ignored, since the range may not have been requested by anyone.
+        """
+        if size <= 0 or size > self._max_size:
+            return
+
+        self._check_cache()
+        if self._core.is_running():
+            return
+
+        region = self._core.memory_map.get_region_for_address(addr)
+        if region is None or not region.is_cacheable:
+            return
+        end = min(addr + size, region.end + 1)
+
+        if not self._get_gaps(addr, min(end, addr + (size + 1) // 2)):
+            return
+
+        for begin, gap_end in self._get_gaps(addr, end):
+            data = bytearray(gap_end - begin)
+            try:
+                self._context.read_memory_into(begin, data)
+            except TransferFaultError as err:
+                LOG.debug("fault during prefetch of [%x:%x]: %s", begin, gap_end, err)
+                return
+            self._store(region, begin, data)
+            self._prefetched.addi(begin, gap_end)
+            self._metrics.prefetches += 1
+            self._metrics.prefetched += gap_end - begin
+
+    @property
+    def metrics(self):
+        """@brief CacheMetrics for the cache since it was last invalidated."""
+        return self._metrics
+
+    def read_memory_block8(self, addr, size):
+        if size <= 0:
+            return []
+        result = bytearray(size)
+        self.read_memory_into(addr, result)
+        return list(result)
 
     def read_memory_block32(self, addr, size):
         return conversion.byte_list_to_u32le_list(self.read_memory_block8(addr, size*4))
@@ -268,41 +414,54 @@ class MemoryCache(object):
             return self.write_memory_block8(addr, conversion.nbit_le_list_to_byte_list([value], transfer_size))
 
     def write_memory_block8(self, addr, value):
-        if len(value) <= 0:
+        return self.write_memory_from(addr, bytes(bytearray(value)))
+
+    def write_memory_block32(self, addr, data):
+        return self.write_memory_block8(addr, conversion.u32le_list_to_byte_list(data))
+
+    def write_memory_from(self, addr, data):
+        size = len(data)
+        if size <= 0:
             return
 
         self._check_cache()
 
         # Validate memory regions.
-        cacheable = self._check_regions(addr, len(value))
-
-        # Write to the target first, so if it fails we don't update the cache.
-        result = self._context.write_memory_block8(addr, value)
+        region = self._get_region(addr, size)
+        end = addr + size
 
-        if cacheable:
-            size = len(value)
-            end = addr + size
-            cached = sorted(self._cache.overlap(addr, end), key=lambda x:x.begin)
+        if region is not None:
             self._metrics.writes += size
 
-            if len(cached):
-                # Write data is entirely within a single cached interval.
-                if addr >= cached[0].begin and end <= cached[0].end:
-                    beginOffset = addr - cached[0].begin
-                    endOffset = beginOffset + size
-                    cached[0].data[beginOffset:endOffset] = value
+        # Writes larger than the cache can hold go to the target, updating any cached data.
+        if region is not None and size > self._max_size:
+            self._context.write_memory_from(addr, data)
+            self._dirty.chop(addr, end)
+            for iv in self._cache.overlap(addr, end):
+                begin = max(iv.begin, addr)
+                iv_end = min(iv.end, end)
+                iv.data[begin - iv.begin:iv_end - iv.begin] = data[begin - addr:iv_end - addr]
+            return
 
-                else:
-                    self._update_contiguous(cached, addr, bytearray(value))
-            else:
-                # No cached data in this range, so just add the entire interval.
-                self._cache.addi(addr, end, bytearray(value))
+        if region is not None and self._write_back:
+            self._store(region, addr, data)
+            self._dirty.addi(addr, end)
+            self._dirty.merge_overlaps(strict=False)
+            return
+
+        # Write to the target first, so if it fails we don't update the cache.
+        result = self._context.write_memory_from(addr, data)
+
+        if region is not None:
+            self._store(region, addr, data)
 
         return result
 
-    def write_memory_block32(self, addr, data):
-        return self.write_memory_block8(addr, conversion.u32le_list_to_byte_list(data))
+    def flush(self):
+        """@brief Write any modified data to the target."""
+        self._flush_dirty()
 
     def invalidate(self):
+        self._flush_dirty()
         self._reset_cache()
 
@@ -21,6 +21,14 @@ class CacheMetrics(object):
         self.misses = 0
         self.reads = 0
         self.writes = 0
+        self.fills = 0
+        self.evictions = 0
+        ## Number of speculative reads made by prefetching.
+        self.prefetches = 0
+        ## Bytes read from the target by prefetching.
+        self.prefetched = 0
+        ## Bytes of reads that were hits on prefetched data.
+        self.prefetch_hits = 0
 
     @property
     def total(self):
@@ -40,3 +48,10 @@ class CacheMetrics(object):
         else:
             return 0
 
+    @property
+    def percent_prefetch_hit(self):
+        """@brief Percentage of prefetched bytes that were subsequently read."""
+        if self.prefetched > 0:
+            return self.prefetch_hits * 100.0 / self.prefetched
+        else:
+            return 0
@@ -0,0 +1,78 @@
+# pyOCD debugger
+# Copyright (c) 2026 PyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import (Optional, Tuple)
+
+class AccessPatternDetector(object):
+    """@brief Predicts the next memory range a debugger will read.
+
+    Each read is passed to observe(). Two patterns are recognised:
+
+    - Sequential: a read that starts where the previous read ended, such as gdb reading successive
+      stack frames or a memory view being scrolled. A prediction is made immediately.
+    - Stride: reads separated by the same nonzero address delta, in either direction, such as walking
+      an array of structures or a table of pointers. A prediction is made once the same stride has
+      been seen twice in a row.
+
+    The predicted range is the `window` bytes following the current read for ascending patterns, or
+    preceding it for descending patterns. Deltas larger than `max_stride` are treated as unrelated
+    reads and reset the detector.
+    """
+
+    def __init__(self, window: int, max_stride: int) -> None:
+        assert window > 0
+        self._window = window
+        self._max_stride = max_stride
+        self._last: Optional[Tuple[int, int]] = None
+        self._stride = 0
+        self._repeats = 0
+
+    def reset(self) -> None:
+        self._last = None
+        self._stride = 0
+        self._repeats = 0
+
+    def observe(self, addr: int, size: int) -> Optional[Tuple[int, int]]:
+        """@brief Record a read and return a predicted range to prefetch.
+        @return Either None or a 2-tuple of (address, size) to prefetch.
+        """
+        last = self._last
+        self._last = (addr, size)
+        if last is None:
+            return None
+
+        last_addr, last_size = last
+        stride = addr - last_addr
+        if stride == 0 or abs(stride) > self._max_stride:
+            self._stride = 0
+            self._repeats = 0
+            return None
+
+        if stride == self._stride:
+            self._repeats += 1
+        else:
+            self._stride = stride
+            self._repeats = 1
+
+        is_sequential = (addr == last_addr + last_size)
+        if not is_sequential and self._repeats < 2:
+            return None
+
+        if stride > 0:
+            return (addr + size, self._window)
+        else:
+            begin = max(0, addr - self._window)
+            return (begin, addr - begin) if addr > begin else None
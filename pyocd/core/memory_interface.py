@@ -59,6 +59,25 @@ class MemoryInterface:
         """@brief Read an aligned block of 32-bit words."""
         raise NotImplementedError()
 
+    def write_memory_from(self, addr: int, data: Union[bytes, bytearray, memoryview]) -> None:
+        """@brief Write a block of unaligned bytes in memory from a bytes-like object.
+
+        This default implementation passes the data to write_memory_block8(). Subclasses that can
+        transfer directly from the buffer should override it.
+        """
+        self.write_memory_block8(addr, bytes(data))
+
+    def read_memory_into(self, addr: int, buf: Union[bytearray, memoryview]) -> None:
+        """@brief Read a block of unaligned bytes in memory into a writable buffer.
+
+        The number of bytes read is the length of _buf_.
+
+        This default implementation copies the result of read_memory_block8() into the buffer.
+        Subclasses that can fill the buffer directly should override it.
+        """
+        view = memoryview(buf).cast('B')
+        view[:] = bytes(self.read_memory_block8(addr, len(view)))
+
     def write64(self, addr: int, value: int) -> None:
         """@brief Shorthand to write a 64-bit word."""
         self.write_memory(addr, value, 64)
@@ -39,6 +39,17 @@ BUILTIN_OPTIONS = [
         "Enable the memory read cache. Default is enabled."),
     OptionInfo('cache.enable_register', bool, True,
         "Enable the core register cache. Default is enabled."),
+    OptionInfo('cache.memory_line_size', int, 64,
+        "Size in bytes of the aligned blocks in which memory cache misses are filled. Must be a power of two. "
+        "Set to 1 to read only the requested bytes."),
+    OptionInfo('cache.memory_max_size', int, 1024 * 1024,
+        "Maximum number of bytes held by the memory cache for each memory region. Least recently used data "
+        "is evicted when this is exceeded."),
+    OptionInfo('cache.memory_prefetch_size', int, 256,
+        "Number of bytes read ahead into the memory cache when sequential or strided reads are detected "
+        "while the target is halted. Set to 0 to disable prefetching."),
+    OptionInfo('cache.memory_write_back', bool, False,
+        "Defer memory writes to cacheable regions until the target is resumed, reset, or disconnected."),
     OptionInfo('cache.read_code_from_elf', bool, True,
         "Controls whether reads of code sections will be taken from an attached ELF file instead of the "
         "target memory."),
@@ -72,6 +83,32 @@ BUILTIN_OPTIONS = [
     OptionInfo('fast_program', bool, False,
         "Setting this option to True will use CRC checks of existing flash sector contents to "
         "determine whether pages need to be programmed."),
+    OptionInfo('flash.compress', bool, False,
+        "Whether to send run-length encoded page data that is expanded on the target by a small "
+        "decompressor before programming. Requires a flash algorithm with at least two page buffers."),
+    OptionInfo('flash.delta_program', bool, False,
+        "Whether to program changed pages without erasing their sector when all of those pages are "
+        "already erased on the target. Unchanged pages in the sector keep their contents."),
+    OptionInfo('flash.erase_blank_check', bool, True,
+        "Whether sector erase skips sectors that are already blank, as reported by the flash algo's "
+        "BlankCheck() function. Has no effect if the flash algo does not have BlankCheck()."),
+    OptionInfo('flash.erase_crc_blank_check', bool, False,
+        "Whether sector erase compares sector CRCs from the CRC analyzer with the CRC of an erased sector "
+        "to find blank sectors when the flash algo does not have BlankCheck(). Not safe for flash with "
+        "ECC, where an erased sector may not read as the erased byte value."),
+    OptionInfo('flash.manifest_path', str, None,
+        "Path of a file in which to record the CRCs of programmed flash pages for each probe, target type, "
+        "and flash region. When set, unchanged pages are identified from the manifest after verifying a "
+        "sample of them, instead of analyzing every page. Disabled if not set."),
+    OptionInfo('flash.manifest_samples', int, 4,
+        "Number of pages that must match the flash manifest before its other pages are assumed to be "
+        "unchanged. A value of 0 verifies all pages, using a single CRC analyzer call if supported."),
+    OptionInfo('flash.page_buffers', int, 2,
+        "Maximum number of page buffers to allocate in RAM for flash algorithms created from CMSIS-Pack "
+        "FLM files. More buffers let more page data be downloaded while the target is programming."),
+    OptionInfo('flash.verify', str, "none",
+        "Verification of programmed flash pages. One of \"none\", \"read\" to read back and compare "
+        "each page, or \"crc\" to compare CRCs computed on the target by the flash algo's analyzer."),
     OptionInfo('flash.timeout.init', float, 5.0,
         "Flash algorithm init and uninit timeout in seconds."),
     OptionInfo('flash.timeout.analyzer', float, 30.0,
@@ -96,6 +133,10 @@ BUILTIN_OPTIONS = [
     OptionInfo('pack', (str, list), None,
         "Path or list of paths to CMSIS Device Family Packs. Devices defined in the pack(s) are "
         "added to the list of available targets."),
+    OptionInfo('pack.algo_cache_dir', str, None,
+        "Path of a directory in which to cache the flash algorithms extracted from CMSIS-Pack FLM files. "
+        "Cached algorithms are identified by the contents of the FLM file and load without parsing the "
+        "ELF file. The directory can be shared by concurrent pyOCD processes. Disabled if not set."),
     OptionInfo('pack.debug_sequences.debugvars', str, None,
         "Variable definition statements to change configurable debug sequence variables."),
     OptionInfo('pack.debug_sequences.disabled_sequences', (str, list), None,
@@ -131,6 +172,11 @@ BUILTIN_OPTIONS = [
         "Set to 0 to disable the core accessibility test. Default is 2.0 s."),
     OptionInfo('resume_on_disconnect', bool, True,
         "Whether to run target on disconnect."),
+    OptionInfo('rtt.poll_max_interval', float, 0.05,
+        "Maximum interval in seconds between RTT polls, used while no data is being transferred. Default is 0.05."),
+    OptionInfo('rtt.poll_min_interval', float, 0.001,
+        "Minimum interval in seconds between RTT polls. The interval is adapted to the rate of data from the "
+        "target within this limit. Default is 0.001."),
     OptionInfo('scan_all_aps', bool, False,
         "Controls whether all 256 ADIv5 AP addresses will be probed. Default is False."),
     OptionInfo('serve_local_only', bool, True,
@@ -160,6 +206,12 @@ BUILTIN_OPTIONS = [
         "Duration in seconds that a failed target status check will be retried before an error is raised. "
         "Only applies while the target is running after a resume operation in the debugger and pyOCD is waiting "
         "for it to halt again."),
+    OptionInfo('gdbserver.halt_poll_min_interval', float, 0.002,
+        "Interval in seconds between checks of whether the core has halted, just after it is resumed. The "
+        "interval doubles with each check, up to gdbserver.halt_poll_max_interval. Default is 0.002."),
+    OptionInfo('gdbserver.halt_poll_max_interval', float, 0.05,
+        "Maximum interval in seconds between checks of whether the core has halted, while it is running. "
+        "Default is 0.05."),
     OptionInfo('gdbserver_port', int, 3333,
         "Base TCP port for the gdbserver."),
     OptionInfo('persist', bool, False,
@@ -243,6 +243,12 @@ class SoCTarget(TargetGraphNode):
     def read_memory_block32(self, addr: int, size: int) -> Sequence[int]:
         return self.selected_core_or_raise.read_memory_block32(addr, size)
 
+    def write_memory_from(self, addr: int, data: Union[bytes, bytearray, memoryview]) -> None:
+        return self.selected_core_or_raise.write_memory_from(addr, data)
+
+    def read_memory_into(self, addr: int, buf: Union[bytearray, memoryview]) -> None:
+        return self.selected_core_or_raise.read_memory_into(addr, buf)
+
     def read_core_register(self, id: CoreRegisterNameOrNumberType) -> CoreRegisterValueType:
         return self.selected_core_or_raise.read_core_register(id)
 
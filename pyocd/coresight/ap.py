@@ -18,10 +18,12 @@
 from __future__ import annotations
 
 import logging
+import struct
 from contextlib import contextmanager
 from functools import total_ordering
 from enum import Enum
-from typing import (Any, Callable, Dict, Generator, Optional, TYPE_CHECKING, Sequence, Set, Tuple, Type, Union, overload)
+from typing import (Any, Callable, Dict, Generator, List, Optional, TYPE_CHECKING, Sequence, Set, Tuple, Type, Union,
+        overload)
 from typing_extensions import Literal
 
 from ..core import (exceptions, memory_interface)
@@ -93,6 +95,7 @@ MEM_APv2_CONTROL_REG_OFFSET = 0xD00
 MEM_AP_CSW = 0x00
 MEM_AP_TAR = 0x04
 MEM_AP_DRW = 0x0C
+MEM_AP_BD0 = 0x10
 MEM_AP_TRR = 0x24 # Only APv2 with ERRv1
 MEM_AP_BASE_HI = 0xF0
 MEM_AP_CFG = 0xF4
@@ -1124,6 +1127,81 @@ class MEM_AP(AccessPort, memory_interface.MemoryInterface):
         else:
             return read_mem_cb
 
+    @property
+    def supports_banked_transfers(self) -> bool:
+        """@brief Whether transfer_banked() can be used.
+
+        Banked transfers require direct access to the AP registers, so they are not available when the
+        probe provides an accelerated memory interface for this AP.
+        """
+        return self._accelerated_memory_interface is None
+
+    @locked
+    def transfer_banked(self, bank: int, ops: Sequence[Tuple[int, Optional[int]]]) -> Callable[[], List[int]]:
+        """@brief Perform a sequence of word accesses within one 16-byte block of memory.
+
+        TAR is written once with the block address, then each access is made through the banked data
+        register (BD0-BD3) that maps to the word's address. This removes the TAR write needed by each
+        individual memory access, which is useful for groups of related registers such as the Cortex-M
+        DHCSR, DCRSR, and DCRDR. All accesses are queued before any response is required.
+
+        @param self
+        @param bank Address of the 16-byte aligned block.
+        @param ops Sequence of (address, value) tuples. The address must be a word within the block.
+            If value is None the word is read, otherwise the value is written.
+        @return Callable returning a list of the read values, in the order of the reads in _ops_.
+
+        @exception TransferError Raised if banked transfers are not supported.
+        """
+        assert (bank & 0xf) == 0
+        if not self.supports_banked_transfers:
+            raise exceptions.TransferError("banked transfers are not supported by %s" % self.short_description)
+        bank &= self._address_mask
+        num = self.dp.next_access_number
+        TRACE.debug("transfer_banked:%06d (ap=0x%x; bank=0x%08x, %d ops) {",
+            num, self.address.nominal_address, bank, len(ops))
+        read_cbs = []
+        try:
+            self.write_reg(self._reg_offset + MEM_AP_CSW, self._csw | TRANSFER_SIZE[32])
+            self.write_reg(self._reg_offset + MEM_AP_TAR, bank)
+            for addr, value in ops:
+                assert (addr & ~0xc) == bank
+                bd = self._reg_offset + MEM_AP_BD0 + (addr & 0xc)
+                if value is None:
+                    read_cbs.append(self.read_reg(bd, now=False))
+                else:
+                    self.write_reg(bd, value)
+        except exceptions.TransferFaultError as error:
+            # Annotate error with target address.
+            self._handle_error(error, num)
+            error.fault_address = bank
+            error.fault_length = 16
+            raise
+        except exceptions.Error as error:
+            self._handle_error(error, num)
+            raise
+
+        def transfer_banked_cb() -> List[int]:
+            # Complete every read, even after an error, so the DP's deferred reads are all finished.
+            results = []
+            first_error = None
+            for cb in read_cbs:
+                try:
+                    results.append(cb())
+                except exceptions.Error as error:
+                    if first_error is None:
+                        first_error = error
+            if first_error is not None:
+                self._handle_error(first_error, num)
+                if isinstance(first_error, exceptions.TransferFaultError):
+                    first_error.fault_address = bank
+                    first_error.fault_length = 16
+                raise first_error
+            TRACE.debug("transfer_banked:%06d }", num)
+            return results
+
+        return transfer_banked_cb
+
     def _write_block32_page(self, addr: int, data: Sequence[int]) -> None:
         """@brief Write a single transaction's worth of aligned words.
 
@@ -1151,33 +1229,233 @@ class MEM_AP(AccessPort, memory_interface.MemoryInterface):
             raise
         TRACE.debug("_write_block32:%06d }", num)
 
-    def _read_block32_page(self, addr: int, size: int) -> Sequence[int]:
-        """@brief Read a single transaction's worth of aligned words.
+    def _write_block32_page_from(self, addr: int, data: memoryview) -> None:
+        """@brief Write a single transaction's worth of aligned words from a byte buffer.
 
         The transaction must not cross the MEM-AP's auto-increment boundary.
 
-        This method is not locked because it is only called by _read_memory_block32(), which is locked.
+        This method is not locked because it is only called by _write_memory_from(), which is locked.
         """
         assert (addr & 0x3) == 0
         num = self.dp.next_access_number
-        TRACE.debug("_read_block32:%06d (ap=0x%x; addr=0x%08x, size=%d) {",
-            num, self.address.nominal_address, addr, size)
+        TRACE.debug("_write_block32_from:%06d (ap=0x%x; addr=0x%08x, size=%d) {",
+            num, self.address.nominal_address, addr, len(data) // 4)
         # put address in TAR
         self.write_reg(self._reg_offset + MEM_AP_CSW, self._csw | CSW_SIZE32)
         self.write_reg(self._reg_offset + MEM_AP_TAR, addr)
         try:
-            resp = self.dp.read_ap_multiple(self.address.address + self._reg_offset + MEM_AP_DRW, size)
+            self.dp.write_ap_multiple_from(self.address.address + self._reg_offset + MEM_AP_DRW, data)
+        except exceptions.TransferFaultError as error:
+            # Annotate error with target address.
+            self._handle_error(error, num)
+            error.fault_address = addr
+            error.fault_length = len(data)
+            raise
+        except exceptions.Error as error:
+            self._handle_error(error, num)
+            raise
+        TRACE.debug("_write_block32_from:%06d }", num)
+
+    def _read_block32_page_into(self, addr: int, buf: memoryview) -> Callable[[], None]:
+        """@brief Start reading a single transaction's worth of aligned words into a byte buffer.
+
+        The transaction must not cross the MEM-AP's auto-increment boundary.
+
+        This method is not locked because it is only called by _read_memory_into(), which is locked.
+
+        @return Callable that must be invoked to complete the read. Errors are raised from the callable.
+        """
+        assert (addr & 0x3) == 0
+        num = self.dp.next_access_number
+        TRACE.debug("_read_block32_into:%06d (ap=0x%x; addr=0x%08x, size=%d) {",
+            num, self.address.nominal_address, addr, len(buf) // 4)
+        try:
+            # put address in TAR
+            self.write_reg(self._reg_offset + MEM_AP_CSW, self._csw | CSW_SIZE32)
+            self.write_reg(self._reg_offset + MEM_AP_TAR, addr)
+            result_cb = self.dp.read_ap_multiple_into(self.address.address + self._reg_offset + MEM_AP_DRW,
+                    buf, now=False)
+            assert result_cb is not None
         except exceptions.TransferFaultError as error:
             # Annotate error with target address.
             self._handle_error(error, num)
             error.fault_address = addr
-            error.fault_length = size * 4
+            error.fault_length = len(buf)
             raise
         except exceptions.Error as error:
             self._handle_error(error, num)
             raise
-        TRACE.debug("_read_block32:%06d }", num)
-        return resp
+
+        def read_block32_page_into_cb() -> None:
+            try:
+                result_cb()
+            except exceptions.TransferFaultError as error:
+                # Annotate error with target address.
+                self._handle_error(error, num)
+                error.fault_address = addr
+                error.fault_length = len(buf)
+                raise
+            except exceptions.Error as error:
+                self._handle_error(error, num)
+                raise
+            TRACE.debug("_read_block32_into:%06d }", num)
+
+        return read_block32_page_into_cb
+
+    @locked
+    def _write_memory_from(self, addr: int, data: Union[bytes, bytearray, memoryview]) -> None:
+        """@brief Write a block of unaligned bytes in memory from a bytes-like object.
+
+        Leading and trailing unaligned bytes are written with 8- and 16-bit transfers. The aligned
+        remainder is passed to the probe as views of _data_, one auto-increment page at a time, so no
+        per-word objects are created.
+        """
+        view = memoryview(data).cast('B')
+        addr &= self._address_mask
+        size = len(view)
+        offset = 0
+
+        # Write leading unaligned bytes.
+        if (size > 0) and (addr & 0x01):
+            self._write_memory(addr, view[offset], 8)
+            offset += 1
+            addr += 1
+            size -= 1
+        if (size > 1) and (addr & 0x02):
+            self._write_memory(addr, view[offset] | (view[offset + 1] << 8), 16)
+            offset += 2
+            addr += 2
+            size -= 2
+
+        # Write aligned words.
+        while size >= 4:
+            n = self.auto_increment_page_size - (addr & (self.auto_increment_page_size - 1))
+            n = min(n, size & ~0x3)
+            self._write_block32_page_from(addr, view[offset:offset + n])
+            offset += n
+            addr += n
+            size -= n
+
+        # Write trailing unaligned bytes.
+        if size > 1:
+            self._write_memory(addr, view[offset] | (view[offset + 1] << 8), 16)
+            offset += 2
+            addr += 2
+            size -= 2
+        if size > 0:
+            self._write_memory(addr, view[offset], 8)
+
+    @locked
+    def _read_memory_into(self, addr: int, buf: Union[bytearray, memoryview]) -> None:
+        """@brief Read a block of unaligned bytes in memory into a writable buffer.
+
+        The number of bytes read is the length of _buf_. Leading and trailing unaligned bytes are read
+        with 8- and 16-bit transfers. The aligned portion is read directly into _buf_, one auto-increment
+        page at a time. All transfers are queued before any result is waited on.
+        """
+        view = memoryview(buf).cast('B')
+        addr &= self._address_mask
+        size = len(view)
+        offset = 0
+        # List of (offset, transfer size, callback) for edge reads that must be copied into the buffer.
+        edge_reads: List[Tuple[int, int, Callable[[], int]]] = []
+        page_reads: List[Callable[[], None]] = []
+
+        # Queue all the reads. If queueing a read fails, the reads that were already queued are still
+        # completed so the locks held by their deferred transfers are released, and the error is raised.
+        try:
+            # Read leading unaligned bytes.
+            if (size > 0) and (addr & 0x01):
+                edge_reads.append((offset, 8, self._read_memory(addr, 8, now=False)))
+                offset += 1
+                addr += 1
+                size -= 1
+            if (size > 1) and (addr & 0x02):
+                edge_reads.append((offset, 16, self._read_memory(addr, 16, now=False)))
+                offset += 2
+                addr += 2
+                size -= 2
+
+            # Read aligned words.
+            while size >= 4:
+                n = self.auto_increment_page_size - (addr & (self.auto_increment_page_size - 1))
+                n = min(n, size & ~0x3)
+                page_reads.append(self._read_block32_page_into(addr, view[offset:offset + n]))
+                offset += n
+                addr += n
+                size -= n
+
+            # Read trailing unaligned bytes.
+            if size > 1:
+                edge_reads.append((offset, 16, self._read_memory(addr, 16, now=False)))
+                offset += 2
+                addr += 2
+                size -= 2
+            if size > 0:
+                edge_reads.append((offset, 8, self._read_memory(addr, 8, now=False)))
+        except Exception:
+            self._complete_reads_into(view, page_reads, edge_reads)
+            raise
+
+        first_error = self._complete_reads_into(view, page_reads, edge_reads)
+        if first_error is not None:
+            raise first_error
+
+    @staticmethod
+    def _complete_reads_into(view: memoryview, page_reads: List[Callable[[], None]],
+            edge_reads: List[Tuple[int, int, Callable[[], int]]]) -> Optional[Exception]:
+        """@brief Complete reads queued by _read_memory_into().
+
+        Every callback is invoked even if an earlier one fails, so that locks held by the deferred
+        reads are released.
+
+        @return The first error raised by a callback, or None.
+        """
+        first_error: Optional[Exception] = None
+        for page_cb in page_reads:
+            try:
+                page_cb()
+            except exceptions.Error as error:
+                first_error = first_error or error
+        for offset, transfer_size, edge_cb in edge_reads:
+            try:
+                value = edge_cb()
+            except exceptions.Error as error:
+                first_error = first_error or error
+                continue
+            view[offset] = value & 0xff
+            if transfer_size == 16:
+                view[offset + 1] = (value >> 8) & 0xff
+        return first_error
+
+    def write_memory_from(self, addr: int, data: Union[bytes, bytearray, memoryview]) -> None:
+        """@brief Write a block of unaligned bytes in memory from a bytes-like object."""
+        if self._accelerated_memory_interface is not None:
+            super().write_memory_from(addr, data)
+        else:
+            self._write_memory_from(addr, data)
+
+    def read_memory_into(self, addr: int, buf: Union[bytearray, memoryview]) -> None:
+        """@brief Read a block of unaligned bytes in memory into a writable buffer."""
+        if self._accelerated_memory_interface is not None:
+            super().read_memory_into(addr, buf)
+        else:
+            self._read_memory_into(addr, buf)
+
+    # The block8 methods are replaced by the accelerated versions when the probe provides an
+    # accelerated memory interface.
+    def write_memory_block8(self, addr: int, data: Sequence[int]) -> None:
+        """@brief Write a block of unaligned bytes in memory."""
+        self._write_memory_from(addr, bytes(data))
+
+    def read_memory_block8(self, addr: int, size: int) -> Sequence[int]:
+        """@brief Read a block of unaligned bytes in memory.
+
+        @return A list of byte values.
+        """
+        buf = bytearray(size)
+        self._read_memory_into(addr, buf)
+        return list(buf)
 
     @locked
     def _write_memory_block32(self, addr: int, data: Sequence[int]) -> None:
@@ -1185,12 +1463,13 @@ class MEM_AP(AccessPort, memory_interface.MemoryInterface):
         assert (addr & 0x3) == 0
         addr &= self._address_mask
         size = len(data)
+        offset = 0
         while size > 0:
             n = self.auto_increment_page_size - (addr & (self.auto_increment_page_size - 1))
             if size*4 < n:
                 n = (size*4) & 0xfffffffc
-            self._write_block32_page(addr, data[:n//4])
-            data = data[n//4:]
+            self._write_block32_page(addr, data[offset:offset + n//4])
+            offset += n//4
             size -= n//4
             addr += n
         return
@@ -1202,16 +1481,9 @@ class MEM_AP(AccessPort, memory_interface.MemoryInterface):
         @return A list of word values.
         """
         assert (addr & 0x3) == 0
-        addr &= self._address_mask
-        resp = []
-        while size > 0:
-            n = self.auto_increment_page_size - (addr & (self.auto_increment_page_size - 1))
-            if size*4 < n:
-                n = (size*4) & 0xfffffffc
-            resp += self._read_block32_page(addr, n//4)
-            size -= n//4
-            addr += n
-        return resp
+        buf = bytearray(size * 4)
+        self._read_memory_into(addr, buf)
+        return list(struct.unpack(f"<{size}I", buf))
 
     # Note: the "type: ignore"s below are ok because the accelerated memory interface accepts
     # attribute keyword args. The MemoryInterface class should be extended to accept attribute args
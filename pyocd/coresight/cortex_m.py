@@ -624,6 +624,16 @@ class CortexM(CoreTarget, CoreSightCoreComponent): # lgtm[py/multiple-calls-to-i
         """@brief Write an aligned block of 32-bit words."""
         self.ap.write_memory_block32(addr, data)
 
+    def write_memory_from(self, addr: int, data: Union[bytes, bytearray, memoryview]) -> None:
+        """@brief Write a block of unaligned bytes in memory from a bytes-like object."""
+        self.ap.write_memory_from(addr, data)
+
+    def read_memory_into(self, addr: int, buf: Union[bytearray, memoryview]) -> None:
+        """@brief Read a block of unaligned bytes in memory into a writable buffer."""
+        view = memoryview(buf).cast('B')
+        self.ap.read_memory_into(addr, view)
+        self.bp_manager.filter_memory_unaligned_8(addr, len(view), view)
+
     def read_memory_block32(self, addr: int, size: int) -> Sequence[int]:
         """@brief Read an aligned block of 32-bit words."""
         data = self.ap.read_memory_block32(addr, size)
@@ -1245,6 +1255,41 @@ class CortexM(CoreTarget, CoreSightCoreComponent): # lgtm[py/multiple-calls-to-i
         self.check_reg_list(reg_list)
         return self._base_read_core_registers_raw(reg_list)
 
+    def _queue_register_reads(self, regsel_list: Sequence[int]) -> Callable[[], List[Tuple[int, int]]]:
+        """@brief Queue DCRSR register transfers for a list of REGSEL values.
+
+        For each register, the REGSEL value is written to DCRSR, then DHCSR and DCRDR are read.
+        Technically, we need to poll S_REGRDY in DHCSR before reading DCRDR. But we're running so
+        slow compared to the target that it's not necessary, so DHCSR is read only to check that
+        S_REGRDY is set.
+
+        DHCSR, DCRSR, and DCRDR are within the same 16-byte block, so if the AP supports it the whole
+        sequence is performed with banked transfers. This needs three AP accesses per register instead
+        of six, so many more registers fit in each probe packet.
+
+        @return Callable that returns a list of (DHCSR, DCRDR) value tuples, one per register.
+        """
+        if self.ap.supports_banked_transfers:
+            ops: List[Tuple[int, Optional[int]]] = []
+            for regsel in regsel_list:
+                ops += [(CortexM.DCRSR, regsel), (CortexM.DHCSR, None), (CortexM.DCRDR, None)]
+            banked_cb = self.ap.transfer_banked(CortexM.DHCSR, ops)
+
+            def banked_results_cb() -> List[Tuple[int, int]]:
+                values = banked_cb()
+                return list(zip(values[0::2], values[1::2]))
+            return banked_results_cb
+
+        cb_list = []
+        for regsel in regsel_list:
+            # write id in DCRSR
+            self.write_memory(CortexM.DCRSR, regsel)
+            cb_list.append((self.read32(CortexM.DHCSR, now=False), self.read32(CortexM.DCRDR, now=False)))
+
+        def results_cb() -> List[Tuple[int, int]]:
+            return [(dhcsr_cb(), reg_cb()) for dhcsr_cb, reg_cb in cb_list]
+        return results_cb
+
     def _base_read_core_registers_raw(self, reg_list: List[int]) -> List[int]:
         """@brief Private core register read routine.
 
@@ -1281,34 +1326,21 @@ class CortexM(CoreTarget, CoreSightCoreComponent): # lgtm[py/multiple-calls-to-i
             singleValues = self._base_read_core_registers_raw(singleRegList)
 
         # Begin all reads and writes
-        dhcsr_cb_list = []
-        reg_cb_list = []
+        regsel_list = []
         for reg in reg_list:
             if CortexMCoreRegisterInfo.get(reg).is_cfbp_subregister:
                 reg = CortexMCoreRegisterInfo.get('cfbp').index
             elif CortexMCoreRegisterInfo.get(reg).is_psr_subregister:
                 reg = CortexMCoreRegisterInfo.get('xpsr').index
-
-            # write id in DCRSR
-            self.write_memory(CortexM.DCRSR, reg)
-
-            # Technically, we need to poll S_REGRDY in DHCSR here before reading DCRDR. But
-            # we're running so slow compared to the target that it's not necessary.
-            # Read it and check that S_REGRDY is set.
-
-            dhcsr_cb = self.read32(CortexM.DHCSR, now=False)
-            reg_cb = self.read32(CortexM.DCRDR, now=False)
-            dhcsr_cb_list.append(dhcsr_cb)
-            reg_cb_list.append(reg_cb)
+            regsel_list.append(reg)
+        results_cb = self._queue_register_reads(regsel_list)
 
         # Read all results
         reg_vals = []
         fail_list = []
-        for reg, reg_cb, dhcsr_cb in zip(reg_list, reg_cb_list, dhcsr_cb_list):
-            dhcsr_val = dhcsr_cb()
+        for reg, (dhcsr_val, val) in zip(reg_list, results_cb()):
             if (dhcsr_val & CortexM.S_REGRDY) == 0:
                 fail_list.append(reg)
-            val = reg_cb()
 
             # Special handling for registers that are combined into a single DCRSR number.
             if CortexMCoreRegisterInfo.get(reg).is_cfbp_subregister:
@@ -1435,7 +1467,7 @@ class CortexM(CoreTarget, CoreSightCoreComponent): # lgtm[py/multiple-calls-to-i
                 reg_data_list.append((reg, data))
 
         # Write out registers
-        dhcsr_cb_list = []
+        write_list = []
         for reg, data in reg_data_list:
             if CortexMCoreRegisterInfo.get(reg).is_cfbp_subregister:
                 # Mask in the new special register value so we don't modify the other register
@@ -1451,23 +1483,31 @@ class CortexM(CoreTarget, CoreSightCoreComponent): # lgtm[py/multiple-calls-to-i
                 data = (xpsrValue & (0xffffffff ^ mask)) | (data & mask)
                 xpsrValue = data
                 reg = CortexMCoreRegisterInfo.get('xpsr').index
+            write_list.append((reg, data))
+
+        # Technically, we need to poll S_REGRDY in DHCSR after each write to ensure the
+        # register write has completed. Read it and assert that S_REGRDY is set.
+        if self.ap.supports_banked_transfers:
+            ops: List[Tuple[int, Optional[int]]] = []
+            for reg, data in write_list:
+                # write DCRDR, then id in DCRSR and flag to start write transfer
+                ops += [(CortexM.DCRDR, data), (CortexM.DCRSR, reg | CortexM.DCRSR_REGWnR), (CortexM.DHCSR, None)]
+            dhcsr_vals = self.ap.transfer_banked(CortexM.DHCSR, ops)()
+        else:
+            dhcsr_cb_list = []
+            for reg, data in write_list:
+                # write DCRDR
+                self.write_memory(CortexM.DCRDR, data)
 
-            # write DCRDR
-            self.write_memory(CortexM.DCRDR, data)
-
-            # write id in DCRSR and flag to start write transfer
-            self.write_memory(CortexM.DCRSR, reg | CortexM.DCRSR_REGWnR)
+                # write id in DCRSR and flag to start write transfer
+                self.write_memory(CortexM.DCRSR, reg | CortexM.DCRSR_REGWnR)
 
-            # Technically, we need to poll S_REGRDY in DHCSR here to ensure the
-            # register write has completed.
-            # Read it and assert that S_REGRDY is set
-            dhcsr_cb = self.read32(CortexM.DHCSR, now=False)
-            dhcsr_cb_list.append(dhcsr_cb)
+                dhcsr_cb_list.append(self.read32(CortexM.DHCSR, now=False))
+            dhcsr_vals = [dhcsr_cb() for dhcsr_cb in dhcsr_cb_list]
 
         # Make sure S_REGRDY was set for all register writes.
         fail_list = []
-        for dhcsr_cb, reg_and_data in zip(dhcsr_cb_list, reg_data_list):
-            dhcsr_val = dhcsr_cb()
+        for dhcsr_val, reg_and_data in zip(dhcsr_vals, reg_data_list):
             if (dhcsr_val & CortexM.S_REGRDY) == 0:
                 fail_list.append(reg_and_data[0])
 
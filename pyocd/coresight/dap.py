@@ -1006,6 +1006,62 @@ class DebugPort(DelegateHavingMixIn):
         else:
             return read_ap_multiple_cb
 
+    def write_ap_multiple_from(self, addr: int, data: Union[bytes, bytearray, memoryview]) -> None:
+        assert isinstance(addr, int)
+        num = self.next_access_number
+        did_lock = False
+
+        try:
+            did_lock = self._select_ap(addr)
+            TRACE.debug("write_ap_multiple_from:%06d (addr=0x%08x) = (%i bytes)", num, addr, len(data))
+            return self.probe.write_ap_multiple_from(addr, data)
+        except exceptions.TargetError as error:
+            self._handle_error(error, num)
+            raise
+        finally:
+            if did_lock:
+                self.unlock()
+
+    def read_ap_multiple_into(self, addr: int, buf: Union[bytearray, memoryview], now: bool = True) \
+            -> Optional[Callable[[], None]]:
+        assert isinstance(addr, int)
+        num = self.next_access_number
+        did_lock = False
+
+        try:
+            did_lock = self._select_ap(addr)
+            TRACE.debug("read_ap_multiple_into:%06d (addr=0x%08x, %i bytes)", num, addr, len(buf))
+            result_cb = self.probe.read_ap_multiple_into(addr, buf, now=False)
+            assert result_cb is not None
+        except exceptions.TargetError as error:
+            self._handle_error(error, num)
+            if did_lock:
+                self.unlock()
+            raise
+        except Exception:
+            if did_lock:
+                self.unlock()
+            raise
+
+        # Need to wrap the deferred callback to convert exceptions.
+        def read_ap_multiple_into_cb() -> None:
+            try:
+                result_cb()
+            except exceptions.TargetError as error:
+                TRACE.debug("read_ap_multiple_into:%06d %s(addr=0x%08x) -> error (%s)", num, "" if now else "...",
+                        addr, error)
+                self._handle_error(error, num)
+                raise
+            finally:
+                if did_lock:
+                    self.unlock()
+
+        if now:
+            read_ap_multiple_into_cb()
+            return None
+        else:
+            return read_ap_multiple_into_cb
+
     def _handle_error(self, error: Exception, num: int) -> None:
         TRACE.debug("error:%06d %s", num, error)
         # Clear sticky error for fault errors.
@@ -85,6 +85,12 @@ class GenericMemAPTarget(Target, CoreSightCoreComponent):
     def read_memory_block32(self, addr, size):
         return self.ap.read_memory_block32(addr, size)
 
+    def write_memory_from(self, addr, data):
+        self.ap.write_memory_from(addr, data)
+
+    def read_memory_into(self, addr, buf):
+        self.ap.read_memory_into(addr, buf)
+
     def halt(self):
         pass
 
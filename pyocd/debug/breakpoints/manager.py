@@ -17,7 +17,7 @@
 
 import logging
 from copy import copy
-from typing import (Dict, List, TYPE_CHECKING, Iterable, MutableSequence, Optional, Sequence, Tuple)
+from typing import (Dict, List, TYPE_CHECKING, Iterable, MutableSequence, Optional, Sequence, Tuple, Union)
 
 from .provider import Breakpoint
 from ...core.target import Target
@@ -282,7 +282,8 @@ class BreakpointManager:
             data = provider.filter_memory(addr, size, data)
         return data
 
-    def filter_memory_unaligned_8(self, addr: int, size: int, data: MutableSequence[int]) -> Sequence[int]:
+    def filter_memory_unaligned_8(self, addr: int, size: int, data: Union[MutableSequence[int], memoryview]) \
+            -> Sequence[int]:
         for provider in [p for p in self._providers.values() if p.do_filter_memory]:
             for i, d in enumerate(data):
                 data[i] = provider.filter_memory(addr + i, 8, d)
@@ -15,10 +15,18 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import logging
+
 from .context import DebugContext
 from ..cache.memory import MemoryCache
+from ..cache.prefetch import AccessPatternDetector
 from ..cache.register import RegisterCache
 
+LOG = logging.getLogger(__name__)
+
+## Maximum address delta between reads that is considered part of an access pattern.
+PREFETCH_MAX_STRIDE = 1024
+
 class CachingDebugContext(DebugContext):
     """@brief Debug context combining register and memory caches."""
 
@@ -27,13 +35,45 @@ class CachingDebugContext(DebugContext):
         self._enable_memory = enable_memory
         self._enable_register = enable_register
         self._regcache = RegisterCache(parent, self.core) if enable_register else parent
-        self._memcache = MemoryCache(parent, self.core) if enable_memory else parent
+        self._memcache = self._create_memory_cache(parent) if enable_memory else parent
+        self._prefetcher = None
+        if enable_memory:
+            prefetch_size = self.session.options.get('cache.memory_prefetch_size')
+            if prefetch_size > 0:
+                self._prefetcher = AccessPatternDetector(prefetch_size, PREFETCH_MAX_STRIDE)
+
+    def _create_memory_cache(self, parent):
+        options = self.session.options
+        line_size = options.get('cache.memory_line_size')
+        if line_size < 1 or (line_size & (line_size - 1)) != 0:
+            LOG.warning("cache.memory_line_size option value %d is not a power of two; using %d",
+                    line_size, options.get_default('cache.memory_line_size'))
+            line_size = options.get_default('cache.memory_line_size')
+        return MemoryCache(parent, self.core,
+                line_size=line_size,
+                max_size=max(1, options.get('cache.memory_max_size')),
+                write_back=options.get('cache.memory_write_back'))
+
+    def _prefetch(self, addr, size):
+        """@brief Pass a completed read to the prefetcher and read ahead if it predicts a pattern."""
+        if self._prefetcher is None:
+            return
+        prediction = self._prefetcher.observe(addr, size)
+        if prediction is not None:
+            self._memcache.prefetch(*prediction)
+
+    @property
+    def memory_cache_metrics(self):
+        """@brief CacheMetrics of the memory cache, or None if the memory cache is disabled."""
+        return self._memcache.metrics if self._enable_memory else None
 
     def write_memory(self, addr, value, transfer_size=32):
         return self._memcache.write_memory(addr, value, transfer_size)
 
     def read_memory(self, addr, transfer_size=32, now=True):
-        return self._memcache.read_memory(addr, transfer_size, now)
+        result = self._memcache.read_memory(addr, transfer_size, now)
+        self._prefetch(addr, transfer_size // 8)
+        return result
 
     def write_memory_block8(self, addr, value):
         return self._memcache.write_memory_block8(addr, value)
@@ -42,10 +82,22 @@ class CachingDebugContext(DebugContext):
         return self._memcache.write_memory_block32(addr, data)
 
     def read_memory_block8(self, addr, size):
-        return self._memcache.read_memory_block8(addr, size)
+        result = self._memcache.read_memory_block8(addr, size)
+        self._prefetch(addr, size)
+        return result
 
     def read_memory_block32(self, addr, size):
-        return self._memcache.read_memory_block32(addr, size)
+        result = self._memcache.read_memory_block32(addr, size)
+        self._prefetch(addr, size * 4)
+        return result
+
+    def write_memory_from(self, addr, data):
+        return self._memcache.write_memory_from(addr, data)
+
+    def read_memory_into(self, addr, buf):
+        result = self._memcache.read_memory_into(addr, buf)
+        self._prefetch(addr, memoryview(buf).nbytes)
+        return result
 
     def read_core_registers_raw(self, reg_list):
         return self._regcache.read_core_registers_raw(reg_list)
@@ -53,11 +105,19 @@ class CachingDebugContext(DebugContext):
     def write_core_registers_raw(self, reg_list, data_list):
         return self._regcache.write_core_registers_raw(reg_list, data_list)
 
+    def flush(self):
+        # Write any deferred memory writes before flushing the core.
+        if self._enable_memory:
+            self._memcache.flush()
+        super().flush()
+
     def invalidate(self):
         if self._enable_register:
             self._regcache.invalidate()
         if self._enable_memory:
             self._memcache.invalidate()
+            if self._prefetcher is not None:
+                self._prefetcher.reset()
 
 
 
@@ -80,6 +80,12 @@ class DebugContext(MemoryInterface):
     def read_memory_block32(self, addr, size):
         return self._parent.read_memory_block32(addr, size)
 
+    def write_memory_from(self, addr, data):
+        return self._parent.write_memory_from(addr, data)
+
+    def read_memory_into(self, addr, buf):
+        return self._parent.read_memory_into(addr, buf)
+
     def read_core_register(self, reg):
         """@brief Read one core register.
 
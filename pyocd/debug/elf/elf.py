@@ -120,6 +120,8 @@ class ELFBinaryFile(object):
 
         self._symbol_decoder = None
         self._address_decoder = None
+        self._build_id = None
+        self._did_read_build_id = False
 
         self._extract_sections()
         self._compute_regions()
@@ -225,6 +227,20 @@ class ELFBinaryFile(object):
         """
         return self._unused
 
+    @property
+    def build_id(self):
+        """@brief The GNU build ID of the executable as a hex string, or None if it has none."""
+        if not self._did_read_build_id:
+            self._did_read_build_id = True
+            for section in self._elf.iter_sections():
+                if section['sh_type'] != 'SHT_NOTE':
+                    continue
+                for note in section.iter_notes():
+                    if note['n_type'] == 'NT_GNU_BUILD_ID':
+                        self._build_id = note['n_desc']
+                        return self._build_id
+        return self._build_id
+
     @property
     def symbol_decoder(self):
         if self._symbol_decoder is None:
@@ -77,6 +77,18 @@ class ElfReaderContext(DebugContext):
         LOG.debug("read flash data [%x:%x]", section.start + addr, section.start + addr  + size)
         return list(data)
 
+    def read_memory_into(self, addr, buf):
+        view = memoryview(buf).cast('B')
+        size = len(view)
+        matches = self._tree.overlap(addr, addr + size)
+        # Must match only one interval (ELF section).
+        if len(matches) != 1:
+            return self._parent.read_memory_into(addr, view)
+        section = matches.pop().data
+        addr -= section.start
+        view[:] = section.data[addr:addr + size]
+        LOG.debug("read flash data [%x:%x]", section.start + addr, section.start + addr  + size)
+
     def read_memory_block32(self, addr, size):
         return conversion.byte_list_to_u32le_list(self.read_memory_block8(addr, size * 4))
 
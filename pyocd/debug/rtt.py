@@ -21,12 +21,16 @@
 
 from abc import ABC, abstractmethod
 from ctypes import Structure, c_char, c_int32, c_uint32, sizeof
+import logging
 import struct
-from typing import Optional, Sequence
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
 
 from ..core.memory_map import MemoryMap, MemoryRegion, MemoryType
 from ..core.soc_target import SoCTarget
 from ..core import exceptions
+from .elf.symbols import ELFSymbolProvider
+
+LOG = logging.getLogger(__name__)
 
 
 class SEGGER_RTT_BUFFER_UP(Structure):
@@ -139,6 +143,33 @@ class RTTControlBlock(ABC):
         return GenericRTTControlBlock(target, address = address, size = size,
                                       control_block_id = control_block_id)
 
+    def poll(self, up_channel_ids: Iterable[int],
+             down_data: Optional[Mapping[int, bytes]] = None) -> Tuple[Dict[int, bytes], Dict[int, int]]:
+        """@brief Transfer data on several channels at once.
+
+        Reads all available data from each of the given up channels, and writes as much as possible
+        of the provided data to down channels. This default implementation accesses each channel in
+        turn. Subclasses may override it to combine the accesses.
+
+        @param up_channel_ids IDs of the up channels to read.
+        @param down_data Dict of down channel ID to the data to write to that channel.
+
+        @return Bi-tuple of a dict of up channel ID to the data read, for channels that had data,
+            and a dict of down channel ID to the number of bytes written.
+        """
+        up_data: Dict[int, bytes] = {}
+        for channel_id in up_channel_ids:
+            data = self.up_channels[channel_id].read()
+            if data:
+                up_data[channel_id] = data
+
+        bytes_written: Dict[int, int] = {}
+        for channel_id, data in (down_data or {}).items():
+            if data:
+                bytes_written[channel_id] = self.down_channels[channel_id].write(data)
+
+        return up_data, bytes_written
+
 
 
 
@@ -223,7 +254,13 @@ class GenericRTTUpChannel(RTTUpChannel):
 
         # Get offsets
         write_off, read_off = self._target.read_memory_block32(self._offsets_addr, 2)
+        return self._read_data(write_off, read_off)
 
+    def _read_data(self, write_off: int, read_off: int) -> bytes:
+        """@brief Read the data between the given offsets and update the read offset.
+
+        The write of the new read offset is not flushed.
+        """
         if (write_off >= self.size) or (read_off >= self.size):
             raise exceptions.RTTError("Invalid up buffer")
         elif write_off == read_off:
@@ -234,16 +271,19 @@ class GenericRTTUpChannel(RTTUpChannel):
             |oooooo|xxxxxxxxxxxx|oooooo|
             0    rdOff        WrOff    SizeOfBuffer
             """
-            data = self._target.read_memory_block8(self._buffer_address + read_off,
-                                                   write_off - read_off)
+            data = bytearray(write_off - read_off)
+            self._target.read_memory_into(self._buffer_address + read_off, data)
         else:
             """
             |xxxxxx|oooooooooooo|xxxxxx|
             0    WrOff        RdOff    SizeOfBuffer
             """
-            data = self._target.read_memory_block8(self._buffer_address + read_off,
-                                                   self.size - read_off)
-            data += self._target.read_memory_block8(self._buffer_address, write_off)
+            first_size = self.size - read_off
+            data = bytearray(first_size + write_off)
+            view = memoryview(data)
+            self._target.read_memory_into(self._buffer_address + read_off, view[:first_size])
+            if write_off:
+                self._target.read_memory_into(self._buffer_address, view[first_size:])
 
         # Update read offset
         self._target.write32(self._offsets_addr + 4, write_off)
@@ -347,11 +387,18 @@ class GenericRTTDownChannel(RTTDownChannel):
 
         # Get offsets
         write_off, read_off = self._target.read_memory_block32(self._offsets_addr, 2)
+        return self._write_data(data, write_off, read_off)
+
+    def _write_data(self, data: bytes, write_off: int, read_off: int) -> int:
+        """@brief Write as much data as fits given the buffer offsets, then update the write offset.
+
+        The writes are not flushed.
 
+        @return The number of bytes written to the target.
+        """
         if (write_off >= self.size) or (read_off >= self.size):
             raise exceptions.RTTError("Invalid down buffer")
 
-
         bytes_written: int = 0
         if write_off >= read_off:
             # There is some space to fill at the top of the buffer
@@ -386,10 +433,23 @@ class GenericRTTControlBlock(RTTControlBlock):
               require any support from interface.
     """
 
+    ## Name of the control block variable in SEGGER's RTT implementation.
+    CONTROL_BLOCK_SYMBOL = "_SEGGER_RTT"
+
+    ## Number of bytes read from the target at a time while searching for the control block.
+    SEARCH_CHUNK_SIZE = 0x4000
+
+    ## Address where the control block was last found, keyed by the build ID of the target's ELF
+    # file. The key is None if there is no ELF file or it has no build ID.
+    _address_cache: Dict[Optional[str], int] = {}
+
     target: SoCTarget
+    up_channels: List[GenericRTTUpChannel]
+    down_channels: List[GenericRTTDownChannel]
     _cb_search_address: int
     _cb_search_size_bytes: int
-    _control_block_id: Sequence[int]
+    _control_block_id: bytes
+    _up_base: Optional[int]
 
     def __init__(self, target: SoCTarget, address: int = None,
                  size: int = None, control_block_id: bytes = b'SEGGER RTT'):
@@ -405,6 +465,7 @@ class GenericRTTControlBlock(RTTControlBlock):
         self.target = target
         self.up_channels = list()
         self.down_channels = list()
+        self._up_base = None
 
         if address is None:
             memory_map: MemoryMap = self.target.get_memory_map()
@@ -422,39 +483,61 @@ class GenericRTTControlBlock(RTTControlBlock):
             self._cb_search_size_bytes = 0
         else:
             self._cb_search_size_bytes = size
-        self._control_block_id = control_block_id
+        self._control_block_id = bytes(control_block_id)
 
     def _find_control_block(self) -> Optional[int]:
-        addr: int = self._cb_search_address & ~0x3
-        search_size: int  = self._cb_search_size_bytes
-        if search_size < len(self._control_block_id):
-            search_size = len(self._control_block_id)
-
-        id_len = len(self._control_block_id)
-        offset: int = 0
-
-        while search_size:
-            read_size = min(search_size, 32)
-            data = self.target.read_memory_block8(addr, read_size)
-
-            if not data:
-                break
+        """@brief Locate the control block on the target.
 
-            for byte in data:
-                if byte == self._control_block_id[offset]:
-                    offset += 1
-                    if offset == id_len:
-                        break
-                else:
-                    num_skip_words = (offset + 1)
-                    addr += (num_skip_words * 1)
-                    search_size -= num_skip_words
-                    offset = 0
+        If the control block is expected at a fixed address, only that address is checked. Otherwise,
+        candidate addresses are checked before searching: the address of the `_SEGGER_RTT` symbol if
+        the target has an ELF file, and the address where the control block was last found for the
+        same ELF build. If the ID is not present at either, the search range is read in large blocks
+        that are scanned for the ID.
 
-            if offset == id_len:
-                break
-
-        return addr if offset == id_len else None
+        @return The address of the control block, or None if it was not found.
+        """
+        id_len = len(self._control_block_id)
+        start = self._cb_search_address & ~0x3
+        end = start + max(self._cb_search_size_bytes, id_len)
+
+        if self._cb_search_size_bytes == 0:
+            return start if self._check_control_block_id(start) else None
+
+        elf = self.target.elf
+        build_id = elf.build_id if (elf is not None) else None
+        candidates = [self._address_cache.get(build_id)]
+        if elf is not None:
+            candidates.insert(0, ELFSymbolProvider(elf).get_symbol_value(self.CONTROL_BLOCK_SYMBOL))
+        for addr in candidates:
+            if (addr is not None) and self._check_control_block_id(addr):
+                LOG.debug("Found RTT control block at 0x%08x without searching", addr)
+                self._address_cache[build_id] = addr
+                return addr
+
+        # Consecutive reads overlap by enough to find an ID that spans two reads, rounded up to keep
+        # the reads word aligned.
+        overlap = (id_len + 2) & ~0x3
+        buf = bytearray(max(self.SEARCH_CHUNK_SIZE, overlap + 4))
+        addr = start
+        while True:
+            size = min(len(buf), end - addr)
+            self.target.read_memory_into(addr, memoryview(buf)[:size])
+            offset = buf.find(self._control_block_id, 0, size)
+            if offset != -1:
+                self._address_cache[build_id] = addr + offset
+                return addr + offset
+            elif addr + size >= end:
+                return None
+            addr += size - overlap
+
+    def _check_control_block_id(self, addr: int) -> bool:
+        """@brief Whether the control block ID is present at the given address."""
+        data = bytearray(len(self._control_block_id))
+        try:
+            self.target.read_memory_into(addr, data)
+        except exceptions.TransferError:
+            return False
+        return data == self._control_block_id
 
     def start(self):
         """@brief Find the RTT control block on the target.
@@ -475,6 +558,7 @@ class GenericRTTControlBlock(RTTControlBlock):
 
         # Setup up channels
         up_base = cb_addr + sizeof(SEGGER_RTT_CB)
+        self._up_base = up_base
         for i in range(num_up_buffs):
             addr = up_base + (i * sizeof(SEGGER_RTT_BUFFER_UP))
             self.up_channels.append(GenericRTTUpChannel(self.target, addr))
@@ -484,3 +568,55 @@ class GenericRTTControlBlock(RTTControlBlock):
         for i in range(num_down_buffs):
             addr = down_base + (i * sizeof(SEGGER_RTT_BUFFER_DOWN))
             self.down_channels.append(GenericRTTDownChannel(self.target, addr))
+
+    def poll(self, up_channel_ids: Iterable[int],
+             down_data: Optional[Mapping[int, bytes]] = None) -> Tuple[Dict[int, bytes], Dict[int, int]]:
+        """@brief Transfer data on several channels at once.
+
+        The descriptors of all up and down channels, which are contiguous in the control block, are
+        read together with a single block read. Only the ring buffer segments that contain data are
+        then read. The offset updates and down channel data are written without waiting for the
+        transfers to complete, and all writes are flushed at the end of the poll.
+
+        The parameters and return value are the same as for RTTControlBlock.poll().
+        """
+        if self._up_base is None:
+            raise exceptions.RTTError("RTT is not yet started")
+
+        desc_words = sizeof(SEGGER_RTT_BUFFER_UP) // 4
+        num_up_buffs = len(self.up_channels)
+        words = self.target.read_memory_block32(self._up_base,
+                                                (num_up_buffs + len(self.down_channels)) * desc_words)
+
+        def get_offsets(channel, index: int) -> Optional[Tuple[int, int]]:
+            """@brief Return the (WrOff, RdOff) offsets of a channel, or None if it isn't populated."""
+            base = index * desc_words
+            descriptor = SEGGER_RTT_BUFFER_UP(*words[base:base + desc_words])
+            if (channel.size == 0) or (channel._buffer_address == 0):
+                # descriptor was not yet populated, so read it again once it is
+                if (descriptor.SizeOfBuffer == 0) or (descriptor.pBuffer == 0):
+                    return None
+                channel._read_descriptor()
+            return descriptor.WrOff, descriptor.RdOff
+
+        up_data: Dict[int, bytes] = {}
+        bytes_written: Dict[int, int] = {}
+        try:
+            for channel_id in up_channel_ids:
+                up_chan: GenericRTTUpChannel = self.up_channels[channel_id]
+                offsets = get_offsets(up_chan, channel_id)
+                if offsets is not None:
+                    data = up_chan._read_data(*offsets)
+                    if data:
+                        up_data[channel_id] = data
+
+            for channel_id, data in (down_data or {}).items():
+                if not data:
+                    continue
+                down_chan: GenericRTTDownChannel = self.down_channels[channel_id]
+                offsets = get_offsets(down_chan, num_up_buffs + channel_id)
+                bytes_written[channel_id] = 0 if offsets is None else down_chan._write_data(data, *offsets)
+        finally:
+            self.target.flush()
+
+        return up_data, bytes_written
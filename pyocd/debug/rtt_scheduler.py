@@ -0,0 +1,223 @@
+# pyOCD debugger
+# Copyright (c) 2026 PyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from time import perf_counter
+from typing import (Dict, Mapping, Optional, TYPE_CHECKING)
+
+from ..utility.timeout import Backoff
+
+if TYPE_CHECKING:
+    from ..core.session import Session
+
+class RTTChannelStatistics:
+    """@brief Transfer statistics for one RTT up channel.
+
+    The fill level of a poll is the number of bytes read divided by the capacity of the ring buffer,
+    which is one less than its size. The rate is an exponentially weighted moving average of the
+    bytes per second seen by each poll.
+    """
+
+    ## Weight of the most recent poll in the rate average.
+    RATE_WEIGHT = 0.25
+
+    def __init__(self, size: int) -> None:
+        self.size: int = size
+        self.total_bytes: int = 0
+        self.polls: int = 0
+        self.active_polls: int = 0
+        self.saturated_polls: int = 0
+        self.last_fill: float = 0.0
+        self.peak_fill: float = 0.0
+        self.bytes_per_second: float = 0.0
+        self.overflow_risk: float = 0.0
+
+    @property
+    def capacity(self) -> int:
+        """@brief Maximum number of bytes the ring buffer can hold."""
+        return max(0, self.size - 1)
+
+    @property
+    def efficiency(self) -> float:
+        """@brief Fraction of polls that returned data."""
+        if self.polls > 0:
+            return self.active_polls / self.polls
+        else:
+            return 0.0
+
+    def add_poll(self, byte_count: int, elapsed: float) -> None:
+        """@brief Record the result of one poll.
+        @param self
+        @param byte_count Number of bytes read from the channel.
+        @param elapsed Time in seconds since the previous poll.
+        """
+        self.polls += 1
+        self.total_bytes += byte_count
+        if byte_count:
+            self.active_polls += 1
+
+        capacity = self.capacity
+        if capacity:
+            self.last_fill = min(1.0, byte_count / capacity)
+            self.peak_fill = max(self.peak_fill, self.last_fill)
+            if byte_count >= capacity:
+                self.saturated_polls += 1
+
+        if elapsed > 0:
+            rate = byte_count / elapsed
+            self.bytes_per_second += self.RATE_WEIGHT * (rate - self.bytes_per_second)
+
+    def __str__(self) -> str:
+        return ("%d bytes, %.1f B/s, fill last %.0f%% peak %.0f%%, overflow risk %.0f%%, "
+                "%d/%d polls with data, %d saturated" % (self.total_bytes, self.bytes_per_second,
+                self.last_fill * 100, self.peak_fill * 100, self.overflow_risk * 100,
+                self.active_polls, self.polls, self.saturated_polls))
+
+class RTTPollScheduler:
+    """@brief Chooses the interval between RTT polls from the observed traffic.
+
+    After each poll, the number of bytes read from each up channel is passed to update(), which
+    returns the time to wait before the next poll. While data is flowing, the interval is chosen so
+    that the channel with the least time to fill is expected to be filled to `target_fill` of its
+    capacity when next read. This leaves headroom for bursts without polling faster than the data
+    requires. A poll that finds a ring buffer full means data may have been dropped or the target
+    blocked, so the next poll is made at the minimum interval. Once no data is seen, the interval
+    backs off exponentially to the maximum.
+
+    The size of each read is not scheduled: every poll reads exactly the data present in each ring
+    buffer, as given by its offsets.
+
+    The `overflow_risk` of each channel's statistics is the predicted fill level at the next poll,
+    given its current rate. Values at or above 1 mean that data is expected to be lost or the target
+    to block.
+    """
+
+    ## Default fraction of a ring buffer's capacity expected to be filled between polls.
+    DEFAULT_TARGET_FILL = 0.5
+
+    def __init__(self,
+            min_interval: float,
+            max_interval: float,
+            target_fill: float = DEFAULT_TARGET_FILL,
+            ) -> None:
+        """@brief Constructor.
+        @param self
+        @param min_interval Shortest interval between polls, in seconds.
+        @param max_interval Longest interval between polls, in seconds, used while the channels are idle.
+        @param target_fill Fraction of each ring buffer expected to be filled when it is read.
+        """
+        assert 0.0 < target_fill <= 1.0
+        self._min_interval = min_interval
+        self._max_interval = max(min_interval, max_interval)
+        self._target_fill = target_fill
+        self._backoff = Backoff(min_interval, max_interval)
+        self._interval = min_interval
+        self._last_poll: Optional[float] = None
+        self._channels: Dict[int, RTTChannelStatistics] = {}
+        ## Total number of polls.
+        self.polls = 0
+        ## Number of polls that transferred data on any channel.
+        self.active_polls = 0
+
+    @classmethod
+    def from_session(cls, session: "Session") -> "RTTPollScheduler":
+        """@brief Create a scheduler using the RTT polling options of a session."""
+        return cls(session.options.get('rtt.poll_min_interval'),
+                session.options.get('rtt.poll_max_interval'))
+
+    @property
+    def interval(self) -> float:
+        """@brief The interval returned by the most recent update()."""
+        return self._interval
+
+    @property
+    def efficiency(self) -> float:
+        """@brief Fraction of polls that transferred data."""
+        if self.polls > 0:
+            return self.active_polls / self.polls
+        else:
+            return 0.0
+
+    @property
+    def channels(self) -> Mapping[int, RTTChannelStatistics]:
+        """@brief Dict of up channel ID to statistics for that channel."""
+        return self._channels
+
+    def add_channel(self, channel_id: int, size: int) -> None:
+        """@brief Register an up channel whose fill level is to be tracked.
+        @param self
+        @param channel_id ID of the up channel.
+        @param size Size in bytes of the channel's ring buffer.
+        """
+        self._channels[channel_id] = RTTChannelStatistics(size)
+
+    def remove_channel(self, channel_id: int) -> None:
+        """@brief Stop tracking an up channel. Does nothing if the channel is not registered."""
+        self._channels.pop(channel_id, None)
+
+    def reset(self) -> None:
+        """@brief Return to the minimum interval, for instance after the host sent data."""
+        self._backoff.reset()
+        self._interval = self._min_interval
+
+    def update(self, byte_counts: Mapping[int, int], now: Optional[float] = None) -> float:
+        """@brief Record the result of a poll and compute the interval until the next one.
+        @param self
+        @param byte_counts Dict of up channel ID to the number of bytes read by the poll. Registered
+            channels missing from the dict are recorded as having no data.
+        @param now Time of the poll as returned by `time.perf_counter()`. The current time is used if not
+            provided.
+        @return The number of seconds to wait before the next poll.
+        """
+        if now is None:
+            now = perf_counter()
+        elapsed = (now - self._last_poll) if (self._last_poll is not None) else 0.0
+        self._last_poll = now
+
+        self.polls += 1
+        did_transfer = any(byte_counts.values())
+        if did_transfer:
+            self.active_polls += 1
+
+        # The smallest interval in which a channel is expected to reach the target fill level.
+        fill_interval = self._max_interval
+        is_saturated = False
+        for channel_id, stats in self._channels.items():
+            byte_count = byte_counts.get(channel_id, 0)
+            stats.add_poll(byte_count, elapsed)
+            if stats.capacity and byte_count >= stats.capacity:
+                is_saturated = True
+            if stats.bytes_per_second > 0 and stats.capacity:
+                fill_interval = min(fill_interval,
+                        self._target_fill * stats.capacity / stats.bytes_per_second)
+
+        if is_saturated:
+            self.reset()
+        elif did_transfer:
+            self._backoff.reset()
+            self._interval = max(self._min_interval, fill_interval)
+        else:
+            # Back off while idle, but not beyond the fill interval of channels still thought to be active.
+            self._interval = max(self._min_interval, min(self._backoff.next(), fill_interval))
+
+        for stats in self._channels.values():
+            if stats.capacity:
+                stats.overflow_risk = stats.bytes_per_second * self._interval / stats.capacity
+
+        return self._interval
+
+    def __str__(self) -> str:
+        return "%d polls, %.0f%% with data, interval %.3f ms" % (self.polls, self.efficiency * 100,
+                self._interval * 1000)
@@ -18,20 +18,28 @@
 
 import logging
 import abc
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from time import time
 from binascii import crc32
-from typing import (Any, List, Optional, Union)
+from typing import (Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union)
 
 from ..core.target import Target
 from ..core.exceptions import (FlashFailure, FlashProgramFailure)
 from ..core.memory_map import MemoryRegion
-from ..utility.mask import same
+from .manifest import (FlashManifest, page_crc)
 
 # Number of bytes in a page to read to quickly determine if the page has the same data
 PAGE_ESTIMATE_SIZE = 32
 DATA_TRANSFER_B_PER_S = 40 * 1000 # ~40KB/s, depends on clock speed, theoretical limit for HID is 56,000 B/s
 
+# Host CRCs are computed on a thread pool when the pages are at least this large, since zlib only
+# releases the GIL for large buffers, and the total size is at least CRC_THREAD_MIN_TOTAL_SIZE.
+CRC_THREAD_MIN_PAGE_SIZE = 8 * 1024
+CRC_THREAD_MIN_TOTAL_SIZE = 1024 * 1024
+
 LOG = logging.getLogger(__name__)
 
 def get_page_count(count: int) -> str:
@@ -61,6 +69,14 @@ class ProgrammingInfo:
     erase_sector_count: int = 0
     skipped_byte_count: int = 0
     skipped_page_count: int = 0
+    erase_time: float = 0.0                 # Time spent erasing
+    write_time: float = 0.0                 # Time spent programming pages, including data transfer
+    predicted_erase_time: float = 0.0       # Estimated erase time for the chosen erase and program plan
+    predicted_write_time: float = 0.0       # Estimated page programming time for the chosen plan
+    page_buffer_count: int = 0              # Number of flash algo page buffers used for programming
+    pipeline_occupancy: float = 0.0         # Average fraction of page buffers loaded when each page program started
+    verified_page_count: int = 0            # Number of programmed pages verified
+    verify_time: float = 0.0                # Time spent in the CRC verify pass after programming
 
 class MemoryBuilder(abc.ABC):
     """@brief Abstract class for memory builders."""
@@ -81,7 +97,7 @@ class MemoryBuilder(abc.ABC):
         ...
 
     @abc.abstractmethod
-    def add_data(self, addr: int, data: Union[bytes, bytearray]) -> None:
+    def add_data(self, addr: int, data: Union[bytes, bytearray, memoryview]) -> None:
         """@brief Add a chunk of data to the builder."""
         ...
 
@@ -93,6 +109,18 @@ class MemoryBuilder(abc.ABC):
 def _stub_progress(percent):
     pass
 
+def _split_crc_ranges(start: int, end: int) -> Iterator[Tuple[int, int]]:
+    """@brief Split an address range into naturally aligned power-of-two sized ranges.
+
+    @return Iterator of (address, size) tuples covering start up to but not including end.
+    """
+    while start < end:
+        size = 1 << ((end - start).bit_length() - 1)
+        if start:
+            size = min(size, start & -start)
+        yield start, size
+        start += size
+
 class _FlashSector:
     """@brief Info about an erase sector and all pages to be programmed within it."""
     def __init__(self, sector_info, n_subsectors: int = 1):
@@ -102,6 +130,7 @@ class _FlashSector:
         self.page_list: List[_FlashPage] = []
         self.erase_weight: float = sector_info.erase_weight
         self.n_subsectors = n_subsectors
+        self.erase_required: Optional[bool] = None # Set by the sector erase planner.
 
     @property
     def size(self):
@@ -141,12 +170,14 @@ class _FlashPage:
     def __init__(self, page_info):
         self.addr: int = page_info.base_addr
         self.size: int = page_info.size
-        self.data: List[int] = []
+        ## View of the page's range of the builder's image buffer.
+        self.data: memoryview = memoryview(b'')
         self.program_weight: float = page_info.program_weight
         self.erased: Optional[bool] = None # Whether the data all matches the erased value.
         self.same: Optional[bool] = None
+        self.target_erased: Optional[bool] = None # Whether the current flash contents are erased.
         self.crc: int = 0
-        self.cached_estimate_data: Optional[List[int]] = None
+        self.cached_estimate_data: Optional[bytearray] = None
 
     def get_program_weight(self):
         """@brief Get time to program a page including the data transfer."""
@@ -192,6 +223,7 @@ class FlashBuilder(MemoryBuilder):
     # Type of flash analysis
     FLASH_ANALYSIS_CRC32 = "CRC32"
     FLASH_ANALYSIS_PARTIAL_PAGE_READ = "PAGE_READ"
+    FLASH_ANALYSIS_MANIFEST = "MANIFEST"
 
     def __init__(self, flash):
         super().__init__()
@@ -211,6 +243,15 @@ class FlashBuilder(MemoryBuilder):
         self.sector_erase_count = 0 # Number of pages to program using sector erase method.
         self.sector_erase_weight = 0 # Erase/program weight using sector erase method.
         self.algo_inited_for_read = False
+        ## Sorted base addresses of the image buffers, and the buffers themselves.
+        self._image_bases: List[int] = []
+        self._images: List[bytearray] = []
+        self._erased_pages: Dict[int, bytes] = {}
+        self._manifest: Optional[FlashManifest] = None
+        self._manifest_key: str = ""
+        self._manifest_target_prefix: str = ""
+        self._verify = False
+        self._verify_crc = False
 
     @property
     def region(self) -> MemoryRegion:
@@ -219,6 +260,13 @@ class FlashBuilder(MemoryBuilder):
     def enable_double_buffer(self, enable):
         self.enable_double_buffering = enable
 
+    @property
+    def _use_double_buffering(self):
+        # Compressed programming needs the second page buffer, so it is only used for single buffered
+        # programming.
+        return self.flash.is_double_buffering_supported and self.enable_double_buffering \
+                and not self.flash.is_compressed_programming_enabled
+
     def add_data(self, addr, data):
         """@brief Add a block of data to be programmed.
 
@@ -227,7 +275,7 @@ class FlashBuilder(MemoryBuilder):
         @param self
         @param addr Base address of the block of data passed to this method. The entire block of
             data must be contained within the flash memory region associated with this instance.
-        @param data Data to be programmed. Should be a list of byte values.
+        @param data Data to be programmed. Either a bytes-like object or a list of byte values.
 
         @exception ValueError Attempt to add overlapping data, or address range of added data is
             outside the address range of the flash region associated with the builder.
@@ -241,16 +289,29 @@ class FlashBuilder(MemoryBuilder):
             raise ValueError("Flash address range 0x%x-0x%x is not contained within region '%s'" %
                 (addr, addr + len(data) - 1, self.flash.region.name))
 
-        # Add operation to list
-        self.flash_operation_list.append(_FlashOperation(addr, data))
+        # Keep a reference to bytes-like data rather than a copy. It is copied into the image buffer
+        # when programming.
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            data = memoryview(data).cast('B')
+
+        # Data is normally added in address order, in which case only the previous operation can
+        # overlap.
+        operation = _FlashOperation(addr, data)
+        if not self.flash_operation_list or (self.flash_operation_list[-1].addr <= addr):
+            self._check_overlap(self.flash_operation_list[-1:] + [operation])
+            self.flash_operation_list.append(operation)
+        else:
+            # Keep list sorted
+            operations = sorted(self.flash_operation_list + [operation], key=lambda operation: operation.addr)
+            self._check_overlap(operations)
+            self.flash_operation_list = operations
         self._buffered_data_size += len(data)
 
-        # Keep list sorted
-        self.flash_operation_list = sorted(self.flash_operation_list, key=lambda operation: operation.addr)
-
-        # Verify this does not overlap
+    @staticmethod
+    def _check_overlap(operations):
+        """@brief Verify that no operations in a sorted list overlap."""
         prev_flash_operation = None
-        for operation in self.flash_operation_list:
+        for operation in operations:
             if prev_flash_operation is not None:
                 if prev_flash_operation.addr + len(prev_flash_operation.data) > operation.addr:
                     raise ValueError("Error adding data - Data at 0x%x..0x%x overlaps with 0x%x..0x%x"
@@ -276,6 +337,9 @@ class FlashBuilder(MemoryBuilder):
     def _build_sectors_and_pages(self, keep_unwritten):
         """@brief Converts the list of flash operations to flash sectors and pages.
 
+        The data for the pages is held in image buffers, one for each run of contiguous sectors being
+        programmed, with each page's data a view of its range of a buffer.
+
         @param self
         @param keep_unwritten If true, unwritten pages in an erased sector and unwritten
             contents of a modified page will be read from the target and added to the data to be
@@ -296,6 +360,8 @@ class FlashBuilder(MemoryBuilder):
         if page_info is None:
             raise FlashFailure("attempt to program invalid flash address", address=flash_addr)
 
+        self._allocate_images()
+
         def create_flash_sector(sector_info, page_info):
             if page_info.size > sector_info.size:
                 assert page_info.size % sector_info.size == 0, \
@@ -306,30 +372,31 @@ class FlashBuilder(MemoryBuilder):
 
             return _FlashSector(sector_info, n_subsectors=n_subsectors)
 
-        current_page = _FlashPage(page_info)
+        current_page = self._create_page(page_info)
         current_sector = create_flash_sector(sector_info, page_info)
+        page_fill = 0 # Number of bytes at the start of the current page that have been filled.
 
         self.page_list.append(current_page)
         self.sector_list.append(current_sector)
 
         current_sector.add_page(current_page)
 
+        def fill_gap(addr, length):
+            # Unwritten ranges of the image are already set to the erased value.
+            if keep_unwritten and self.flash.region.is_readable:
+                self._enable_read_access()
+                self.flash.target.read_memory_into(addr, self._image_view(addr, length))
+            self.program_byte_count += length
+
         def fill_end_of_page_gap():
             # Fill the gap at the end of the soon to be previous page if there is one
-            if len(current_page.data) != current_page.size:
-                page_data_end = current_page.addr + len(current_page.data)
-                old_data_len = current_page.size - len(current_page.data)
-                if keep_unwritten and self.flash.region.is_readable:
-                    self._enable_read_access()
-                    old_data = self.flash.target.read_memory_block8(page_data_end, old_data_len)
-                else:
-                    old_data = [self.flash.region.erased_byte_value] * old_data_len
-                current_page.data.extend(old_data)
-                self.program_byte_count += old_data_len
+            if page_fill != current_page.size:
+                fill_gap(current_page.addr + page_fill, current_page.size - page_fill)
 
         for flash_operation in self.flash_operation_list:
+            data = flash_operation.data
             pos = 0
-            while pos < len(flash_operation.data):
+            while pos < len(data):
                 flash_addr = flash_operation.addr + pos
 
                 # Check if operation is in a different sector.
@@ -349,27 +416,24 @@ class FlashBuilder(MemoryBuilder):
                     page_info = self.flash.get_page_info(flash_addr)
                     if page_info is None:
                         raise FlashFailure("attempt to program invalid flash address", address=flash_addr)
-                    current_page = _FlashPage(page_info)
+                    current_page = self._create_page(page_info)
+                    page_fill = 0
                     current_sector.add_page(current_page)
                     self.page_list.append(current_page)
 
                 # Fill the page gap if there is one
-                page_data_end = current_page.addr + len(current_page.data)
+                page_data_end = current_page.addr + page_fill
                 if flash_addr != page_data_end:
-                    old_data_len = flash_addr - page_data_end
-                    if keep_unwritten and self.flash.region.is_readable:
-                        self._enable_read_access()
-                        old_data = self.flash.target.read_memory_block8(page_data_end, old_data_len)
-                    else:
-                        old_data = [self.flash.region.erased_byte_value] * old_data_len
-                    current_page.data.extend(old_data)
-                    self.program_byte_count += old_data_len
+                    fill_gap(page_data_end, flash_addr - page_data_end)
+                    page_fill = flash_addr - current_page.addr
 
                 # Copy data to page and increment pos
-                space_left_in_page = page_info.size - len(current_page.data)
-                space_left_in_data = len(flash_operation.data) - pos
+                space_left_in_page = page_info.size - page_fill
+                space_left_in_data = len(data) - pos
                 amount = min(space_left_in_page, space_left_in_data)
-                current_page.data.extend(flash_operation.data[pos:pos + amount])
+                image, offset = self._image_location(flash_addr)
+                image[offset:offset + amount] = data[pos:pos + amount]
+                page_fill += amount
                 self.program_byte_count += amount
 
                 #increment position
@@ -382,6 +446,81 @@ class FlashBuilder(MemoryBuilder):
         if keep_unwritten and self.flash.region.is_readable:
             self._fill_unwritten_sector_pages()
 
+    def _get_unit_range(self, addr):
+        """@brief Return the range of the sector or page containing an address, whichever is larger.
+        @return Tuple of start address and end address, exclusive.
+        """
+        sector_info = self.flash.get_sector_info(addr)
+        page_info = self.flash.get_page_info(addr)
+        if sector_info is None or page_info is None:
+            raise FlashFailure("attempt to program invalid flash address", address=addr)
+        start = min(sector_info.base_addr, page_info.base_addr)
+        end = max(sector_info.base_addr + max(sector_info.size, page_info.size),
+                page_info.base_addr + page_info.size)
+        return start, end
+
+    def _allocate_images(self):
+        """@brief Create the image buffers covering all sectors and pages of the flash operations.
+
+        One buffer is created for each run of contiguous sectors containing data, so ranges of the
+        region without data take no memory.
+        """
+        spans: List[List[int]] = []
+        for operation in self.flash_operation_list:
+            start, _ = self._get_unit_range(operation.addr)
+            _, end = self._get_unit_range(operation.addr + len(operation.data) - 1)
+            if spans and start <= spans[-1][1]:
+                spans[-1][1] = max(spans[-1][1], end)
+            else:
+                spans.append([start, end])
+        erased = bytes([self.flash.region.erased_byte_value])
+        self._image_bases = [start for start, _ in spans]
+        self._images = [bytearray(erased) * (end - start) for start, end in spans]
+
+    def _image_location(self, addr):
+        """@brief Return the image buffer containing an address, and the address's offset within it."""
+        index = bisect_right(self._image_bases, addr) - 1
+        assert index >= 0
+        return self._images[index], addr - self._image_bases[index]
+
+    def _image_view(self, addr, size):
+        """@brief Return a view of the image buffer for an address range."""
+        image, offset = self._image_location(addr)
+        assert offset + size <= len(image)
+        return memoryview(image)[offset:offset + size]
+
+    def _create_page(self, page_info):
+        """@brief Create a page whose data is a view of an image buffer."""
+        page = _FlashPage(page_info)
+        page.data = self._image_view(page.addr, page.size)
+        return page
+
+    def _is_erased(self, data):
+        """@brief Whether all bytes of a bytes-like object equal the region's erased value."""
+        size = len(data)
+        erased = self._erased_pages.get(size)
+        if erased is None:
+            erased = self._erased_pages[size] = bytes([self.flash.region.erased_byte_value]) * size
+        return data == erased
+
+    def _read_page(self, page, offset=0):
+        """@brief Read the current flash contents of a page, starting at an offset into the page."""
+        data = bytearray(page.size - offset)
+        self.flash.target.read_memory_into(page.addr + offset, data)
+        return data
+
+    def _compute_page_crcs(self, pages: Sequence["_FlashPage"]) -> List[int]:
+        """@brief Compute the CRC32 of the data of each page.
+
+        Large pages are processed on a thread pool for large images.
+        """
+        views = [page.data for page in pages]
+        if (len(views) > 1) and (min(len(v) for v in views) >= CRC_THREAD_MIN_PAGE_SIZE) \
+                and (sum(len(v) for v in views) >= CRC_THREAD_MIN_TOTAL_SIZE):
+            with ThreadPoolExecutor() as pool:
+                return [crc & 0xFFFFFFFF for crc in pool.map(crc32, views)]
+        return [crc32(v) & 0xFFFFFFFF for v in views]
+
     def _fill_unwritten_sector_pages(self):
         """@brief Fill in missing pages from sectors we are going to modify."""
         for sector in self.sector_list:
@@ -392,9 +531,9 @@ class FlashBuilder(MemoryBuilder):
                 page_info = self.flash.get_page_info(sector_page_addr)
                 if page_info is None:
                     raise FlashFailure("attempt to program invalid flash address", address=sector_page_addr)
-                new_page = _FlashPage(page_info)
+                new_page = self._create_page(page_info)
                 self._enable_read_access()
-                new_page.data = self.flash.target.read_memory_block8(new_page.addr, new_page.size)
+                self.flash.target.read_memory_into(new_page.addr, new_page.data)
                 new_page.same = True
                 sector.add_page(new_page)
                 self.page_list.append(new_page)
@@ -469,6 +608,8 @@ class FlashBuilder(MemoryBuilder):
             LOG.warning("No pages were programmed")
             return
 
+        self._init_manifest()
+
         # Convert chip_erase.
         if (chip_erase is None) or (chip_erase == "auto"):
             chip_erase = None
@@ -479,6 +620,13 @@ class FlashBuilder(MemoryBuilder):
         else:
             raise ValueError("invalid chip_erase value '{}'".format(chip_erase))
 
+        verify = self.flash.target.session.options.get('flash.verify')
+        if verify not in ("none", "read", "crc"):
+            raise ValueError("invalid flash.verify value '{}'".format(verify))
+        self._verify_crc = (verify == "crc") and self.flash.get_flash_info().crc_supported
+        self._verify = (verify == "read" or (verify == "crc" and not self._verify_crc)) \
+                and self.flash.region.is_readable
+
         # Convert the list of flash operations into flash sectors and pages
         self._build_sectors_and_pages(keep_unwritten)
         assert len(self.sector_list) != 0 and len(self.sector_list[0].page_list) != 0
@@ -522,18 +670,30 @@ class FlashBuilder(MemoryBuilder):
             LOG.debug("Chip erase weight %f, sector erase weight %f" % (chip_erase_program_time, page_program_time))
             chip_erase = chip_erase_program_time < page_program_time
 
-        if chip_erase:
-            if self.flash.is_double_buffering_supported and self.enable_double_buffering:
-                LOG.debug("Using double buffer chip erase program")
-                flash_operation = self._chip_erase_program_double_buffer(progress_cb)
-            else:
-                flash_operation = self._chip_erase_program(progress_cb)
-        else:
-            if self.flash.is_double_buffering_supported and self.enable_double_buffering:
-                LOG.debug("Using double buffer sector erase program")
-                flash_operation = self._sector_erase_program_double_buffer(progress_cb)
+        try:
+            if chip_erase:
+                if self._use_double_buffering:
+                    LOG.debug("Using double buffer chip erase program")
+                    flash_operation = self._chip_erase_program_double_buffer(progress_cb)
+                else:
+                    flash_operation = self._chip_erase_program(progress_cb)
             else:
-                flash_operation = self._sector_erase_program(progress_cb)
+                if self._use_double_buffering:
+                    LOG.debug("Using double buffer sector erase program")
+                    flash_operation = self._sector_erase_program_double_buffer(progress_cb)
+                else:
+                    flash_operation = self._sector_erase_program(progress_cb)
+
+            if self._verify_crc:
+                self._verify_pages_with_crc([page for page in self.page_list
+                        if not (page.erased if chip_erase else page.same)])
+        except:
+            # The flash contents are unknown after a failure, so the manifest entry can't be trusted.
+            if self._manifest is not None:
+                self._manifest.remove(self._manifest_target_prefix if chip_erase else self._manifest_key)
+            raise
+
+        self._update_manifest(chip_erase)
 
         # Cleanup flash algo and reset target after programming.
         self.flash.cleanup()
@@ -559,7 +719,7 @@ class FlashBuilder(MemoryBuilder):
                 actual_program_byte_count += page.size
                 actual_program_page_count += 1
         for sector in self.sector_list:
-            if sector.are_any_pages_not_same():
+            if sector.erase_required if not chip_erase else sector.are_any_pages_not_same():
                 erase_byte_count += sector.size
                 erase_sector_count += 1
 
@@ -571,6 +731,10 @@ class FlashBuilder(MemoryBuilder):
         self.perf.skipped_byte_count = skipped_byte_count
         self.perf.skipped_page_count = skipped_page_count
 
+        LOG.debug("Predicted erase %.3f s, program %.3f s; actual erase %.3f s, program %.3f s",
+                self.perf.predicted_erase_time, self.perf.predicted_write_time,
+                self.perf.erase_time, self.perf.write_time)
+
         if self.log_performance:
             if chip_erase:
                 LOG.info("Erased chip, programmed %d bytes (%s), skipped %d bytes (%s) at %.02f kB/s",
@@ -599,6 +763,105 @@ class FlashBuilder(MemoryBuilder):
                 sector.erased = False
                 page.same = False
 
+    def _init_manifest(self):
+        """@brief Set up use of the flash manifest if the `flash.manifest_path` option is set."""
+        session = self.flash.target.session
+        path = session.options.get('flash.manifest_path')
+        if not path or session.probe is None or session.target is None:
+            self._manifest = None
+            return
+        target_type = session.options.get('target_override') or session.target.part_number
+        self._manifest = FlashManifest(path)
+        self._manifest_key = FlashManifest.make_key(session.probe.unique_id, target_type,
+                self.flash.region.name, self.flash.region.start)
+        self._manifest_target_prefix = FlashManifest.make_target_prefix(session.probe.unique_id, target_type)
+
+    def _update_manifest(self, chip_erase):
+        """@brief Record the CRCs of the pages now in flash."""
+        if self._manifest is None:
+            return
+        erased_value = self.flash.region.erased_byte_value
+        crcs = {page.addr: page_crc(page.data, page.size, erased_value) for page in self.page_list}
+        if chip_erase:
+            # Erase all may affect any region of the target.
+            self._manifest.remove(self._manifest_target_prefix)
+            erased_ranges = []
+        elif self.region.is_erasable:
+            erased_ranges = [(sector.addr, sector.addr + sector.size) for sector in self.sector_list
+                    if sector.erase_required]
+        else:
+            erased_ranges = []
+        self._manifest.update(self._manifest_key, crcs, erased_ranges)
+
+    def _analyze_pages_with_manifest(self):
+        """@brief Determine which pages are unchanged using the CRCs recorded in the flash manifest.
+
+        Pages whose new data has the same CRC as recorded in the manifest are candidates for being
+        unchanged. A sample of `flash.manifest_samples` candidates, spread across the region, is
+        verified against flash using the CRC analyzer if available or otherwise by reading the full
+        page. If all samples match, all candidates are marked as the same and pages with a different
+        recorded CRC are marked as changed. If any sample doesn't match, the manifest entry is
+        discarded since the flash was modified by other means.
+
+        @return Boolean indicating whether the manifest was used.
+        """
+        if self._manifest is None:
+            return False
+        recorded = self._manifest.get(self._manifest_key)
+        if not recorded:
+            return False
+
+        erased_value = self.flash.region.erased_byte_value
+        candidates = []
+        changed = []
+        pages = [page for page in self.page_list if page.same is None and page.addr in recorded]
+        for page, crc in zip(pages, self._compute_page_crcs(pages)):
+            page.crc = crc
+            if page.crc == recorded[page.addr]:
+                candidates.append(page)
+            else:
+                changed.append(page)
+
+        # Choose evenly spaced sample pages, including the first and last. A sample count of 0 verifies
+        # all candidates, which is only a single call if the CRC analyzer is supported.
+        sample_count = self.flash.target.session.options.get('flash.manifest_samples')
+        if sample_count <= 0 or sample_count >= len(candidates):
+            samples = candidates
+        elif sample_count == 1:
+            samples = candidates[:1]
+        else:
+            step = (len(candidates) - 1) / (sample_count - 1)
+            samples = [candidates[round(i * step)] for i in range(sample_count)]
+
+        if samples:
+            if self.flash.get_flash_info().crc_supported:
+                self._enable_read_access()
+                crc_list = self.flash.compute_crcs([(page.addr, page.size) for page in samples])
+                is_valid = all(page.crc == crc for page, crc in zip(samples, crc_list))
+            elif self.flash.region.is_readable:
+                self._enable_read_access()
+                is_valid = all(self._read_page(page) == page.data for page in samples)
+            else:
+                return False
+
+            if not is_valid:
+                LOG.info("Flash manifest for region '%s' does not match flash contents; discarding it",
+                        self.flash.region.name)
+                self._manifest.remove(self._manifest_key)
+                return False
+
+        erased_crcs = {}
+        for page in candidates:
+            page.same = True
+        for page in changed:
+            page.same = False
+            if page.size not in erased_crcs:
+                erased_crcs[page.size] = page_crc([], page.size, erased_value)
+            page.target_erased = (recorded[page.addr] == erased_crcs[page.size])
+        LOG.debug("Flash manifest: %d pages unchanged, %d changed, %d samples verified",
+                len(candidates), len(changed), len(samples))
+        return True
+
     def _compute_chip_erase_pages_and_weight(self):
         """@brief Compute the number of erased pages.
 
@@ -609,7 +872,7 @@ class FlashBuilder(MemoryBuilder):
         chip_erase_weight += self.flash.get_flash_info().erase_weight
         for page in self.page_list:
             if page.erased is None:
-                page.erased = self.flash.region.is_data_erased(page.data)
+                page.erased = self._is_erased(page.data)
             if not page.erased:
                 chip_erase_count += 1
                 chip_erase_weight += page.get_program_weight()
@@ -633,10 +896,12 @@ class FlashBuilder(MemoryBuilder):
             # Analyze pages that haven't been analyzed yet
             if page.same is None:
                 size = min(PAGE_ESTIMATE_SIZE, len(page.data))
-                data = self.flash.target.read_memory_block8(page.addr, size)
-                page_same = same(data, page.data[0:size])
-                if page_same is False:
+                data = bytearray(size)
+                self.flash.target.read_memory_into(page.addr, data)
+                if data != page.data[:size]:
                     page.same = False
+                    if not self._is_erased(data):
+                        page.target_erased = False
                 else:
                     # Save the data read for estimation so we don't need to read it again.
                     page.cached_estimate_data = data
@@ -652,25 +917,17 @@ class FlashBuilder(MemoryBuilder):
             be marked as the same.  There is a small chance that the CRCs match even though the
             data is different, but the odds of this happing are low: ~1/(2^32) = ~2.33*10^-8%.
         """
-        # Build list of all the pages that need to be analyzed
-        sector_list = []
-        page_list = []
-        for page in self.page_list:
-            if page.same is None:
-                # Add page to compute_crcs
-                sector_list.append((page.addr, page.size))
-                page_list.append(page)
-                # Compute CRC of data (Padded with 0xFF)
-                data = list(page.data)
-                pad_size = page.size - len(page.data)
-                if pad_size > 0:
-                    data.extend([0xFF] * pad_size)
-                page.crc = crc32(bytearray(data)) & 0xFFFFFFFF
+        # Build list of all the pages that need to be analyzed, and compute the CRC of their data.
+        page_list = [page for page in self.page_list if page.same is None]
+        sector_list = [(page.addr, page.size) for page in page_list]
+        for page, crc in zip(page_list, self._compute_page_crcs(page_list)):
+            page.crc = crc
 
         # Analyze pages
         if len(page_list) > 0:
             self._enable_read_access()
             crc_list = self.flash.compute_crcs(sector_list)
+            erased_value = self.flash.region.erased_byte_value
             for page, crc in zip(page_list, crc_list):
                 page_same = page.crc == crc
                 if assume_estimate_correct:
@@ -678,6 +935,14 @@ class FlashBuilder(MemoryBuilder):
                 elif page_same is False:
                     page.same = False
 
+                # A different CRC proves the page isn't erased, while a match is only trusted with
+                # the same condition as for the same flag.
+                is_erased_crc = (crc == page_crc([], page.size, erased_value))
+                if not is_erased_crc:
+                    page.target_erased = False
+                elif assume_estimate_correct:
+                    page.target_erased = True
+
     def _compute_sector_erase_pages_and_weight(self, fast_verify):
         """@brief Quickly analyze flash contents and compute weights for sector erase.
 
@@ -687,6 +952,11 @@ class FlashBuilder(MemoryBuilder):
         """
         analyze_start = time()
 
+        # Use the manifest of previously programmed pages first, if enabled.
+        if any(page.same is None for page in self.page_list):
+            if self._analyze_pages_with_manifest():
+                self.perf.analyze_type = FlashBuilder.FLASH_ANALYSIS_MANIFEST
+
         # Analyze unknown pages using either CRC32 analyzer or partial reads.
         if any(page.same is None for page in self.page_list):
             if self.flash.get_flash_info().crc_supported:
@@ -716,7 +986,12 @@ class FlashBuilder(MemoryBuilder):
                     # Page is confirmed to be the same so no programming weight
                     pass
 
-            if sector.are_any_pages_not_same():
+            if self._is_delta_program_enabled:
+                needs_erase = any((page.same is not True) and (page.target_erased is not True)
+                        for page in sector.page_list)
+            else:
+                needs_erase = sector.are_any_pages_not_same()
+            if needs_erase:
                 sector_erase_weight += sector.erase_weight
 
         self.sector_erase_count = sector_erase_count
@@ -734,85 +1009,54 @@ class FlashBuilder(MemoryBuilder):
         progress_cb(0.0)
         progress = 0
 
+        self._predict_times(True)
+
+        erase_start = time()
         self.flash.init(self.flash.Operation.ERASE)
         self.flash.erase_all()
         self.flash.uninit()
+        self.perf.erase_time = time() - erase_start
 
         progress += self.flash.get_flash_info().erase_weight
         progress_cb(float(progress) / float(self.chip_erase_weight))
 
+        write_start = time()
         self.flash.init(self.flash.Operation.PROGRAM)
         for page in self.page_list:
             if not page.erased:
                 self.flash.program_page(page.addr, page.data)
+                if self._verify:
+                    self._verify_page(page)
                 progress += page.get_program_weight()
                 progress_cb(float(progress) / float(self.chip_erase_weight))
         self.flash.uninit()
+        self.perf.write_time = time() - write_start
         progress_cb(1.0)
         return FlashBuilder.FLASH_CHIP_ERASE
 
-    def _next_unerased_page(self, i):
-        if i >= len(self.page_list):
-            return None, i
-        page = self.page_list[i]
-        while page.erased:
-            i += 1
-            if i >= len(self.page_list):
-                return None, i
-            page = self.page_list[i]
-        return page, i + 1
-
     def _chip_erase_program_double_buffer(self, progress_cb=_stub_progress):
         """@brief Double-buffered program by first performing an erase all."""
         LOG.debug("%i of %i pages have erased data", len(self.page_list) - self.chip_erase_count, len(self.page_list))
         progress_cb(0.0)
         progress = 0
 
-        program_timeout = self.flash.target.session.options.get('flash.timeout.program')
+        self._predict_times(True)
 
+        erase_start = time()
         self.flash.init(self.flash.Operation.ERASE)
         self.flash.erase_all()
         self.flash.uninit()
+        self.perf.erase_time = time() - erase_start
 
         progress += self.flash.get_flash_info().erase_weight
         progress_cb(float(progress) / float(self.chip_erase_weight))
 
-        # Set up page and buffer info.
-        current_buf = 0
-        next_buf = 1
-        page, i = self._next_unerased_page(0)
-        assert page is not None
-
-        # Load first page buffer
-        self.flash.load_page_buffer(current_buf, page.addr, page.data)
-
+        write_start = time()
         self.flash.init(self.flash.Operation.PROGRAM)
-        while page is not None:
-            # Kick off this page program.
-            current_addr = page.addr
-            current_weight = page.get_program_weight()
-            self.flash.start_program_page_with_buffer(current_buf, current_addr)
-
-            # Get next page and load it.
-            page, i = self._next_unerased_page(i)
-            if page is not None:
-                self.flash.load_page_buffer(next_buf, page.addr, page.data)
-
-            # Wait for the program to complete.
-            result = self.flash.wait_for_completion(timeout=program_timeout)
-            if result == self.flash.TIMEOUT_ERROR:
-                raise FlashProgramFailure('flash program page timeout', address=current_addr, result_code=result)
-            elif result != 0:
-                raise FlashProgramFailure('flash program page failure', address=current_addr, result_code=result)
-
-            # Swap buffers.
-            current_buf, next_buf = next_buf, current_buf
-
-            # Update progress.
-            progress += current_weight
-            progress_cb(float(progress) / float(self.chip_erase_weight))
-
+        progress = self._program_pages_with_buffers([page for page in self.page_list if not page.erased],
+                progress, self.chip_erase_weight, progress_cb)
         self.flash.uninit()
+        self.perf.write_time = time() - write_start
         progress_cb(1.0)
         return FlashBuilder.FLASH_CHIP_ERASE
 
@@ -827,15 +1071,18 @@ class FlashBuilder(MemoryBuilder):
         # Fill in same flag for all pages. This is done up front so we're not trying
         # to read from flash while simultaneously programming it.
         progress = self._scan_pages_for_same(progress_cb)
+        self._predict_times(False)
 
         for sector in self.sector_list:
             if sector.are_any_pages_not_same():
-                if self.region.is_erasable:
+                if sector.erase_required and self.region.is_erasable:
                     # Erase the sector
+                    erase_start = time()
                     self.flash.init(self.flash.Operation.ERASE)
                     for addr in sector.addrs:
                         self.flash.erase_sector(addr)
                     self.flash.uninit()
+                    self.perf.erase_time += time() - erase_start
 
                     actual_sector_erase_weight += sector.erase_weight
 
@@ -843,15 +1090,21 @@ class FlashBuilder(MemoryBuilder):
                 if self.sector_erase_weight > 0:
                     progress_cb(float(progress) / float(self.sector_erase_weight))
 
-                # The sector was erased, so we must program all pages in the sector
-                # regardless of whether they were the same or not.
+                # If the sector was erased, all pages in the sector have been marked as not the same
+                # and must be programmed. Otherwise only the changed pages are programmed.
                 for page in sector.page_list:
+                    if page.same:
+                        continue
 
                     progress += page.get_program_weight()
 
+                    write_start = time()
                     self.flash.init(self.flash.Operation.PROGRAM)
                     self.flash.program_page(page.addr, page.data)
+                    if self._verify:
+                        self._verify_page(page)
                     self.flash.uninit()
+                    self.perf.write_time += time() - write_start
 
                     actual_sector_erase_count += 1
                     actual_sector_erase_weight += page.get_program_weight()
@@ -871,8 +1124,8 @@ class FlashBuilder(MemoryBuilder):
         """@brief Read the full page data to determine if it is unchanged.
 
         When this function exits, the same flag will be set to either True or False for
-        every page. In addition, sectors that need at least one page programmed will have
-        the same flag set to False for all pages within that sector.
+        every page. In addition, the erase plan is computed by _plan_sector_erases(), so sectors
+        that must be erased will have the same flag set to False for all pages within that sector.
         """
         progress = 0
 
@@ -886,12 +1139,12 @@ class FlashBuilder(MemoryBuilder):
                     data = page.cached_estimate_data
                     offset = len(data)
                 else:
-                    data = []
+                    data = bytearray()
                     offset = 0
                 assert len(page.data) == page.size, "page data size (%d) != page size (%d)" % (len(page.data), page.size)
-                data.extend(self.flash.target.read_memory_block8(page.addr + offset,
-                                                                    page.size - offset))
-                page.same = same(page.data, data)
+                data += self._read_page(page, offset)
+                page.same = (page.data == data)
+                page.target_erased = self._is_erased(data)
                 page.cached_estimate_data = None # This data isn't needed anymore.
                 progress += page.get_verify_weight()
 
@@ -899,44 +1152,227 @@ class FlashBuilder(MemoryBuilder):
                 if self.sector_erase_weight > 0:
                     progress_cb(float(progress) / float(self.sector_erase_weight))
 
-        # If we have to program any pages of a sector, then mark all pages of that sector
-        # as needing to be programmed, since the sector will be erased.
+        self._plan_sector_erases()
+
+        return progress
+
+    @property
+    def _is_delta_program_enabled(self):
+        return self.region.is_erasable and self.flash.target.session.options.get('flash.delta_program')
+
+    def _plan_sector_erases(self):
+        """@brief Decide which sectors must be erased.
+
+        Normally, a sector that has any changed page is erased and all of its pages are programmed.
+        If the `flash.delta_program` option is enabled, a sector is not erased when every changed page
+        in it is currently erased on the target. Only the changed pages are then programmed, and
+        the unchanged pages keep their contents. This is the common case of adding to or extending
+        an image, and is especially effective for flash with large sectors.
+
+        Whether a page is erased is known from full page reads, CRCs and the flash manifest. If it is
+        still unknown for some changed pages in a sector, those pages are read if that is estimated to
+        cost less than erasing the sector and reprogramming its unchanged pages.
+
+        Sector sizes and weights come from the flash subregion containing each sector, so regions with
+        mixed sector sizes are planned per sector.
+        """
+        is_delta = self._is_delta_program_enabled
         for sector in self.sector_list:
-            if sector.are_any_pages_not_same():
+            if not sector.are_any_pages_not_same():
+                sector.erase_required = False
+            elif is_delta and self._can_program_sector_without_erase(sector):
+                sector.erase_required = False
+            else:
+                # The sector will be erased, so all its pages must be programmed.
+                sector.erase_required = True
                 sector.mark_all_pages_not_same()
 
-        return progress
+    def _can_program_sector_without_erase(self, sector):
+        changed_pages = [page for page in sector.page_list if not page.same]
+        if any(page.target_erased is False for page in changed_pages):
+            return False
+
+        unknown_pages = [page for page in changed_pages if page.target_erased is None]
+        if unknown_pages:
+            if not self.flash.region.is_readable:
+                return False
+            read_weight = sum(page.get_verify_weight() for page in unknown_pages)
+            erase_weight = sector.erase_weight + \
+                    sum(page.get_program_weight() for page in sector.page_list if page.same)
+            if read_weight >= erase_weight:
+                return False
+
+            self._enable_read_access()
+            for page in unknown_pages:
+                page.target_erased = self._is_erased(self._read_page(page))
+                if not page.target_erased:
+                    return False
+
+        return True
 
-    def _next_nonsame_page(self, i):
-        if i >= len(self.page_list):
-            return None, i
-        page = self.page_list[i]
-        while page.same:
-            i += 1
-            if i >= len(self.page_list):
-                return None, i
-            page = self.page_list[i]
-        return page, i + 1
+    def _predict_times(self, chip_erase):
+        """@brief Record the estimated erase and program times for the programming plan."""
+        if chip_erase:
+            self.perf.predicted_erase_time = self.flash.get_flash_info().erase_weight
+            self.perf.predicted_write_time = sum(page.get_program_weight()
+                    for page in self.page_list if not page.erased)
+        else:
+            self.perf.predicted_erase_time = sum(sector.erase_weight
+                    for sector in self.sector_list if sector.erase_required) if self.region.is_erasable else 0.0
+            self.perf.predicted_write_time = sum(page.get_program_weight()
+                    for page in self.page_list if not page.same)
+
+    def _verify_page(self, page):
+        """@brief Read back a programmed page and compare it with the page data."""
+        if self._read_page(page) != page.data:
+            raise FlashProgramFailure('flash verify failure', address=page.addr)
+        self.perf.verified_page_count += 1
+
+    def _verify_pages_with_crc(self, pages):
+        """@brief Verify programmed pages using the CRC32 analyzer.
+
+        Runs of contiguous pages are split into the largest naturally aligned power-of-two ranges,
+        which is what the analyzer supports, so the number of CRCs to compute is small. CRCs for all
+        ranges are computed with as few analyzer calls as the command buffer allows. Pages of any range
+        whose CRC doesn't match, or that the analyzer can't address, are then read back and compared.
+        """
+        if not pages:
+            return
+        verify_start = time()
+
+        crc_ranges = []
+        read_ranges = []
+        run_start = run_end = pages[0].addr
+        for page in pages + [None]:
+            if (page is not None) and (page.addr == run_end):
+                run_end += page.size
+                continue
+            for addr, size in _split_crc_ranges(run_start, run_end):
+                # The analyzer command has 16 bits for the address in units of the range size.
+                if (addr // size) < 0x10000:
+                    crc_ranges.append((addr, size))
+                else:
+                    read_ranges.append((addr, size))
+            if page is not None:
+                run_start = page.addr
+                run_end = page.addr + page.size
+
+        # Flash was left inited for programming, so it must be inited for read again.
+        self.algo_inited_for_read = False
+        self._enable_read_access()
+
+        # Each analyzer command and result is a word in the first page buffer.
+        max_count = max(1, min(page.size for page in pages) // 4)
+        for i in range(0, len(crc_ranges), max_count):
+            batch = crc_ranges[i:i + max_count]
+            for (addr, size), crc in zip(batch, self.flash.compute_crcs(batch)):
+                if crc != (crc32(self._image_view(addr, size)) & 0xFFFFFFFF):
+                    LOG.debug("CRC verify mismatch for %#010x-%#010x", addr, addr + size - 1)
+                    read_ranges.append((addr, size))
+
+        read_count = 0
+        for addr, size in read_ranges:
+            for page in pages:
+                if addr <= page.addr < addr + size:
+                    self._verify_page(page)
+                    read_count += 1
+
+        self.perf.verified_page_count += len(pages) - read_count
+        self.perf.verify_time = time() - verify_start
+        LOG.debug("Verified %s with %d CRCs, %d pages read back", get_page_count(len(pages)),
+                len(crc_ranges), read_count)
+
+    def _program_pages_with_buffers(self, pages, progress, total_weight, progress_cb):
+        """@brief Program pages using all of the flash algo's page buffers.
+
+        Page programming is pipelined so that the SWD link is kept busy while the target is running the
+        flash algo. After the program operation for a page is started, page data is downloaded into every
+        free buffer before waiting for the program operation to complete. A buffer is only reused once the
+        page it holds has been programmed.
+
+        If verify is enabled, each page is read back once its program operation has completed. Flash is
+        never read while it is being programmed, as some flash controllers return stale data without
+        faulting during programming.
+
+        The flash algo must already be inited for programming.
+
+        @param self
+        @param pages Sequence of pages to program, in order.
+        @param progress Progress weight at the start of programming.
+        @param total_weight Total progress weight used to compute the completion fraction.
+        @param progress_cb Progress callback.
+        @return The updated progress weight.
+        """
+        program_timeout = self.flash.target.session.options.get('flash.timeout.program')
+        buffer_count = self.flash.page_buffer_count
+        free_buffers = list(range(buffer_count))
+        loaded = deque()
+        next_page = iter(pages)
+        occupancy = 0.0
+        program_count = 0
+
+        def load_free_buffers(limit=buffer_count):
+            while free_buffers and limit > 0:
+                limit -= 1
+                page = next(next_page, None)
+                if page is None:
+                    break
+                buffer_number = free_buffers.pop(0)
+                self.flash.load_page_buffer(buffer_number, page.addr, page.data)
+                loaded.append((buffer_number, page))
+
+        # Only load the first page before starting, so the target begins programming as soon as possible.
+        load_free_buffers(1)
+        while loaded:
+            # Kick off the oldest loaded page program.
+            buffer_number, page = loaded.popleft()
+            occupancy += (len(loaded) + 1) / buffer_count
+            program_count += 1
+            self.flash.start_program_page_with_buffer(buffer_number, page.addr)
+
+            # While the target is busy, load following pages.
+            load_free_buffers()
+
+            # Wait for the program to complete.
+            result = self.flash.wait_for_completion(timeout=program_timeout)
+            if result == self.flash.TIMEOUT_ERROR:
+                raise FlashProgramFailure('flash program page timeout', address=page.addr, result_code=result)
+            elif result != 0:
+                raise FlashProgramFailure('flash program page failure', address=page.addr, result_code=result)
+            free_buffers.append(buffer_number)
+
+            if self._verify:
+                self._verify_page(page)
+
+            # Update progress
+            progress += page.get_program_weight()
+            if total_weight > 0:
+                progress_cb(float(progress) / float(total_weight))
+
+        self.perf.page_buffer_count = buffer_count
+        if program_count:
+            self.perf.pipeline_occupancy = occupancy / program_count
+            LOG.debug("Programmed %s with %d page buffers, %.0f%% average buffer occupancy",
+                    get_page_count(program_count), buffer_count, self.perf.pipeline_occupancy * 100)
+        return progress
 
     def _sector_erase_program_double_buffer(self, progress_cb=_stub_progress):
         """@brief Double-buffered program by performing sector erases."""
-        actual_sector_erase_count = 0
-        actual_sector_erase_weight = 0
         progress = 0
 
         progress_cb(0.0)
 
-        program_timeout = self.flash.target.session.options.get('flash.timeout.program')
-
         # Fill in same flag for all pages. This is done up front so we're not trying
         # to read from flash while simultaneously programming it.
         progress = self._scan_pages_for_same(progress_cb)
+        self._predict_times(False)
 
         if self.region.is_erasable:
             # Erase all sectors up front.
+            erase_start = time()
             self.flash.init(self.flash.Operation.ERASE)
             for sector in self.sector_list:
-                if sector.are_any_pages_not_same():
+                if sector.erase_required:
                     # Erase the sector
                     for addr in sector.addrs:
                         self.flash.erase_sector(addr)
@@ -946,52 +1382,18 @@ class FlashBuilder(MemoryBuilder):
                     if self.sector_erase_weight > 0:
                         progress_cb(float(progress) / float(self.sector_erase_weight))
             self.flash.uninit()
+            self.perf.erase_time = time() - erase_start
 
-        # Set up page and buffer info.
-        current_buf = 0
-        next_buf = 1
-        page, i = self._next_nonsame_page(0)
+        write_start = time()
+        pages = [page for page in self.page_list if not page.same]
+        actual_sector_erase_count = len(pages)
 
         # Make sure there are actually pages to program differently from current flash contents.
-        if page is not None:
+        if pages:
             self.flash.init(self.flash.Operation.PROGRAM)
-
-            # Load first page buffer
-            self.flash.load_page_buffer(current_buf, page.addr, page.data)
-
-            while page is not None:
-                assert page.same is not None
-
-                # Kick off this page program.
-                current_addr = page.addr
-                current_weight = page.get_program_weight()
-
-                self.flash.start_program_page_with_buffer(current_buf, current_addr)
-
-                actual_sector_erase_count += 1
-                actual_sector_erase_weight += page.get_program_weight()
-
-                # Get next page and load it.
-                page, i = self._next_nonsame_page(i)
-                if page is not None:
-                    self.flash.load_page_buffer(next_buf, page.addr, page.data)
-
-                # Wait for the program to complete.
-                result = self.flash.wait_for_completion(timeout=program_timeout)
-                if result == self.flash.TIMEOUT_ERROR:
-                    raise FlashProgramFailure('flash program page timeout', address=current_addr, result_code=result)
-                elif result != 0:
-                    raise FlashProgramFailure('flash program page failure', address=current_addr, result_code=result)
-
-                # Swap buffers.
-                current_buf, next_buf = next_buf, current_buf
-
-                # Update progress
-                progress += current_weight
-                if self.sector_erase_weight > 0:
-                    progress_cb(float(progress) / float(self.sector_erase_weight))
-
+            progress = self._program_pages_with_buffers(pages, progress, self.sector_erase_weight, progress_cb)
             self.flash.uninit()
+        self.perf.write_time = time() - write_start
 
         progress_cb(1.0)
 
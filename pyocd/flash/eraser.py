@@ -17,8 +17,14 @@
 
 import logging
 from enum import Enum
+from typing import (TYPE_CHECKING, List, Set, Tuple)
 
 from ..core.memory_map import MemoryType
+from .builder import get_sector_count
+from .manifest import page_crc
+
+if TYPE_CHECKING:
+    from ..core.memory_map import FlashRegion
 
 LOG = logging.getLogger(__name__)
 
@@ -105,8 +111,8 @@ class FlashEraser(object):
                 LOG.info("Chip erase complete")
 
     def _sector_erase(self, addresses):
-        flash = None
-        currentRegion = None
+        # Collect the sectors to erase, grouped by runs of sectors in the same region.
+        region_sectors: List[Tuple["FlashRegion", List[Tuple[int, int]]]] = []
 
         for spec in addresses:
             # Convert the spec into a start and end address.
@@ -123,15 +129,10 @@ class FlashEraser(object):
                     break
 
                 # Handle switching regions.
-                if region is not currentRegion:
-                    # Clean up previous flash.
-                    if flash is not None:
-                        flash.cleanup()
-
-                    currentRegion = region
-                    flash = region.flash
-                    flash.init(flash.Operation.ERASE)
+                if not region_sectors or region is not region_sectors[-1][0]:
+                    region_sectors.append((region, []))
 
+                flash = region.flash
                 assert flash is not None
 
                 # Get sector info for the current address.
@@ -145,15 +146,74 @@ class FlashEraser(object):
                     LOG.warning("sector address 0x%08x is unaligned", sector_addr)
                     sector_addr -= delta
 
+                region_sectors[-1][1].append((sector_addr, sector_info.size))
+                sector_addr += sector_info.size
+
+        skipped_count = 0
+        skipped_size = 0
+        for region, sectors in region_sectors:
+            flash = region.flash
+            flash.init(flash.Operation.ERASE)
+
+            if self._session.options.get('flash.erase_blank_check'):
+                blank_sectors = self._find_blank_sectors(region, sectors)
+            else:
+                blank_sectors = set()
+
+            for sector_addr, sector_size in sectors:
+                if sector_addr in blank_sectors:
+                    LOG.debug("Skipping blank sector 0x%08x (%d bytes)", sector_addr, sector_size)
+                    skipped_count += 1
+                    skipped_size += sector_size
+                    continue
+
                 # Erase this page.
-                LOG.info("Erasing sector 0x%08x (%d bytes)", sector_addr, sector_info.size)
+                LOG.info("Erasing sector 0x%08x (%d bytes)", sector_addr, sector_size)
                 flash.erase_sector(sector_addr)
 
-                sector_addr += sector_info.size
-
-        if flash is not None:
             flash.cleanup()
 
+        if skipped_count:
+            LOG.info("Skipped erasing %s (%d bytes) that were already blank",
+                    get_sector_count(skipped_count), skipped_size)
+
+    def _find_blank_sectors(self, region: "FlashRegion", sectors: List[Tuple[int, int]]) -> Set[int]:
+        """@brief Determine which sectors are already erased.
+
+        The flash algo's BlankCheck() function is used if it has one. Otherwise, only if the
+        'flash.erase_crc_blank_check' option is enabled and the CRC analyzer is supported, CRCs of all
+        sectors are computed in a few analyzer calls and compared with the CRC of an erased sector.
+        Sectors that the analyzer can't handle, because they are not a naturally aligned power-of-two
+        size, are never considered blank. No data is read from flash by the host.
+
+        The flash algo must already be inited.
+
+        @return Set of the addresses of blank sectors.
+        """
+        flash = region.flash
+        assert flash is not None
+        if flash.is_blank_check_supported:
+            return {addr for addr, size in sectors if flash.blank_check(addr, size)}
+
+        if not self._session.options.get('flash.erase_crc_blank_check'):
+            return set()
+        if not (flash.get_flash_info().crc_supported and region.are_erased_sectors_readable):
+            return set()
+
+        # The analyzer command has 16 bits for the address in units of the sector size.
+        candidates = [(addr, size) for addr, size in sectors
+                        if (size & (size - 1)) == 0 and (addr % size) == 0 and (addr // size) < 0x10000]
+
+        # Each analyzer command and result is a word in the page buffer.
+        max_count = max(1, region.page_size // 4)
+        blank_sectors = set()
+        for i in range(0, len(candidates), max_count):
+            batch = candidates[i:i + max_count]
+            for (addr, size), crc in zip(batch, flash.compute_crcs(batch)):
+                if crc == page_crc(b'', size, region.erased_byte_value):
+                    blank_sectors.add(addr)
+        return blank_sectors
+
     def _convert_spec(self, spec):
         if isinstance(spec, str):
             # Convert spec from string to range.
@@ -16,32 +16,76 @@
 # limitations under the License.
 
 import errno
-import itertools
 import logging
 import os
-from typing import (IO, TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Tuple, Union)
+from typing import (IO, TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union)
 
 from elftools.elf.elffile import ELFFile
 from intelhex import IntelHex
 
 from ..core import exceptions
-from .loader import (FlashLoader, ProgressCallback)
+from .loader import (FlashLoader, MemoryLoader, ProgressCallback)
 
 if TYPE_CHECKING:
     from ..core.session import Session
+    from .builder import ProgrammingInfo
 
 LOG = logging.getLogger(__name__)
 
-def ranges(i: List[int]) -> Iterator[Tuple[int, int]]:
-    """Accepts a sorted list of byte addresses. Breaks the addresses into contiguous ranges.
+def ranges(i: Iterable[int]) -> Iterator[Tuple[int, int]]:
+    """Accepts a sorted iterable of byte addresses. Breaks the addresses into contiguous ranges.
     Yields 2-tuples of the start and end address for each contiguous range.
 
     For instance, the input [0, 1, 2, 3, 32, 33, 34, 35] will yield the following 2-tuples:
     (0, 3) and (32, 35).
     """
-    for a, b in itertools.groupby(enumerate(i), lambda x: x[1] - x[0]):
-        b = list(b)
-        yield b[0][1], b[-1][1]
+    start: Optional[int] = None
+    end = 0
+    for addr in i:
+        if start is not None and addr == end + 1:
+            end = addr
+            continue
+        if start is not None:
+            yield start, end
+        start = end = addr
+    if start is not None:
+        yield start, end
+
+class ImageSegment(NamedTuple):
+    """@brief Contiguous data read from an image file."""
+    ## Start address, or None for the start of the target's boot memory.
+    address: Optional[int]
+    ## Read-only bytes-like data.
+    data: Union[bytes, memoryview]
+
+class ProgramImage:
+    """@brief Data read from an image file, ready to be programmed into any number of targets.
+
+    Instances are created by FileProgrammer.read_image() and programmed with
+    FileProgrammer.program_image(). The data is not modified by programming, so a single instance can be
+    shared by programmers running on different threads.
+
+    All of the image's data is held in memory, since it may be programmed more than once. To program
+    a large image without reading all of it first, pass its chunks to FlashLoader.add_chunks().
+    """
+
+    def __init__(self, file_format: str, segments: List[ImageSegment]) -> None:
+        self._format = file_format
+        self._segments = segments
+
+    @property
+    def format(self) -> str:
+        """@brief Name of the file format the image was read from."""
+        return self._format
+
+    @property
+    def segments(self) -> List[ImageSegment]:
+        return self._segments
+
+    @property
+    def size(self) -> int:
+        """@brief Total number of bytes in all segments."""
+        return sum(len(segment.data) for segment in self._segments)
 
 class FileProgrammer(object):
     """@brief Class to manage programming a file in any supported format with many options.
@@ -94,16 +138,13 @@ class FileProgrammer(object):
         self._keep_unwritten = keep_unwritten
         self._no_reset = no_reset
         self._progress = progress
-        self._loader = None
+        self._loader: Optional[MemoryLoader] = None
 
-        self._format_handlers: Dict[str, Callable[..., None]] = {
-            'axf': self._program_elf,
-            'bin': self._program_bin,
-            'elf': self._program_elf,
-            'hex': self._program_hex,
-            }
+    ## Map of format name to the method that reads the format.
+    _FORMAT_READERS: Dict[str, Callable[..., Iterator[ImageSegment]]] = {}
 
-    def program(self, file_or_path: Union[str, IO[bytes]], file_format: Optional[str] = None, **kwargs: Any):
+    def program(self, file_or_path: Union[str, IO[bytes]], file_format: Optional[str] = None, **kwargs: Any) \
+            -> List["ProgrammingInfo"]:
         """@brief Program a file into flash.
 
         @param self
@@ -119,10 +160,26 @@ class FileProgrammer(object):
         - `skip`: Number of bytes to skip at the start of the binary file. Does not affect the
             base address.
 
+        @return List of ProgrammingInfo for each memory region that was programmed.
+
         @exception FileNotFoundError Provided file_or_path string does not reference a file.
         @exception ValueError Invalid argument value, for instance providing a file object but
             not setting file_format.
         """
+        return self.program_image(self.read_image(file_or_path, file_format, **kwargs))
+
+    @classmethod
+    def read_image(cls, file_or_path: Union[str, IO[bytes]], file_format: Optional[str] = None,
+            **kwargs: Any) -> ProgramImage:
+        """@brief Read the data to program from a file.
+
+        The parameters and exceptions are the same as for program(). No target is required.
+
+        The whole file is read into memory before this method returns. Reading is not streamed, so
+        that the returned image can be programmed any number of times.
+
+        @return A ProgramImage that can be passed to program_image().
+        """
         is_path = isinstance(file_or_path, str)
 
         # Check for valid path first.
@@ -143,17 +200,9 @@ class FileProgrammer(object):
                 raise ValueError("file object provided but no format is set")
 
         # Check the format is one we understand.
-        if file_format is None or file_format not in self._format_handlers:
+        if file_format is None or file_format not in cls._FORMAT_READERS:
             raise ValueError("unknown file format '%s'" % file_format)
 
-        self._loader = FlashLoader(self._session,
-                                    progress=self._progress,
-                                    chip_erase=self._chip_erase,
-                                    smart_flash=self._smart_flash,
-                                    trust_crc=self._trust_crc,
-                                    keep_unwritten=self._keep_unwritten,
-                                    no_reset=self._no_reset)
-
         # file_obj = None
         # Open the file if a path was provided.
         if is_path:
@@ -167,71 +216,92 @@ class FileProgrammer(object):
             assert not isinstance(file_or_path, str)
             file_obj = file_or_path
         try:
-
-            # Pass to the format-specific programmer.
-            self._format_handlers[file_format](file_obj, **kwargs)
-            self._loader.commit()
+            # Pass to the format-specific reader.
+            segments = list(cls._FORMAT_READERS[file_format](file_obj, **kwargs))
         finally:
             if is_path and file_obj is not None:
                 file_obj.close()
 
-    def _program_bin(self, file_obj: IO[bytes], **kwargs: Any) -> None:
-        """@brief Binary file format loader"""
-        assert self._loader
+        return ProgramImage(file_format, segments)
+
+    def program_image(self, image: ProgramImage) -> List["ProgrammingInfo"]:
+        """@brief Program an image previously read with read_image().
+
+        @return List of ProgrammingInfo for each memory region that was programmed.
+        """
+        loader = FlashLoader(self._session,
+                             progress=self._progress,
+                             chip_erase=self._chip_erase,
+                             smart_flash=self._smart_flash,
+                             trust_crc=self._trust_crc,
+                             keep_unwritten=self._keep_unwritten,
+                             no_reset=self._no_reset)
+        self._loader = loader
+
+        for segment in image.segments:
+            address = segment.address
+
+            # If no base address is specified use the start of the boot memory.
+            if address is None:
+                assert self._session.target
+                boot_memory = self._session.target.memory_map.get_boot_memory()
+                if boot_memory is None:
+                    raise exceptions.TargetSupportError("No boot memory is defined for this device")
+                address = boot_memory.start
+
+            # Ignore invalid addresses for HEX and ELF files only
+            # Binary files (obviously) don't contain addresses
+            # For ELF files, any metadata that's not part of the application code
+            # will be held in a section that doesn't have the SHF_WRITE flag set
+            if image.format == 'bin':
+                loader.add_data(address, segment.data)
+            else:
+                try:
+                    loader.add_data(address, segment.data)
+                except ValueError as e:
+                    LOG.warning("Failed to add data chunk: %s", e)
+
+        return loader.commit()
 
-        # If no base address is specified use the start of the boot memory.
+    @staticmethod
+    def _read_bin(file_obj: IO[bytes], **kwargs: Any) -> Iterator[ImageSegment]:
+        """@brief Binary file format reader"""
         address = kwargs.get('base_address', None)
-        if address is None:
-            assert self._session.target
-            boot_memory = self._session.target.memory_map.get_boot_memory()
-            if boot_memory is None:
-                raise exceptions.TargetSupportError("No boot memory is defined for this device")
-            address = boot_memory.start
-        assert isinstance(address, int)
+        assert address is None or isinstance(address, int)
 
         skip_offset = kwargs.get('skip', 0)
         if not isinstance(skip_offset, int):
             raise TypeError("skip argument must be an integer")
         file_obj.seek(skip_offset, os.SEEK_SET)
-        data = list(bytearray(file_obj.read()))
-
-        self._loader.add_data(address, data)
-
-    def _program_hex(self, file_obj: IO[bytes], **kwargs: Any) -> None:
-        """Intel hex file format loader"""
-        assert self._loader
+        yield ImageSegment(address, bytes(file_obj.read()))
 
+    @staticmethod
+    def _read_hex(file_obj: IO[bytes], **kwargs: Any) -> Iterator[ImageSegment]:
+        """Intel hex file format reader"""
         hexfile = IntelHex(file_obj)
         addresses = hexfile.addresses()
         addresses.sort()
 
-        data_list = list(ranges(addresses))
-        for start, end in data_list:
+        for start, end in ranges(addresses):
             size = end - start + 1
-            data = list(hexfile.tobinarray(start=start, size=size))
-            # Ignore invalid addresses for HEX files only
-            # Binary files (obviously) don't contain addresses
-            # For ELF files, any metadata that's not part of the application code
-            # will be held in a section that doesn't have the SHF_WRITE flag set
-            try:
-                self._loader.add_data(start, data)
-            except ValueError as e:
-                LOG.warning("Failed to add data chunk: %s", e)
-
-    def _program_elf(self, file_obj: IO[bytes], **kwargs: Any) -> None:
-        assert self._loader
+            yield ImageSegment(start, hexfile.tobinstr(start=start, size=size))
 
+    @staticmethod
+    def _read_elf(file_obj: IO[bytes], **kwargs: Any) -> Iterator[ImageSegment]:
         elf = ELFFile(file_obj)
         for segment in elf.iter_segments():
             addr = segment['p_paddr']
             if segment.header.p_type == 'PT_LOAD' and segment.header.p_filesz != 0:
-                data = bytearray(segment.data())
                 LOG.debug("Writing segment LMA:0x%08x, VMA:0x%08x, size %d", addr,
                           segment['p_vaddr'], segment.header.p_filesz)
-                try:
-                    self._loader.add_data(addr, data)
-                except ValueError as e:
-                    LOG.warning("Failed to add data chunk: %s", e)
+                yield ImageSegment(addr, bytes(segment.data()))
             else:
                 LOG.debug("Skipping segment LMA:0x%08x, VMA:0x%08x, size %d", addr,
                           segment['p_vaddr'], segment.header.p_filesz)
+
+FileProgrammer._FORMAT_READERS = {
+    'axf': FileProgrammer._read_elf,
+    'bin': FileProgrammer._read_bin,
+    'elf': FileProgrammer._read_elf,
+    'hex': FileProgrammer._read_hex,
+    }
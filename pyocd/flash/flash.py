@@ -24,6 +24,7 @@ from ..core import exceptions
 from ..core.target import Target
 from ..core.exceptions import (FlashFailure, FlashEraseFailure, FlashProgramFailure)
 from ..utility.mask import (align_down, msb)
+from ..utility.rle import rle_encode
 from ..utility.timeout import Timeout
 from .builder import FlashBuilder
 
@@ -47,6 +48,17 @@ _ANALYZER_CODE = (
     0x00000042,
     )
 
+# Program to decode run-length encoded page data (see pyocd.utility.rle) and then program the page.
+# The arguments are the same as for ProgramPage(), plus the destination page buffer:
+#   r0=address, r1=size, r2=encoded data, r3=page buffer
+# After decoding, it tail calls ProgramPage() with r2 set to the page buffer. Code is relocatable and
+# only needs to be on a 4 byte boundary. The last word must be set to the address of ProgramPage() with
+# bit 0 set. Compatible with all Cortex-M architectures.
+_RLE_DECOMPRESSOR_CODE = (
+    0x1859b41b, 0xd213428b, 0x32017810, 0xd2072880, 0x78143001, 0x701c3201, 0x38013301, 0xe7f1d1f9,
+    0x7814387d, 0x701c3201, 0x38013301, 0xe7e9d1fb, 0x4b01bc17, 0x46c04718, 0x00000000,
+    )
+
 @dataclass
 class SectorInfo:
     """@brief Info about an erase sector."""
@@ -96,6 +108,7 @@ class Flash:
     - `pc_erase_sector`: Address of the `EraseSector()` entry point.
     - `pc_program_page`: Address of the `ProgramPage()` entry point.
     - `pc_unInit`: Address of the `UnInit()` entry point. Optional.
+    - `pc_blank_check`: Address of the `BlankCheck()` entry point. Optional.
     - `begin_data`: Base address of the page buffer. Used if `page_buffers` is not provided.
     - `page_buffers`: An optional list of base addresses for page buffers. The buffers must be at
         least as large as the region's page_size attribute. If at least 2 buffers are included in
@@ -134,6 +147,7 @@ class Flash:
         self._region = None
         self._did_prepare_target = False
         self._active_operation = None
+        self._decompressor_address = None
         if flash_algo is not None:
             self.is_valid = True
             self.use_analyzer = flash_algo['analyzer_supported']
@@ -181,6 +195,20 @@ class Flash:
     def page_buffer_count(self):
         return len(self.page_buffers)
 
+    @property
+    def is_compressed_programming_enabled(self):
+        """@brief Whether program_page() sends compressed page data.
+
+        Requires the `flash.compress` option to be enabled and at least two page buffers, one for the
+        compressed data and decompressor, and the other for the decompressed page.
+        """
+        return (len(self.page_buffers) > 1) and self.target.session.options.get('flash.compress')
+
+    @property
+    def is_blank_check_supported(self):
+        """@brief Whether the algo has a BlankCheck() function, for use by blank_check()."""
+        return self._is_api_valid('pc_blank_check')
+
     @property
     def is_erase_all_supported(self):
         return self._is_api_valid('pc_eraseAll')
@@ -240,6 +268,7 @@ class Flash:
 
             # Load flash algo code into target RAM.
             self.target.write_memory_block32(self.flash_algo['load_address'], self.flash_algo['instructions'])
+            self._decompressor_address = None
 
             # Write stack canary if we know the expected end of stack address.
             if self.end_stack is not None:
@@ -361,6 +390,28 @@ class Flash:
         elif result != 0:
             raise FlashEraseFailure('flash erase all failure', result_code=result)
 
+    def blank_check(self, address, size):
+        """@brief Check whether a range of flash is erased using the algo's BlankCheck() function.
+
+        The algo must be inited, normally for the erase operation.
+
+        @return Boolean indicating whether the range is erased.
+        @exception FlashFailure
+        """
+        assert self._active_operation is not None
+        assert self.region is not None
+
+        TRACE.debug("call blank_check(addr=%x, len=%x)", address, size)
+        result = self._call_function_and_wait(self.flash_algo['pc_blank_check'], address, size,
+                self.region.erased_byte_value,
+                timeout=self.target.session.options.get('flash.timeout.erase_sector'))
+
+        # check the return code
+        TRACE.debug("blank_check result = %d", result)
+        if result == self.TIMEOUT_ERROR:
+            raise FlashFailure('flash blank check timed out', address=address)
+        return result == 0
+
     def erase_sector(self, address):
         """@brief Erase one sector.
 
@@ -390,13 +441,18 @@ class Flash:
         # prevent security settings from locking the device
         bytes = self.override_security_bits(address, bytes)
 
-        # first transfer in RAM
-        self.target.write_memory_block8(self.begin_data, bytes)
+        result = None
+        if self.is_compressed_programming_enabled:
+            result = self._program_page_compressed(address, bytes)
 
-        # update core register to execute the program_page subroutine
-        TRACE.debug("call program_page(addr=%x, len=%x, data=%x)", address, len(bytes), self.begin_data)
-        result = self._call_function_and_wait(self.flash_algo['pc_program_page'], address, len(bytes), self.begin_data,
-                timeout=self.target.session.options.get('flash.timeout.program'))
+        if result is None:
+            # first transfer in RAM
+            self._write_buffer(self.begin_data, bytes)
+
+            # update core register to execute the program_page subroutine
+            TRACE.debug("call program_page(addr=%x, len=%x, data=%x)", address, len(bytes), self.begin_data)
+            result = self._call_function_and_wait(self.flash_algo['pc_program_page'], address, len(bytes), self.begin_data,
+                    timeout=self.target.session.options.get('flash.timeout.program'))
 
         # check the return code
         TRACE.debug("program_page result = %d", result)
@@ -405,6 +461,35 @@ class Flash:
         elif result != 0:
             raise FlashProgramFailure('flash program page failure', address=address, result_code=result)
 
+    def _program_page_compressed(self, address, data):
+        """@brief Program a page by sending run-length encoded data to be expanded on the target.
+
+        The encoded data is written to the start of the second page buffer, and the decompressor to
+        its end. The decompressor expands the data into the first page buffer, then calls ProgramPage().
+
+        @return The ProgramPage() result, or None if the data doesn't compress well enough and must be
+            programmed normally.
+        """
+        decompressor_size = len(_RLE_DECOMPRESSOR_CODE) * 4
+        decompressor_address = self.page_buffers[1] + align_down(len(data) - decompressor_size, 4)
+        encoded = rle_encode(data)
+        if len(encoded) >= decompressor_address - self.page_buffers[1]:
+            return None
+
+        # Load the decompressor if the buffer was overwritten or the page size changed.
+        if self._decompressor_address != decompressor_address:
+            code = list(_RLE_DECOMPRESSOR_CODE)
+            code[-1] = self.flash_algo['pc_program_page'] | 1
+            self.target.write_memory_block32(decompressor_address, code)
+            self._decompressor_address = decompressor_address
+
+        self.target.write_memory_from(self.page_buffers[1], encoded)
+
+        TRACE.debug("call decompress and program_page(addr=%x, len=%x, data=%x, encoded=%x)",
+                address, len(data), self.page_buffers[0], len(encoded))
+        return self._call_function_and_wait(decompressor_address, address, len(data), self.page_buffers[1],
+                self.page_buffers[0], timeout=self.target.session.options.get('flash.timeout.program'))
+
     def start_program_page_with_buffer(self, buffer_number, address):
         """@brief Start flashing one or more pages.
         """
@@ -430,8 +515,12 @@ class Flash:
         # prevent security settings from locking the device
         bytes = self.override_security_bits(address, bytes)
 
+        # The decompressor, if loaded, is in the second buffer.
+        if buffer_number == 1:
+            self._decompressor_address = None
+
         # transfer the buffer to device RAM
-        self.target.write_memory_block8(self.page_buffers[buffer_number], bytes)
+        self._write_buffer(self.page_buffers[buffer_number], bytes)
 
     def program_phrase(self, address, bytes):
         """@brief Flash a portion of a page.
@@ -455,7 +544,7 @@ class Flash:
         bytes = self.override_security_bits(address, bytes)
 
         # first transfer in RAM
-        self.target.write_memory_block8(self.begin_data, bytes)
+        self._write_buffer(self.begin_data, bytes)
 
         # update core register to execute the program_page subroutine
         TRACE.debug("call program_phrase(addr=%x, len=%x, data=%x)", address, len(bytes), self.begin_data)
@@ -468,6 +557,13 @@ class Flash:
         elif result != 0:
             raise FlashProgramFailure('flash program phrase failure', address=address, result_code=result)
 
+    def _write_buffer(self, address, data):
+        """@brief Write page data to algorithm RAM, directly from the buffer if it is bytes-like."""
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            self.target.write_memory_from(address, data)
+        else:
+            self.target.write_memory_block8(address, data)
+
     def _get_region_or_subregion(self, addr: int):
         assert self.region is not None
         if not self.region.contains_address(addr):
@@ -20,7 +20,7 @@ from __future__ import annotations
 import logging
 from dataclasses import dataclass
 from time import time
-from typing import (TYPE_CHECKING, Any, Callable, Dict, List, Optional, Union, cast)
+from typing import (TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Tuple, Union, cast)
 
 from ..core import exceptions
 from ..core.memory_map import RamRegion
@@ -39,7 +39,7 @@ ProgressCallback = Callable[[Union[int, float]], None]
 @dataclass
 class DataChunk:
     addr: int
-    data: Union[bytes, bytearray]
+    data: Union[bytes, bytearray, memoryview]
 
 class RamBuilder(MemoryBuilder):
     """@brief Memory builder for writing potentially discontiguous data to RAM."""
@@ -55,7 +55,7 @@ class RamBuilder(MemoryBuilder):
         self._region = region
         self._chunks: List[DataChunk] = []
 
-    def add_data(self, addr: int, data: Union[bytes, bytearray]) -> None:
+    def add_data(self, addr: int, data: Union[bytes, bytearray, memoryview]) -> None:
         # Make sure this address range is contained by our region.
         if not self._region.contains_range(start=addr, length=len(data)):
             raise ValueError(f"Attempt to add data ({addr:#010x}-{addr + len(data) - 1:#010x}) outside "
@@ -213,11 +213,14 @@ class MemoryLoader:
     def add_data(self, address, data):
         """@brief Add a chunk of data to be programmed.
 
-        The data may cross memory region boundaries, as long as the regions are contiguous.
+        The data may cross memory region boundaries, as long as the regions are contiguous. Builders keep
+        the data until commit(). Read-only bytes-like data, such as bytes or a read-only memoryview, is
+        split between regions using memoryview slices, so it isn't copied. Mutable data, such as a
+        bytearray or writable memoryview, is copied so the caller may reuse the buffer.
 
         @param self
         @param address Integer address for where the first byte of _data_ should be written.
-        @param data A list of byte values to be programmed at the given address.
+        @param data A bytes-like object or a list of byte values to be programmed at the given address.
 
         @return The MemoryLoader instance is returned, to allow chaining further add_data()
             calls or a call to commit().
@@ -227,48 +230,80 @@ class MemoryLoader:
             instance associated with it, which indicates that the target connect sequence did
             not run successfully.
         """
-        while len(data):
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            data = memoryview(data).cast('B')
+            if not data.readonly:
+                data = memoryview(bytes(data))
+        else:
+            data = bytes(data)
+
+        offset = 0
+        data_length = len(data)
+        while offset < data_length:
             # Look up the memory region for this address.
             region = self._map.get_region_for_address(address)
             if region is None:
                 raise ValueError("no memory region defined for address 0x%08x" % address)
 
-            region_builder = self._builders.get(region, None)
-
-            # Create the builder for this region if we don't already have one. This also verifies
-            # that the region is of a type we can write to.
-            if region_builder is None:
-                if region.is_flash:
-                    if region.flash is None:
-                        raise exceptions.TargetSupportError(f"flash memory region at address {address:#010x} has no flash instance")
-                    region_builder = region.flash.get_flash_builder()
-                    region_builder.log_performance = False
-                elif region.is_writable:
-                    # Casting to a RamRegion is technically not quite right, since we're only checking
-                    # that the region is writable
-                    region_builder = RamBuilder(self._session, cast(RamRegion, region))
-                else:
-                    raise ValueError(f"memory region at address {address:#010x} is not writable")
-
-                # Save the new builder.
-                assert region_builder is not None
-                self._builders[region] = region_builder
+            region_builder = self._get_builder(region, address)
 
             # Take as much data as is contained by this region.
-            program_length = min(len(data), region.end - address + 1)
+            program_length = min(data_length - offset, region.end - address + 1)
             assert program_length != 0
 
             # Add data to this region's builder.
-            region_builder.add_data(address, data[:program_length])
+            region_builder.add_data(address, data[offset:offset + program_length])
 
             # Advance.
-            data = data[program_length:]
+            offset += program_length
             address += program_length
             self._total_data_size += program_length
 
         return self
 
-    def commit(self):
+    def add_chunks(self, chunks: Iterable[Tuple[int, Union[bytes, bytearray, memoryview]]]) -> "MemoryLoader":
+        """@brief Add data from an iterable of (address, data) chunks.
+
+        Chunks are consumed one at a time as they are produced, for instance by a generator that
+        returns read-only memoryviews of a memory mapped file, so the caller does not have to build a
+        copy of the whole image. The same rules as for add_data() apply to each chunk, so a generator
+        may reuse one bytearray for every chunk.
+
+        Note that flash region builders still hold the data of every sector that contains data until
+        commit() is called, since all of a region's data is needed to plan erasing and programming. Host
+        memory use is therefore proportional to the size of those sectors, not to the page buffers.
+
+        @return The MemoryLoader instance is returned, to allow chaining a call to commit().
+        """
+        for address, data in chunks:
+            self.add_data(address, data)
+        return self
+
+    def _get_builder(self, region: "MemoryRegion", address: int) -> MemoryBuilder:
+        """@brief Return the builder for a region, creating it if necessary.
+
+        Creating the builder also verifies that the region is of a type we can write to.
+        """
+        region_builder = self._builders.get(region, None)
+        if region_builder is None:
+            if region.is_flash:
+                if region.flash is None:
+                    raise exceptions.TargetSupportError(f"flash memory region at address {address:#010x} has no flash instance")
+                region_builder = region.flash.get_flash_builder()
+                region_builder.log_performance = False
+            elif region.is_writable:
+                # Casting to a RamRegion is technically not quite right, since we're only checking
+                # that the region is writable
+                region_builder = RamBuilder(self._session, cast(RamRegion, region))
+            else:
+                raise ValueError(f"memory region at address {address:#010x} is not writable")
+
+            # Save the new builder.
+            assert region_builder is not None
+            self._builders[region] = region_builder
+        return region_builder
+
+    def commit(self) -> List[ProgrammingInfo]:
         """@brief Write all collected data to memory.
 
         This routine ensures that chip erase is only used once if either the auto mode or chip
@@ -280,6 +315,8 @@ class MemoryLoader:
         algorithm for the first region doesn't actually erase the entire chip (all regions).
 
         After calling this method, the loader instance can be reused to program more data.
+
+        @return List of ProgrammingInfo for each memory region that was written, in address order.
         """
         didChipErase = False
         perfList = []
@@ -308,6 +345,8 @@ class MemoryLoader:
         # Clear state to allow reuse.
         self._reset_state()
 
+        return perfList
+
     def _log_performance(self, perf_list):
         """@brief Log a report of programming performance numbers."""
         # Compute overall performance numbers.
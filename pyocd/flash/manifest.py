@@ -0,0 +1,236 @@
+# pyOCD debugger
+# Copyright (c) 2026 PyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from contextlib import contextmanager
+import errno
+import json
+import logging
+import os
+import sys
+import threading
+from binascii import crc32
+from time import (monotonic, sleep)
+from typing import (IO, Any, Dict, Iterable, Iterator, Optional, Sequence, Tuple, Union)
+
+if sys.platform == 'win32':
+    import msvcrt
+
+    ## Errors raised by msvcrt.locking() when another process holds the lock.
+    _LOCK_CONTENTION_ERRNOS = (errno.EACCES, errno.EDEADLK)
+
+    def _try_lock_file(f: IO[Any]) -> None:
+        # Lock the first byte of the file.
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+
+    def _unlock_file(f: IO[Any]) -> None:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    ## Errors raised by a non-blocking flock() when another process holds the lock.
+    _LOCK_CONTENTION_ERRNOS = (errno.EAGAIN, errno.EWOULDBLOCK, errno.EACCES)
+
+    def _try_lock_file(f: IO[Any]) -> None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _unlock_file(f: IO[Any]) -> None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+LOG = logging.getLogger(__name__)
+
+## Seconds to wait for another process to release the manifest lock.
+LOCK_TIMEOUT = 30.0
+
+## Seconds between attempts to take the manifest lock.
+LOCK_RETRY_INTERVAL = 0.05
+
+def _lock_file(f: IO[Any], path: str, timeout: Optional[float] = None) -> None:
+    """@brief Take an exclusive lock on an open file, waiting while another process holds it.
+
+    @exception OSError Raised if the lock can't be taken, or if it is still held by another process
+        after _timeout_ seconds. The timeout defaults to LOCK_TIMEOUT.
+    """
+    deadline = monotonic() + (LOCK_TIMEOUT if timeout is None else timeout)
+    logged = False
+    while True:
+        try:
+            _try_lock_file(f)
+            return
+        except OSError as e:
+            if e.errno not in _LOCK_CONTENTION_ERRNOS:
+                raise
+        if monotonic() >= deadline:
+            raise TimeoutError(errno.ETIMEDOUT, "timed out waiting for lock", path)
+        if not logged:
+            LOG.debug("Waiting for another process to release %s", path)
+            logged = True
+        sleep(LOCK_RETRY_INTERVAL)
+
+def page_crc(data: Union[bytes, bytearray, memoryview, Sequence[int]], size: int, erased_byte_value: int = 0xff) -> int:
+    """@brief CRC32 of page data padded to the page size.
+
+    This is the same value the flash algorithm CRC analyzer computes for the page.
+    """
+    if len(data) < size:
+        buf = bytearray(data)
+        buf.extend(bytes([erased_byte_value]) * (size - len(buf)))
+        return crc32(buf) & 0xFFFFFFFF
+    if not isinstance(data, (bytes, bytearray, memoryview)):
+        data = bytes(data)
+    return crc32(data) & 0xFFFFFFFF
+
+class FlashManifest:
+    """@brief Persistent record of the page CRCs last programmed into flash regions.
+
+    The manifest is a JSON file containing one entry per flash region of each target, identified by a
+    key made from the probe's unique ID, the target type, and the region. Each entry maps page
+    addresses to the CRC32 of the page contents. Since entries are only as reliable as the
+    assumption that nothing else modified the flash since it was recorded, users of the manifest must
+    verify a sample of pages before trusting an entry.
+
+    The file is re-read before every save and only the modified entries are replaced, so several
+    processes or threads using the same file for different targets don't lose each other's entries.
+    Each read-modify-write holds an exclusive lock on a separate `.lock` file next to the manifest,
+    which serializes processes, as well as a lock that serializes the threads of one process. Writes
+    are atomic.
+    """
+
+    ## Version of the file format.
+    VERSION = 1
+
+    ## Lock shared by all instances to serialize read-modify-write of manifest files within a process.
+    _file_lock = threading.Lock()
+
+    def __init__(self, path: str) -> None:
+        self._path = os.path.abspath(os.path.expanduser(path))
+        self._lock_path = self._path + ".lock"
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @staticmethod
+    def make_target_prefix(probe_uid: str, target_type: str) -> str:
+        """@brief Build the common prefix of the keys for all regions of a target."""
+        return "%s/%s/" % (probe_uid, target_type)
+
+    @classmethod
+    def make_key(cls, probe_uid: str, target_type: str, region_name: Optional[str], region_start: int) -> str:
+        """@brief Build the key for a flash region of a target."""
+        return cls.make_target_prefix(probe_uid, target_type) + "%s@%#010x" % (region_name or "", region_start)
+
+    def get(self, key: str) -> Optional[Dict[int, int]]:
+        """@brief Return the recorded page CRCs for a region.
+        @return Either None or a dict of page address to CRC32.
+        """
+        with self._locked():
+            entry = self._load().get(key)
+        if entry is None:
+            return None
+        return {int(addr, 0): crc for addr, crc in entry.items()}
+
+    def update(self, key: str, crcs: Dict[int, int], erased_ranges: Iterable[Tuple[int, int]] = ()) -> None:
+        """@brief Record new page CRCs for a region.
+
+        @param self
+        @param key Region key from make_key().
+        @param crcs Dict of page address to CRC32 for pages that were programmed or verified.
+        @param erased_ranges Iterable of (start, end) address ranges, with exclusive end, that were
+            erased. Recorded pages within these ranges that are not in _crcs_ are removed.
+        """
+        erased_ranges = list(erased_ranges)
+        with self._locked():
+            entries = self._load()
+            entry = entries.get(key, {})
+            entry = {addr: crc for addr, crc in entry.items()
+                    if not any(start <= int(addr, 0) < end for start, end in erased_ranges)}
+            entry.update({"%#010x" % addr: crc for addr, crc in crcs.items()})
+            entries[key] = entry
+            self._save(entries)
+
+    def remove(self, key_prefix: str) -> None:
+        """@brief Remove all entries whose key starts with the given prefix."""
+        with self._locked():
+            entries = self._load()
+            keys = [key for key in entries if key.startswith(key_prefix)]
+            if keys:
+                for key in keys:
+                    del entries[key]
+                self._save(entries)
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """@brief Context manager that gives exclusive access to the manifest file.
+
+        If the lock file cannot be created, for instance because the directory is read-only, or another
+        process holds the lock for longer than LOCK_TIMEOUT, only the threads of this process are
+        serialized.
+        """
+        with self._file_lock:
+            lock_file: Optional[IO[Any]] = None
+            try:
+                dir_path = os.path.dirname(self._lock_path)
+                if dir_path:
+                    os.makedirs(dir_path, exist_ok=True)
+                lock_file = open(self._lock_path, 'a+')
+                _lock_file(lock_file, self._lock_path)
+            except OSError as e:
+                if isinstance(e, TimeoutError):
+                    LOG.warning("Flash manifest %s is locked by another process; updating it anyway",
+                            self._path)
+                else:
+                    LOG.debug("Unable to lock flash manifest %s: %s", self._path, e)
+                if lock_file is not None:
+                    lock_file.close()
+                    lock_file = None
+            try:
+                yield
+            finally:
+                if lock_file is not None:
+                    _unlock_file(lock_file)
+                    lock_file.close()
+
+    def _load(self) -> Dict[str, Dict[str, int]]:
+        try:
+            with open(self._path, 'r') as f:
+                contents: Dict[str, Any] = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            LOG.warning("Ignoring unreadable flash manifest %s: %s", self._path, e)
+            return {}
+        if not isinstance(contents, dict) or contents.get('version') != self.VERSION:
+            LOG.debug("Ignoring flash manifest %s with unsupported version", self._path)
+            return {}
+        return contents.get('regions', {})
+
+    def _save(self, entries: Dict[str, Dict[str, int]]) -> None:
+        temp_path = "%s.%d.%d.tmp" % (self._path, os.getpid(), threading.get_ident())
+        try:
+            dir_path = os.path.dirname(self._path)
+            if dir_path:
+                os.makedirs(dir_path, exist_ok=True)
+            with open(temp_path, 'w') as f:
+                json.dump({'version': self.VERSION, 'regions': entries}, f, indent=1, sort_keys=True)
+            os.replace(temp_path, self._path)
+        except OSError as e:
+            LOG.warning("Failed to write flash manifest %s: %s", self._path, e)
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
@@ -0,0 +1,234 @@
+# pyOCD debugger
+# Copyright (c) 2026 PyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from dataclasses import (dataclass, field)
+import logging
+import threading
+from time import perf_counter
+from typing import (IO, TYPE_CHECKING, Any, Dict, List, Mapping, Optional, Sequence, Union)
+
+from ..core.helpers import ConnectHelper
+from ..core.session import Session
+from .file_programmer import (FileProgrammer, ProgramImage)
+from .loader import ProgressCallback
+
+if TYPE_CHECKING:
+    from ..probe.debug_probe import DebugProbe
+    from .builder import ProgrammingInfo
+
+LOG = logging.getLogger(__name__)
+
+@dataclass
+class ProbeResult:
+    """@brief Outcome of programming the target connected to one probe."""
+    unique_id: str
+    description: str
+    target_type: Optional[str] = None
+    ## True if programming completed without error.
+    success: bool = False
+    ## Description of the error that stopped programming, if any.
+    error: Optional[str] = None
+    ## Seconds from opening the session until it was closed.
+    duration: float = 0.0
+    programming_info: List["ProgrammingInfo"] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        info = self.programming_info
+        return {
+            'unique_id': self.unique_id,
+            'description': self.description,
+            'target_type': self.target_type,
+            'status': 'ok' if self.success else 'failed',
+            'error': self.error,
+            'duration': round(self.duration, 3),
+            'total_bytes': sum(perf.total_byte_count for perf in info),
+            'programmed_bytes': sum(perf.program_byte_count for perf in info),
+            'skipped_bytes': sum(perf.skipped_byte_count for perf in info),
+            'erased_bytes': sum(perf.erase_byte_count for perf in info),
+            }
+
+class ParallelProgrammer:
+    """@brief Program the same image into the targets of several probes at once.
+
+    The image is read and parsed a single time, then each probe is given its own session and thread
+    that programs the shared image with a FileProgrammer. A failure on one probe does not stop the
+    others; the outcome of each is returned as a ProbeResult, and report() produces a summary suitable
+    for writing as JSON.
+
+    Progress of all probes is combined into a single callback that receives the average completion
+    fraction, so that one progress bar covers the whole operation.
+
+    The sessions run concurrently, so code they use must take options from its own session rather
+    than from Session.get_current(), which returns whichever session was created last. This matters
+    for probe-specific options from the `probes` section of a config file. The CMSIS-DAP backend and
+    the flash algorithm cache are given their session's options. Options that are read while probes
+    are enumerated, such as `cmsis_dap.prefer_v1`, are global.
+
+    Example:
+    @code
+    programmer = ParallelProgrammer(options={'target_override': 'k64f'})
+    results = programmer.program("app.hex")
+    print(json.dumps(programmer.report(results), indent=2))
+    @endcode
+    """
+
+    def __init__(self,
+            probes: Optional[Sequence["DebugProbe"]] = None,
+            unique_id: Optional[str] = None,
+            progress: Optional[ProgressCallback] = None,
+            chip_erase: Optional[str] = None,
+            smart_flash: Optional[bool] = None,
+            trust_crc: Optional[bool] = None,
+            keep_unwritten: Optional[bool] = None,
+            no_reset: Optional[bool] = None,
+            options: Optional[Mapping[str, Any]] = None,
+            **kwargs: Any
+            ) -> None:
+        """@brief Constructor.
+
+        @param self
+        @param probes Debug probes to use. If not provided, all connected probes whose unique ID
+            matches _unique_id_ are used.
+        @param unique_id String to match against probes' unique IDs using a contains match. Only used
+            if _probes_ is not provided.
+        @param progress A progress report handler as a callable that takes a percentage completed.
+            Called from the programming threads, but never concurrently.
+        @param chip_erase See FileProgrammer.
+        @param smart_flash See FileProgrammer.
+        @param trust_crc See FileProgrammer.
+        @param keep_unwritten See FileProgrammer.
+        @param no_reset See FileProgrammer.
+        @param options Dictionary of session options, applied to every session.
+        @param kwargs Other keyword arguments are passed to the Session constructor.
+        """
+        if probes is None:
+            probes = ConnectHelper.get_all_connected_probes(blocking=False, unique_id=unique_id)
+        self._probes = list(probes)
+        self._progress = progress
+        self._programmer_args: Dict[str, Any] = dict(
+                chip_erase=chip_erase,
+                smart_flash=smart_flash,
+                trust_crc=trust_crc,
+                keep_unwritten=keep_unwritten,
+                no_reset=no_reset,
+                )
+        self._options = options
+        self._session_kwargs = kwargs
+        self._lock = threading.Lock()
+        self._probe_progress: List[float] = []
+        self._duration = 0.0
+        self._images: List[ProgramImage] = []
+
+    @property
+    def probes(self) -> List["DebugProbe"]:
+        """@brief The probes that will be programmed."""
+        return self._probes
+
+    def program(self, file_or_path: Union[str, IO[bytes], ProgramImage], file_format: Optional[str] = None,
+            **kwargs: Any) -> List[ProbeResult]:
+        """@brief Program a file into the targets of all probes.
+
+        The parameters are the same as for FileProgrammer.program(), except that an already read
+        ProgramImage may also be passed.
+
+        @return List of ProbeResult in the same order as the probes list.
+
+        @exception FileNotFoundError Provided file_or_path string does not reference a file.
+        @exception ValueError Invalid argument value.
+        """
+        if isinstance(file_or_path, ProgramImage):
+            image = file_or_path
+        else:
+            image = FileProgrammer.read_image(file_or_path, file_format, **kwargs)
+        return self.program_images([image])
+
+    def program_images(self, images: Sequence[ProgramImage]) -> List[ProbeResult]:
+        """@brief Program several images into the targets of all probes.
+
+        Each target's session is opened once, and the images are programmed in order.
+
+        @return List of ProbeResult in the same order as the probes list.
+        """
+        images = list(images)
+        self._images = images
+
+        results = [ProbeResult(probe.unique_id, probe.description) for probe in self._probes]
+        self._probe_progress = [0.0] * len(self._probes)
+        if self._progress is not None:
+            self._progress(0.0)
+
+        start = perf_counter()
+        threads = [
+            threading.Thread(target=self._program_thread, args=(index, images, result),
+                    name="program %s" % result.unique_id, daemon=True)
+            for index, result in enumerate(results)
+            ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self._duration = perf_counter() - start
+
+        return results
+
+    def report(self, results: Sequence[ProbeResult]) -> Dict[str, Any]:
+        """@brief Build a summary of the results of program() that can be serialized as JSON."""
+        return {
+            'images': [{'format': image.format, 'size': image.size} for image in self._images],
+            'duration': round(self._duration, 3),
+            'succeeded': sum(1 for result in results if result.success),
+            'failed': sum(1 for result in results if not result.success),
+            'probes': [result.to_dict() for result in results],
+            }
+
+    def _update_progress(self, index: int, progress: float) -> None:
+        with self._lock:
+            self._probe_progress[index] = progress
+            if self._progress is not None:
+                self._progress(sum(self._probe_progress) / len(self._probe_progress))
+
+    def _program_thread(self, index: int, images: List[ProgramImage], result: ProbeResult) -> None:
+        start = perf_counter()
+        try:
+            result.programming_info = self._program_probe(index, images, result)
+            result.success = True
+        except Exception as e:
+            LOG.error("Programming with probe %s failed: %s", result.unique_id, e,
+                    exc_info=Session.get_current().log_tracebacks)
+            result.error = str(e) or e.__class__.__name__
+        finally:
+            result.duration = perf_counter() - start
+            # A failed probe counts as complete so the combined progress still reaches 100%.
+            self._update_progress(index, 1.0)
+
+    def _program_probe(self, index: int, images: List[ProgramImage], result: ProbeResult) \
+            -> List["ProgrammingInfo"]:
+        """@brief Open a session on one probe and program the images."""
+        session = Session(self._probes[index], options=self._options, **self._session_kwargs)
+        total_size = sum(image.size for image in images) or 1
+        info: List["ProgrammingInfo"] = []
+        with session:
+            assert session.target
+            result.target_type = session.options.get('target_override') or session.target.part_number
+            offset = 0.0
+            for image in images:
+                fraction = image.size / total_size
+                programmer = FileProgrammer(session,
+                                progress=lambda progress: self._update_progress(index, offset + progress * fraction),
+                                **self._programmer_args)
+                info += programmer.program_image(image)
+                offset += fraction
+        return info
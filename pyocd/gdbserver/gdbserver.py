@@ -31,11 +31,11 @@ from ..utility.cmdline import convert_vector_catch
 from ..utility.conversion import (hex_to_byte_list, hex_encode, hex_decode, hex8_to_u32le)
 from ..utility.compatibility import (to_bytes_safe, to_str_safe)
 from ..utility.server import StreamServer
-from ..utility.timeout import Timeout
 from ..trace.swv import SWVReader
 from ..utility.rtt_server import RTTServer
 from ..utility.sockets import ListenerSocket
 from .syscall import GDBSyscallIOHandler
+from .halt_watch import HaltWatcher
 from ..debug import semihost
 from .context_facade import GDBDebugContextFacade
 from .symbols import GDBSymbolProvider
@@ -202,6 +202,9 @@ class GDBServer(threading.Thread):
         # Start with RTT disabled
         self.rtt_server: Optional[RTTServer] = None
 
+        # Created for each connection, as it waits on the connection's interrupt event.
+        self._halt_watcher: Optional[HaltWatcher] = None
+
         #
         # If SWV is enabled, create a SWVReader thread. Note that we only do
         # this if the core is 0: SWV is not a per-core construct, and can't
@@ -293,6 +296,7 @@ class GDBServer(threading.Thread):
         if self.packet_io:
             self.packet_io.stop()
             self.packet_io = None
+        self._stop_halt_watcher()
         if self.semihost:
             self.semihost.cleanup()
             self.semihost = None
@@ -307,6 +311,35 @@ class GDBServer(threading.Thread):
             self.rtt_server = None
         self.abstract_socket.cleanup()
 
+    def _create_halt_watcher(self) -> HaltWatcher:
+        assert self.packet_io
+        watcher = HaltWatcher(self.session, self.target, self.lock, self.packet_io.interrupt_event,
+                self.shutdown_event, name="core%d" % self.core)
+        watcher.add_service(self._poll_rtt, self._rtt_poll_interval)
+        return watcher
+
+    def _stop_halt_watcher(self) -> None:
+        if self._halt_watcher:
+            self._halt_watcher.stop()
+            self._halt_watcher = None
+
+    def _poll_rtt(self) -> bool:
+        """@brief Halt watcher service for RTT.
+
+        Always returns False, so that RTT traffic does not reset the halt poll interval. The RTT poll rate
+        is instead set by the RTT server's scheduler through _rtt_poll_interval().
+        """
+        if self.rtt_server:
+            self.rtt_server.poll()
+        return False
+
+    def _rtt_poll_interval(self) -> float:
+        """@brief Halt watcher service interval for RTT."""
+        rtt_server = self.rtt_server
+        if rtt_server and rtt_server.running:
+            return rtt_server.poll_interval
+        return float('inf')
+
     def _cleanup_for_next_connection(self):
         self.non_stop = False
         self.thread_provider = None
@@ -330,6 +363,7 @@ class GDBServer(threading.Thread):
                     connected = self.abstract_socket.connect()
                     if connected != None:
                         self.packet_io = GDBServerPacketIOThread(self.abstract_socket)
+                        self._halt_watcher = self._create_halt_watcher()
                         break
 
                 if self.shutdown_event.is_set():
@@ -404,6 +438,7 @@ class GDBServer(threading.Thread):
         self.abstract_socket.close()
         self.packet_io.stop()
         self.packet_io = None
+        self._stop_halt_watcher()
 
         # If persisting is not enabled, we exit on detach. Otherwise prepare for a new connection.
         if self.persist:
@@ -592,86 +627,69 @@ class GDBServer(threading.Thread):
                 self.thread_provider.read_from_target = True
 
         val = b''
+        watcher = self._halt_watcher
+        assert watcher
 
-        # Timeout used only if the target starts returning faults. The is_running property of this timeout
-        # also serves as a flag that a fault occurred and we're attempting to retry.
-        fault_retry_timeout = Timeout(self.session.options.get('debug.status_fault_retry_timeout'))
-
-        while fault_retry_timeout.check():
-            if self.shutdown_event.is_set():
-                self.packet_io.interrupt_event.clear()
-                return self.create_rsp_packet(val)
+        while True:
+            watcher.arm()
 
+            # Wait for the watcher to report a halt, ctrl-c, or error.
             self.lock.release()
-
-            # Wait for a ctrl-c to be received.
-            if self.packet_io.interrupt_event.wait(0.01):
+            try:
+                result, error = watcher.wait()
+            finally:
                 self.lock.acquire()
+
+            if result == HaltWatcher.Result.SHUTDOWN:
+                self.packet_io.interrupt_event.clear()
+                break
+            elif result == HaltWatcher.Result.INTERRUPTED:
                 LOG.debug("receive CTRL-C")
                 self.packet_io.interrupt_event.clear()
 
-                # Be careful about reading the target state. If we previously got a fault (the timeout
-                # is running) then ignore the error. In all cases we still return SIGINT.
+                # Be careful about reading the target state. If we previously got a fault then ignore
+                # the error. In all cases we still return SIGINT.
                 try:
                     self.target.halt()
                     val = self.get_t_response(forceSignal=signals.SIGINT)
                 except exceptions.TransferError as e:
                     # Note: if the target is not actually halted, gdb can get confused from this point on.
                     # But there's not much we can do if we're getting faults attempting to control it.
-                    if not fault_retry_timeout.is_running:
+                    if not watcher.is_retrying_faults:
                         LOG.error('Error reading target status: %s', e, exc_info=self.session.log_tracebacks)
                     val = ('S%02x' % signals.SIGINT).encode()
                 break
-
-            self.lock.acquire()
-
-            try:
-                state = self.target.get_state()
-
-                if self.rtt_server:
-                    self.rtt_server.poll()
-
-                # If we were able to successfully read the target state after previously receiving a fault,
-                # then clear the timeout.
-                if fault_retry_timeout.is_running:
-                    LOG.info("Target control reestablished.")
-                    fault_retry_timeout.clear()
-
-                if state == Target.State.HALTED:
-                    # Handle semihosting
-                    if self.enable_semihosting:
-                        was_semihost = self.semihost.check_and_handle_semihost_request()
-
-                        if was_semihost:
-                            self.target.resume()
-                            continue
-
-                    pc = self.target_context.read_core_register('pc')
-                    LOG.debug("state halted; pc=0x%08x", pc)
-                    val = self.get_t_response()
-                    break
-            except exceptions.TransferError as e:
-                # If we get any sort of transfer error or fault while checking target status, then start
-                # a timeout running. Upon a later successful status check, the timeout is cleared. In the event
-                # that the timeout expires, this loop is exited and an error raised to gdb.
-                if not fault_retry_timeout.is_running:
-                    LOG.warning("Transfer error while checking target status; retrying: %s", e,
-                            exc_info=self.session.log_tracebacks)
-                fault_retry_timeout.start()
-            except exceptions.Error as e:
+            elif result == HaltWatcher.Result.FAULT_TIMEOUT:
+                LOG.error("Timed out while attempting to reestablish control over target.")
+                val = ('S%02x' % signals.SIGSEGV).encode()
+                break
+            elif result == HaltWatcher.Result.ERROR:
                 try:
                     self.target.halt()
                 except exceptions.Error:
                     pass
-                LOG.warning('Error while target was running: %s', e, exc_info=self.session.log_tracebacks)
+                LOG.warning('Error while target was running: %s', error, exc_info=self.session.log_tracebacks)
                 # This exception was not a transfer error, so reading the target state should be ok.
                 val = ('S%02x' % self.target_facade.get_signal_value()).encode()
                 break
 
-        # Check if we exited the above loop due to a timeout after a fault.
-        if fault_retry_timeout.did_time_out:
-            LOG.error("Timed out while attempting to reestablish control over target.")
-            val = ('S%02x' % signals.SIGSEGV).encode()
+            assert result == HaltWatcher.Result.HALTED
+            try:
+                # Handle semihosting
+                if self.enable_semihosting:
+                    was_semihost = self.semihost.check_and_handle_semihost_request()
+
+                    if was_semihost:
+                        self.target.resume()
+                        continue
+
+                pc = self.target_context.read_core_register('pc')
+                LOG.debug("state halted; pc=0x%08x", pc)
+                val = self.get_t_response()
+            except exceptions.Error as e:
+                LOG.warning('Error while handling target halt: %s', e, exc_info=self.session.log_tracebacks)
+                val = ('S%02x' % signals.SIGSEGV).encode()
+            break
 
         return self.create_rsp_packet(val)
 
@@ -851,10 +869,11 @@ class GDBServer(threading.Thread):
         TRACE_MEM.debug("GDB getMem: addr=%x len=%x", addr, length)
 
         try:
-            mem = self.target_context.read_memory_block8(addr, length)
+            mem = bytearray(length)
+            self.target_context.read_memory_into(addr, mem)
             # Flush so an exception is thrown now if invalid memory was accesses
             self.target_context.flush()
-            val = hex_encode(bytearray(mem))
+            val = hex_encode(mem)
         except exceptions.TransferError as e:
             LOG.debug("get_memory failed at 0x%x: %s", addr, str(e))
             val = b'E01' #EPERM
@@ -897,7 +916,7 @@ class GDBServer(threading.Thread):
 
         try:
             if length > 0:
-                self.target_context.write_memory_block8(addr, data)
+                self.target_context.write_memory_from(addr, bytes(data))
                 # Flush so an exception is thrown now if invalid memory was accessed
                 self.target_context.flush()
             resp = b"OK"
@@ -0,0 +1,223 @@
+# pyOCD debugger
+# Copyright (c) 2026 PyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from enum import Enum
+import logging
+import threading
+from typing import (Callable, List, Optional, Tuple, TYPE_CHECKING)
+
+from ..core import exceptions
+from ..core.target import Target
+from ..utility.timeout import (Backoff, Timeout)
+
+if TYPE_CHECKING:
+    from ..core.session import Session
+
+LOG = logging.getLogger(__name__)
+
+## Type of a service callback. Returns True if it performed any work.
+ServiceCallback = Callable[[], bool]
+
+## Type of a service interval callback. Returns the longest interval in seconds until the service
+# should be run again.
+ServiceIntervalCallback = Callable[[], float]
+
+class HaltWatcher(threading.Thread):
+    """@brief Watches a running core for it to halt.
+
+    A GDBServer arms the watcher after resuming the core, then waits for a result with wait(). While
+    armed, the watcher thread polls the core state at an adaptive interval. Polling starts at the
+    `gdbserver.halt_poll_min_interval` option right after the core is resumed, when a quick halt on a
+    nearby breakpoint is most likely, and backs off to `gdbserver.halt_poll_max_interval` while the
+    core keeps running.
+
+    Registered service callbacks, such as RTT polling, are run in the same poll after the state is
+    read, under the same lock, so that the probe is accessed in one burst per interval rather than
+    by several independent loops. A service that returns True resets the interval to the minimum. A
+    service may also provide an interval callback, which limits the interval to the one it requests.
+
+    Ctrl-C from gdb is detected immediately by waiting on the interrupt event between polls. The
+    waiting gdbserver thread is woken through a condition variable once there is a result, so no
+    thread spins while the core runs.
+
+    Transfer errors are retried for `debug.status_fault_retry_timeout` seconds, as for gdb's own
+    connection to a core that is temporarily inaccessible, for instance in a low power mode.
+
+    The caller of arm() and wait() must not hold `lock` while waiting.
+    """
+
+    class Result(Enum):
+        """@brief Reasons for the watcher to stop watching."""
+        ## The core halted.
+        HALTED = 1
+        ## gdb sent an interrupt request. The core has not been halted.
+        INTERRUPTED = 2
+        ## Transfer errors continued until the fault retry timeout expired.
+        FAULT_TIMEOUT = 3
+        ## An error other than a transfer error occurred.
+        ERROR = 4
+        ## The shutdown event was set.
+        SHUTDOWN = 5
+
+    def __init__(self,
+            session: "Session",
+            target: Target,
+            lock: threading.Lock,
+            interrupt_event: threading.Event,
+            shutdown_event: threading.Event,
+            name: str = "",
+            ) -> None:
+        super().__init__(name="halt watcher (%s)" % name, daemon=True)
+        self._session = session
+        self._target = target
+        self._lock = lock
+        self._interrupt_event = interrupt_event
+        self._shutdown_event = shutdown_event
+        self._cond = threading.Condition()
+        self._services: List[ServiceCallback] = []
+        self._service_intervals: List[ServiceIntervalCallback] = []
+        self._is_armed = False
+        self._stopping = False
+        self._result: Optional[HaltWatcher.Result] = None
+        self._error: Optional[Exception] = None
+        self._backoff = Backoff(session.options.get('gdbserver.halt_poll_min_interval'),
+                session.options.get('gdbserver.halt_poll_max_interval'))
+        self._fault_retry_timeout = Timeout(session.options.get('debug.status_fault_retry_timeout'))
+        ## Number of state polls performed, for diagnostics.
+        self.poll_count = 0
+
+    @property
+    def is_retrying_faults(self) -> bool:
+        """@brief Whether transfer errors were seen since the last successful state read."""
+        return self._fault_retry_timeout.is_running
+
+    def add_service(self, callback: ServiceCallback,
+            interval_callback: Optional[ServiceIntervalCallback] = None) -> None:
+        """@brief Add a callback to run on each poll while the core is running.
+
+        The callback is invoked from the watcher thread with the lock held. Transfer errors raised by it are
+        handled the same as errors reading the core state.
+
+        @param self
+        @param callback The service callback.
+        @param interval_callback Optional callback returning the longest interval the service can wait
+            between runs. It is invoked before each wait, without the lock held.
+        """
+        self._services.append(callback)
+        if interval_callback is not None:
+            self._service_intervals.append(interval_callback)
+
+    def arm(self) -> None:
+        """@brief Start watching for the core to halt.
+
+        Should be called just after resuming the core. The poll interval is reset to the minimum.
+        """
+        with self._cond:
+            self._result = None
+            self._error = None
+            self._backoff.reset()
+            self._is_armed = True
+            self._cond.notify_all()
+        if not self.is_alive():
+            self.start()
+
+    def wait(self) -> Tuple["HaltWatcher.Result", Optional[Exception]]:
+        """@brief Wait until the watcher has a result.
+        @return 2-tuple of the Result and, for Result.ERROR, the exception that was raised.
+        """
+        with self._cond:
+            while self._result is None:
+                self._cond.wait()
+            return self._result, self._error
+
+    def stop(self) -> None:
+        """@brief Terminate the watcher thread."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self.is_alive():
+            self.join()
+
+    def _report(self, result: "HaltWatcher.Result", error: Optional[Exception] = None) -> None:
+        with self._cond:
+            self._is_armed = False
+            self._result = result
+            self._error = error
+            self._cond.notify_all()
+
+    def run(self) -> None:
+        while True:
+            with self._cond:
+                while not (self._is_armed or self._stopping):
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                self._fault_retry_timeout.clear()
+
+            while True:
+                if self._interrupt_event.wait(self._next_interval()):
+                    self._report(self.Result.INTERRUPTED)
+                    break
+                if self._stopping or self._shutdown_event.is_set():
+                    self._report(self.Result.SHUTDOWN)
+                    break
+                result = self._poll()
+                if result is not None:
+                    self._report(*result)
+                    break
+
+    def _next_interval(self) -> float:
+        """@brief Advance the backoff and limit the interval to those requested by services."""
+        interval = self._backoff.next()
+        for interval_callback in self._service_intervals:
+            interval = min(interval, interval_callback())
+        return interval
+
+    def _poll(self) -> Optional[Tuple["HaltWatcher.Result", Optional[Exception]]]:
+        """@brief Read the core state and run services once.
+        @return None to continue watching, otherwise the result and error to report.
+        """
+        timeout = self._fault_retry_timeout
+        with self._lock:
+            self.poll_count += 1
+            try:
+                state = self._target.get_state()
+
+                # If we were able to successfully read the target state after previously receiving a fault,
+                # then clear the timeout.
+                if timeout.is_running:
+                    LOG.info("Target control reestablished.")
+                    timeout.clear()
+
+                if state == Target.State.HALTED:
+                    return (self.Result.HALTED, None)
+
+                for service in self._services:
+                    if service():
+                        self._backoff.reset()
+            except exceptions.TransferError as e:
+                # If we get any sort of transfer error or fault while checking target status, then start
+                # a timeout running. Upon a later successful status check, the timeout is cleared. In the event
+                # that the timeout expires, watching stops and an error is reported to gdb.
+                if not timeout.is_running:
+                    LOG.warning("Transfer error while checking target status; retrying: %s", e,
+                            exc_info=self._session.log_tracebacks)
+                    timeout.start()
+                elif not timeout.check(autosleep=False):
+                    return (self.Result.FAULT_TIMEOUT, e)
+            except exceptions.Error as e:
+                return (self.Result.ERROR, e)
+        return None
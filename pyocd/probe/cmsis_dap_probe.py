@@ -274,7 +274,7 @@ class CMSISDAPProbe(DebugProbe):
         try:
             TRACE.debug("trace: open")
 
-            self._link.open()
+            self._link.open(self.session.options)
             self._is_open = True
             self._link.set_deferred_transfer(self.session.options.get('cmsis_dap.deferred_transfers'))
 
@@ -683,6 +683,44 @@ class CMSISDAPProbe(DebugProbe):
                     ", ".join(["%#010x" % v for v in values]), exc)
             raise self._convert_exception(exc) from exc
 
+    def read_ap_multiple_into(self, addr: int, buf: Union[bytearray, memoryview], now: bool = True) \
+            -> Optional[Callable[[], None]]:
+        assert isinstance(addr, int)
+        ap_reg = self.REG_ADDR_TO_ID_MAP[self.AP, (addr & self.A32)]
+
+        try:
+            TRACE.debug("trace: read_ap_multi_into(addr=%#010x, count=%i)%s", addr, len(buf) // 4,
+                    "" if now else " -> ...")
+            result = self._link.reg_read_repeat_into(ap_reg, buf, dap_index=0, now=now)
+        except DAPAccess.Error as exc:
+            raise self._convert_exception(exc) from exc
+
+        # Need to wrap the deferred callback to convert exceptions.
+        def read_ap_repeat_into_callback():
+            try:
+                result()
+            except DAPAccess.Error as exc:
+                TRACE.debug("trace: ... read_ap_multi_into(addr=%#010x, count=%i) -> error(%s)",
+                    addr, len(buf) // 4, exc)
+                raise self._convert_exception(exc) from exc
+
+        if now:
+            return None
+        else:
+            return read_ap_repeat_into_callback
+
+    def write_ap_multiple_from(self, addr: int, data: Union[bytes, bytearray, memoryview]) -> None:
+        assert isinstance(addr, int)
+        ap_reg = self.REG_ADDR_TO_ID_MAP[self.AP, (addr & self.A32)]
+
+        try:
+            self._link.reg_write_repeat_from(ap_reg, data, dap_index=0)
+            TRACE.debug("trace: write_ap_multi_from(addr=%#010x, count=%i)", addr, len(data) // 4)
+        except DAPAccess.Error as exc:
+            TRACE.debug("trace: write_ap_multi_from(addr=%#010x, count=%i) -> error(%s)", addr,
+                    len(data) // 4, exc)
+            raise self._convert_exception(exc) from exc
+
     # ------------------------------------------- #
     #          SWO functions
     # ------------------------------------------- #
@@ -749,4 +787,13 @@ class CMSISDAPProbePlugin(Plugin):
                 "Whether the CMSIS-DAP probe backend will use deferred transfers for improved performance."),
             OptionInfo('cmsis_dap.limit_packets', bool, False,
                 "Restrict CMSIS-DAP backend to using a single in-flight command at a time."),
+            OptionInfo('cmsis_dap.max_packets_in_flight', int, 0,
+                "Maximum number of command packets the CMSIS-DAP backend will have in flight at once. The "
+                "default of 0 uses the packet count reported by the probe. Values larger than the probe's "
+                "packet count are ignored."),
+            OptionInfo('cmsis_dap.reader_thread', bool, False,
+                "Whether the CMSIS-DAP backend reads and decodes command responses on a dedicated thread, "
+                "overlapping response handling with sending further commands. Experimental, as reading "
+                "the interface from one thread while writing from another has not been validated with "
+                "every USB backend."),
             ]
@@ -18,6 +18,7 @@
 from __future__ import annotations
 
 from enum import (Enum, IntFlag)
+import struct
 import threading
 from typing import (Callable, Collection, Optional, overload, Sequence, Set, TYPE_CHECKING, Tuple, Union)
 from typing_extensions import Literal
@@ -55,6 +56,8 @@ class DebugProbe:
     - create_associated_board()
     - flush()
     - get_memory_interface_for_ap()
+    - read_ap_multiple_into()
+    - write_ap_multiple_from()
 
     These methods must be implemented depending on the probe capabilities, as returned from the `capabilities` property.
 
@@ -505,6 +508,46 @@ class DebugProbe:
         """@brief Write one AP register multiple times."""
         raise NotImplementedError()
 
+    def read_ap_multiple_into(self, addr: int, buf: Union[bytearray, memoryview], now: bool = True) \
+            -> Optional[Callable[[], None]]:
+        """@brief Read one AP register multiple times into a buffer.
+
+        The number of reads is the length of _buf_ in bytes divided by 4. Each word read is stored in _buf_
+        in little-endian byte order.
+
+        The default implementation uses read_ap_multiple() and packs the result into the buffer. Probes that
+        can place response data directly into the buffer should override this method.
+
+        @param self
+        @param addr Integer AP register address.
+        @param buf Writable bytes-like object. Its length must be a multiple of 4.
+        @param now Boolean specifying whether the read is synchronous (True) or asynchronous.
+        @return None if _now_ is True. Otherwise a callable that must be invoked to complete the read.
+        """
+        view = memoryview(buf).cast('B')
+        count = len(view) // 4
+        result_cb = self.read_ap_multiple(addr, count, now=False)
+
+        def read_ap_multiple_into_cb() -> None:
+            struct.pack_into(f"<{count}I", view, 0, *result_cb())
+
+        if now:
+            read_ap_multiple_into_cb()
+            return None
+        else:
+            return read_ap_multiple_into_cb
+
+    def write_ap_multiple_from(self, addr: int, data: Union[bytes, bytearray, memoryview]) -> None:
+        """@brief Write one AP register multiple times with words from a buffer.
+
+        The number of writes is the length of _data_ in bytes divided by 4. Words are taken from _data_ in
+        little-endian byte order.
+
+        The default implementation unpacks the data and calls write_ap_multiple().
+        """
+        view = memoryview(data).cast('B')
+        self.write_ap_multiple(addr, struct.unpack(f"<{len(view) // 4}I", view))
+
     def get_memory_interface_for_ap(self, ap_address: APAddressBase) -> Optional[MemoryInterface]:
         """@brief Returns a @ref pyocd.core.memory_interface.MemoryInterface "MemoryInterface" for
             the specified AP.
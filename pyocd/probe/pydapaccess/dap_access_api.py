@@ -173,8 +173,13 @@ class DAPAccessIntf(object):
     # ------------------------------------------- #
     #          Host control functions
     # ------------------------------------------- #
-    def open(self):
-        """@brief Open device and lock it for exclusive access"""
+    def open(self, options=None):
+        """@brief Open device and lock it for exclusive access
+
+        @param self
+        @param options Options of the session that owns the probe, used to configure the connection.
+            If not provided, the options of the current session are used.
+        """
         raise NotImplementedError()
 
     def close(self):
@@ -349,3 +354,18 @@ class DAPAccessIntf(object):
     def reg_read_repeat(self, num_repeats, reg_id, dap_index=0, now=True):
         """@brief Read one or more words from the same DP or AP register"""
         raise NotImplementedError()
+
+    def reg_write_repeat_from(self, reg_id, data, dap_index=0):
+        """@brief Write little-endian words from a bytes-like object to the same DP or AP register
+
+        The number of words written is the length of _data_ divided by 4.
+        """
+        raise NotImplementedError()
+
+    def reg_read_repeat_into(self, reg_id, buf, dap_index=0, now=True):
+        """@brief Read words from the same DP or AP register into a writable buffer
+
+        The number of words read is the length of _buf_ divided by 4. Words are stored in
+        little-endian byte order.
+        """
+        raise NotImplementedError()
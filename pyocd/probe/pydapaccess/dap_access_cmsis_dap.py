@@ -19,12 +19,15 @@
 import re
 import logging
 import collections
+import struct
 import threading
-from typing import (Any, Dict, Optional, Tuple, Union)
+from itertools import repeat
+from typing import (Any, Dict, Optional, TYPE_CHECKING, Tuple, Union)
 
 from .dap_settings import DAPSettings
 from .dap_access_api import DAPAccessIntf
 from .cmsis_dap_core import CMSISDAPProtocol
+from .pipeline import (PacketPipeline, PipelineStatistics)
 from .interface import (INTERFACE, USB_BACKEND, USB_BACKEND_V2)
 from .interface.common import ARM_DAPLINK_ID
 from .cmsis_dap_core import (
@@ -40,6 +43,9 @@ from .cmsis_dap_core import (
 from ...core import session
 from ...utility.concurrency import locked
 
+if TYPE_CHECKING:
+    from ...core.options_manager import OptionsManager
+
 # NoneType was added in Python 3.10, but we need to support back to Python 3.6.
 NoneType = type(None)
 
@@ -99,6 +105,18 @@ def _get_unique_id(interface):
     return interface.get_serial_number()
 
 
+## Request byte and word value of a single DAP_Transfer write.
+_TRANSFER_WRITE = struct.Struct("<BI")
+
+def _mask_words(values):
+    """@brief Return write values that are guaranteed to fit in 32 bits.
+
+    Write values are nearly always already in range, so they are only masked if any is not.
+    """
+    if min(values) >= 0 and max(values) <= 0xffffffff:
+        return values
+    return [v & 0xffffffff for v in values]
+
 class _Transfer(object):
     """@brief A wrapper object representing a command invoked by the layer above.
 
@@ -107,18 +125,20 @@ class _Transfer(object):
     """
 
     def __init__(self, daplink, dap_index, transfer_count,
-                 transfer_request, transfer_data):
+                 transfer_request, transfer_data, buffer=None):
         # Writes should not need a transfer object
         # since they don't have any response data
         assert isinstance(dap_index, int)
         assert isinstance(transfer_count, int)
         assert isinstance(transfer_request, int)
         assert transfer_request & READ
+        assert buffer is None or len(buffer) == transfer_count * 4
         self.daplink = daplink
         self.dap_index = dap_index
         self.transfer_count = transfer_count
         self.transfer_request = transfer_request
         self.transfer_data = transfer_data
+        self._buffer = buffer
         self._size_bytes = 0
         if transfer_request & READ:
             self._size_bytes = transfer_count * 4
@@ -137,12 +157,13 @@ class _Transfer(object):
         that get_data_size returns.
         """
         assert len(data) == self._size_bytes
-        result = []
-        for i in range(0, self._size_bytes, 4):
-            word = ((data[0 + i] << 0) | (data[1 + i] << 8) |
-                    (data[2 + i] << 16) | (data[3 + i] << 24))
-            result.append(word)
-        self._result = result
+        # If the caller provided a buffer, the raw little-endian response data is copied
+        # directly into it rather than being converted to a list of ints.
+        if self._buffer is not None:
+            self._buffer[:] = data
+            self._result = self._buffer
+            return
+        self._result = list(struct.unpack("<%dI" % self.transfer_count, data))
 
     def add_error(self, error):
         """@brief Attach an exception to this transfer rather than data.
@@ -154,7 +175,7 @@ class _Transfer(object):
         """@brief Get the result of this transfer.
         """
         while self._result is None:
-            if len(self.daplink._commands_to_read) > 0:
+            if self.daplink._pipeline.in_flight > 0:
                 self.daplink._read_packet()
             else:
                 assert not self.daplink._crnt_cmd.get_empty()
@@ -328,21 +349,23 @@ class _Command(object):
         buf[pos] = transfer_count
         pos += 1
         for count, request, write_list in self._data:
-            assert write_list is None or len(write_list) <= count
-            write_pos = 0
-            for _ in range(count):
-                buf[pos] = request
-                pos += 1
-                if not request & READ:
-                    buf[pos] = (write_list[write_pos] >> (8 * 0)) & 0xff
-                    pos += 1
-                    buf[pos] = (write_list[write_pos] >> (8 * 1)) & 0xff
-                    pos += 1
-                    buf[pos] = (write_list[write_pos] >> (8 * 2)) & 0xff
-                    pos += 1
-                    buf[pos] = (write_list[write_pos] >> (8 * 3)) & 0xff
-                    pos += 1
-                    write_pos += 1
+            if request & READ:
+                # Reads are just the request byte repeated.
+                buf[pos:pos + count] = bytes((request,)) * count
+                pos += count
+                continue
+            # Raw write data (from reg_write_repeat_from()) is a memoryview of little-endian words.
+            if isinstance(write_list, memoryview):
+                write_list = struct.unpack("<%dI" % count, write_list)
+            assert len(write_list) == count
+            # Each write is the request byte followed by the little-endian word.
+            if count == 1:
+                _TRANSFER_WRITE.pack_into(buf, pos, request, write_list[0] & 0xffffffff)
+            else:
+                # Interleave request and word values so the whole run is packed in one call.
+                struct.pack_into("<" + "BI" * count, buf, pos,
+                        *(v for pair in zip(repeat(request), _mask_words(write_list)) for v in pair))
+            pos += count * 5
         return buf[:pos]
 
     def _check_response(self, response):
@@ -379,7 +402,7 @@ class _Command(object):
         """@brief Take a byte array and extract the data from it
 
         Decode the response returned by a DAP_Transfer CMSIS-DAP command
-        and return it as an array of bytes.
+        and return a memoryview of the read data.
         """
         assert self.get_empty() is False
         if data[0] != Command.DAP_TRANSFER:
@@ -395,7 +418,8 @@ class _Command(object):
         if data[1] != self._read_count + self._write_count:
             raise DAPAccessIntf.TransferError()
 
-        return data[3:3 + 4 * self._read_count]
+        # Return a view to avoid copying the read data.
+        return memoryview(data)[3:3 + 4 * self._read_count]
 
     def _encode_transfer_block_data(self):
         """@brief Encode this command into a byte array that can be sent
@@ -420,27 +444,24 @@ class _Command(object):
         buf[pos] = self._block_request
         pos += 1
         for count, request, write_list in self._data:
-            assert write_list is None or len(write_list) <= count
             assert request == self._block_request
-            write_pos = 0
+            # Raw write data (from reg_write_repeat_from()) is a memoryview of little-endian words.
+            if isinstance(write_list, memoryview):
+                assert len(write_list) == count * 4
+                buf[pos:pos + count * 4] = write_list
+                pos += count * 4
+                continue
             if not request & READ:
-                for _ in range(count):
-                    buf[pos] = (write_list[write_pos] >> (8 * 0)) & 0xff
-                    pos += 1
-                    buf[pos] = (write_list[write_pos] >> (8 * 1)) & 0xff
-                    pos += 1
-                    buf[pos] = (write_list[write_pos] >> (8 * 2)) & 0xff
-                    pos += 1
-                    buf[pos] = (write_list[write_pos] >> (8 * 3)) & 0xff
-                    pos += 1
-                    write_pos += 1
+                assert len(write_list) == count
+                struct.pack_into("<%dI" % count, buf, pos, *_mask_words(write_list))
+                pos += count * 4
         return buf[:pos]
 
     def _decode_transfer_block_data(self, data):
         """@brief Take a byte array and extract the data from it
 
         Decode the response returned by a DAP_TransferBlock CMSIS-DAP command
-        and return it as an array of bytes.
+        and return a memoryview of the read data.
         """
         assert self.get_empty() is False
         if data[0] != Command.DAP_TRANSFER_BLOCK:
@@ -457,7 +478,8 @@ class _Command(object):
         if transfer_count != self._read_count + self._write_count:
             raise DAPAccessIntf.TransferError()
 
-        return data[4:4 + 4 * self._read_count]
+        # Return a view to avoid copying the read data.
+        return memoryview(data)[4:4 + 4 * self._read_count]
 
     def encode_data(self):
         """@brief Encode this command into a byte array that can be sent
@@ -589,7 +611,7 @@ class DAPAccessCMSISDAP(DAPAccessIntf):
         self._transfer_list = collections.deque()
         self._crnt_cmd = _Command(0)
         self._packet_size = None
-        self._commands_to_read = collections.deque()
+        self._pipeline = PacketPipeline(interface, 1, use_reader_thread=False)
         self._command_response_buf = bytearray()
         self._swo_status = None
         self._cmsis_dap_version: VersionTuple = CMSISDAPVersion.V1_0_0
@@ -597,6 +619,7 @@ class DAPAccessCMSISDAP(DAPAccessIntf):
         self._has_opened_once = False
         self._is_open: bool = False
         self._cached_info: Dict[DAPAccessIntf.ID, Any] = {}
+        self._options: Optional["OptionsManager"] = None
 
     @property
     def protocol_version(self) -> VersionTuple:
@@ -741,24 +764,27 @@ class DAPAccessCMSISDAP(DAPAccessIntf):
         return self._is_open
 
     @locked
-    def open(self):
+    def open(self, options=None):
         if self._interface is None:
             raise DAPAccessIntf.DeviceError("Unable to open device with no interface")
         if self._is_open:
             return
+        if options is not None:
+            self._options = options
 
         self._interface.open()
 
         # If this probe has already been opened and examined previously, we don't need to examine it again.
         if self._has_opened_once:
             self._init_deferred_buffers()
+            self._start_pipeline()
             if self._has_swo_uart:
                 self._swo_disable()
                 self._swo_status = SWOStatus.DISABLED
             self._is_open = True
             return
 
-        if session.Session.get_current().options['cmsis_dap.limit_packets'] or DAPSettings.limit_packets:
+        if self._get_options()['cmsis_dap.limit_packets'] or DAPSettings.limit_packets:
             self._packet_count = 1
             LOG.debug("Limiting packet count to %d", self._packet_count)
         else:
@@ -807,6 +833,7 @@ class DAPAccessCMSISDAP(DAPAccessIntf):
         self._swo_status = SWOStatus.DISABLED
 
         self._init_deferred_buffers()
+        self._start_pipeline()
 
         self._has_opened_once = True
         self._is_open = True
@@ -816,7 +843,10 @@ class DAPAccessCMSISDAP(DAPAccessIntf):
         assert self._interface is not None
         if not self._is_open:
             return
-        self.flush()
+        try:
+            self.flush()
+        finally:
+            self._stop_pipeline()
         self._interface.close()
         self._is_open = False
         self._crnt_cmd = _Command(0)
@@ -824,6 +854,11 @@ class DAPAccessCMSISDAP(DAPAccessIntf):
     def get_unique_id(self):
         return self._unique_id
 
+    @property
+    def pipeline_statistics(self) -> PipelineStatistics:
+        """@brief Statistics on in-flight command packets for the current or most recent open."""
+        return self._pipeline.statistics
+
     @locked
     def pin_access(self, mask: int, value: int) -> int:
         self.flush()
@@ -872,16 +907,16 @@ class DAPAccessCMSISDAP(DAPAccessIntf):
     @locked
     def flush(self):
         if TRACE.isEnabledFor(logging.DEBUG):
-            if self._crnt_cmd.get_empty() and len(self._commands_to_read):
+            if self._crnt_cmd.get_empty() and self._pipeline.in_flight:
                 TRACE.debug("flush: reading %d outstanding (cmd:%d is empty)",
-                        len(self._commands_to_read), self._crnt_cmd.uid)
+                        self._pipeline.in_flight, self._crnt_cmd.uid)
             elif not self._crnt_cmd.get_empty():
-                TRACE.debug("flush: sending cmd:%d; reading %d outstanding", self._crnt_cmd.uid, len(self._commands_to_read))
+                TRACE.debug("flush: sending cmd:%d; reading %d outstanding", self._crnt_cmd.uid, self._pipeline.in_flight)
 
         # Send current packet
         self._send_packet()
         # Read all backlogged
-        for _ in range(len(self._commands_to_read)):
+        while self._pipeline.in_flight:
             self._read_packet()
 
     @locked
@@ -894,7 +929,7 @@ class DAPAccessCMSISDAP(DAPAccessIntf):
 
         # Check if buffers are inited before calling flush, so identify() can be called from open(), before
         # the initing the deferred buffers.
-        if not self._crnt_cmd.get_empty() or len(self._commands_to_read):
+        if not self._crnt_cmd.get_empty() or self._pipeline.in_flight:
             self.flush()
         value = self._protocol.dap_info(item)
         self._cached_info[item] = value
@@ -1101,6 +1136,46 @@ class DAPAccessCMSISDAP(DAPAccessIntf):
         request |= (reg_id.value % 4) * 4
         self._write(dap_index, num_repeats, request, data_array)
 
+    def reg_write_repeat_from(self, reg_id, data, dap_index=0):
+        assert reg_id in self.REG
+        assert isinstance(dap_index, int)
+
+        data = memoryview(data).cast('B')
+        assert (len(data) % 4) == 0
+
+        request = WRITE
+        if reg_id.value < 4:
+            request |= DP_ACC
+        else:
+            request |= AP_ACC
+        request |= (reg_id.value % 4) * 4
+        self._write(dap_index, len(data) // 4, request, data)
+
+    def reg_read_repeat_into(self, reg_id, buf, dap_index=0, now=True):
+        assert reg_id in self.REG
+        assert isinstance(dap_index, int)
+        assert isinstance(now, bool)
+
+        buf = memoryview(buf).cast('B')
+        assert (len(buf) % 4) == 0
+
+        request = READ
+        if reg_id.value < 4:
+            request |= DP_ACC
+        else:
+            request |= AP_ACC
+        request |= (reg_id.value % 4) * 4
+        transfer = self._write(dap_index, len(buf) // 4, request, None, buf)
+        assert transfer is not None
+
+        def reg_read_repeat_into_cb():
+            transfer.get_result()
+
+        if now:
+            return reg_read_repeat_into_cb()
+        else:
+            return reg_read_repeat_into_cb
+
     def reg_read_repeat(self, num_repeats, reg_id, dap_index=0,
                         now=True):
         assert isinstance(num_repeats, int)
@@ -1144,32 +1219,60 @@ class DAPAccessCMSISDAP(DAPAccessIntf):
         # different transfers
         self._crnt_cmd = _Command(self._packet_size)
         # Packets that have been sent but not read
-        self._commands_to_read.clear()
+        self._pipeline.reset()
         # Buffer for data returned for completed commands.
         # This data will be added to transfers
         self._command_response_buf = bytearray()
 
+    def _get_options(self) -> "OptionsManager":
+        """@brief Return the options passed to open(), or those of the current session if there are none.
+
+        Probes used by concurrent sessions must be given their session's options, as the current session
+        may be a different one.
+        """
+        if self._options is not None:
+            return self._options
+        return session.Session.get_current().options
+
+    def _start_pipeline(self):
+        """@brief Create the packet pipeline for the newly opened interface.
+
+        The pipeline depth defaults to the interface's packet count. The `cmsis_dap.max_packets_in_flight`
+        option can only reduce the depth, since the probe cannot buffer more packets than it reports.
+        """
+        options = self._get_options()
+        depth = self._interface.get_packet_count()
+        max_in_flight = options.get('cmsis_dap.max_packets_in_flight')
+        if max_in_flight > 0:
+            depth = min(depth, max_in_flight)
+        self._pipeline = PacketPipeline(self._interface, depth,
+                use_reader_thread=options.get('cmsis_dap.reader_thread'), name=self._unique_id)
+        self._pipeline.start()
+        LOG.debug("CMSIS-DAP probe %s: %d packets in flight, reader thread %s", self._unique_id, depth,
+                "enabled" if self._pipeline.has_reader_thread else "disabled")
+
+    def _stop_pipeline(self):
+        """@brief Stop the packet pipeline's reader thread and log statistics."""
+        self._pipeline.stop()
+        if self._pipeline.statistics.packets:
+            LOG.debug("CMSIS-DAP probe %s pipeline: %s", self._unique_id, self._pipeline.statistics)
+
     @locked
     def _read_packet(self):
         """@brief Reads and decodes a single packet
 
-        Reads a single packet from the device and
-        stores the data from it in the current Command
-        object
+        Receives the response to the oldest in-flight packet
+        from the pipeline and attaches its data to the
+        pending transfers
         """
-        # Grab command, send it and decode response
-        cmd = self._commands_to_read.popleft()
-        TRACE.debug("[cmd:%d] _read_packet: reading", cmd.uid)
         try:
-            raw_data = self._interface.read()
-            raw_data = bytearray(raw_data)
-            decoded_data = cmd.decode_data(raw_data)
+            cmd, decoded_data = self._pipeline.receive()
         except Exception as exception:
-            TRACE.debug("[cmd:%d] _read_packet: got exception %r; aborting all transfers!", cmd.uid, exception)
+            TRACE.debug("_read_packet: got exception %r; aborting all transfers!", exception)
             self._abort_all_transfers(exception)
             raise
+        TRACE.debug("[cmd:%d] _read_packet: received", cmd.uid)
 
-        decoded_data = bytearray(decoded_data)
         self._command_response_buf.extend(decoded_data)
 
         # Attach data to transfers
@@ -1192,7 +1295,7 @@ class DAPAccessCMSISDAP(DAPAccessIntf):
 
         # Remove used data from _command_response_buf
         if pos > 0:
-            self._command_response_buf = self._command_response_buf[pos:]
+            del self._command_response_buf[:pos]
 
     @locked
     def _send_packet(self):
@@ -1207,25 +1310,31 @@ class DAPAccessCMSISDAP(DAPAccessIntf):
         if cmd.get_empty():
             return
 
-        max_packets = self._interface.get_packet_count()
-        if len(self._commands_to_read) >= max_packets:
+        if self._pipeline.is_full:
             TRACE.debug("[cmd:%d] _send_packet: reading packet; outstanding=%d >= max=%d",
-                    cmd.uid, len(self._commands_to_read), max_packets)
+                    cmd.uid, self._pipeline.in_flight, self._pipeline.depth)
+            self._pipeline.statistics.stalls += 1
             self._read_packet()
         TRACE.debug("[cmd:%d] _send_packet: sending", cmd.uid)
         data = cmd.encode_data()
         try:
-            self._interface.write(list(data))
+            self._pipeline.send(cmd, list(data))
         except Exception as exception:
             self._abort_all_transfers(exception)
             raise
-        self._commands_to_read.append(cmd)
         self._crnt_cmd = _Command(self._packet_size)
 
     @locked
     def _write(self, dap_index, transfer_count,
-               transfer_request, transfer_data):
+               transfer_request, transfer_data, read_buffer=None):
         """@brief Write one or more commands
+
+        The _transfer_data_ parameter is either None (for reads), a sequence of word values, or a
+        memoryview of little-endian word data. In the latter case the data is sliced into packets
+        by byte offset so that no per-word objects are created.
+
+        If _read_buffer_ is provided for a read request, the response data is copied into it
+        instead of being converted to a list of ints.
         """
         assert dap_index == 0  # dap index currently unsupported
         assert isinstance(transfer_count, int)
@@ -1236,9 +1345,12 @@ class DAPAccessCMSISDAP(DAPAccessIntf):
         transfer = None
         if transfer_request & READ:
             transfer = _Transfer(self, dap_index, transfer_count,
-                                 transfer_request, transfer_data)
+                                 transfer_request, transfer_data, read_buffer)
             self._transfer_list.append(transfer)
 
+        # Raw byte data is sliced in units of words.
+        data_unit = 4 if isinstance(transfer_data, memoryview) else 1
+
         # Build physical packet by adding it to command
         cmd = self._crnt_cmd
         size_to_transfer = transfer_count
@@ -1258,7 +1370,7 @@ class DAPAccessCMSISDAP(DAPAccessIntf):
             if transfer_data is None:
                 data = None
             else:
-                data = transfer_data[trans_data_pos:trans_data_pos + size]
+                data = transfer_data[trans_data_pos * data_unit:(trans_data_pos + size) * data_unit]
             cmd.add(size, transfer_request, data, dap_index)
             size_to_transfer -= size
             trans_data_pos += size
@@ -1278,16 +1390,21 @@ class DAPAccessCMSISDAP(DAPAccessIntf):
     def _abort_all_transfers(self, exception):
         """@brief Abort any ongoing transfers and clear all buffers
         """
-        pending_reads = len(self._commands_to_read)
+        pending_reads = self._pipeline.in_flight
         TRACE.debug("aborting %d pending reads after exception %r", pending_reads, exception)
         # invalidate _transfer_list
         for transfer in self._transfer_list:
             transfer.add_error(exception)
-        # clear all deferred buffers
-        self._init_deferred_buffers()
-        # finish all pending reads and ignore the data
-        # Only do this if the error is a transfer error.
-        # Otherwise this could cause another exception
-        if isinstance(exception, DAPAccessIntf.TransferError):
-            for _ in range(pending_reads):
-                self._interface.read()
+        try:
+            # finish all pending reads and ignore the data
+            # Only do this if the error is a transfer error.
+            # Otherwise this could cause another exception
+            if isinstance(exception, DAPAccessIntf.TransferError):
+                for _ in range(pending_reads):
+                    try:
+                        self._pipeline.receive()
+                    except DAPAccessIntf.TransferError:
+                        pass
+        finally:
+            # clear all deferred buffers
+            self._init_deferred_buffers()
@@ -0,0 +1,231 @@
+# pyOCD debugger
+# Copyright (c) 2026 PyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import logging
+import threading
+from time import perf_counter
+from typing import (Any, Deque, Optional, Tuple)
+
+LOG = logging.getLogger(__name__)
+
+class PipelineStatistics:
+    """@brief Statistics for the CMSIS-DAP packet pipeline.
+
+    Depth is sampled each time a packet is sent, and includes the packet being sent. A stall is counted
+    each time the owner of the pipeline had to wait for a response before it could send another packet.
+    Latency is the time from writing a command packet to the interface until its response has been read
+    and decoded.
+    """
+
+    def __init__(self) -> None:
+        self.packets: int = 0
+        self.responses: int = 0
+        self.errors: int = 0
+        self.stalls: int = 0
+        self.max_depth: int = 0
+        self.total_depth: int = 0
+        self.total_latency: float = 0.0
+        self.min_latency: float = 0.0
+        self.max_latency: float = 0.0
+
+    @property
+    def average_depth(self) -> float:
+        if self.packets > 0:
+            return self.total_depth / self.packets
+        else:
+            return 0.0
+
+    @property
+    def average_latency(self) -> float:
+        if self.responses > 0:
+            return self.total_latency / self.responses
+        else:
+            return 0.0
+
+    def add_packet(self, depth: int) -> None:
+        self.packets += 1
+        self.total_depth += depth
+        self.max_depth = max(self.max_depth, depth)
+
+    def add_response(self, latency: float, is_error: bool) -> None:
+        if self.responses == 0 or latency < self.min_latency:
+            self.min_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+        self.total_latency += latency
+        self.responses += 1
+        if is_error:
+            self.errors += 1
+
+    def __str__(self) -> str:
+        return ("%d packets, depth avg %.2f max %d, %d stalls; latency avg %.3f ms, min %.3f ms, max %.3f ms; "
+                "%d errors" % (self.packets, self.average_depth, self.max_depth, self.stalls,
+                self.average_latency * 1000, self.min_latency * 1000, self.max_latency * 1000, self.errors))
+
+class PacketPipeline:
+    """@brief Keeps multiple CMSIS-DAP command packets in flight.
+
+    Command packets are written to the interface with send(), and their decoded responses are returned
+    in order by receive(). The caller is responsible for not sending more than `depth` packets before
+    receiving responses; the `is_full` property reports when this is the case.
+
+    If the reader thread is enabled, a dedicated thread reads and decodes each response as soon as the
+    interface provides it, overlapping response handling with the encoding and sending of further packets
+    by the caller. Otherwise responses are read and decoded synchronously by receive().
+
+    The reader thread only reads from the interface while there are sent packets whose responses have
+    not been read. Therefore, once all responses have been received, the interface may be used directly
+    for other commands.
+
+    Command objects passed to send() must have a `decode_data()` method that accepts the raw response
+    and either returns the decoded data or raises an exception.
+    """
+
+    def __init__(self, interface: Any, depth: int, use_reader_thread: bool = False, name: str = "") -> None:
+        assert depth > 0
+        self._interface = interface
+        self._depth = depth
+        self._use_reader_thread = use_reader_thread
+        self._name = name
+        self._cond = threading.Condition()
+        ## Commands sent but not yet read from the interface, with their send time.
+        self._unread: Deque[Tuple[Any, float, int]] = collections.deque()
+        ## Responses read and decoded but not yet received, as (cmd, data, exception) tuples.
+        self._completed: Deque[Tuple[Any, Any, Optional[Exception]]] = collections.deque()
+        self._in_flight = 0
+        self._generation = 0
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self.statistics = PipelineStatistics()
+
+    @property
+    def depth(self) -> int:
+        """@brief Maximum number of packets in flight."""
+        return self._depth
+
+    @property
+    def in_flight(self) -> int:
+        """@brief Number of packets that have been sent but whose response has not been received."""
+        return self._in_flight
+
+    @property
+    def is_full(self) -> bool:
+        """@brief Whether the maximum number of packets are in flight."""
+        return self._in_flight >= self._depth
+
+    @property
+    def has_reader_thread(self) -> bool:
+        """@brief Whether responses are read by a dedicated thread."""
+        return self._thread is not None
+
+    def start(self) -> None:
+        """@brief Start the reader thread, if enabled."""
+        if not self._use_reader_thread or self._thread is not None:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._reader_task,
+                name="CMSIS-DAP pipeline reader (%s)" % self._name)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self) -> None:
+        """@brief Stop the reader thread.
+
+        Any packets still in flight are discarded.
+        """
+        self.reset()
+        if self._thread is None:
+            return
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join()
+        self._thread = None
+
+    def send(self, cmd: Any, data: Any) -> None:
+        """@brief Write a command packet to the interface."""
+        assert not self.is_full
+        with self._cond:
+            # Record the packet before writing, so the reader thread can never see a response for a
+            # packet it doesn't know about.
+            self._in_flight += 1
+            self.statistics.add_packet(self._in_flight)
+            self._unread.append((cmd, perf_counter(), self._generation))
+            try:
+                self._interface.write(data)
+            except Exception:
+                self._unread.pop()
+                self._in_flight -= 1
+                raise
+            self._cond.notify_all()
+
+    def receive(self) -> Tuple[Any, Any]:
+        """@brief Return the oldest in-flight command and its decoded response data.
+
+        Blocks until the response is available. If reading or decoding the response failed, the
+        exception is raised from this method. In either case the command is no longer in flight.
+        """
+        assert self._in_flight > 0
+        if self._thread is None:
+            cmd, sent_time, _ = self._unread.popleft()
+            self._completed.append(self._read_response(cmd, sent_time))
+        with self._cond:
+            while not self._completed:
+                self._cond.wait()
+            cmd, data, exc = self._completed.popleft()
+            self._in_flight -= 1
+        if exc is not None:
+            raise exc
+        return cmd, data
+
+    def reset(self) -> None:
+        """@brief Forget about all in-flight packets.
+
+        Responses for packets that were in flight but not yet read by the reader thread will not be read.
+        """
+        with self._cond:
+            self._unread.clear()
+            self._completed.clear()
+            self._in_flight = 0
+            self._generation += 1
+
+    def _read_response(self, cmd: Any, sent_time: float) -> Tuple[Any, Any, Optional[Exception]]:
+        result: Tuple[Any, Any, Optional[Exception]]
+        try:
+            raw_data = self._interface.read()
+            result = (cmd, cmd.decode_data(bytearray(raw_data)), None)
+        except Exception as exc:
+            result = (cmd, None, exc)
+        self.statistics.add_response(perf_counter() - sent_time, result[2] is not None)
+        return result
+
+    def _reader_task(self) -> None:
+        while True:
+            with self._cond:
+                while not self._stopping and not self._unread:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                cmd, sent_time, generation = self._unread[0]
+
+            result = self._read_response(cmd, sent_time)
+
+            with self._cond:
+                # Drop the response if the pipeline was reset while it was being read.
+                if generation == self._generation:
+                    self._unread.popleft()
+                    self._completed.append(result)
+                    self._cond.notify_all()
@@ -17,8 +17,9 @@
 
 import logging
 import json
+import struct
 import threading
-from typing import (Any, Optional, Tuple)
+from typing import (Any, Callable, Dict, List, Optional, Set, Tuple)
 
 from .debug_probe import DebugProbe
 from ..core import exceptions
@@ -34,7 +35,14 @@ TRACE.setLevel(logging.CRITICAL)
 class TCPClientProbe(DebugProbe):
     """@brief Probe class that connects to a debug probe server.
 
-    The protocol is a one-line JSON request and response form.
+    The protocol is a one-line JSON request and response form. If the server supports protocol version 2,
+    messages are instead sent as length-prefixed frames with an optional binary payload, and requests are
+    pipelined: writes and deferred reads are sent without waiting for the response. An error from a write
+    is raised by the next read, flush, or other synchronous request, in the same way as for a local probe.
+
+    Also with version 2, DP, AP, and single memory accesses are not sent individually. They are queued and
+    sent together as one `batch` request when a read result is needed, the probe is flushed, any other
+    request is made, or the queue reaches `MAX_BATCH_SIZE` operations.
 
     Request structure:
 
@@ -60,7 +68,31 @@ class TCPClientProbe(DebugProbe):
 
     DEFAULT_PORT = 5555
 
-    PROTOCOL_VERSION = 1
+    PROTOCOL_VERSION = 2
+
+    ## Header of version 2 message frames: JSON length, payload length.
+    FRAME_HEADER = struct.Struct("<II")
+
+    ## Maximum number of requests sent without reading their responses.
+    ##
+    ## This keeps the server from blocking on writing responses that the client is not yet reading, which
+    ## would in turn prevent it from reading further requests.
+    MAX_PENDING_REQUESTS = 128
+
+    ## Maximum number of operations in a batch request.
+    MAX_BATCH_SIZE = 256
+
+    ## Requests that can be queued as operations of a batch request.
+    _BATCHABLE_REQUESTS = frozenset({
+            'read_dp',
+            'write_dp',
+            'read_ap',
+            'write_ap',
+            'read_ap_multiple',
+            'write_ap_multiple',
+            'read_mem',
+            'write_mem',
+        })
 
     class StatusCode:
         """@brief Constants for errors reported from the server."""
@@ -109,6 +141,8 @@ class TCPClientProbe(DebugProbe):
         self._socket = ClientSocket(hostname, port)
         self._is_open = False
         self._request_id = 0
+        self._protocol_version = 1
+        self._init_pipeline()
         self._lock_count = 0
         self._lock_count_lock = threading.RLock()
 
@@ -147,62 +181,294 @@ class TCPClientProbe(DebugProbe):
         self._request_id += 1
         return rid
 
-    def _perform_request_without_raise(self, request: str, *args: Any) -> Tuple[Any, Optional[BaseException]]:
+    @property
+    def protocol_version(self) -> int:
+        """@brief Version of the remote probe protocol in use on the connection."""
+        return self._protocol_version
+
+    def _init_pipeline(self) -> None:
+        ## Map from request ID to request name for requests whose responses have not been read yet.
+        self._pending: Dict[int, str] = {}
+        ## IDs of requests whose results are needed, such as deferred reads whose callbacks have not been
+        ## called yet.
+        self._awaited: Set[int] = set()
+        ## Results of awaited requests that have been read from the server.
+        self._completed: Dict[int, Tuple[Any, Optional[BaseException]]] = {}
+        ## First error from a posted request, to be raised from the next synchronous request.
+        self._posted_error: Optional[BaseException] = None
+        ## Operations queued for the next batch request.
+        self._batch_ops: List[List[Any]] = []
+        ## Holders for the batch request ID and result index of deferred reads queued in the next batch.
+        self._batch_reads: List[List[Any]] = []
+        ## Map from batch request ID to the number of callers that still need its result.
+        self._batch_waiters: Dict[int, int] = {}
+        ## Results of batch requests that have been read, for callers that have not yet taken them.
+        self._batch_results: Dict[int, Tuple[Any, Optional[BaseException]]] = {}
+
+    def _send_request(self, request: str, args: Tuple[Any, ...], payload: Optional[bytes] = None) -> int:
+        """@brief Send a request to the server without waiting for the response.
+
+        @return The ID of the request.
+        """
+        # Send queued batch operations first, to keep requests in order.
+        if request != 'batch' and self._batch_ops:
+            self._send_batch()
+
+        rid = self.request_id
+        rq: Dict[str, Any] = {
+                "id": rid,
+                "request": request,
+            }
+        if len(args):
+            rq["arguments"] = args
+        if payload is not None:
+            rq["binary"] = True
+        formatted_request = json.dumps(rq)
+        TRACE.debug("Request: %s", formatted_request)
+        encoded_request = formatted_request.encode('utf-8')
+
+        # Send request to server.
+        if self._protocol_version == 1:
+            assert payload is None
+            self._socket.write(encoded_request + b"\n")
+        else:
+            if payload is None:
+                payload = b""
+            self._socket.write(self.FRAME_HEADER.pack(len(encoded_request), len(payload))
+                    + encoded_request + payload)
+        self._pending[rid] = request
+        return rid
+
+    def _receive_response(self) -> Tuple[int, Any, Optional[BaseException]]:
+        """@brief Read the next response from the server.
+
+        @return 3-tuple of the request ID, the result, and an exception object. The latter is only non-None
+            if the request failed and a non-zero status code was returned.
+        """
+        # Read response.
+        payload = None
+        if self._protocol_version == 1:
+            response_data = self._socket.readline()
+        else:
+            json_length, payload_length = self.FRAME_HEADER.unpack(self._socket.read_exactly(self.FRAME_HEADER.size))
+            response_data = self._socket.read_exactly(json_length)
+            payload = self._socket.read_exactly(payload_length)
+        decoded_response = json.loads(response_data.decode('utf-8').strip())
+        TRACE.debug("decoded_response = %s", decoded_response)
+
+        # Check for required keys.
+        if ('id' not in decoded_response) or ('status' not in decoded_response):
+            raise exceptions.ProbeError("malformed response from server; missing required field")
+
+        rid = decoded_response['id']
+        request = self._pending.pop(rid, "<unknown>")
+
+        # Check response status.
+        exc = None
+        status = decoded_response['status']
+        if status != 0:
+            # Get the error message.
+            error = decoded_response.get('error', "(missing error message key)")
+            LOG.debug("error received from server for command %s (status code %i): %s",
+                    request, status, error)
+
+            # Create an appropriate local exception based on the status code.
+            exc = self.STATUS_CODE_CLASS_MAP.get(status, exceptions.ProbeError)(
+                    "error received from server for command %s (status code %i): %s"
+                    % (request, status, error))
+
+        # Get response value. If not present then there was no return value from the command
+        if decoded_response.get('binary', False):
+            result = payload
+        else:
+            result = decoded_response.get('result', None)
+
+        return rid, result, exc
+
+    def _read_next_response(self) -> None:
+        """@brief Read one response and save its result or error.
+
+        Results of awaited requests are saved until they are wanted. The first error from a posted request
+        is saved to be raised later.
+        """
+        rid, result, exc = self._receive_response()
+        if rid in self._awaited:
+            self._completed[rid] = (result, exc)
+        elif exc is not None and self._posted_error is None:
+            self._posted_error = exc
+
+    def _wait_for_response(self, rid: int) -> Tuple[Any, Optional[BaseException]]:
+        """@brief Read responses until the response to the given awaited request is found."""
+        while rid not in self._completed:
+            self._read_next_response()
+        self._awaited.discard(rid)
+        return self._completed.pop(rid)
+
+    def _limit_pending(self) -> None:
+        """@brief Read responses until the number of pending requests is below the limit."""
+        while len(self._pending) >= self.MAX_PENDING_REQUESTS:
+            self._read_next_response()
+
+    def _take_posted_error(self) -> Optional[BaseException]:
+        exc = self._posted_error
+        self._posted_error = None
+        return exc
+
+    def _perform_request_without_raise(self, request: str, *args: Any,
+            payload: Optional[bytes] = None) -> Tuple[Any, Optional[BaseException]]:
         """Execute a request-reply transaction with the server.
 
         The return value is a 2-tuple consisting of the optional result from the request and an optional
         exception object. The latter is only non-None if the request failed and a non-zero status code was
-        returned.
+        returned, or if a previously posted request failed.
         """
         # Protect requests with the local lock.
         with self._lock:
-            rq = {
-                    "id": self.request_id,
-                    "request": request,
-                }
-            if len(args):
-                rq["arguments"] = args
-            formatted_request = json.dumps(rq)
-            TRACE.debug("Request: %s", formatted_request)
-
-            # Send request to server.
-            self._socket.write(formatted_request.encode('utf-8') + b"\n")
-
-            # Read response.
-            response_data = self._socket.readline().decode('utf-8').strip()
-            decoded_response = json.loads(response_data)
-            TRACE.debug("decoded_response = %s", decoded_response)
-
-            # Check for required keys.
-            if ('id' not in decoded_response) or ('status' not in decoded_response):
-                raise exceptions.ProbeError("malformed response from server; missing required field")
-
-            # Check response status.
-            exc = None
-            status = decoded_response['status']
-            if status != 0:
-                # Get the error message.
-                error = decoded_response.get('error', "(missing error message key)")
-                LOG.debug("error received from server for command %s (status code %i): %s",
-                        request, status, error)
-
-                # Create an appropriate local exception based on the status code.
-                exc = self.STATUS_CODE_CLASS_MAP.get(status, exceptions.ProbeError)(
-                        "error received from server for command %s (status code %i): %s"
-                        % (request, status, error))
-
-            # Get response value. If not present then there was no return value from the command
-            result = decoded_response.get('result', None)
+            rid = self._send_request(request, args, payload)
+            self._awaited.add(rid)
+            result, exc = self._wait_for_response(rid)
+            return result, (self._take_posted_error() or exc)
 
-            return result, exc
-
-    def _perform_request(self, request: str, *args: Any) -> Any:
+    def _perform_request(self, request: str, *args: Any, payload: Optional[bytes] = None) -> Any:
         """@brief Perform the request and immediately raise any errors."""
-        result, exc = self._perform_request_without_raise(request, *args)
+        result, exc = self._perform_request_without_raise(request, *args, payload=payload)
         if exc is not None:
             raise exc
         return result
 
+    def _post_request(self, request: str, *args: Any, payload: Optional[bytes] = None) -> None:
+        """@brief Send a request whose result is not needed.
+
+        With protocol version 2 the response is not waited for. An error will be raised from a later
+        synchronous request. With version 1 this is the same as _perform_request().
+        """
+        if self._protocol_version == 1:
+            self._perform_request(request, *args, payload=payload)
+            return
+        with self._lock:
+            if request in self._BATCHABLE_REQUESTS:
+                self._queue_batch_op(request, args)
+            else:
+                self._send_request(request, args, payload)
+                self._limit_pending()
+
+    def _defer_request(self, request: str, *args: Any) -> Callable[[], Any]:
+        """@brief Send a request and return a callback that returns its result.
+
+        With protocol version 2 the response is only waited for when the callback is called. With version 1
+        the request is performed immediately.
+        """
+        if self._protocol_version == 1:
+            result, exc = self._perform_request_without_raise(request, *args)
+
+            def request_cb():
+                # Raise any exception here so the traceback includes the actual caller.
+                if exc is not None:
+                    raise exc
+                return result
+
+            return request_cb
+
+        if request in self._BATCHABLE_REQUESTS:
+            return self._defer_batch_op(request, args)
+
+        with self._lock:
+            rid = self._send_request(request, args)
+            self._awaited.add(rid)
+            self._limit_pending()
+
+        def deferred_request_cb():
+            with self._lock:
+                deferred_result, deferred_exc = self._wait_for_response(rid)
+                deferred_exc = self._take_posted_error() or deferred_exc
+            # Raise any exception here so the traceback includes the actual caller.
+            if deferred_exc is not None:
+                raise deferred_exc
+            return deferred_result
+
+        return deferred_request_cb
+
+    def _queue_batch_op(self, request: str, args: Tuple[Any, ...], holder: Optional[List[Any]] = None) -> None:
+        """@brief Add an operation to the next batch.
+
+        @param holder For reads, a 2-element list. The index of the operation's result in the batch results
+            is stored in the second element. The batch request ID is stored in the first element once the
+            batch is sent.
+        """
+        if holder is not None:
+            holder[1] = len(self._batch_ops)
+            self._batch_reads.append(holder)
+        self._batch_ops.append([request, *args])
+        if len(self._batch_ops) >= self.MAX_BATCH_SIZE:
+            self._send_batch()
+
+    def _defer_batch_op(self, request: str, args: Tuple[Any, ...]) -> Callable[[], Any]:
+        """@brief Queue a read operation and return a callback that returns its result."""
+        holder: List[Any] = [None, 0]
+        with self._lock:
+            self._queue_batch_op(request, args, holder)
+
+        def batch_read_cb():
+            with self._lock:
+                # Send the batch containing this read if it hasn't been sent yet.
+                if holder[0] is None:
+                    self._send_batch()
+                results, exc = self._take_batch_result(holder[0])
+                exc = self._take_posted_error() or exc
+            # Raise any exception here so the traceback includes the actual caller.
+            if exc is not None:
+                raise exc
+            return results[holder[1]]
+
+        return batch_read_cb
+
+    def _send_batch(self, extra_waiters: int = 0) -> int:
+        """@brief Send all queued operations as a batch request.
+
+        @param extra_waiters Number of callers besides queued deferred reads that will take the result.
+        @return The ID of the batch request.
+        """
+        ops = self._batch_ops
+        reads = self._batch_reads
+        self._batch_ops = []
+        self._batch_reads = []
+        rid = self._send_request('batch', (ops,))
+        waiters = len(reads) + extra_waiters
+        if waiters:
+            self._awaited.add(rid)
+            self._batch_waiters[rid] = waiters
+            for holder in reads:
+                holder[0] = rid
+        self._limit_pending()
+        return rid
+
+    def _take_batch_result(self, rid: int) -> Tuple[Any, Optional[BaseException]]:
+        """@brief Return the result of a batch request, waiting for it if necessary."""
+        if rid not in self._batch_results:
+            self._batch_results[rid] = self._wait_for_response(rid)
+        result = self._batch_results[rid]
+        self._batch_waiters[rid] -= 1
+        if self._batch_waiters[rid] == 0:
+            del self._batch_waiters[rid]
+            del self._batch_results[rid]
+        return result
+
+    def _negotiate_protocol(self) -> None:
+        """@brief Send the hello request, selecting the newest protocol version supported by the server.
+
+        Older servers only accept version 1 and return an error for other versions.
+        """
+        try:
+            self._perform_request('hello', self.PROTOCOL_VERSION)
+            self._protocol_version = self.PROTOCOL_VERSION
+        except exceptions.Error as err:
+            if self._protocol_version != 1:
+                raise
+            LOG.debug("remote probe server does not support protocol version %i; using version 1 (%s)",
+                    self.PROTOCOL_VERSION, err)
+            self._perform_request('hello', 1)
+        LOG.debug("using remote probe protocol version %i", self._protocol_version)
+
     _PROPERTY_CONVERTERS = {
             'capabilities':                 lambda value: [DebugProbe.Capability[v] for v in value],
             'supported_wire_protocols':     lambda value: [DebugProbe.Protocol[v] for v in value],
@@ -224,7 +490,7 @@ class TCPClientProbe(DebugProbe):
             self._socket.set_timeout(0.1)
 
         # Send hello message.
-        self._perform_request('hello', self.PROTOCOL_VERSION)
+        self._negotiate_protocol()
 
         self._perform_request('open')
 
@@ -233,6 +499,8 @@ class TCPClientProbe(DebugProbe):
             self._perform_request('close')
             self._socket.close()
             self._is_open = False
+            self._protocol_version = 1
+            self._init_pipeline()
 
     def lock(self):
         # The lock count is then used to only send the remote lock request once.
@@ -282,7 +550,17 @@ class TCPClientProbe(DebugProbe):
         return self._perform_request('is_reset_asserted')
 
     def flush(self):
-        self._perform_request('flush')
+        with self._lock:
+            if self._batch_ops:
+                # The server flushes the probe after executing a batch, so no separate flush request is needed.
+                _, exc = self._take_batch_result(self._send_batch(extra_waiters=1))
+                exc = self._take_posted_error() or exc
+                if exc is not None:
+                    raise exc
+            else:
+                # The response to the flush is read after the responses to all posted requests, so any errors
+                # from them will be raised here.
+                self._perform_request('flush')
 
     ##@}
 
@@ -290,46 +568,25 @@ class TCPClientProbe(DebugProbe):
     ##@{
 
     def read_dp(self, addr, now=True):
-        result, exc = self._perform_request_without_raise('read_dp', addr)
-
-        def read_dp_cb():
-            # Raise any exception here so the traceback includes the actual caller.
-            if exc is not None:
-                raise exc
-            return result
-
+        read_dp_cb = self._defer_request('read_dp', addr)
         return read_dp_cb() if now else read_dp_cb
 
     def write_dp(self, addr, data):
-        self._perform_request('write_dp', addr, data)
+        self._post_request('write_dp', addr, data)
 
     def read_ap(self, addr, now=True):
-        result, exc = self._perform_request_without_raise('read_ap', addr)
-
-        def read_ap_cb():
-            # Raise any exception here so the traceback includes the actual caller.
-            if exc is not None:
-                raise exc
-            return result
-
+        read_ap_cb = self._defer_request('read_ap', addr)
         return read_ap_cb() if now else read_ap_cb
 
     def write_ap(self, addr, data):
-        self._perform_request('write_ap', addr, data)
+        self._post_request('write_ap', addr, data)
 
     def read_ap_multiple(self, addr, count=1, now=True):
-        results, exc = self._perform_request_without_raise('read_ap_multiple', addr, count)
-
-        def read_ap_multiple_cb():
-            # Raise any exception here so the traceback includes the actual caller.
-            if exc is not None:
-                raise exc
-            return results
-
+        read_ap_multiple_cb = self._defer_request('read_ap_multiple', addr, count)
         return read_ap_multiple_cb() if now else read_ap_multiple_cb
 
     def write_ap_multiple(self, addr, values):
-        self._perform_request('write_ap_multiple', addr, values)
+        self._post_request('write_ap_multiple', addr, values)
 
     def get_memory_interface_for_ap(self, ap_address):
         handle = self._perform_request('get_memory_interface_for_ap',
@@ -353,7 +610,10 @@ class TCPClientProbe(DebugProbe):
         self._perform_request('swo_stop')
 
     def swo_read(self):
-        return self._perform_request('swo_read')
+        result = self._perform_request('swo_read')
+        if isinstance(result, bytes):
+            return bytearray(result)
+        return result
 
     ##@}
 
@@ -364,32 +624,43 @@ class RemoteMemoryInterface(MemoryInterface):
         self._remote_probe = remote_probe
         self._handle = handle
 
+    @property
+    def _is_binary(self):
+        return self._remote_probe.protocol_version >= 2
+
     def write_memory(self, addr, data, transfer_size=32, **attrs):
         assert transfer_size in (8, 16, 32)
-        self._remote_probe._perform_request('write_mem', self._handle, addr, data, transfer_size)
+        self._remote_probe._post_request('write_mem', self._handle, addr, data, transfer_size)
 
     def read_memory(self, addr, transfer_size=32, now=True, **attrs):
         assert transfer_size in (8, 16, 32)
-        result, exc = self._remote_probe._perform_request_without_raise('read_mem', self._handle, addr, transfer_size)
-
-        def read_callback():
-            # Raise any exception here so the traceback includes the actual caller.
-            if exc is not None:
-                raise exc
-            return result
+        read_callback = self._remote_probe._defer_request('read_mem', self._handle, addr, transfer_size)
         return read_callback() if now else read_callback
 
     def write_memory_block32(self, addr, data, **attrs):
-        self._remote_probe._perform_request('write_block32', self._handle, addr, data)
+        if self._is_binary:
+            self._remote_probe._post_request('write_block32', self._handle, addr,
+                    payload=struct.pack("<%dI" % len(data), *data))
+        else:
+            self._remote_probe._post_request('write_block32', self._handle, addr, data)
 
     def read_memory_block32(self, addr, size, **attrs):
-        return self._remote_probe._perform_request('read_block32', self._handle, addr, size)
+        result = self._remote_probe._perform_request('read_block32', self._handle, addr, size)
+        if isinstance(result, bytes):
+            return list(struct.unpack("<%dI" % (len(result) // 4), result))
+        return result
 
     def write_memory_block8(self, addr, data, **attrs):
-        self._remote_probe._perform_request('write_block8', self._handle, addr, data)
+        if self._is_binary:
+            self._remote_probe._post_request('write_block8', self._handle, addr, payload=bytes(data))
+        else:
+            self._remote_probe._post_request('write_block8', self._handle, addr, list(data))
 
     def read_memory_block8(self, addr, size, **attrs):
-        return self._remote_probe._perform_request('read_block8', self._handle, addr, size)
+        result = self._remote_probe._perform_request('read_block8', self._handle, addr, size)
+        if isinstance(result, bytes):
+            return list(result)
+        return result
 
 class TCPClientProbePlugin(Plugin):
     """@brief Plugin class for TCPClientProbePlugin."""
@@ -19,6 +19,7 @@ import logging
 import threading
 import json
 import socket
+import struct
 from socketserver import (ThreadingTCPServer, StreamRequestHandler)
 from time import sleep
 from typing import (Callable, Dict, Optional, TYPE_CHECKING, Tuple, cast)
@@ -27,6 +28,7 @@ from .shared_probe_proxy import SharedDebugProbeProxy
 from ..core import exceptions
 from .debug_probe import DebugProbe
 from ..coresight.ap import (APVersion, APv1Address, APv2Address)
+from ..utility.timeout import Timeout
 
 if TYPE_CHECKING:
     from ..core.session import Session
@@ -136,13 +138,13 @@ class DebugProbeServer(threading.Thread):
 
     def run(self) -> None:
         """@brief The server thread implementation."""
-        self._did_start = True
-        self._is_running = True
-
-        # Read back the actual port if 0 was specified.
+        # Read back the actual port if 0 was specified. This is done before start() returns.
         if self._port == 0:
             self._port = self._server.socket.getsockname()[1]
 
+        self._did_start = True
+        self._is_running = True
+
         LOG.info("Serving debug probe %s (%s) on port %i",
                 self._probe.description, self._probe.unique_id, self._port)
         self._server.serve_forever()
@@ -177,6 +179,13 @@ class DebugProbeRequestHandler(StreamRequestHandler):
 
     This class implements the server side for the remote probe protocol.
 
+    Protocol version 1 sends each request and response as a line of JSON. Once a client negotiates
+    version 2 with the `hello` request, each message is instead a frame consisting of an 8-byte header
+    with the little-endian 32-bit lengths of the JSON part and of a binary payload, followed by the
+    JSON and the payload. A request with a `"binary": true` key passes the payload as its final
+    argument, and a response with this key has the payload as its result. Requests are handled in the
+    order received, so clients may send further requests before reading responses.
+
     request:
     ````
     {
@@ -198,7 +207,17 @@ class DebugProbeRequestHandler(StreamRequestHandler):
     """
 
     ## Current version of the remote probe protocol.
-    PROTOCOL_VERSION = 1
+    PROTOCOL_VERSION = 2
+
+    # Send each response immediately, rather than waiting to coalesce it with following responses, as the
+    # client may be waiting for it.
+    disable_nagle_algorithm = True
+
+    ## Header of version 2 message frames: JSON length, payload length.
+    FRAME_HEADER = struct.Struct("<II")
+
+    ## Largest JSON or payload part accepted in a frame.
+    MAX_FRAME_PART_SIZE = 64 * 1024 * 1024
 
     class StatusCode:
         """@brief Constants for errors reported from the server."""
@@ -229,6 +248,10 @@ class DebugProbeRequestHandler(StreamRequestHandler):
         if self._probe.session is None:
             self._probe.session = self._session
 
+        # Connections start with version 1 framing until the client's hello request selects another version.
+        self._protocol_version: int = 1
+        self._next_protocol_version: int = 1
+
         # Dict to store handles for AP memory interfaces.
         self._next_ap_memif_handle: int = 0
         self._ap_memif_handles: Dict[int, "MemoryInterface"] = {}
@@ -268,6 +291,24 @@ class DebugProbeRequestHandler(StreamRequestHandler):
                 'write_block32':        (self._request__write_block32,      3   ), # 'write_block32', handle:int, addr:int, data:List[int]
                 'read_block8':          (self._request__read_block8,        3   ), # 'read_block8', handle:int, addr:int, word_count:int -> List[int]
                 'write_block8':         (self._request__write_block8,       3   ), # 'write_block8', handle:int, addr:int, data:List[int]
+                'batch':                (self._request__batch,              1   ), # 'batch', ops:List[List] -> List
+            }
+
+        # Operations accepted by the batch request. Read handlers return a callable for deferred reads.
+        self._BATCH_HANDLERS: Dict[str, Tuple[Callable, int]] = {
+                # Operation              Handler                            Arg count
+                'read_dp':              (lambda addr: self._probe.read_dp(addr, now=False),     1), # addr:int -> int
+                'write_dp':             (self._probe.write_dp,              2   ), # addr:int, data:int
+                'read_ap':              (lambda addr: self._probe.read_ap(addr, now=False),     1), # addr:int -> int
+                'write_ap':             (self._probe.write_ap,              2   ), # addr:int, data:int
+                'read_ap_multiple':     (lambda addr, count: self._probe.read_ap_multiple(addr, count, now=False), 2), # addr:int, count:int -> List[int]
+                'write_ap_multiple':    (self._probe.write_ap_multiple,     2   ), # addr:int, data:List[int]
+                'read_mem':             (lambda handle, addr, xfer_size:
+                                            self._get_memif(handle).read_memory(addr, xfer_size, now=False), 3), # handle:int, addr:int, xfer_size:int -> int
+                'write_mem':            (self._request__write_mem,          4   ), # handle:int, addr:int, value:int, xfer_size:int
+                'poll_dp':              (self._batch__poll_dp,              4   ), # addr:int, mask:int, match:int, timeout:float -> int
+                'poll_ap':              (self._batch__poll_ap,              4   ), # addr:int, mask:int, match:int, timeout:float -> int
+                'poll_mem':             (self._batch__poll_mem,             6   ), # handle:int, addr:int, xfer_size:int, mask:int, match:int, timeout:float -> int
             }
 
         # Let superclass do its thing.
@@ -285,28 +326,60 @@ class DebugProbeRequestHandler(StreamRequestHandler):
 
         super().finish()
 
+    def _send_message(self, response_dict, payload=None):
+        response = json.dumps(response_dict)
+        TRACE.debug("response: %s", response)
+        response_encoded = response.encode('utf-8')
+        if self._protocol_version == 1:
+            self.wfile.write(response_encoded + b"\n")
+        else:
+            if payload is None:
+                payload = b""
+            self.wfile.write(self.FRAME_HEADER.pack(len(response_encoded), len(payload))
+                    + response_encoded + payload)
+
     def _send_error_response(self, status=1, message=""):
         response_dict = {
                 "id": self._current_request_id,
                 "status": status,
                 "error": message,
             }
-        response = json.dumps(response_dict)
-        TRACE.debug("response: %s", response)
-        response_encoded = response.encode('utf-8')
-        self.wfile.write(response_encoded + b"\n")
+        self._send_message(response_dict)
 
     def _send_response(self, result):
         response_dict = {
                 "id": self._current_request_id,
                 "status": 0,
             }
-        if result is not None:
+        payload = None
+        if isinstance(result, (bytes, bytearray)) and self._protocol_version >= 2:
+            response_dict["binary"] = True
+            payload = result
+        elif result is not None:
             response_dict["result"] = result
-        response = json.dumps(response_dict)
-        TRACE.debug("response: %s", response)
-        response_encoded = response.encode('utf-8')
-        self.wfile.write(response_encoded + b"\n")
+        self._send_message(response_dict, payload)
+
+    def _read_request(self):
+        """@brief Read the next request message.
+        @return 2-tuple of the raw JSON request and the binary payload, if any. The JSON is empty if the
+            connection was closed.
+        """
+        if self._protocol_version == 1:
+            return self.rfile.readline(), None
+
+        header = self.rfile.read(self.FRAME_HEADER.size)
+        if len(header) < self.FRAME_HEADER.size:
+            return b"", None
+        json_length, payload_length = self.FRAME_HEADER.unpack(header)
+        if json_length > self.MAX_FRAME_PART_SIZE or payload_length > self.MAX_FRAME_PART_SIZE:
+            # Framing can't be trusted any more, so drop the connection.
+            LOG.error("Invalid request frame from client %s; closing connection", self._client_domain)
+            return b"", None
+        request = self.rfile.read(json_length)
+        payload = self.rfile.read(payload_length)
+        if len(request) < json_length or len(payload) < payload_length:
+            return b"", None
+        return request, payload
 
     def handle(self):
         # Process requests until the connection is closed.
@@ -317,8 +390,8 @@ class DebugProbeRequestHandler(StreamRequestHandler):
                 request_dict = None
                 self._current_request_id = -1
 
-                # Read request line.
-                request = self.rfile.readline()
+                # Read request.
+                request, payload = self._read_request()
                 TRACE.debug("request: %s", request)
                 if len(request) == 0:
                     LOG.debug("empty request, closing connection")
@@ -351,6 +424,10 @@ class DebugProbeRequestHandler(StreamRequestHandler):
                     self._send_error_response(message="invalid request arguments format")
                     continue
 
+                # Binary data is passed as the final argument.
+                if request_dict.get('binary', False):
+                    request_args.append(payload)
+
                 if request_type not in self._REQUEST_HANDLERS:
                     self._send_error_response(message="unknown request type")
                     continue
@@ -360,6 +437,9 @@ class DebugProbeRequestHandler(StreamRequestHandler):
 
                 # Send a success response.
                 self._send_response(result)
+
+                # Switch protocol version after the response to a hello request.
+                self._protocol_version = self._next_protocol_version
             # Catch all exceptions so that an error response can be returned, to not leave the client hanging.
             except Exception as err:
                 # Only send an error response if we received an request.
@@ -399,9 +479,10 @@ class DebugProbeRequestHandler(StreamRequestHandler):
 
     def _request__hello(self, version):
         # 'hello', protocol-version:int
-        if version != self.PROTOCOL_VERSION:
-            raise exceptions.Error("client requested unsupported protocol version %i (expected %i)" %
+        if not (1 <= version <= self.PROTOCOL_VERSION):
+            raise exceptions.Error("client requested unsupported protocol version %i (expected 1-%i)" %
                     (version, self.PROTOCOL_VERSION))
+        self._next_protocol_version = version
 
     def _request__read_property(self, name):
         # 'readprop', name:str
@@ -442,7 +523,16 @@ class DebugProbeRequestHandler(StreamRequestHandler):
         return handle
 
     def _request__swo_read(self):
-        return list(self._probe.swo_read())
+        # 'swo_read' -> List[int] | binary
+        data = self._probe.swo_read()
+        if self._protocol_version >= 2:
+            return bytes(data)
+        return list(data)
+
+    def _get_memif(self, handle):
+        if handle not in self._ap_memif_handles:
+            raise exceptions.Error("invalid handle received from remote memory access")
+        return self._ap_memif_handles[handle]
 
     def _request__read_mem(self, handle, addr, xfer_size):
         # 'read_mem', handle:int, addr:int, xfer_size:int -> int
@@ -457,33 +547,83 @@ class DebugProbeRequestHandler(StreamRequestHandler):
         self._ap_memif_handles[handle].write_memory(addr, value, xfer_size)
 
     def _request__read_block32(self, handle, addr, word_count):
-        # 'read_block32', handle:int, addr:int, word_count:int -> List[int]
-        # TODO use base64 data
+        # 'read_block32', handle:int, addr:int, word_count:int -> List[int] | binary
         if handle not in self._ap_memif_handles:
             raise exceptions.Error("invalid handle received from remote memory access")
-        return self._ap_memif_handles[handle].read_memory_block32(addr, word_count)
+        data = self._ap_memif_handles[handle].read_memory_block32(addr, word_count)
+        if self._protocol_version >= 2:
+            return struct.pack("<%dI" % len(data), *data)
+        return data
 
     def _request__write_block32(self, handle, addr, data):
-        # 'write_block32', handle:int, addr:int, data:List[int]
-        # TODO use base64 data
+        # 'write_block32', handle:int, addr:int, data:List[int] | binary
         if handle not in self._ap_memif_handles:
             raise exceptions.Error("invalid handle received from remote memory access")
+        if isinstance(data, bytes):
+            data = list(struct.unpack("<%dI" % (len(data) // 4), data))
         self._ap_memif_handles[handle].write_memory_block32(addr, data)
 
     def _request__read_block8(self, handle, addr, word_count):
-        # 'read_block8', handle:int, addr:int, word_count:int -> List[int]
-        # TODO use base64 data
+        # 'read_block8', handle:int, addr:int, word_count:int -> List[int] | binary
         if handle not in self._ap_memif_handles:
             raise exceptions.Error("invalid handle received from remote memory access")
-        return self._ap_memif_handles[handle].read_memory_block8(addr, word_count)
+        data = self._ap_memif_handles[handle].read_memory_block8(addr, word_count)
+        if self._protocol_version >= 2:
+            return bytes(data)
+        return data
 
     def _request__write_block8(self, handle, addr, data):
-        # 'write_block8', handle:int, addr:int, data:List[int]
-        # TODO use base64 data
+        # 'write_block8', handle:int, addr:int, data:List[int] | binary
         if handle not in self._ap_memif_handles:
             raise exceptions.Error("invalid handle received from remote memory access")
         self._ap_memif_handles[handle].write_memory_block8(addr, data)
 
+    def _request__batch(self, ops):
+        # 'batch', ops:List[List] -> List
+        #
+        # Each operation is a list of the operation name followed by its arguments. All reads are queued
+        # to the probe before any result is collected, so the probe can combine them into as few
+        # transfers as possible. The probe is flushed at the end so that errors from writes are reported
+        # for this batch. The first error fails the whole batch.
+        if not isinstance(ops, list):
+            raise exceptions.Error("malformed batch request; operations must be a list")
+        results = []
+        for index, op in enumerate(ops):
+            if not isinstance(op, list) or not op or op[0] not in self._BATCH_HANDLERS:
+                raise exceptions.Error("malformed batch request; invalid operation %i" % index)
+            handler, arg_count = self._BATCH_HANDLERS[op[0]]
+            self._check_args(op[1:], arg_count)
+            try:
+                results.append(handler(*op[1:]))
+            except exceptions.Error:
+                LOG.debug("batch operation %i (%s) failed", index, op[0])
+                raise
+        results = [(r() if callable(r) else r) for r in results]
+        self._probe.flush()
+        return results
+
+    def _poll(self, read_fn, mask, match, timeout):
+        """@brief Read a value until it matches under the mask or the timeout expires."""
+        with Timeout(timeout) as t_o:
+            while True:
+                value = read_fn()
+                if (value & mask) == match:
+                    return value
+                if not t_o.check():
+                    break
+        raise exceptions.TransferTimeoutError("timeout polling for value 0x%x under mask 0x%x (last value 0x%x)"
+                % (match, mask, value))
+
+    def _batch__poll_dp(self, addr, mask, match, timeout):
+        return self._poll(lambda: self._probe.read_dp(addr), mask, match, timeout)
+
+    def _batch__poll_ap(self, addr, mask, match, timeout):
+        return self._poll(lambda: self._probe.read_ap(addr), mask, match, timeout)
+
+    def _batch__poll_mem(self, handle, addr, xfer_size, mask, match, timeout):
+        memif = self._get_memif(handle)
+        return self._poll(lambda: memif.read_memory(addr, xfer_size), mask, match, timeout)
+
     _PROPERTY_CONVERTERS = {
             'capabilities':                 lambda value: [v.name for v in value],
             'supported_wire_protocols':     lambda value: [v.name for v in value],
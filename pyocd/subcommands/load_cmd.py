@@ -15,17 +15,20 @@
 # limitations under the License.
 
 import argparse
-from typing import List
+import json
+from typing import (Iterator, List, Optional, Tuple)
 import logging
 from pathlib import Path
 
 from .base import SubcommandBase
 from ..core.helpers import ConnectHelper
 from ..flash.file_programmer import FileProgrammer
+from ..flash.parallel_programmer import ParallelProgrammer
 from ..utility.cmdline import (
     convert_session_options,
     int_base_0,
 )
+from ..utility.progress import print_progress
 
 LOG = logging.getLogger(__name__)
 
@@ -64,6 +67,11 @@ class LoadSubcommand(SubcommandBase):
             help="Skip programming the first N bytes. Binary files only.")
         parser_options.add_argument("--no-reset", action="store_true",
             help="Specify to prevent resetting device after programming has finished.")
+        parser_options.add_argument("--all-probes", action="store_true",
+            help="Program the targets of all connected probes in parallel. The --uid option can be used to "
+                 "select a subset of probes.")
+        parser_options.add_argument("--report", metavar="PATH",
+            help="Write a JSON report of the result for each probe to the given file. Requires --all-probes.")
 
         parser.add_argument("file", metavar="<file-path>", nargs="+",
             help="File to write to memory. Binary files can have an optional base address appended to the file "
@@ -79,6 +87,11 @@ class LoadSubcommand(SubcommandBase):
         if (self._args.base_address is not None) and (len(self._args.file) > 1):
             raise ValueError("--base-address cannot be set when loading more than one file; "
                     "use a base address suffix instead")
+        if (self._args.report is not None) and not self._args.all_probes:
+            raise ValueError("--report requires --all-probes")
+
+        if self._args.all_probes:
+            return self._load_all_probes()
 
         session = ConnectHelper.session_with_chosen_probe(
                             project_dir=self._args.project_dir,
@@ -102,31 +115,9 @@ class LoadSubcommand(SubcommandBase):
                             chip_erase=self._args.erase,
                             trust_crc=self._args.trust_crc,
                             no_reset=self._args.no_reset)
-            for filename in self._args.file:
-                # Get an initial path with the argument as-is.
-                file_path = Path(filename).expanduser()
-
-                # Look for a base address suffix. If the supplied argument including an address suffix
-                # references an existing file, then the address suffix is not extracted.
-                if "@" in filename and not file_path.exists():
-                    filename, suffix = filename.rsplit("@", 1)
-                    try:
-                        base_address = int_base_0(suffix)
-                    except ValueError:
-                        LOG.error(f'Base address suffix "{suffix}" on file "{filename}" is not a valid integer address')
-                        return 1
-                else:
-                    base_address = self._args.base_address
-
-                # Resolve our path.
-                file_path = Path(filename).expanduser().resolve()
-                filename = str(file_path)
-
-                if base_address is None:
-                    LOG.info("Loading %s", filename)
-                else:
-                    LOG.info("Loading %s at %#010x", filename, base_address)
-
+            for filename, base_address in self._files():
+                if filename is None:
+                    return 1
                 programmer.program(filename,
                                 base_address=base_address,
                                 skip=self._args.skip,
@@ -134,4 +125,86 @@ class LoadSubcommand(SubcommandBase):
 
         return 0
 
+    def _files(self) -> Iterator[Tuple[Optional[str], Optional[int]]]:
+        """@brief Generate the path and base address of each file argument.
+
+        If a base address suffix is invalid, an error is logged and (None, None) is generated.
+        """
+        for filename in self._args.file:
+            # Get an initial path with the argument as-is.
+            file_path = Path(filename).expanduser()
+
+            # Look for a base address suffix. If the supplied argument including an address suffix
+            # references an existing file, then the address suffix is not extracted.
+            if "@" in filename and not file_path.exists():
+                filename, suffix = filename.rsplit("@", 1)
+                try:
+                    base_address = int_base_0(suffix)
+                except ValueError:
+                    LOG.error(f'Base address suffix "{suffix}" on file "{filename}" is not a valid integer address')
+                    yield None, None
+                    return
+            else:
+                base_address = self._args.base_address
+
+            # Resolve our path.
+            file_path = Path(filename).expanduser().resolve()
+            filename = str(file_path)
+
+            if base_address is None:
+                LOG.info("Loading %s", filename)
+            else:
+                LOG.info("Loading %s at %#010x", filename, base_address)
+
+            yield filename, base_address
+
+    def _load_all_probes(self) -> int:
+        """@brief Program all matching probes with ParallelProgrammer."""
+        # Read the files once, before connecting, so that file errors are reported only once.
+        images = []
+        for filename, base_address in self._files():
+            if filename is None:
+                return 1
+            images.append(FileProgrammer.read_image(filename,
+                            base_address=base_address,
+                            skip=self._args.skip,
+                            file_format=self._args.format))
+
+        options = convert_session_options(self._args.options)
+        programmer = ParallelProgrammer(
+                            unique_id=self._args.unique_id,
+                            progress=None if options.get('hide_programming_progress') else print_progress(),
+                            chip_erase=self._args.erase,
+                            trust_crc=self._args.trust_crc,
+                            no_reset=self._args.no_reset,
+                            project_dir=self._args.project_dir,
+                            config_file=self._args.config,
+                            user_script=self._args.script,
+                            no_config=self._args.no_config,
+                            pack=self._args.pack,
+                            target_override=self._args.target_override,
+                            frequency=self._args.frequency,
+                            connect_mode=self._args.connect_mode,
+                            options=options,
+                            option_defaults=self._modified_option_defaults(),
+                            )
+        if not programmer.probes:
+            LOG.error("No connected debug probes")
+            return 1
+
+        results = programmer.program_images(images)
+        report = programmer.report(results)
+
+        for result in results:
+            if result.success:
+                LOG.info("%s: programmed %s", result.unique_id, result.target_type)
+            else:
+                LOG.error("%s: failed: %s", result.unique_id, result.error)
+
+        if self._args.report is not None:
+            with open(self._args.report, 'w') as report_file:
+                json.dump(report, report_file, indent=2)
+
+        return 0 if report['failed'] == 0 else 1
+
 
@@ -29,6 +29,7 @@ from typing import List
 from pyocd.core.helpers import ConnectHelper
 from pyocd.core.soc_target import SoCTarget
 from pyocd.debug.rtt import RTTControlBlock, RTTUpChannel, RTTDownChannel
+from pyocd.debug.rtt_scheduler import RTTPollScheduler
 from pyocd.subcommands.base import SubcommandBase
 from pyocd.utility.cmdline import convert_session_options, int_base_0
 from pyocd.utility.kbhit import KBHit
@@ -113,6 +114,9 @@ class RTTSubcommand(SubcommandBase):
 
                 target.resume()
 
+                scheduler = RTTPollScheduler.from_session(session)
+                scheduler.add_channel(self._args.up_channel_id, up_chan.size)
+
                 # set up terminal input
                 kb = KBHit()
 
@@ -124,9 +128,13 @@ class RTTSubcommand(SubcommandBase):
                     down_name = down_chan.name if down_chan.name is not None else ""
                     LOG.info(f"Writing to down channel {self._args.down_channel_id} (\"{down_name}\")")
 
-                    self.viewer_loop(up_chan, down_chan, kb)
+                    self.viewer_loop(control_block, scheduler, kb)
                 else:
-                    self.logger_loop(up_chan, kb)
+                    self.logger_loop(control_block, scheduler, kb)
+
+                LOG.info(f"RTT polling: {scheduler}")
+                LOG.info(f"Up channel {self._args.up_channel_id}: "
+                         f"{scheduler.channels[self._args.up_channel_id]}")
 
         except KeyboardInterrupt:
             pass
@@ -139,9 +147,11 @@ class RTTSubcommand(SubcommandBase):
 
         return 0
 
-    def logger_loop(self, up_chan, kb):
+    def logger_loop(self, control_block, scheduler, kb):
 
         LOG.info("start logging ... Press any key to stop")
+        up_chan_id = self._args.up_channel_id
+        up_stats = scheduler.channels[up_chan_id]
         total_size = 0
         block_size = 0
         last_time = time.time()
@@ -149,19 +159,23 @@ class RTTSubcommand(SubcommandBase):
         with open(self._args.log_file, 'wb') as log_file:
 
             while True:
-                # poll at most 1000 times per second to limit CPU use
-                sleep(0.001)
+                # the poll interval adapts to the rate of data from the target
+                sleep(scheduler.interval)
 
                 # read data from up buffer
-                data = up_chan.read()
+                up_data, _ = control_block.poll([up_chan_id])
+                data = up_data.get(up_chan_id, b'')
                 log_file.write(data)
+                scheduler.update({up_chan_id: len(data)})
 
                 s = len(data)
                 block_size += s
                 total_size += s
                 diff = time.time() - last_time
                 if diff > 1.0:
-                    print(f"Transfer rate: {block_size / 1000:.1f} KByte/s; Bytes written: {total_size / 1000:.0f} KByte", end="\r")
+                    print(f"Transfer rate: {block_size / 1000:.1f} KByte/s; Bytes written: {total_size / 1000:.0f} KByte; "
+                          f"Buffer fill: {up_stats.peak_fill * 100:.0f}% peak, "
+                          f"overflow risk {up_stats.overflow_risk * 100:.0f}%", end="\r")
                     block_size = 0
                     last_time = time.time()
 
@@ -169,19 +183,16 @@ class RTTSubcommand(SubcommandBase):
                 if kb.kbhit():
                     break
 
-    def viewer_loop(self, up_chan, down_chan, kb):
+    def viewer_loop(self, control_block, scheduler, kb):
+        up_chan_id = self._args.up_channel_id
+        down_chan_id = self._args.down_channel_id
+
         # byte array to send via RTT
         cmd = bytes()
 
         while True:
-            # poll at most 1000 times per second to limit CPU use
-            sleep(0.001)
-
-            # read data from up buffer 0 (target -> host) and write to
-            # stdout
-            up_data: bytes = up_chan.read()
-            sys.stdout.buffer.write(up_data)
-            sys.stdout.buffer.flush()
+            # the poll interval adapts to the rate of data from the target
+            sleep(scheduler.interval)
 
             # try to fetch character
             if kb.kbhit():
@@ -195,10 +206,18 @@ class RTTSubcommand(SubcommandBase):
                 # add char to buffer
                 cmd += c.encode("utf-8")
 
-            # write buffer to target
-            if not cmd:
-                continue
-
-            # write cmd buffer to down buffer 0 (host -> target)
-            bytes_out = down_chan.write(cmd)
-            cmd = cmd[bytes_out:]
+            # read data from up buffer (target -> host) and write cmd buffer
+            # to down buffer (host -> target) in a single poll
+            up_data, bytes_out = control_block.poll([up_chan_id], {down_chan_id: cmd} if cmd else None)
+            data = up_data.get(up_chan_id, b'')
+            scheduler.update({up_chan_id: len(data)})
+
+            # write data from the up buffer to stdout
+            if data:
+                sys.stdout.buffer.write(data)
+                sys.stdout.buffer.flush()
+
+            if cmd:
+                cmd = cmd[bytes_out.get(down_chan_id, 0):]
+                # the target is likely to respond to the command
+                scheduler.reset()
@@ -0,0 +1,120 @@
+# pyOCD debugger
+# Copyright (c) 2026 PyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import (Any, Dict, Optional, TYPE_CHECKING, Union)
+
+if TYPE_CHECKING:
+    from ...core.session import Session
+
+LOG = logging.getLogger(__name__)
+
+class FlashAlgoCache:
+    """@brief On-disk cache of flash algorithms extracted from FLM files.
+
+    Each entry holds everything PackFlashAlgo derives from an FLM's ELF file, so an algo can be
+    constructed again without parsing the ELF. Entries are keyed by the SHA-256 of the FLM contents
+    and stored one per JSON file in the cache directory. Because the key depends only on the file
+    contents, an entry never has to be invalidated; a modified FLM simply gets a new entry.
+
+    Entries are written atomically, so any number of processes can share the cache directory. Loaded
+    entries are also kept in memory for the life of the process.
+    """
+
+    ## Version of the entry format. Must be incremented whenever the entry contents change.
+    VERSION = 1
+
+    ## Entries loaded or stored by this process, keyed by cache directory and key.
+    _memory_cache: Dict[str, Dict[str, Any]] = {}
+    _memory_cache_lock = threading.Lock()
+
+    def __init__(self, path: str) -> None:
+        self._path = os.path.abspath(os.path.expanduser(path))
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @classmethod
+    def get_default(cls, session: "Session") -> Optional["FlashAlgoCache"]:
+        """@brief Return a cache for the directory set by the session's `pack.algo_cache_dir` option.
+
+        @param session The session whose options are used.
+        @return FlashAlgoCache instance, or None if the option is not set.
+        """
+        path = session.options.get('pack.algo_cache_dir')
+        return cls(path) if path else None
+
+    @staticmethod
+    def make_key(data: Union[bytes, bytearray, memoryview]) -> str:
+        """@brief Compute the cache key for the contents of an FLM file."""
+        return hashlib.sha256(data).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self._path, key + ".json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """@brief Return the cached entry for a key, or None if there isn't a valid one."""
+        entry_path = self._entry_path(key)
+        with self._memory_cache_lock:
+            entry = self._memory_cache.get(entry_path)
+        if entry is not None:
+            return entry
+
+        try:
+            with open(entry_path, 'r') as f:
+                contents = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            LOG.debug("Ignoring unreadable flash algo cache entry %s: %s", entry_path, e)
+            return None
+        if not isinstance(contents, dict) or contents.get('version') != self.VERSION:
+            LOG.debug("Ignoring flash algo cache entry %s with unsupported version", entry_path)
+            return None
+
+        entry = contents.get('algo')
+        if not isinstance(entry, dict):
+            return None
+        with self._memory_cache_lock:
+            self._memory_cache[entry_path] = entry
+        return entry
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        """@brief Store an entry.
+
+        Failure to write the entry is logged but is otherwise not an error.
+        """
+        entry_path = self._entry_path(key)
+        with self._memory_cache_lock:
+            self._memory_cache[entry_path] = entry
+
+        temp_path = "%s.%d.%d.tmp" % (entry_path, os.getpid(), threading.get_ident())
+        try:
+            os.makedirs(self._path, exist_ok=True)
+            with open(temp_path, 'w') as f:
+                json.dump({'version': self.VERSION, 'algo': entry}, f, sort_keys=True)
+            os.replace(temp_path, entry_path)
+        except OSError as e:
+            LOG.debug("Failed to write flash algo cache entry %s: %s", entry_path, e)
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
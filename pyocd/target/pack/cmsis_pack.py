@@ -27,6 +27,7 @@ import errno
 from pathlib import Path
 from typing import (Any, Callable, Dict, List, IO, Optional, Tuple, TypeVar, Set, Union)
 
+from .algo_cache import FlashAlgoCache
 from .flash_algo import PackFlashAlgo
 from ...core import exceptions
 from ...core.memory_map import (
@@ -691,12 +692,14 @@ class CmsisPackDevice:
         self._processors_ap_map: Dict[APAddressBase, ProcessorInfo] = {}
         self._built_apid_map: bool = False
 
-    def _build_memory_regions(self) -> None:
+    def _build_memory_regions(self, algo_cache: Optional[FlashAlgoCache]) -> None:
         """@brief Creates memory region instances for the device.
 
         For each `<memory>` element in the device info, a memory region object is created and
         added to the `_regions` attribute. IROM or non-writable memories are created as RomRegions
         by this method. They will be converted to FlashRegions by _build_flash_regions().
+
+        @param algo_cache Flash algo cache used when loading FLM files, or None.
         """
         for elem in self._info.memories:
             try:
@@ -753,7 +756,7 @@ class CmsisPackDevice:
                     algo_element = None
 
                 # Convert the region to flash if we found a matching algorithm element.
-                if (algo_element is not None) and self._set_flash_attributes(algo_element, attrs):
+                if (algo_element is not None) and self._set_flash_attributes(algo_element, attrs, algo_cache):
                     # Mark this algo as processed.
                     self._processed_algos.add(algo_element)
 
@@ -787,7 +790,7 @@ class CmsisPackDevice:
                 continue
 
             # Load flash algo from .FLM file so we can get its address range, etc.
-            pack_algo = self._load_flash_algo(algo.attrib['name'])
+            pack_algo = self._load_flash_algo(algo.attrib['name'], algo_cache)
             if pack_algo is None:
                 LOG.warning(f"{self.pack_description.pack_name} DFP ({self.part_number}): "
                     f"failed to find or load flash algorithm '{algo.attrib['name']}'")
@@ -837,9 +840,10 @@ class CmsisPackDevice:
 
         return attrs
 
-    def _set_flash_attributes(self, algo_element: Element, attrs: dict) -> bool:
+    def _set_flash_attributes(self, algo_element: Element, attrs: dict,
+            algo_cache: Optional[FlashAlgoCache]) -> bool:
         # Load flash algo from .FLM file.
-        pack_algo = self._load_flash_algo(algo_element.attrib['name'])
+        pack_algo = self._load_flash_algo(algo_element.attrib['name'], algo_cache)
         if pack_algo is None:
             LOG.warning(f"{self.pack_description.pack_name} DFP ({self.part_number}): "
                 f"failed to find or load flash algorithm '{algo_element.attrib['name']}'")
@@ -886,11 +890,11 @@ class CmsisPackDevice:
                     return algo
         raise KeyError("no matching flash algorithm")
 
-    def _load_flash_algo(self, filename: str) -> Optional[PackFlashAlgo]:
+    def _load_flash_algo(self, filename: str, algo_cache: Optional[FlashAlgoCache]) -> Optional[PackFlashAlgo]:
         """@brief Return the PackFlashAlgo instance for the given flash algo filename."""
         try:
             algo_data = self.get_file(filename)
-            return PackFlashAlgo(algo_data)
+            return PackFlashAlgo(algo_data, algo_cache)
         except FileNotFoundError:
             # Return default value.
             return None
@@ -1005,9 +1009,18 @@ class CmsisPackDevice:
     @property
     def memory_map(self) -> MemoryMap:
         """@brief MemoryMap object."""
+        return self.get_memory_map()
+
+    def get_memory_map(self, algo_cache: Optional[FlashAlgoCache] = None) -> MemoryMap:
+        """@brief Return the MemoryMap object, constructing it on first use.
+
+        @param self
+        @param algo_cache Flash algo cache used when loading the device's FLM files to construct the
+            memory map. Ignored if the memory map has already been constructed.
+        """
         # Lazily construct the memory map.
         if self._memory_map is None:
-            self._build_memory_regions()
+            self._build_memory_regions(algo_cache)
 
             # Warn if there was no boot memory.
             if not self._saw_startup:
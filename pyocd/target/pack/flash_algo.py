@@ -15,6 +15,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import base64
+import io
 import os
 import struct
 import logging
@@ -27,6 +29,7 @@ from ...core.memory_map import MemoryRange
 from ...core import exceptions
 from ...utility.conversion import byte_list_to_u32le_list
 from ...utility.mask import align_down
+from .algo_cache import FlashAlgoCache
 
 if TYPE_CHECKING:
     from ...debug.elf.elf import ELFSection
@@ -90,15 +93,49 @@ class PackFlashAlgo:
     # Alignment for page buffers.
     _PAGE_BUFFER_ALIGN = 16
 
-    def __init__(self, data):
-        """@brief Construct a PackFlashAlgo from a file-like object."""
-        self.elf = ELFBinaryFile(data)
-        self.flash_info = PackFlashInfo(self.elf)
+    def __init__(self, data, cache: Optional[FlashAlgoCache] = None):
+        """@brief Construct a PackFlashAlgo from a file-like object or path.
 
-        self.flash_start = self.flash_info.start
-        self.flash_size = self.flash_info.size
-        self.page_size = self.flash_info.page_size
-        self.sector_sizes = self.flash_info.sector_info_list
+        If a flash algo cache is passed in _cache_, the values extracted from the FLM are saved in it.
+        When the cache already has an entry for the FLM's contents, it is used instead of parsing the
+        ELF file. Callers normally get the cache from FlashAlgoCache.get_default() with their session.
+        """
+        if isinstance(data, (str, os.PathLike)):
+            with open(data, 'rb') as f:
+                self._data = f.read()
+        else:
+            self._data = data.read()
+        self._elf: Optional[ELFBinaryFile] = None
+
+        if cache is not None:
+            key = FlashAlgoCache.make_key(self._data)
+            entry = cache.get(key)
+            if entry is not None:
+                try:
+                    self._restore_cache_entry(entry)
+                    return
+                except (AttributeError, KeyError, TypeError, ValueError) as err:
+                    LOG.debug("Ignoring invalid flash algo cache entry %s: %s", key, err)
+
+        self._extract()
+
+        if cache is not None:
+            cache.put(key, self._make_cache_entry())
+
+    @property
+    def elf(self) -> ELFBinaryFile:
+        """@brief The parsed FLM file.
+
+        The ELF is only parsed on first access when the algo was loaded from the cache.
+        """
+        if self._elf is None:
+            self._elf = ELFBinaryFile(io.BytesIO(self._data))
+        return self._elf
+
+    def _extract(self) -> None:
+        """@brief Extract the flash algo and device description from the ELF file."""
+        self.flash_info = PackFlashInfo(self.elf)
+        self._set_flash_attributes()
 
         symbols: Dict[str, int] = {}
         x = self._extract_symbols(self.REQUIRED_SYMBOLS)
@@ -107,8 +144,8 @@ class PackFlashAlgo:
                                         default=0xFFFFFFFF))
         self.symbols = symbols
 
-        ro_rw_zi = self._find_sections(self.SECTIONS_TO_FIND)
-        ro_rw_zi = self._algo_fill_zi_if_missing(ro_rw_zi)
+        s_ro, s_rw, s_zi = self._find_sections(self.SECTIONS_TO_FIND)
+        ro_rw_zi = self._algo_fill_zi_if_missing((s_ro, s_rw, s_zi))
         error_msg = self._algo_check_for_section_problems(ro_rw_zi)
         if error_msg is not None:
             raise FlashAlgoException(error_msg)
@@ -124,6 +161,34 @@ class PackFlashAlgo:
 
         self.algo_data = self._create_algo_bin(ro_rw_zi)
 
+    def _set_flash_attributes(self) -> None:
+        self.flash_start = self.flash_info.start
+        self.flash_size = self.flash_info.size
+        self.page_size = self.flash_info.page_size
+        self.sector_sizes = self.flash_info.sector_info_list
+
+    def _make_cache_entry(self) -> Dict[str, Any]:
+        """@brief Return a JSON-compatible dict of the values extracted from the ELF file."""
+        return {
+            'flash_info': self.flash_info.to_dict(),
+            'symbols': self.symbols,
+            'sections': [self.ro_start, self.ro_size, self.rw_start, self.rw_size, self.zi_start, self.zi_size],
+            'algo_data': base64.b64encode(self.algo_data).decode('ascii'),
+        }
+
+    def _restore_cache_entry(self, entry: Dict[str, Any]) -> None:
+        """@brief Set attributes from a dict created by _make_cache_entry()."""
+        flash_info = PackFlashInfo.from_dict(entry['flash_info'])
+        symbols = {str(name): int(addr) for name, addr in entry['symbols'].items()}
+        if not (self.REQUIRED_SYMBOLS | self.EXTRA_SYMBOLS) <= symbols.keys():
+            raise KeyError("missing symbols")
+        (self.ro_start, self.ro_size, self.rw_start, self.rw_size, self.zi_start,
+                self.zi_size) = (int(v) for v in entry['sections'])
+        self.algo_data = bytearray(base64.b64decode(entry['algo_data'], validate=True))
+        self.flash_info = flash_info
+        self.symbols = symbols
+        self._set_flash_attributes()
+
     def iter_sector_size_ranges(self) -> Iterator[Tuple[MemoryRange, int]]:
         """@brief Iterator yielding tuples with a memory ranges and sector size for each of the algo's
             sector sizes.
@@ -146,24 +211,28 @@ class PackFlashAlgo:
 
             yield MemoryRange(start, end), sector_size
 
-    def get_pyocd_flash_algo(self, blocksize: int, ram_region: "RamRegion") -> Dict[str, Any]:
+    def get_pyocd_flash_algo(self, blocksize: int, ram_region: "RamRegion", max_page_buffers: int = 2) \
+            -> Dict[str, Any]:
         """@brief Return a dictionary representing a pyOCD flash algorithm, or None.
 
         The most interesting operation this method performs is dynamically allocating memory
         for the flash algo from a given RAM region. Note that the .data and .bss sections are
         concatenated with .text. That's why there isn't a specific allocation for those sections.
 
-        Double buffering is supported as long as there is enough RAM.
+        Double buffering, or more, is supported as long as there is enough RAM. Page buffers are
+        allocated until either _max_page_buffers_ is reached or another buffer would leave less than
+        the minimum stack size. At least one buffer is always allocated.
 
         Memory layout:
         ```
-        [<--stack] [buf2] [buf1] [code]
-        ^ ram start                   ^ ram end
+        [<--stack] [bufN] ... [buf2] [buf1] [code]
+        ^ ram start                              ^ ram end
         ```
 
         @param self
         @param blocksize The size to use for page buffers, normally the erase block size.
         @param ram_region A RamRegion object where the flash algo will be allocated.
+        @param max_page_buffers Maximum number of page buffers to allocate.
         @return A pyOCD-style flash algo dictionary. If None is returned, the flash algo did
             not fit into the provided ram_region.
 
@@ -181,48 +250,35 @@ class PackFlashAlgo:
         # Data buffer 1
         unaligned_buffer_addr = addr - blocksize
         addr = align_down(unaligned_buffer_addr, self._PAGE_BUFFER_ALIGN)
-        addr_data = addr
+        page_buffers = [addr]
 
-        if addr_data < ram_region.start:
+        if addr < ram_region.start:
             # Not enough space for flash algorithm
             raise FlashAlgoException("not enough memory space to fit flash algorithm")
 
-        # Data buffer 2
-        unaligned_buffer_addr = addr - blocksize
-        addr = align_down(unaligned_buffer_addr, self._PAGE_BUFFER_ALIGN)
-        addr_data2 = addr
-
-        # Stack
-        # Select best fit for one or two data buffers and a variable size stack.
+        # Additional data buffers, as long as the stack keeps its minimum size.
         # TODO Switching down from two to one buffer should probably be done with the stack size around
         #   mid-level instead of going all the way down to minimum first.
-        stack_size_one_buf = addr_data - ram_region.start
-        stack_size_two_bufs = addr_data2 - ram_region.start
-
-        if stack_size_two_bufs < self._MIN_STACK_SIZE:
-            # One buffer
-            stack_size = stack_size_one_buf
-            addr_stack = addr_data
-            page_buffers = [addr_data]
-
-            LOG.debug("flash algo: [stack=%#x; %#x b] [b1=%#x,+%#x] [code=%#x,+%#x,%#x b] (ram=%#010x, %#x b)",
-                addr_stack, stack_size,
-                addr_data, addr_data - ram_region.start,
-                addr_load, addr_load - ram_region.start, len(instructions) * 4,
-                ram_region.start, ram_region.length
-            )
-        else:
-            stack_size = stack_size_two_bufs
-            addr_stack = addr_data2
-            page_buffers = [addr_data, addr_data2]
-
-            LOG.debug("flash algo: [stack=%#x; %#x b] [b2=%#x,+%#x] [b1=%#x,+%#x] [code=%#x,+%#x,%#x b] (ram=%#010x, %#x b)",
-                addr_stack, stack_size,
-                addr_data, addr_data - ram_region.start,
-                addr_data2, addr_data2 - ram_region.start,
-                addr_load, addr_load - ram_region.start, len(instructions) * 4,
-                ram_region.start, ram_region.length
-            )
+        while len(page_buffers) < max_page_buffers:
+            unaligned_buffer_addr = addr - blocksize
+            next_addr = align_down(unaligned_buffer_addr, self._PAGE_BUFFER_ALIGN)
+            if next_addr - ram_region.start < self._MIN_STACK_SIZE:
+                break
+            addr = next_addr
+            page_buffers.append(addr)
+
+        # Stack
+        addr_stack = addr
+        stack_size = addr_stack - ram_region.start
+
+        LOG.debug("flash algo: [stack=%#x; %#x b] %s [code=%#x,+%#x,%#x b] (ram=%#010x, %#x b)",
+            addr_stack, stack_size,
+            " ".join("[b%d=%#x,+%#x]" % (n, buf, buf - ram_region.start)
+                    for n, buf in reversed(list(enumerate(page_buffers, start=1)))),
+            addr_load, addr_load - ram_region.start, len(instructions) * 4,
+            ram_region.start, ram_region.length
+        )
+
         # TODO - analyzer support
 
         code_start = addr_load + self._FLASH_BLOB_HEADER_SIZE
@@ -234,6 +290,7 @@ class PackFlashAlgo:
             "pc_eraseAll": code_start + self.symbols["EraseChip"],
             "pc_erase_sector": code_start + self.symbols["EraseSector"],
             "pc_program_page": code_start + self.symbols["ProgramPage"],
+            "pc_blank_check": code_start + self.symbols["BlankCheck"],
             "page_buffers": page_buffers,
             "begin_data": page_buffers[0],
             "begin_stack": addr_stack,
@@ -351,6 +408,27 @@ class PackFlashInfo(object):
             sector_gen = self._sector_and_sz_itr(elf, info_start + info_size)
             self.sector_info_list = list(sector_gen)
 
+    ## Names of the attributes saved by to_dict().
+    _ATTRIBUTES = ('version', 'type', 'start', 'size', 'page_size', 'value_empty', 'prog_timeout_ms',
+            'erase_timeout_ms')
+
+    def to_dict(self) -> Dict[str, Any]:
+        """@brief Return a JSON-compatible dict of the flash device information."""
+        result: Dict[str, Any] = {name: getattr(self, name) for name in self._ATTRIBUTES}
+        result['name'] = self.name.decode('latin-1')
+        result['sector_info_list'] = [list(sector) for sector in self.sector_info_list]
+        return result
+
+    @classmethod
+    def from_dict(cls, values: Dict[str, Any]) -> "PackFlashInfo":
+        """@brief Create a PackFlashInfo from a dict returned by to_dict(), without an ELF file."""
+        info = cls.__new__(cls)
+        for name in cls._ATTRIBUTES:
+            setattr(info, name, int(values[name]))
+        info.name = values['name'].encode('latin-1')
+        info.sector_info_list = [(int(start), int(size)) for start, size in values['sector_info_list']]
+        return info
+
     def __str__(self):
         desc =  "Flash Device:" + os.linesep
         desc += "  name=%s" % self.name + os.linesep
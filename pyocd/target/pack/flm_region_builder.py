@@ -25,6 +25,7 @@ from ...core.memory_map import (
     MemoryType,
     RamRegion,
 )
+from .algo_cache import FlashAlgoCache
 from .flash_algo import (PackFlashAlgo, FlashAlgoException)
 
 if TYPE_CHECKING:
@@ -63,7 +64,7 @@ class FlmFlashRegionBuilder:
                     flm_path = self._session.find_user_file(None, [str(region.flm)])
                     if flm_path is not None:
                         LOG.info("Creating flash algo for region %s from: %s", region.name, flm_path)
-                        pack_algo = PackFlashAlgo(flm_path)
+                        pack_algo = PackFlashAlgo(flm_path, FlashAlgoCache.get_default(self._session))
                     else:
                         LOG.warning("Failed to find FLM file: %s", region.flm)
                         return False
@@ -89,7 +90,8 @@ class FlmFlashRegionBuilder:
                     return False
 
                 # Create the algo dict from the FLM.
-                algo = pack_algo.get_pyocd_flash_algo(page_size, ram_for_algo)
+                algo = pack_algo.get_pyocd_flash_algo(page_size, ram_for_algo,
+                        max(1, self._session.options.get('flash.page_buffers')))
 
                 # If we got a valid algo from the FLM, set it on the region.
                 if algo is not None:
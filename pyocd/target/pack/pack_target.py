@@ -22,6 +22,7 @@ import os
 from typing import (cast, Callable, Dict, IO, Iterable, List, Optional, Set, Tuple, Type, Union, TYPE_CHECKING)
 
 
+from .algo_cache import FlashAlgoCache
 from .cmsis_pack import (CmsisPack, CmsisPackDevice, MalformedCmsisPackError)
 from .reset_sequence_maps import (RESET_SEQUENCE_TO_TYPE_MAP, RESET_TYPE_TO_SEQUENCE_MAP)
 from ..family import FAMILIES
@@ -375,7 +376,8 @@ class _PackTargetMethods:
     @staticmethod
     def _pack_target__init__(self, session: Session) -> None: # type:ignore
         """@brief Constructor for dynamically created target class."""
-        super(self.__class__, self).__init__(session, self._pack_device.memory_map)
+        memory_map = self._pack_device.get_memory_map(FlashAlgoCache.get_default(session))
+        super(self.__class__, self).__init__(session, memory_map)
 
         self.vendor = self._pack_device.vendor
         self.part_families = self._pack_device.families
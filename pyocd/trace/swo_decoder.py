@@ -0,0 +1,394 @@
+# pyOCD debugger
+# Copyright (c) 2026 PyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from array import array
+import struct
+from typing import (TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple)
+
+from . import events
+
+if TYPE_CHECKING:
+    from ..core.core_target import CoreTarget
+
+class SWOEventBuffer:
+    """@brief Columnar storage for decoded SWO trace packets.
+
+    Each decoded packet is a row in five parallel arrays. The meaning of the port and payload
+    columns depends on the kind of the row:
+
+    Kind                  | Port                  | Payload               | Width
+    ----------------------|-----------------------|-----------------------|----------------
+    OVERFLOW              | 0                     | 0                     | 0
+    TIMESTAMP             | TC field              | timestamp delta       | 0
+    ITM                   | stimulus port         | data                  | data size
+    EVENT_COUNTER         | 0                     | counter mask          | data size
+    EXCEPTION             | exception number      | action                | data size
+    PERIODIC_PC           | 0                     | PC, 0 for sleep       | data size
+    DATA_PC               | comparator            | PC                    | data size
+    DATA_ADDRESS          | comparator            | address bits [15:0]   | data size
+    DATA_READ, DATA_WRITE | comparator            | value                 | transfer size
+
+    The timestamp column holds the local timestamp in effect when the packet was decoded. As with
+    the SWO protocol, the timestamp of an event is actually given by the next TIMESTAMP row;
+    SWOParser performs this association when it passes events to a sink.
+
+    TraceEvent objects are only created on demand by event() or events().
+    """
+
+    OVERFLOW = 0
+    TIMESTAMP = 1
+    ITM = 2
+    EVENT_COUNTER = 3
+    EXCEPTION = 4
+    PERIODIC_PC = 5
+    DATA_PC = 6
+    DATA_ADDRESS = 7
+    DATA_READ = 8
+    DATA_WRITE = 9
+
+    def __init__(self) -> None:
+        self.timestamps = array('Q')
+        self.kinds = array('B')
+        self.ports = array('L')
+        self.payloads = array('L')
+        self.widths = array('B')
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def clear(self) -> None:
+        """@brief Remove all rows."""
+        del self.timestamps[:]
+        del self.kinds[:]
+        del self.ports[:]
+        del self.payloads[:]
+        del self.widths[:]
+
+    def append(self, kind: int, timestamp: int, port: int = 0, payload: int = 0, width: int = 0) -> None:
+        """@brief Add a row."""
+        self.timestamps.append(timestamp)
+        self.kinds.append(kind)
+        self.ports.append(port)
+        self.payloads.append(payload)
+        self.widths.append(width)
+
+    def row(self, index: int) -> Tuple[int, int, int, int, int]:
+        """@brief Return the (kind, timestamp, port, payload, width) tuple of a row."""
+        return (self.kinds[index], self.timestamps[index], self.ports[index], self.payloads[index],
+                self.widths[index])
+
+    def event(self, index: int, core: Optional["CoreTarget"] = None) -> events.TraceEvent:
+        """@brief Create the TraceEvent for a row.
+        @param self
+        @param index Row index.
+        @param core Core used to look up exception names. If not provided, exception events have no name.
+        """
+        return self._make_event(*self.row(index), core, {})
+
+    @classmethod
+    def _make_event(cls, kind: int, ts: int, port: int, payload: int, width: int,
+            core: Optional["CoreTarget"], exception_names: Dict[int, Optional[str]]) -> events.TraceEvent:
+        """@brief Create the TraceEvent for the fields of a row.
+
+        Exception names are looked up through _exception_names_ before asking the core.
+        """
+        if kind == cls.ITM:
+            return events.TraceITMEvent(port, payload, width, ts)
+        elif kind == cls.TIMESTAMP:
+            return events.TraceTimestamp(port, ts)
+        elif kind == cls.OVERFLOW:
+            return events.TraceOverflow(ts)
+        elif kind == cls.EVENT_COUNTER:
+            return events.TraceEventCounter(payload, ts)
+        elif kind == cls.EXCEPTION:
+            # TODO remove exception name and dependency on core
+            try:
+                name = exception_names[port]
+            except KeyError:
+                name = core.exception_number_to_name(port) if (core is not None) else None
+                exception_names[port] = name
+            return events.TraceExceptionEvent(port, name, payload, ts)
+        elif kind == cls.PERIODIC_PC:
+            return events.TracePeriodicPC(payload, ts)
+        elif kind == cls.DATA_PC:
+            return events.TraceDataTraceEvent(cmpn=port, pc=payload, ts=ts)
+        elif kind == cls.DATA_ADDRESS:
+            return events.TraceDataTraceEvent(cmpn=port, addr=payload, ts=ts)
+        else:
+            return events.TraceDataTraceEvent(cmpn=port, value=payload, rnw=(kind == cls.DATA_READ),
+                    sz=width, ts=ts)
+
+    def events(self, core: Optional["CoreTarget"] = None) -> Iterator[events.TraceEvent]:
+        """@brief Iterate over TraceEvent objects for all rows."""
+        exception_names: Dict[int, Optional[str]] = {}
+        make_event = self._make_event
+        for kind, ts, port, payload, width in zip(self.kinds, self.timestamps, self.ports, self.payloads,
+                self.widths):
+            yield make_event(kind, ts, port, payload, width, core, exception_names)
+
+    def itm_data(self, port: Optional[int] = None) -> bytearray:
+        """@brief Return the bytes written to ITM stimulus ports, in order.
+
+        Each ITM row contributes its data as little endian bytes of the row's width.
+
+        @param self
+        @param port Only include data for this stimulus port. If None, data for all ports is included.
+        """
+        result = bytearray()
+        ITM = self.ITM
+        for kind, p, payload, width in zip(self.kinds, self.ports, self.payloads, self.widths):
+            if kind == ITM and (port is None or p == port):
+                if width == 1:
+                    result.append(payload)
+                else:
+                    result += payload.to_bytes(width, 'little')
+        return result
+
+# Header table actions.
+_SYNC = 0
+_OVERFLOW = 1
+_SOURCE = 2
+_LOCAL_TS_SHORT = 3
+_LOCAL_TS_LONG = 4
+_EXTENSION_SHORT = 5
+_EXTENSION_LONG = 6
+_IGNORE = 7
+
+# Table entry kind for hardware source packets that produce no event.
+_INVALID = -1
+# Table entry kind for exception trace packets, whose validity depends on the payload.
+_EXCEPTION_PAYLOAD = -2
+
+def _build_header_table() -> List[Tuple[int, int, int, int]]:
+    """@brief Compute the decoding of every possible SWO packet header byte.
+
+    Each entry is an (action, size, kind, arg) tuple. For source packets, _size_ is the payload size,
+    _kind_ the SWOEventBuffer row kind, and _arg_ the port or comparator number. For local
+    timestamps, _arg_ is the TC field for the long form or the timestamp delta for the short form.
+    For extension packets, _size_ is the SH bit and _arg_ the EX field of the short form.
+    """
+    B = SWOEventBuffer
+    table = []
+    for hdr in range(256):
+        c = (hdr >> 7) & 0x1
+        if hdr == 0:
+            entry = (_SYNC, 0, 0, 0)
+        elif hdr == 0x70:
+            entry = (_OVERFLOW, 0, 0, 0)
+        # Protocol packets.
+        elif (hdr & 0x3) == 0:
+            d = (hdr >> 4) & 0b111
+            if (hdr & 0xf) == 0 and d not in (0x0, 0x3):
+                if c == 1:
+                    entry = (_LOCAL_TS_LONG, 0, 0, (hdr >> 4) & 0x3)
+                else:
+                    entry = (_LOCAL_TS_SHORT, 0, 0, (hdr >> 4) & 0x7)
+            elif hdr in (0b10010100, 0b10110100):
+                # TODO handle global timestamp
+                entry = (_IGNORE, 0, 0, 0)
+            elif (hdr & 0x8) == 0x8:
+                sh = (hdr >> 2) & 0x1
+                if c == 0:
+                    entry = (_EXTENSION_SHORT, sh, 0, (hdr >> 4) & 0x7)
+                else:
+                    entry = (_EXTENSION_LONG, sh, 0, 0)
+            else:
+                # Reserved.
+                entry = (_IGNORE, 0, 0, 0)
+        # Source packets.
+        else:
+            size = 1 << ((hdr & 0x3) - 1)
+            a = (hdr >> 3) & 0x1f
+            kind = _INVALID
+            arg = 0
+            if (hdr & 0x4) == 0:
+                kind = B.ITM
+                arg = a
+            elif a == 0:
+                kind = B.EVENT_COUNTER
+            elif a == 1:
+                kind = _EXCEPTION_PAYLOAD
+            elif a == 2:
+                kind = B.PERIODIC_PC
+            elif 8 <= a <= 23:
+                type = (hdr >> 6) & 0x3
+                arg = (hdr >> 4) & 0x3
+                bit3 = (hdr >> 3) & 0x1
+                if type == 0b01:
+                    kind = B.DATA_ADDRESS if bit3 else B.DATA_PC
+                elif type == 0b10:
+                    kind = B.DATA_WRITE if bit3 else B.DATA_READ
+            entry = (_SOURCE, size, kind, arg)
+        table.append(entry)
+    return table
+
+_HEADER_TABLE = _build_header_table()
+
+_U16 = struct.Struct("<H")
+_U32 = struct.Struct("<I")
+
+class SWOBatchDecoder:
+    """@brief SWO data stream decoder that processes whole buffers at once.
+
+    Each call to decode() decodes all complete packets in the provided data into an SWOEventBuffer.
+    Packet headers are decoded with a precomputed table. A packet that is incomplete at the end of
+    the data is kept and decoded once the rest of it is passed to the next call.
+
+    The reset() method should be called if there is a break in the SWO data stream.
+    """
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        """@brief Discard any partial packet and return to the initial state."""
+        self._bytes_decoded = 0
+        self._itm_page = 0
+        self._timestamp = 0
+        self._partial = b''
+
+    @property
+    def bytes_decoded(self) -> int:
+        """@brief The number of bytes of SWO data passed to decode() thus far."""
+        return self._bytes_decoded
+
+    def decode(self, data: Iterable[int], buffer: Optional[SWOEventBuffer] = None) -> SWOEventBuffer:
+        """@brief Decode SWO data.
+
+        @param self
+        @param data SWO data, normally the result of a call to DebugProbe.swo_read(). Data that is not
+            bytes or a bytearray is copied to a bytes object first.
+        @param buffer Rows for the decoded packets are appended to this buffer. If not provided, a new
+            buffer is created.
+        @return The buffer the decoded packets were appended to.
+        """
+        if buffer is None:
+            buffer = SWOEventBuffer()
+        if not isinstance(data, (bytes, bytearray)):
+            data = bytes(data)
+        self._bytes_decoded += len(data)
+        if self._partial:
+            data = self._partial + data
+            self._partial = b''
+
+        # Local copies of the columns' append methods and other state for speed.
+        add_timestamp = buffer.timestamps.append
+        add_kind = buffer.kinds.append
+        add_port = buffer.ports.append
+        add_payload = buffer.payloads.append
+        add_width = buffer.widths.append
+        table = _HEADER_TABLE
+        unpack_u16 = _U16.unpack_from
+        unpack_u32 = _U32.unpack_from
+        ITM = SWOEventBuffer.ITM
+        TIMESTAMP = SWOEventBuffer.TIMESTAMP
+        EXCEPTION = SWOEventBuffer.EXCEPTION
+        timestamp = self._timestamp
+        page_base = self._itm_page * 32
+
+        n = len(data)
+        i = 0
+        while i < n:
+            action, size, kind, arg = table[data[i]]
+
+            if action == _SOURCE:
+                end = i + 1 + size
+                if end > n:
+                    break
+                if size == 1:
+                    payload = data[i + 1]
+                elif size == 2:
+                    payload = unpack_u16(data, i + 1)[0]
+                else:
+                    payload = unpack_u32(data, i + 1)[0]
+                i = end
+
+                if kind == ITM:
+                    arg += page_base
+                elif kind < 0:
+                    if kind == _INVALID:
+                        continue
+                    # Exception trace.
+                    kind = EXCEPTION
+                    arg = payload & 0x1ff
+                    payload = (payload >> 12) & 0x3
+                    if payload == 0:
+                        continue
+                add_timestamp(timestamp)
+                add_kind(kind)
+                add_port(arg)
+                add_payload(payload)
+                add_width(size)
+            elif action == _LOCAL_TS_SHORT:
+                i += 1
+                timestamp = (timestamp + arg) & 0xffffffffffffffff
+                add_timestamp(timestamp)
+                add_kind(TIMESTAMP)
+                add_port(0)
+                add_payload(arg)
+                add_width(0)
+            elif action == _SYNC:
+                # At least 5 zero bytes followed by 0x80. The first non-zero byte ends the sync
+                # packet, and is consumed whether or not it is valid.
+                j = i + 1
+                while j < n and data[j] == 0:
+                    j += 1
+                if j >= n:
+                    break
+                i = j + 1
+                page_base = 0
+            elif action == _LOCAL_TS_LONG or action == _EXTENSION_LONG:
+                # Accumulate the continuation bytes.
+                value = 0
+                j = i + 1
+                while j < n:
+                    byte = data[j]
+                    j += 1
+                    value = (value << 7) | (byte & 0x7f)
+                    if not (byte & 0x80):
+                        break
+                else:
+                    break
+                i = j
+                if action == _LOCAL_TS_LONG:
+                    timestamp = (timestamp + value) & 0xffffffffffffffff
+                    add_timestamp(timestamp)
+                    add_kind(TIMESTAMP)
+                    add_port(arg)
+                    add_payload(value & 0xffffffff)
+                    add_width(0)
+                elif size == 0:
+                    # Extension packet with sh==0 sets ITM stimulus page.
+                    page_base = (value * 32) & 0xffffffff
+            elif action == _EXTENSION_SHORT:
+                i += 1
+                if size == 0:
+                    page_base = arg * 32
+            elif action == _OVERFLOW:
+                i += 1
+                add_timestamp(timestamp)
+                add_kind(SWOEventBuffer.OVERFLOW)
+                add_port(0)
+                add_payload(0)
+                add_width(0)
+            else:
+                i += 1
+
+        if i < n:
+            self._partial = bytes(data[i:])
+        self._timestamp = timestamp
+        self._itm_page = page_base // 32
+        return buffer
@@ -23,7 +23,7 @@ from typing import (Optional, TextIO, TYPE_CHECKING)
 
 from .sink import TraceEventSink
 from .events import (TraceEvent, TraceITMEvent)
-from .swo import SWOParser
+from .swo_decoder import (SWOBatchDecoder, SWOEventBuffer)
 from ..coresight.itm import ITM
 from ..coresight.tpiu import TPIU
 from ..core.target import Target
@@ -100,8 +100,8 @@ class SWVReader(threading.Thread):
 
         This method performs all steps required to start up SWV. It first calls the target's
         trace_start() method, which allows for target-specific trace initialization. Then it
-        configures the TPIU and ITM modules. A simple trace data processing graph is created that
-        connects an SWVEventSink with a SWOParser. Finally, the reader thread is started.
+        configures the TPIU and ITM modules. Then an SWO decoder is created, whose ITM data is written
+        to the console. Finally, the reader thread is started.
 
         If the debug probe or target do not support SWO, a warning is printed and False returns,
         but nothing else is done (no exception raised).
@@ -141,9 +141,11 @@ class SWVReader(threading.Thread):
             LOG.warning("SWV not initalized: Failed to set SWO clock rate")
             return False
 
-        self._parser = SWOParser(self._core)
-        self._sink = SWVEventSink(console)
-        self._parser.connect(self._sink)
+        # ITM data is taken from the decoded packets directly, without creating event objects. The
+        # output is the same as with an SWOParser connected to an SWVEventSink.
+        self._decoder = SWOBatchDecoder()
+        self._events = SWOEventBuffer()
+        self._console = console
 
         self.start()
 
@@ -174,7 +176,7 @@ class SWVReader(threading.Thread):
         """@brief SWV reader thread routine.
 
         Starts the probe receiving SWO data by calling DebugProbe.swo_start(). For as long as the
-        thread runs, it reads SWO data from the probe and passes it to the SWO parser created in
+        thread runs, it reads SWO data from the probe and passes it to the SWO decoder created in
         init(). When the thread is signaled to stop, it calls DebugProbe.swo_stop() before exiting.
         """
         assert self._session.probe
@@ -201,7 +203,11 @@ class SWVReader(threading.Thread):
             if data:
                 if swv_raw_server:
                     swv_raw_server.write(data)
-                self._parser.parse(data)
+                self._events.clear()
+                self._decoder.decode(data, self._events)
+                itm_data = self._events.itm_data()
+                if itm_data:
+                    self._console.write(itm_data.decode('latin-1'))
 
             if self._lock:
                 self._lock.release()
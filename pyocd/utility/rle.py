@@ -0,0 +1,86 @@
+# pyOCD debugger
+# Copyright (c) 2026 PyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""@brief Run-length encoding used for compressed flash programming.
+
+The encoded data is a sequence of records, each starting with a control byte _c_:
+- _c_ < 0x80: a literal run; the next _c_ + 1 bytes are copied unchanged.
+- _c_ >= 0x80: a repeat run; the next byte is repeated _c_ - 0x80 + 3 times.
+
+This is simple enough to be decoded by a few dozen bytes of Thumb code on the target.
+"""
+
+import re
+from typing import (Union)
+
+## Minimum and maximum lengths of a repeat run.
+MIN_RUN = 3
+MAX_RUN = 0x7f + MIN_RUN
+
+## Maximum length of a literal run.
+MAX_LITERAL = 0x80
+
+_RUN_PATTERN = re.compile(rb'(.)\1{%d,}' % (MIN_RUN - 1), re.DOTALL)
+
+def _add_literals(out: bytearray, data: bytes, start: int, end: int) -> None:
+    while start < end:
+        count = min(end - start, MAX_LITERAL)
+        out.append(count - 1)
+        out += data[start:start + count]
+        start += count
+
+def rle_encode(data: Union[bytes, bytearray, memoryview]) -> bytes:
+    """@brief Run-length encode bytes-like data."""
+    data = bytes(data)
+    out = bytearray()
+    pos = 0
+    for match in _RUN_PATTERN.finditer(data):
+        start, end = match.span()
+        _add_literals(out, data, pos, start)
+        value = data[start]
+        length = end - start
+        while length >= MIN_RUN:
+            count = min(length, MAX_RUN)
+            out.append(0x80 + count - MIN_RUN)
+            out.append(value)
+            length -= count
+        # A remainder too short for a repeat run is added to the following literals.
+        pos = end - length
+    _add_literals(out, data, pos, len(data))
+    return bytes(out)
+
+def rle_decode(data: Union[bytes, bytearray, memoryview]) -> bytes:
+    """@brief Decode run-length encoded data.
+
+    @exception ValueError The encoded data is truncated.
+    """
+    data = bytes(data)
+    out = bytearray()
+    pos = 0
+    while pos < len(data):
+        control = data[pos]
+        if control < 0x80:
+            count = control + 1
+            if pos + 1 + count > len(data):
+                raise ValueError("truncated literal run")
+            out += data[pos + 1:pos + 1 + count]
+            pos += 1 + count
+        else:
+            if pos + 1 >= len(data):
+                raise ValueError("truncated repeat run")
+            out += bytes([data[pos + 1]]) * (control - 0x80 + MIN_RUN)
+            pos += 2
+    return bytes(out)
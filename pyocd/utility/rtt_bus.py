@@ -0,0 +1,230 @@
+# pyOCD debugger
+# Copyright (c) 2026 PyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+from enum import Enum
+import logging
+import threading
+from typing import (Callable, Deque, Optional, Tuple, Union)
+
+LOG = logging.getLogger(__name__)
+
+## Type of a bus callback. It is passed a read-only view of the data from each read of the channel.
+RTTBusCallback = Callable[[memoryview], None]
+
+class RTTSubscription:
+    """@brief Bounded queue of data from an RTT up channel for one consumer.
+
+    Subscriptions are created by RTTChannelBus.subscribe(). Each holds read-only memoryviews of the
+    buffers published on the bus, so queuing data for several subscribers does not copy it.
+
+    The number of queued bytes is limited to `max_bytes`, except that a chunk is always accepted by
+    an empty queue. When published data does not fit, the subscription's policy decides what happens:
+    - `DROP`: the chunk is discarded and counted in `dropped_bytes` and `dropped_chunks`. The
+        publisher, and therefore other subscribers, are never delayed.
+    - `BLOCK`: the publisher waits for the consumer to make room, for up to `block_timeout` seconds
+        if set, after which the chunk is dropped. This must only be used when the consumer runs on a
+        different thread than the publisher.
+
+    Consumers either take whole chunks with get(), or use peek() and consume() to handle chunks that
+    are only partly written to their destination.
+    """
+
+    class Policy(Enum):
+        """@brief Action taken when published data does not fit in a subscription's queue."""
+        ## Discard the data.
+        DROP = 1
+        ## Wait for the consumer to make room.
+        BLOCK = 2
+
+    def __init__(self,
+            bus: "RTTChannelBus",
+            max_bytes: int,
+            policy: "RTTSubscription.Policy",
+            block_timeout: Optional[float],
+            ) -> None:
+        self._bus = bus
+        self._max_bytes = max_bytes
+        self._policy = policy
+        self._block_timeout = block_timeout
+        self._queue: Deque[memoryview] = collections.deque()
+        self._cond = threading.Condition()
+        self._is_closed = False
+        self.pending_bytes: int = 0
+        self.dropped_bytes: int = 0
+        self.dropped_chunks: int = 0
+
+    @property
+    def channel_id(self) -> int:
+        """@brief ID of the up channel the data comes from."""
+        return self._bus.channel_id
+
+    @property
+    def is_closed(self) -> bool:
+        return self._is_closed
+
+    def get(self, timeout: Optional[float] = 0) -> Optional[memoryview]:
+        """@brief Remove and return the oldest queued chunk.
+        @param self
+        @param timeout Maximum seconds to wait for data. 0, the default, does not wait, and None waits
+            until data is available or the subscription is closed.
+        @return A read-only memoryview, or None if no data is available.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._queue or self._is_closed, timeout):
+                return None
+            if not self._queue:
+                return None
+            data = self._queue.popleft()
+            self.pending_bytes -= len(data)
+            self._cond.notify_all()
+            return data
+
+    def peek(self) -> Optional[memoryview]:
+        """@brief Return the oldest queued chunk without removing it, or None if the queue is empty."""
+        with self._cond:
+            return self._queue[0] if self._queue else None
+
+    def consume(self, count: int) -> None:
+        """@brief Remove the first _count_ bytes of the oldest queued chunk, as returned by peek()."""
+        with self._cond:
+            data = self._queue[0]
+            if count >= len(data):
+                self._queue.popleft()
+                count = len(data)
+            else:
+                self._queue[0] = data[count:]
+            self.pending_bytes -= count
+            self._cond.notify_all()
+
+    def close(self) -> None:
+        """@brief Unsubscribe from the bus and discard queued data.
+
+        Consumers waiting in get() and a publisher blocked on this subscription are released.
+        """
+        self._bus._remove_subscription(self)
+        with self._cond:
+            self._is_closed = True
+            self._queue.clear()
+            self.pending_bytes = 0
+            self._cond.notify_all()
+
+    def _put(self, data: memoryview) -> None:
+        """@brief Queue a chunk published on the bus, applying the overflow policy."""
+        length = len(data)
+        with self._cond:
+            def has_room() -> bool:
+                return (self._is_closed or not self._queue
+                        or (self.pending_bytes + length <= self._max_bytes))
+
+            if not has_room() and (self._policy is self.Policy.BLOCK):
+                self._cond.wait_for(has_room, self._block_timeout)
+
+            if self._is_closed:
+                return
+            elif not has_room():
+                self.dropped_bytes += length
+                self.dropped_chunks += 1
+                return
+
+            self._queue.append(data)
+            self.pending_bytes += length
+            self._cond.notify_all()
+
+class RTTChannelBus:
+    """@brief Distributes data read from one RTT up channel to any number of consumers.
+
+    Each buffer passed to publish() is wrapped in a single read-only memoryview that is shared by all
+    consumers. Callbacks are invoked synchronously by publish(), so they must return quickly. Other
+    consumers receive the data through an RTTSubscription with its own bounded queue, so that a slow
+    consumer cannot hold up the reading of the channel for the others.
+    """
+
+    ## Default limit on the number of bytes queued for a subscription.
+    DEFAULT_MAX_BYTES = 64 * 1024
+
+    def __init__(self, channel_id: int) -> None:
+        self.channel_id = channel_id
+        self._lock = threading.Lock()
+        # Tuples are replaced rather than modified, so publish() can iterate without the lock.
+        self._subscriptions: Tuple[RTTSubscription, ...] = ()
+        self._callbacks: Tuple[RTTBusCallback, ...] = ()
+        ## Total number of bytes published.
+        self.total_bytes = 0
+
+    @property
+    def has_consumers(self) -> bool:
+        """@brief Whether there are any subscriptions or callbacks."""
+        return bool(self._subscriptions or self._callbacks)
+
+    def subscribe(self,
+            max_bytes: int = DEFAULT_MAX_BYTES,
+            policy: RTTSubscription.Policy = RTTSubscription.Policy.DROP,
+            block_timeout: Optional[float] = None,
+            ) -> RTTSubscription:
+        """@brief Create a subscription that receives all data published from now on.
+        @param self
+        @param max_bytes Maximum number of bytes queued for the subscription.
+        @param policy What to do with published data that does not fit in the queue.
+        @param block_timeout Maximum time in seconds the publisher waits for room with the BLOCK policy.
+            None waits indefinitely.
+        """
+        subscription = RTTSubscription(self, max_bytes, policy, block_timeout)
+        with self._lock:
+            self._subscriptions += (subscription,)
+        return subscription
+
+    def add_callback(self, callback: RTTBusCallback) -> None:
+        """@brief Register a callback to be invoked with each published buffer."""
+        with self._lock:
+            self._callbacks += (callback,)
+
+    def remove_callback(self, callback: RTTBusCallback) -> None:
+        """@brief Unregister a callback. Does nothing if it is not registered."""
+        with self._lock:
+            self._callbacks = tuple(c for c in self._callbacks if c is not callback)
+
+    def close(self) -> None:
+        """@brief Close all subscriptions and remove all callbacks."""
+        for subscription in self._subscriptions:
+            subscription.close()
+        with self._lock:
+            self._callbacks = ()
+
+    def publish(self, data: Union[bytes, bytearray]) -> None:
+        """@brief Pass data read from the channel to all consumers.
+
+        The data must not be modified afterwards, as it is not copied. Consumers are passed a
+        read-only view even if the data is mutable.
+        """
+        if not data:
+            return
+        view = memoryview(data)
+        if not view.readonly:
+            # memoryview.toreadonly() was added in Python 3.8.
+            view = view.toreadonly() if hasattr(view, 'toreadonly') else memoryview(bytes(view))
+        self.total_bytes += len(view)
+        for callback in self._callbacks:
+            try:
+                callback(view)
+            except Exception as e:
+                LOG.error("Error in RTT channel %d callback: %s", self.channel_id, e, exc_info=True)
+        for subscription in self._subscriptions:
+            subscription._put(view)
+
+    def _remove_subscription(self, subscription: RTTSubscription) -> None:
+        with self._lock:
+            self._subscriptions = tuple(s for s in self._subscriptions if s is not subscription)
@@ -15,20 +15,24 @@
 # limitations under the License.
 
 from abc import ABC, abstractmethod
+import logging
 import selectors
 import socket
-from typing import Optional, Sequence
+from typing import List, Optional, Sequence, Union
 
 from ..core.soc_target import SoCTarget
 from ..core import exceptions
-from ..debug.rtt import RTTControlBlock, RTTUpChannel, RTTDownChannel
+from ..debug.rtt import RTTControlBlock
+from ..debug.rtt_scheduler import RTTPollScheduler
+from .rtt_bus import (RTTChannelBus, RTTSubscription)
 
+LOG = logging.getLogger(__name__)
 
 class RTTChanWorker(ABC):
     """@brief Source and sink for data to be transferred over RTT. """
 
     @abstractmethod
-    def write_up_data(self, data: bytes) -> int:
+    def write_up_data(self, data: Union[bytes, memoryview]) -> int:
         """@brief Write data that has been received from an up channel to the
                   correct destination.
 
@@ -92,13 +96,17 @@ class RTTChanTCPWorker(RTTChanWorker):
                 self.client, _ = self.server.accept()
                 self.client.setblocking(False)
 
-    def write_up_data(self, data: bytes):
+    def write_up_data(self, data: Union[bytes, memoryview]):
         if self.client is None:
             self._check_for_new_client()
             if self.client is None:
                 return 0
 
-        return self.client.send(data)
+        try:
+            return self.client.send(data)
+        except BlockingIOError:
+            # the client is not keeping up with the data
+            return 0
 
     def get_down_data(self):
         if self.client is None:
@@ -134,11 +142,23 @@ class RTTChanFileWorker(RTTChanWorker):
 
 class RTTServer:
     """@brief Keeps track of polling for multiple active RTT channels and the
-              sources and sinks of data for each channel. """
+              sources and sinks of data for each channel.
+
+    The owner of the server calls poll() repeatedly, waiting `poll_interval`
+    seconds between calls. The interval is adapted to the rate of data on the
+    active up channels by an RTTPollScheduler.
+
+    Data read from each up channel is published on the channel's
+    RTTChannelBus. Workers receive it through a subscription that drops data
+    once its queue is full, so a worker that cannot keep up does not delay the
+    reading of the channel. Other consumers can subscribe to or add callbacks
+    to the bus returned by get_bus(). Up channels are only read while their
+    bus has consumers. """
     control_block: RTTControlBlock
-    workers: Optional[Sequence[Optional[RTTChanWorker]]]
-    up_buffers: Optional[Sequence[bytes]]
-    down_buffers: Optional[Sequence[bytes]]
+    scheduler: Optional[RTTPollScheduler]
+    workers: List[Optional[RTTChanWorker]]
+    buses: Sequence[RTTChannelBus]
+    down_buffers: List[bytes]
 
     def __init__(self, target: SoCTarget, address: int, size: int,
                  control_block_id: bytes):
@@ -153,44 +173,79 @@ class RTTServer:
         """
         self.control_block = RTTControlBlock.from_target(target, address = address,
                                     size = size, control_block_id = control_block_id)
-
-        self.workers = None
-        self.up_buffers = None
-        self.down_buffers = None
-
-    def poll(self):
-        """@brief Reads from and writes to active RTT channels. """
-        if not self.running:
+        self._session = target.session
+
+        # The scheduler is only set while RTT is started. The lists are empty when it is stopped.
+        self.scheduler = None
+        self.workers = []
+        self.buses = []
+        self.down_buffers = []
+        self._subscriptions: List[Optional[RTTSubscription]] = []
+
+    def poll(self) -> bool:
+        """@brief Reads from and writes to active RTT channels.
+        @return Whether any data was transferred in either direction.
+        """
+        scheduler = self.scheduler
+        if scheduler is None:
             # not yet started
-            return
-
-        for i, worker in enumerate(self.workers):
-            if worker is None:
-                continue
-
-            # Read from up channel
-            try:
-                up_chan: RTTUpChannel = self.control_block.up_channels[i]
-            except IndexError:
-                pass
-            else:
-                self.up_buffers[i] += up_chan.read()
-
-            # Write to worker
-            bytes_written = worker.write_up_data(self.up_buffers[i])
-            self.up_buffers[i] = self.up_buffers[i][bytes_written:]
-
-            # Read from worker
-            self.down_buffers[i] += worker.get_down_data()
-
-            # Write data to down channel
-            try:
-                down_chan: RTTDownChannel = self.control_block.down_channels[i]
-            except IndexError:
-                pass
-            else:
-                bytes_out: int = down_chan.write(self.down_buffers[i])
-                self.down_buffers[i] = self.down_buffers[i][bytes_out:]
+            return False
+
+        num_down_chans: int = len(self.down_buffers)
+        active_chans = [i for i, worker in enumerate(self.workers) if worker is not None]
+
+        # Read from workers
+        for i in active_chans:
+            worker = self.workers[i]
+            if (worker is not None) and (i < num_down_chans):
+                self.down_buffers[i] += worker.get_down_data()
+
+        # Transfer data for all active channels together
+        down_data = {i: self.down_buffers[i] for i in active_chans
+                     if (i < num_down_chans) and self.down_buffers[i]}
+        up_chans = [i for i, bus in enumerate(self.buses) if bus.has_consumers]
+        self._update_scheduler_channels(scheduler, up_chans)
+        up_data, bytes_out = self.control_block.poll(up_chans, down_data)
+
+        did_transfer = bool(up_data) or any(bytes_out.values())
+        for i, data in up_data.items():
+            self.buses[i].publish(data)
+        for i, count in bytes_out.items():
+            self.down_buffers[i] = self.down_buffers[i][count:]
+
+        scheduler.update({i: len(data) for i, data in up_data.items()})
+        if any(bytes_out.values()):
+            # The target is likely to respond to data sent to it.
+            scheduler.reset()
+
+        # Write to workers
+        for i in active_chans:
+            worker = self.workers[i]
+            subscription = self._subscriptions[i]
+            if (worker is not None) and (subscription is not None):
+                self._write_to_worker(worker, subscription)
+
+        return did_transfer
+
+    def _update_scheduler_channels(self, scheduler: RTTPollScheduler, up_chans: List[int]) -> None:
+        """@brief Make the set of channels tracked by the scheduler match those being read."""
+        for i in list(scheduler.channels):
+            if i not in up_chans:
+                scheduler.remove_channel(i)
+        for i in up_chans:
+            if i not in scheduler.channels:
+                scheduler.add_channel(i, self.control_block.up_channels[i].size)
+
+    @staticmethod
+    def _write_to_worker(worker: RTTChanWorker, subscription: RTTSubscription) -> None:
+        """@brief Pass queued up channel data to a worker until it stops accepting it."""
+        data = subscription.peek()
+        while data is not None:
+            bytes_written = worker.write_up_data(data)
+            subscription.consume(bytes_written)
+            if bytes_written < len(data):
+                break
+            data = subscription.peek()
 
     def start(self):
         """@brief Find and parse RTT control block. """
@@ -200,27 +255,74 @@ class RTTServer:
         num_down_chans: int = len(self.control_block.down_channels)
         num_chans: int = max(num_up_chans, num_down_chans)
 
+        self.scheduler = RTTPollScheduler.from_session(self._session)
         self.workers = [None] * num_chans
-        self.up_buffers = [bytes()] * num_up_chans
+        self.buses = [RTTChannelBus(i) for i in range(num_up_chans)]
         self.down_buffers = [bytes()] * num_down_chans
+        self._subscriptions = [None] * num_chans
 
     def stop(self):
         """@brief Close all RTT workers. """
-        if not self.running:
+        scheduler = self.scheduler
+        if scheduler is None:
             return
 
+        LOG.debug("RTT polling: %s", scheduler)
+        for i, stats in scheduler.channels.items():
+            LOG.debug("RTT up channel %d: %s", i, stats)
+
         for i, worker in enumerate(self.workers):
             if worker is not None:
                 worker.close()
+        for bus in self.buses:
+            bus.close()
 
-        self.workers = None
-        self.up_buffers = None
-        self.down_buffers = None
+        self.scheduler = None
+        self.workers = []
+        self.buses = []
+        self.down_buffers = []
+        self._subscriptions = []
 
     @property
     def running(self):
         """@brief True if RTT is started. """
-        return self.workers is not None
+        return self.scheduler is not None
+
+    @property
+    def poll_interval(self) -> float:
+        """@brief Seconds to wait before the next call to poll(). """
+        if self.scheduler is None:
+            raise exceptions.RTTError("RTT is not yet started")
+        return self.scheduler.interval
+
+    def get_bus(self, channel: int) -> RTTChannelBus:
+        """@brief Get the bus on which data read from an up channel is published.
+
+        @param channel The RTT up channel.
+        """
+        if not self.running:
+            raise exceptions.RTTError("RTT is not yet started")
+        elif not (0 <= channel < len(self.buses)):
+            raise exceptions.RTTError(f"no up channel {channel}")
+        return self.buses[channel]
+
+    def add_worker(self, channel: int, worker: RTTChanWorker):
+        """@brief Connect a worker to a given RTT channel.
+
+        The worker receives data from the up channel and provides data for
+        the down channel with the same ID, for those that exist.
+
+        @param channel The RTT channel to connect.
+        @param worker The channel worker.
+        """
+        if not self.running:
+            raise exceptions.RTTError("RTT is not yet started")
+        elif self.workers[channel] is not None:
+            raise exceptions.RTTError(f"RTT is already started for channel {channel}")
+
+        self.workers[channel] = worker
+        if channel < len(self.buses):
+            self._subscriptions[channel] = self.buses[channel].subscribe()
 
     def add_server(self, port: int, channel: int):
         """@brief Start a new TCP server to communicate with a given RTT channel.
@@ -233,7 +335,7 @@ class RTTServer:
         elif self.workers[channel] is not None:
             raise exceptions.RTTError(f"RTT is already started for channel {channel}")
 
-        self.workers[channel] = RTTChanTCPWorker(port, listen = True)
+        self.add_worker(channel, RTTChanTCPWorker(port, listen = True))
 
     def stop_server(self, port: int):
         """@brief Stop a TCP server.
@@ -249,3 +351,7 @@ class RTTServer:
                 if worker.port == port:
                     worker.close()
                     self.workers[i] = None
+                    subscription = self._subscriptions[i]
+                    if subscription is not None:
+                        subscription.close()
+                        self._subscriptions[i] = None
@@ -133,11 +133,28 @@ class ClientSocket(object):
                 del self._buffer[:offset]
                 return data
             # Read a chunk and put in the buffer, then try again.
-            while True:
-                try:
-                    data = self.read()
-                except socket.timeout:
-                    pass
-                else:
-                    break
+            self._buffer += self._read_blocking()
+
+    def read_exactly(self, size):
+        """@brief Read exactly _size_ bytes.
+
+        Blocks until enough data has been received.
+
+        @exception ConnectionError The connection was closed by the other end.
+        """
+        while len(self._buffer) < size:
+            data = self._read_blocking()
+            if not data:
+                raise ConnectionError("connection closed")
             self._buffer += data
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def _read_blocking(self):
+        """@brief Read a chunk, retrying if the socket times out."""
+        while True:
+            try:
+                return self.read()
+            except socket.timeout:
+                pass
@@ -146,3 +146,47 @@ class Timeout:
         self.check(autosleep=False)
         return self._timed_out
 
+
+class Backoff:
+    """@brief Exponentially increasing poll interval.
+
+    Each call to next() returns the current interval and then multiplies it by _factor_, up to
+    _max_interval_. Calling reset() returns to _min_interval_, for instance after activity was seen,
+    so that polling is fast while things are happening and slows down while nothing is.
+
+    @code
+    backoff = Backoff(0.001, 0.05)
+    while not done_event.wait(backoff.next()):
+        if poll_something():
+            backoff.reset()
+    @endcode
+    """
+
+    def __init__(self, min_interval: float, max_interval: float, factor: float = 2.0) -> None:
+        """@brief Constructor.
+        @param self
+        @param min_interval Initial interval in seconds.
+        @param max_interval Maximum interval in seconds. If less than _min_interval_, the interval is fixed
+            at _min_interval_.
+        @param factor Multiplier applied to the interval by each call to next(). Must be at least 1.
+        """
+        assert factor >= 1.0
+        self._min_interval = min_interval
+        self._max_interval = max(min_interval, max_interval)
+        self._factor = factor
+        self._interval = min_interval
+
+    @property
+    def interval(self) -> float:
+        """@brief The interval that will be returned by the next call to next()."""
+        return self._interval
+
+    def reset(self) -> None:
+        """@brief Return to the minimum interval."""
+        self._interval = self._min_interval
+
+    def next(self) -> float:
+        """@brief Return the current interval and advance to the following one."""
+        interval = self._interval
+        self._interval = min(self._max_interval, interval * self._factor)
+        return interval
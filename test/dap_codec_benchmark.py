@@ -0,0 +1,138 @@
+# pyOCD debugger
+# Copyright (c) 2026 PyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""@brief Microbenchmark for CMSIS-DAP transfer packet encoding and decoding.
+
+Measures the host-side cost of building DAP_Transfer and DAP_TransferBlock command packets and of
+decoding their responses into transfer results, reported as milliseconds per MB of word data. No
+debug probe is required.
+"""
+
+import argparse
+import struct
+from time import perf_counter
+
+from pyocd.probe.pydapaccess.dap_access_cmsis_dap import (_Command, _Transfer, READ)
+from pyocd.probe.pydapaccess.cmsis_dap_core import (Command, DAPTransferResponse)
+
+_1MB = (1 * 1024 * 1024)
+
+AP_ACC = 1 << 0
+DRW_WRITE = AP_ACC | 0xC
+DRW_READ = DRW_WRITE | READ
+
+def make_block_commands(packet_size, total_words, request, use_view):
+    """@brief Fill commands with a single block transfer per packet until total_words are added."""
+    commands = []
+    data = bytes(i & 0xff for i in range(total_words * 4))
+    words = list(struct.unpack("<%dI" % total_words, data))
+    pos = 0
+    while pos < total_words:
+        cmd = _Command(packet_size)
+        count = cmd.get_request_space(total_words - pos, request, 0)
+        if request & READ:
+            chunk = None
+        elif use_view:
+            chunk = memoryview(data)[pos * 4:(pos + count) * 4]
+        else:
+            chunk = words[pos:pos + count]
+        cmd.add(count, request, chunk, 0)
+        commands.append(cmd)
+        pos += count
+    return commands
+
+def make_mixed_commands(packet_size, total_words):
+    """@brief Fill commands with alternating single writes and reads, forcing DAP_Transfer."""
+    commands = []
+    pos = 0
+    while pos < total_words:
+        cmd = _Command(packet_size)
+        while pos < total_words:
+            request = DRW_READ if (pos & 1) else DRW_WRITE
+            if cmd.get_request_space(1, request, 0) == 0:
+                break
+            cmd.add(1, request, None if (request & READ) else [pos * 0x01010101 & 0xffffffff], 0)
+            pos += 1
+        commands.append(cmd)
+    return commands
+
+def make_response(cmd):
+    """@brief Build a successful response for an encoded command."""
+    read_data = bytes(cmd._read_count * 4)
+    count = cmd._read_count + cmd._write_count
+    if cmd._block_allowed:
+        return bytearray([Command.DAP_TRANSFER_BLOCK, count & 0xff, count >> 8, DAPTransferResponse.ACK_OK]) \
+                + read_data
+    else:
+        return bytearray([Command.DAP_TRANSFER, count, DAPTransferResponse.ACK_OK]) + read_data
+
+def time_per_mb(fn, total_bytes, repeat):
+    best = None
+    for _ in range(repeat):
+        start = perf_counter()
+        fn()
+        elapsed = perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * _1MB / total_bytes * 1000
+
+def bench_encode(commands):
+    def run():
+        for cmd in commands:
+            cmd._data_encoded = False
+            cmd.encode_data()
+    return run
+
+def bench_decode(commands, responses):
+    def run():
+        for cmd, response in zip(commands, responses):
+            data = cmd.decode_data(response)
+            transfer = _Transfer(None, 0, len(data) // 4, DRW_READ, None)
+            transfer.add_response(data)
+    return run
+
+def main():
+    parser = argparse.ArgumentParser(description='CMSIS-DAP transfer codec benchmark')
+    parser.add_argument('-s', '--packet-size', type=int, default=512, help="Packet size in bytes (default 512).")
+    parser.add_argument('-k', '--kilobytes', type=int, default=1024, help="Data size per test in KB (default 1024).")
+    parser.add_argument('-r', '--repeat', type=int, default=5, help="Repetitions; the best time is used.")
+    args = parser.parse_args()
+
+    total_words = args.kilobytes * 1024 // 4
+    total_bytes = total_words * 4
+    results = []
+
+    for name, use_view in (("block write (list)", False), ("block write (view)", True)):
+        commands = make_block_commands(args.packet_size, total_words, DRW_WRITE, use_view)
+        results.append(("encode " + name, time_per_mb(bench_encode(commands), total_bytes, args.repeat)))
+
+    commands = make_block_commands(args.packet_size, total_words, DRW_READ, False)
+    bench_encode(commands)()
+    responses = [make_response(cmd) for cmd in commands]
+    results.append(("decode block read", time_per_mb(bench_decode(commands, responses), total_bytes, args.repeat)))
+
+    commands = make_mixed_commands(args.packet_size, total_words)
+    results.append(("encode transfer (mixed)", time_per_mb(bench_encode(commands), total_bytes, args.repeat)))
+    responses = [make_response(cmd) for cmd in commands]
+    results.append(("decode transfer (mixed)", time_per_mb(bench_decode(
+            [c for c, r in zip(commands, responses) if c._read_count],
+            [r for c, r in zip(commands, responses) if c._read_count]), total_bytes // 2, args.repeat)))
+
+    print("Packet size %d bytes, %d KB per test" % (args.packet_size, args.kilobytes))
+    for name, ms_per_mb in results:
+        print("{:<28}{:>12.2f} ms/MB".format(name, ms_per_mb))
+
+if __name__ == "__main__":
+    main()
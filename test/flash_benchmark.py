@@ -0,0 +1,393 @@
+# pyOCD debugger
+# Copyright (c) 2026 PyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""@brief Flash programming throughput benchmark against a simulated target.
+
+Runs FileProgrammer.program() end to end with a simulated Cortex-M target and flash algorithm behind
+a mock CMSIS-DAP probe, so no hardware is required. All target memory accesses go through the real
+MEM-AP, DAP access, and packet pipeline layers, and the mock probe can simulate USB latency and
+bandwidth. Flash algorithm operations take a configurable time on the simulated target.
+
+Each scenario is programmed into erased flash and then programmed again with the same image, which
+only analyzes the flash contents. For each run the wall clock and host CPU times, command packet
+count, and the builder's statistics are reported. Results can be saved as JSON and compared with a
+baseline file to detect regressions.
+"""
+
+import argparse
+import dataclasses
+import io
+import json
+import random
+import sys
+from binascii import crc32
+from time import (perf_counter, process_time)
+from types import SimpleNamespace
+
+from pyocd.core.memory_map import (FlashRegion, MemoryMap, RamRegion)
+from pyocd.core.options_manager import OptionsManager
+from pyocd.core.target import Target
+from pyocd.coresight.ap import (APv1Address, MEM_AP)
+from pyocd.coresight.dap import DebugPort
+from pyocd.flash.file_programmer import FileProgrammer
+from pyocd.flash.flash import Flash
+from pyocd.probe.cmsis_dap_probe import CMSISDAPProbe
+from pyocd.probe.debug_probe import DebugProbe
+
+from unit.mockcore import MockCore
+from unit.mockdap import (MockDAPInterface, close_mock_dap_access, create_mock_dap_access)
+
+FLASH_START = 0x0
+SECTOR_SIZE = 0x1000
+PAGE_SIZE = 0x400
+RAM_START = 0x100000
+RAM_SIZE = 0x10000
+
+# Words standing in for the core debug registers, placed after RAM.
+DHCSR = RAM_START + RAM_SIZE
+DCRSR = DHCSR + 4
+DCRDR = DHCSR + 8
+MEMORY_SIZE = DHCSR + 16
+
+# Flash algo placement in RAM.
+ALGO_LOAD_ADDRESS = RAM_START + RAM_SIZE - 0x100
+ANALYZER_ADDRESS = RAM_START + 0x800
+PAGE_BUFFER_BASE = RAM_START + 0x1000
+
+class SimulatedCore(MockCore):
+    """@brief Core that simulates flash algorithm functions, with memory accessed through a mock probe.
+
+    Core register accesses are modelled as accesses of words in target memory, so they cost the same
+    transfers as the debug register accesses made for a real core. Resuming the core at one of the
+    flash algo's entry points performs the operation immediately, after which the core stays running
+    for the operation's simulated duration.
+    """
+    def __init__(self, session, iface, flash_size, timing):
+        super().__init__(has_fpu=False)
+        self.session = session
+        self.iface = iface
+        self.timing = timing
+        self.flash_region = FlashRegion(start=FLASH_START, length=flash_size, sector_size=SECTOR_SIZE,
+                page_size=PAGE_SIZE, is_boot_memory=True, name='flash')
+        self.ram_region = RamRegion(start=RAM_START, length=RAM_SIZE, name='ram')
+        self.memory_map = MemoryMap(self.flash_region, self.ram_region)
+        self._busy_until = 0.0
+
+        self.dap = create_mock_dap_access(iface)
+        probe = CMSISDAPProbe(self.dap)
+        probe._protocol = DebugProbe.Protocol.SWD
+        self.debug_port = DebugPort(probe, self)
+        self.mem_ap = MEM_AP(self.debug_port, APv1Address(0))
+        self.mem_ap._transfer_sizes = {8, 16, 32}
+
+        self._functions = {}
+
+    def close(self):
+        close_mock_dap_access(self.dap)
+
+    def add_function(self, pc, fn, duration_name=None):
+        self._functions[pc] = (fn, duration_name)
+
+    def halt(self):
+        self.mem_ap.write32(DHCSR, 0)
+
+    def reset_and_halt(self, reset_type=None):
+        self.halt()
+
+    def resume(self):
+        # The operation runs once all preceding transfers, such as a page buffer load, have been made.
+        self.mem_ap.write32(DHCSR, 1)
+        self.debug_port.flush()
+        fn, duration_name = self._functions[self.regs[15]]
+        self.regs[0] = fn(*(self.regs[n] for n in range(4)))
+        self._busy_until = perf_counter() + (getattr(self.timing, duration_name) if duration_name else 0.0)
+
+    def get_state(self):
+        self.mem_ap.read32(DHCSR)
+        return Target.State.RUNNING if perf_counter() < self._busy_until else Target.State.HALTED
+
+    def get_vector_catch(self):
+        return 0
+
+    def set_vector_catch(self, enable_mask):
+        pass
+
+    def read_core_register(self, reg):
+        return self.read_core_registers_raw([reg])[0]
+
+    def read_core_registers_raw(self, reg_list):
+        for _ in reg_list:
+            self.mem_ap.write32(DCRSR, 0)
+            self.mem_ap.read32(DCRDR)
+        return super().read_core_registers_raw(reg_list)
+
+    def write_core_registers_raw(self, reg_list, data_list):
+        for value in data_list:
+            self.mem_ap.write32(DCRDR, value)
+            self.mem_ap.write32(DCRSR, 1 << 16)
+        super().write_core_registers_raw(reg_list, data_list)
+
+    def read_memory(self, addr, transfer_size=32, now=True):
+        return self.mem_ap.read_memory(addr, transfer_size, now)
+
+    def write_memory(self, addr, value, transfer_size=32):
+        self.mem_ap.write_memory(addr, value, transfer_size)
+
+    def read_memory_block8(self, addr, size):
+        return self.mem_ap.read_memory_block8(addr, size)
+
+    def read_memory_block32(self, addr, size):
+        return self.mem_ap.read_memory_block32(addr, size)
+
+    def read_memory_into(self, addr, buf):
+        self.mem_ap.read_memory_into(addr, buf)
+
+    def write_memory_block8(self, addr, data):
+        self.mem_ap.write_memory_block8(addr, data)
+
+    def write_memory_block32(self, addr, data):
+        self.mem_ap.write_memory_block32(addr, data)
+
+    def write_memory_from(self, addr, data):
+        self.mem_ap.write_memory_from(addr, data)
+
+class SimulatedFlashAlgo:
+    """@brief Flash algo operations performed directly on the mock probe's memory."""
+
+    ## Entry point offsets from the load address. The first word is the blob header.
+    ENTRY_POINTS = ('init', 'uninit', 'erase_all', 'erase_sector', 'program_page')
+
+    def __init__(self, core, page_buffer_count, analyzer):
+        self.memory = core.iface.memory
+        self.flash_size = core.flash_region.length
+        pcs = {name: ALGO_LOAD_ADDRESS + 4 * (n + 1) for n, name in enumerate(self.ENTRY_POINTS)}
+        page_buffers = [PAGE_BUFFER_BASE + n * PAGE_SIZE for n in range(page_buffer_count)]
+        self.algo = {
+            'load_address': ALGO_LOAD_ADDRESS,
+            'instructions': [0xE7FDBE00] * 16,
+            'pc_init': pcs['init'],
+            'pc_unInit': pcs['uninit'],
+            'pc_eraseAll': pcs['erase_all'],
+            'pc_erase_sector': pcs['erase_sector'],
+            'pc_program_page': pcs['program_page'],
+            'page_buffers': page_buffers,
+            'begin_data': page_buffers[0],
+            'begin_stack': ANALYZER_ADDRESS,
+            'end_stack': RAM_START,
+            'static_base': ALGO_LOAD_ADDRESS,
+            'min_program_length': PAGE_SIZE,
+            'analyzer_supported': analyzer,
+            'analyzer_address': ANALYZER_ADDRESS,
+        }
+        core.add_function(pcs['init'], self.nop)
+        core.add_function(pcs['uninit'], self.nop)
+        core.add_function(pcs['erase_all'], self.erase_all, 'chip_erase')
+        core.add_function(pcs['erase_sector'], self.erase_sector, 'sector_erase')
+        core.add_function(pcs['program_page'], self.program_page, 'page_program')
+        core.add_function(ANALYZER_ADDRESS, self.compute_crcs)
+
+    def nop(self, *args):
+        return 0
+
+    def erase_all(self, *args):
+        self.memory[FLASH_START:FLASH_START + self.flash_size] = b'\xff' * self.flash_size
+        return 0
+
+    def erase_sector(self, address, *args):
+        self.memory[address:address + SECTOR_SIZE] = b'\xff' * SECTOR_SIZE
+        return 0
+
+    def program_page(self, address, size, buffer, *args):
+        self.memory[address:address + size] = self.memory[buffer:buffer + size]
+        return 0
+
+    def compute_crcs(self, address, count, *args):
+        view = memoryview(self.memory)
+        for n in range(count):
+            offset = address + n * 4
+            command = int.from_bytes(view[offset:offset + 4], 'little')
+            size = 1 << (command & 0xffff)
+            start = (command >> 16) * size
+            view[offset:offset + 4] = (crc32(view[start:start + size]) & 0xffffffff).to_bytes(4, 'little')
+        return 0
+
+class BenchmarkSession:
+    """@brief Minimal session for programming the simulated target."""
+    def __init__(self, options):
+        self.options = OptionsManager()
+        self.options.add_front(options)
+        self.probe = SimpleNamespace(unique_id="benchmark")
+        self.target = None
+        self.board = None
+
+    def notify(self, event, source=None, data=None):
+        pass
+
+    def subscribe(self, cb, events, source=None):
+        pass
+
+## Scenario name, chip erase mode, and number of page buffers.
+SCENARIOS = (
+    ("chip-erase", "chip", 1),
+    ("sector-erase", "sector", 1),
+    ("double-buffer", "sector", 2),
+)
+
+def make_image(size, seed):
+    """@brief Generate reproducible image data with some erased ranges, as in a typical firmware image."""
+    rng = random.Random(seed)
+    image = bytearray(rng.getrandbits(8) for _ in range(size))
+    for _ in range(size // 0x4000):
+        start = rng.randrange(size)
+        end = min(size, start + rng.randrange(0x100, 0x800))
+        image[start:end] = b'\xff' * (end - start)
+    return bytes(image)
+
+def run_program(args, image, chip_erase, page_buffer_count, flash_contents=None):
+    """@brief Program the image into a new simulated target and measure the cost.
+
+    @return Tuple of (result dict, final flash contents).
+    """
+    flash_size = max(SECTOR_SIZE, -(-len(image) // SECTOR_SIZE) * SECTOR_SIZE)
+    iface = MockDAPInterface(memory_size=MEMORY_SIZE, packet_size=args.packet_size,
+            packet_count=args.packet_count, latency=args.latency * 1e-6, bandwidth=args.bandwidth * 1e3)
+    iface.memory[FLASH_START:FLASH_START + flash_size] = flash_contents or (b'\xff' * flash_size)
+
+    session = BenchmarkSession({'hide_programming_progress': True})
+    timing = SimpleNamespace(chip_erase=args.chip_erase_time * 1e-3,
+            sector_erase=args.sector_erase_time * 1e-6, page_program=args.page_program_time * 1e-6)
+    core = SimulatedCore(session, iface, flash_size, timing)
+    session.target = core
+    session.board = SimpleNamespace(target=core)
+    sim_algo = SimulatedFlashAlgo(core, page_buffer_count, not args.no_analyzer)
+    flash = Flash(core, sim_algo.algo)
+    flash.region = core.flash_region
+    core.flash_region.flash = flash
+
+    try:
+        start_cpu = process_time()
+        start = perf_counter()
+        info_list = FileProgrammer(session, progress=lambda _: None, chip_erase=chip_erase, no_reset=True) \
+                .program(io.BytesIO(image), file_format='bin', base_address=FLASH_START)
+        elapsed = perf_counter() - start
+        cpu_time = process_time() - start_cpu
+    finally:
+        core.close()
+
+    assert iface.memory[FLASH_START:FLASH_START + len(image)] == image, "flash contents don't match image"
+    info = info_list[0]
+    result = {
+        'wall_time': elapsed,
+        'cpu_time': cpu_time,
+        'throughput': len(image) / elapsed / 1024,
+        'packets': iface.packets_written,
+        'bytes_transferred': iface.bytes_transferred,
+        'link_time': iface.link_time,
+        'info': dataclasses.asdict(info),
+    }
+    return result, bytes(iface.memory[FLASH_START:FLASH_START + flash_size])
+
+def best_of(args, fn):
+    """@brief Repeat a measurement and return the result of the fastest run, with the lowest CPU time."""
+    runs = [fn() for _ in range(args.repeat)]
+    best = min(runs, key=lambda r: r[0]['wall_time'])
+    best[0]['cpu_time'] = min(r[0]['cpu_time'] for r in runs)
+    return best
+
+def compare(results, baseline, tolerance):
+    """@brief Compare results with a baseline.
+
+    @return List of regression descriptions.
+    """
+    regressions = []
+    baseline_results = {(r['scenario'], r['operation']): r for r in baseline['results']}
+    for r in results:
+        base = baseline_results.get((r['scenario'], r['operation']))
+        if base is None:
+            continue
+        name = "%s %s" % (r['scenario'], r['operation'])
+        if r['packets'] > base['packets']:
+            regressions.append("%s: packets %d > %d" % (name, r['packets'], base['packets']))
+        if r['cpu_time'] > base['cpu_time'] * (1 + tolerance):
+            regressions.append("%s: CPU time %.3f s > %.3f s" % (name, r['cpu_time'], base['cpu_time']))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Flash programming benchmark with a simulated target')
+    parser.add_argument('-k', '--kilobytes', type=int, default=256, help="Image size in KB (default 256).")
+    parser.add_argument('-s', '--packet-size', type=int, default=512, help="Packet size in bytes (default 512).")
+    parser.add_argument('-c', '--packet-count', type=int, default=4, help="Probe packet count (default 4).")
+    parser.add_argument('-l', '--latency', type=float, default=0.0,
+            help="Simulated USB latency per packet in µs (default 0).")
+    parser.add_argument('-b', '--bandwidth', type=float, default=0.0,
+            help="Simulated USB bandwidth in KB/s, or 0 for unlimited (default 0).")
+    parser.add_argument('--page-program-time', type=float, default=0.0,
+            help="Simulated page program time in µs (default 0).")
+    parser.add_argument('--sector-erase-time', type=float, default=0.0,
+            help="Simulated sector erase time in µs (default 0).")
+    parser.add_argument('--chip-erase-time', type=float, default=0.0,
+            help="Simulated chip erase time in ms (default 0).")
+    parser.add_argument('--no-analyzer', action='store_true',
+            help="Disable the CRC analyzer, so flash is analyzed by reading it.")
+    parser.add_argument('--seed', type=int, default=0, help="Image data random seed (default 0).")
+    parser.add_argument('-r', '--repeat', type=int, default=3, help="Repetitions; the fastest run is used.")
+    parser.add_argument('-o', '--output', help="Write results to this JSON file.")
+    parser.add_argument('--baseline', help="Compare results with this JSON file and fail on regressions.")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+            help="Allowed fractional CPU time increase over the baseline (default 0.25).")
+    args = parser.parse_args()
+
+    image = make_image(args.kilobytes * 1024, args.seed)
+    results = []
+    for name, chip_erase, page_buffer_count in SCENARIOS:
+        program, flash_contents = best_of(args, lambda: run_program(args, image, chip_erase, page_buffer_count))
+        reprogram, _ = best_of(args, lambda: run_program(args, image, chip_erase, page_buffer_count, flash_contents))
+        for operation, result in (("program", program), ("reprogram", reprogram)):
+            results.append(dict(scenario=name, operation=operation, **result))
+
+    print("Image %d KB, packet size %d bytes, packet count %d" % (args.kilobytes, args.packet_size,
+            args.packet_count))
+    print("{:<16}{:<10}{:>10}{:>10}{:>12}{:>10}{:>10}".format(
+            "scenario", "operation", "wall s", "cpu s", "KB/s", "packets", "analyze s"))
+    for r in results:
+        print("{:<16}{:<10}{:>10.3f}{:>10.3f}{:>12.1f}{:>10}{:>10.3f}".format(
+                r['scenario'], r['operation'], r['wall_time'], r['cpu_time'], r['throughput'], r['packets'],
+                r['info']['analyze_time']))
+
+    report = {
+        'config': {k: v for k, v in vars(args).items() if k not in ('output', 'baseline')},
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=1)
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        # Packet counts depend on timing, so results are only comparable for the same configuration.
+        ignored_keys = ('repeat', 'tolerance')
+        if any(baseline['config'].get(k) != v for k, v in report['config'].items() if k not in ignored_keys):
+            print("Error: baseline configuration differs")
+            sys.exit(2)
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print("Regression: " + regression)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
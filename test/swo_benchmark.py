@@ -0,0 +1,168 @@
+# pyOCD debugger
+# Copyright (c) 2026 PyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""@brief SWO decoding throughput benchmark.
+
+Generates a synthetic SWO stream and measures the sustained rate at which it is decoded, fed in
+buffers of the size returned by a probe's swo_read(). The stream is a mix of 1, 2, and 4 byte ITM
+stimulus packets on several ports, local timestamps, exception trace, and periodic PC samples, with
+the proportion of ITM data configurable.
+
+The modes measured are:
+- `parser`: SWOParser passing every event to a sink that discards it, as used for trace event sinks.
+- `decode`: SWOBatchDecoder filling a reused SWOEventBuffer, without creating event objects.
+- `itm_data`: batch decoding plus extraction of the ITM bytes, as done by the SWV console.
+
+For reference, 6 Mbaud of SWO on a UART (NRZ) link carries 0.6 MB/s.
+"""
+
+import argparse
+import json
+import random
+from time import perf_counter
+from unittest import mock
+
+from pyocd.trace.sink import TraceEventSink
+from pyocd.trace.swo import SWOParser
+from pyocd.trace.swo_decoder import (SWOBatchDecoder, SWOEventBuffer)
+
+class NullSink(TraceEventSink):
+    def __init__(self):
+        self.count = 0
+
+    def receive(self, event):
+        self.count += 1
+
+def make_stream(size, itm_fraction, seed):
+    """@brief Generate a synthetic SWO stream of at least _size_ bytes."""
+    rng = random.Random(seed)
+    stream = bytearray(b'\x00' * 5 + b'\x80')
+    while len(stream) < size:
+        r = rng.random()
+        if r < itm_fraction:
+            port = rng.randrange(4)
+            ss = rng.choice((1, 1, 1, 2, 3))
+            stream.append((port << 3) | ss)
+            stream += bytes(rng.randrange(0x20, 0x7f) for _ in range(1 << (ss - 1)))
+        elif r < itm_fraction + (1 - itm_fraction) / 2:
+            # Local timestamp, short or long form.
+            if rng.random() < 0.5:
+                stream.append(rng.randrange(1, 7) << 4)
+            else:
+                stream += bytes((0xc0, 0x80 | rng.randrange(0x80), rng.randrange(0x80)))
+        elif rng.random() < 0.5:
+            # Exception trace, entered or exited.
+            stream += bytes((0x0e, rng.randrange(16, 64), rng.choice((0x10, 0x20))))
+        else:
+            # Periodic PC sample.
+            stream.append(0x17)
+            stream += (rng.randrange(0x10000) * 2).to_bytes(4, 'little')
+    return bytes(stream)
+
+def chunks(stream, chunk_size):
+    return [stream[i:i + chunk_size] for i in range(0, len(stream), chunk_size)]
+
+def run_parser(buffers):
+    sink = NullSink()
+    parser = SWOParser(mock.Mock(), sink)
+    for data in buffers:
+        parser.parse(data)
+    return sink.count
+
+def run_decode(buffers):
+    decoder = SWOBatchDecoder()
+    buffer = SWOEventBuffer()
+    count = 0
+    for data in buffers:
+        buffer.clear()
+        decoder.decode(data, buffer)
+        count += len(buffer)
+    return count
+
+def run_itm_data(buffers):
+    decoder = SWOBatchDecoder()
+    buffer = SWOEventBuffer()
+    count = 0
+    for data in buffers:
+        buffer.clear()
+        decoder.decode(data, buffer)
+        buffer.itm_data()
+        count += len(buffer)
+    return count
+
+MODES = [
+    ("parser", run_parser),
+    ("decode", run_decode),
+    ("itm_data", run_itm_data),
+    ]
+
+def best_of(repeat, fn, buffers):
+    """@brief Repeat a measurement and return the shortest time and the event count."""
+    best = None
+    for _ in range(repeat):
+        start = perf_counter()
+        count = fn(buffers)
+        elapsed = perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, count
+
+def main():
+    parser = argparse.ArgumentParser(description='SWO decoding throughput benchmark')
+    parser.add_argument('-k', '--kilobytes', type=int, default=1024, help="Stream size in KB (default 1024).")
+    parser.add_argument('-c', '--chunk-size', type=int, default=4096,
+            help="Size of the buffers passed to the decoder in bytes (default 4096).")
+    parser.add_argument('-i', '--itm-fraction', type=float, default=0.8,
+            help="Fraction of packets that are ITM stimulus packets (default 0.8).")
+    parser.add_argument('-m', '--mode', action='append', choices=[name for name, _ in MODES],
+            help="Mode to measure. May be repeated. All modes are measured by default.")
+    parser.add_argument('--seed', type=int, default=0, help="Stream random seed (default 0).")
+    parser.add_argument('-r', '--repeat', type=int, default=3, help="Repetitions; the fastest run is used.")
+    parser.add_argument('-o', '--output', help="Write results to this JSON file.")
+    args = parser.parse_args()
+
+    stream = make_stream(args.kilobytes * 1024, args.itm_fraction, args.seed)
+    buffers = chunks(stream, args.chunk_size)
+    results = []
+    for name, fn in MODES:
+        if args.mode and name not in args.mode:
+            continue
+        elapsed, count = best_of(args.repeat, fn, buffers)
+        results.append({
+            'mode': name,
+            'time': elapsed,
+            'events': count,
+            'throughput': len(stream) / elapsed / 1e6,
+            'event_rate': count / elapsed,
+        })
+
+    print("Stream %d bytes in %d byte buffers, %.0f%% ITM packets" % (len(stream), args.chunk_size,
+            args.itm_fraction * 100))
+    print("{:<10}{:>10}{:>10}{:>12}{:>14}".format("mode", "time s", "events", "MB/s", "events/s"))
+    for r in results:
+        print("{:<10}{:>10.3f}{:>10}{:>12.2f}{:>14.0f}".format(r['mode'], r['time'], r['events'],
+                r['throughput'], r['event_rate']))
+
+    if args.output:
+        report = {
+            'config': {k: v for k, v in vars(args).items() if k != 'output'},
+            'results': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+# pyOCD debugger
+# Copyright (c) 2026 PyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import struct
+from time import (perf_counter, sleep)
+
+from pyocd.probe.pydapaccess.dap_access_cmsis_dap import DAPAccessCMSISDAP
+from pyocd.probe.pydapaccess.cmsis_dap_core import (Command, DAPTransferResponse)
+
+# Transfer request bits.
+AP_ACC = 1 << 0
+READ = 1 << 1
+VALUE_MATCH = 1 << 4
+MATCH_MASK = 1 << 5
+
+# Transfer response value mismatch bit.
+VALUE_MISMATCH = 1 << 4
+
+# DP SELECT register address.
+DP_SELECT = 0x8
+
+# MEM-AP register offsets.
+MEM_AP_CSW = 0x00
+MEM_AP_TAR = 0x04
+MEM_AP_DRW = 0x0C
+MEM_AP_BD0 = 0x10
+MEM_AP_BD3 = 0x1C
+
+class MockDAPInterface:
+    """@brief Simulated CMSIS-DAP USB interface.
+
+    The interface implements the DAP_Transfer and DAP_TransferBlock commands against a single MEM-AP
+    whose address space is backed by a bytearray starting at address 0. The AP register bank is selected
+    by the APBANKSEL field of writes to the DP SELECT register, and the CSW, TAR, DRW, and BD0-BD3
+    registers are implemented. Accesses outside the memory
+    return a FAULT ACK. Responses are queued and returned in order by read(), so any number of packets
+    can be outstanding.
+
+    A USB link can optionally be simulated. Packets are processed one at a time, each taking the time
+    to transfer the command and response at _bandwidth_ bytes per second, and every response is
+    returned _latency_ seconds after its command was processed. read() waits until the next response
+    is available.
+    """
+
+    vendor_name = "Mock"
+    product_name = "Mock CMSIS-DAP"
+    vid = 0
+    pid = 0
+    is_bulk = True
+    has_swo_ep = False
+
+    def __init__(self, memory_size=0x10000, packet_size=64, packet_count=4, latency=0.0, bandwidth=None):
+        self.memory = bytearray(memory_size)
+        self.packet_size = packet_size
+        self.packet_count = packet_count
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.csw = 2 # 32-bit transfers
+        self.tar = 0
+        self.select = 0
+        self.match_mask = 0xffffffff
+        self._responses = collections.deque()
+        self.packets_written = 0
+        self.bytes_transferred = 0
+        self.link_time = 0.0
+        self.max_outstanding = 0
+        self._busy_until = 0.0
+
+    def get_serial_number(self):
+        return "mockdap"
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def get_packet_count(self):
+        return self.packet_count
+
+    def set_packet_count(self, count):
+        self.packet_count = count
+
+    def set_packet_size(self, size):
+        self.packet_size = size
+
+    def _access(self, request, value=None):
+        """@brief Perform one register access.
+        @return 2-tuple of (ack, read value or None).
+        """
+        reg = request & 0xc
+        if not (request & AP_ACC):
+            # DP registers read as zero and ignore writes, except SELECT and MATCH_MASK.
+            if not (request & READ):
+                if request & MATCH_MASK:
+                    self.match_mask = value
+                elif reg == DP_SELECT:
+                    self.select = value
+            return DAPTransferResponse.ACK_OK, (0 if (request & READ) else None)
+        reg |= self.select & 0xf0
+        if reg == MEM_AP_CSW:
+            if request & READ:
+                return DAPTransferResponse.ACK_OK, self.csw
+            self.csw = value
+        elif reg == MEM_AP_TAR:
+            if request & READ:
+                return DAPTransferResponse.ACK_OK, self.tar
+            self.tar = value
+        elif reg == MEM_AP_DRW:
+            # Data is presented on the byte lanes selected by TAR, as for a real MEM-AP.
+            size = 1 << (self.csw & 0x7)
+            word_addr = self.tar & ~0x3
+            if word_addr + 4 > len(self.memory):
+                return DAPTransferResponse.ACK_FAULT, None
+            if request & READ:
+                result, = struct.unpack_from("<I", self.memory, word_addr)
+                self.tar += size
+                return DAPTransferResponse.ACK_OK, result
+            lane = self.tar & 0x3
+            self.memory[self.tar:self.tar + size] = struct.pack("<I", value)[lane:lane + size]
+            self.tar += size
+        elif MEM_AP_BD0 <= reg <= MEM_AP_BD3:
+            # Banked data registers always make word accesses and don't increment TAR.
+            word_addr = (self.tar & ~0xf) | (reg & 0xc)
+            if word_addr + 4 > len(self.memory):
+                return DAPTransferResponse.ACK_FAULT, None
+            if request & READ:
+                return DAPTransferResponse.ACK_OK, struct.unpack_from("<I", self.memory, word_addr)[0]
+            struct.pack_into("<I", self.memory, word_addr, value)
+        else:
+            raise NotImplementedError("mock MEM-AP register 0x%02x" % reg)
+        return DAPTransferResponse.ACK_OK, None
+
+    def _transfer(self, data):
+        count = data[2]
+        pos = 3
+        response = bytearray()
+        ack = DAPTransferResponse.ACK_OK
+        done = 0
+        while done < count:
+            request = data[pos]
+            pos += 1
+            value = None
+            if not (request & READ) or (request & VALUE_MATCH):
+                value, = struct.unpack_from("<I", data, pos)
+                pos += 4
+            if (request & READ) and (request & VALUE_MATCH):
+                ack, result = self._access(request & ~VALUE_MATCH)
+                if ack == DAPTransferResponse.ACK_OK and (result & self.match_mask) != value:
+                    ack = DAPTransferResponse.ACK_OK | VALUE_MISMATCH
+                    break
+            else:
+                ack, result = self._access(request, value)
+                if ack == DAPTransferResponse.ACK_OK and result is not None:
+                    response += struct.pack("<I", result)
+            if ack != DAPTransferResponse.ACK_OK:
+                break
+            done += 1
+        return bytearray([Command.DAP_TRANSFER, done, ack]) + response
+
+    def _transfer_block(self, data):
+        count, request = struct.unpack_from("<HB", data, 2)
+        pos = 5
+        response = bytearray()
+        ack = DAPTransferResponse.ACK_OK
+        done = 0
+        while done < count:
+            value = None
+            if not (request & READ):
+                value, = struct.unpack_from("<I", data, pos)
+                pos += 4
+            ack, result = self._access(request, value)
+            if ack != DAPTransferResponse.ACK_OK:
+                break
+            if result is not None:
+                response += struct.pack("<I", result)
+            done += 1
+        return bytearray([Command.DAP_TRANSFER_BLOCK, done & 0xff, done >> 8, ack]) + response
+
+    def write(self, data):
+        data = bytes(data)
+        assert len(data) <= self.packet_size
+        self.packets_written += 1
+        if data[0] == Command.DAP_TRANSFER:
+            response = self._transfer(data)
+        elif data[0] == Command.DAP_TRANSFER_BLOCK:
+            response = self._transfer_block(data)
+        else:
+            raise NotImplementedError("mock CMSIS-DAP command 0x%02x" % data[0])
+
+        size = len(data) + len(response)
+        self.bytes_transferred += size
+        ready = 0.0
+        if self.bandwidth or self.latency:
+            transfer_time = (size / self.bandwidth) if self.bandwidth else 0.0
+            self.link_time += transfer_time
+            self._busy_until = max(perf_counter(), self._busy_until) + transfer_time
+            ready = self._busy_until + self.latency
+
+        self._responses.append((ready, response))
+        self.max_outstanding = max(self.max_outstanding, len(self._responses))
+
+    def read(self, timeout=None):
+        ready, response = self._responses.popleft()
+        delay = ready - perf_counter()
+        if delay > 0:
+            sleep(delay)
+        return response
+
+def create_mock_dap_access(interface, options=None):
+    """@brief Create a DAPAccessCMSISDAP object that is ready to perform transfers on a mock interface.
+
+    The packet pipeline is configured from _options_ as if they were passed to open(), or from the
+    current session's options if not provided. Call close_mock_dap_access() to stop the pipeline's
+    reader thread.
+    """
+    dap = DAPAccessCMSISDAP(None, interface=interface)
+    dap._options = options
+    dap._packet_size = interface.packet_size
+    dap._packet_count = interface.packet_count
+    dap._init_deferred_buffers()
+    dap._start_pipeline()
+    dap._is_open = True
+    dap.set_deferred_transfer(True)
+    return dap
+
+def close_mock_dap_access(dap):
+    """@brief Flush and stop a DAPAccessCMSISDAP object created by create_mock_dap_access()."""
+    try:
+        dap.flush()
+    finally:
+        dap._stop_pipeline()
+        dap._is_open = False
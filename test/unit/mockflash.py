@@ -0,0 +1,152 @@
+# pyOCD debugger
+# Copyright (c) 2026 PyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from binascii import crc32
+from collections import Counter
+
+from pyocd.core.options_manager import OptionsManager
+from pyocd.flash.flash import Flash
+
+class MockFlashSession:
+    """@brief Minimal session for use with MockFlash."""
+    def __init__(self, options=None, unique_id="mockprobe"):
+        self.options = OptionsManager()
+        self.options.add_front(options or {})
+        self.probe = MockProbe(unique_id)
+        self.target = self
+        self.part_number = "mock"
+        self.events = []
+
+    def notify(self, event, source=None, data=None):
+        self.events.append(event)
+
+class MockProbe:
+    def __init__(self, unique_id):
+        self.unique_id = unique_id
+
+class MockFlashTarget:
+    """@brief Target memory containing a single flash region."""
+    def __init__(self, region, session):
+        self.region = region
+        self.session = session
+        self.memory = bytearray([region.erased_byte_value]) * region.length
+        self.bytes_read = 0
+        self.trace = []
+
+    def read_memory_block8(self, addr, size):
+        offset = addr - self.region.start
+        assert 0 <= offset and offset + size <= len(self.memory)
+        self.bytes_read += size
+        self.trace.append(('read', addr))
+        return list(self.memory[offset:offset + size])
+
+    def read_memory_into(self, addr, buf):
+        view = memoryview(buf).cast('B')
+        view[:] = bytes(self.read_memory_block8(addr, len(view)))
+
+    def reset_and_halt(self):
+        pass
+
+class MockFlash(Flash):
+    """@brief Flash algorithm simulation that operates directly on MockFlashTarget memory.
+
+    The `ops` counter records the number of each operation performed, and `trace` is the sequence of
+    (operation, address) tuples for page buffer loads, program starts and completions, and reads.
+    """
+    def __init__(self, region, options=None, crc_supported=True, double_buffer=False, page_buffer_count=2,
+            blank_check_supported=False):
+        self.session = MockFlashSession(options)
+        super().__init__(MockFlashTarget(region, self.session), None)
+        self.region = region
+        self.use_analyzer = crc_supported
+        self.double_buffer_supported = double_buffer
+        self.blank_check_supported = blank_check_supported
+        self.page_buffers = [bytearray() for _ in range(page_buffer_count if double_buffer else 1)]
+        self.ops = Counter()
+        self.trace = []
+        self.target.trace = self.trace
+        self._pending_program = None
+
+    @property
+    def memory(self):
+        return self.target.memory
+
+    @property
+    def is_erase_all_supported(self):
+        return True
+
+    @property
+    def is_blank_check_supported(self):
+        return self.blank_check_supported
+
+    def _offset(self, addr):
+        return addr - self.region.start
+
+    def init(self, operation, address=None, clock=0, reset=True):
+        self.ops['init'] += 1
+        self._active_operation = operation
+
+    def uninit(self):
+        self._active_operation = None
+
+    def cleanup(self):
+        self._active_operation = None
+
+    def compute_crcs(self, sectors):
+        self.ops['compute_crcs'] += 1
+        for addr, size in sectors:
+            # Same constraints as the analyzer commands.
+            assert (size & (size - 1)) == 0 and (addr % size) == 0 and (addr // size) < 0x10000
+        return [crc32(self.memory[self._offset(addr):self._offset(addr) + size]) & 0xFFFFFFFF
+                for addr, size in sectors]
+
+    def blank_check(self, address, size):
+        self.ops['blank_check'] += 1
+        offset = self._offset(address)
+        return self.memory[offset:offset + size] == bytes([self.region.erased_byte_value]) * size
+
+    def erase_all(self):
+        self.ops['erase_all'] += 1
+        self.memory[:] = bytes([self.region.erased_byte_value]) * len(self.memory)
+
+    def erase_sector(self, address):
+        self.ops['erase_sector'] += 1
+        info = self.get_sector_info(address)
+        offset = self._offset(info.base_addr)
+        self.memory[offset:offset + info.size] = bytes([self.region.erased_byte_value]) * info.size
+
+    def program_page(self, address, bytes):
+        self.ops['program_page'] += 1
+        offset = self._offset(address)
+        self.memory[offset:offset + len(bytes)] = bytearray(bytes)
+
+    def load_page_buffer(self, buffer_number, address, bytes):
+        assert self._pending_program is None or self._pending_program[0] != buffer_number, \
+            "loading buffer %d while it is being programmed" % buffer_number
+        self.trace.append(('load', address))
+        self.page_buffers[buffer_number] = bytearray(bytes)
+
+    def start_program_page_with_buffer(self, buffer_number, address):
+        assert self._pending_program is None
+        self.trace.append(('start', address))
+        self._pending_program = (buffer_number, address)
+
+    def wait_for_completion(self, timeout=None):
+        buffer_number, address = self._pending_program
+        self._pending_program = None
+        self.trace.append(('done', address))
+        self.program_page(address, self.page_buffers[buffer_number])
+        return 0
@@ -0,0 +1,322 @@
+# pyOCD debugger
+# Copyright (c) 2026 PyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+import struct
+from time import perf_counter
+from unittest import mock
+
+from pyocd.core import exceptions
+from pyocd.core.session import Session
+from pyocd.coresight.ap import (APv1Address, MEM_AP)
+from pyocd.coresight.dap import DebugPort
+from pyocd.probe.cmsis_dap_probe import CMSISDAPProbe
+from pyocd.probe.debug_probe import DebugProbe
+from pyocd.probe.pydapaccess import DAPAccess
+from .mockdap import (MockDAPInterface, close_mock_dap_access, create_mock_dap_access)
+
+TAR = DAPAccess.REG.AP_0x4
+DRW = DAPAccess.REG.AP_0xC
+
+@pytest.fixture(scope='function')
+def iface():
+    return MockDAPInterface()
+
+@pytest.fixture(scope='function')
+def dap(iface):
+    dap = create_mock_dap_access(iface)
+    yield dap
+    close_mock_dap_access(dap)
+
+def fill_pattern(iface):
+    for i in range(0, len(iface.memory), 4):
+        struct.pack_into("<I", iface.memory, i, 0x01020304 * (i // 4) & 0xffffffff)
+
+class TestDAPAccessBuffers:
+    def test_read_repeat_into(self, iface, dap):
+        fill_pattern(iface)
+        dap.write_reg(TAR, 0x100)
+        buf = bytearray(64 * 4)
+        dap.reg_read_repeat_into(DRW, buf)
+        assert buf == iface.memory[0x100:0x200]
+
+    def test_read_repeat_into_matches_list(self, iface, dap):
+        fill_pattern(iface)
+        dap.write_reg(TAR, 0x40)
+        words = dap.reg_read_repeat(100, DRW)
+        dap.write_reg(TAR, 0x40)
+        buf = bytearray(100 * 4)
+        dap.reg_read_repeat_into(DRW, buf)
+        assert list(struct.unpack("<100I", buf)) == list(words)
+
+    def test_read_repeat_into_deferred(self, iface, dap):
+        fill_pattern(iface)
+        buf = bytearray(0x400)
+        dap.write_reg(TAR, 0)
+        cb1 = dap.reg_read_repeat_into(DRW, memoryview(buf)[:0x200], now=False)
+        dap.write_reg(TAR, 0x800)
+        cb2 = dap.reg_read_repeat_into(DRW, memoryview(buf)[0x200:], now=False)
+        cb2()
+        cb1()
+        assert buf[:0x200] == iface.memory[:0x200]
+        assert buf[0x200:] == iface.memory[0x800:0xa00]
+
+    def test_write_repeat_from(self, iface, dap):
+        data = bytes(range(256)) * 3
+        dap.write_reg(TAR, 0x1000)
+        dap.reg_write_repeat_from(DRW, data)
+        dap.flush()
+        assert iface.memory[0x1000:0x1000 + len(data)] == data
+
+    def test_write_repeat_from_mixed_packet(self, iface, dap):
+        # A TAR write followed by a small data write forces the DAP_Transfer encoding.
+        data = b'\x11\x22\x33\x44\x55\x66\x77\x88'
+        dap.write_reg(TAR, 0x20)
+        dap.reg_write_repeat_from(DRW, memoryview(data))
+        dap.write_reg(TAR, 0x20)
+        assert dap.reg_read_repeat(2, DRW) == [0x44332211, 0x88776655]
+
+    @pytest.mark.parametrize("count", [1, 3, 300])
+    def test_write_values_masked(self, iface, dap, count):
+        # Out of range write values are truncated to 32 bits, for both DAP_Transfer and DAP_TransferBlock.
+        dap.write_reg(TAR, 0x100)
+        dap.reg_write_repeat(count, DRW, [-1] * count)
+        dap.write_reg(TAR, 0x100)
+        assert dap.reg_read_repeat(count, DRW) == [0xffffffff] * count
+
+    def test_read_into_fault(self, iface, dap):
+        dap.write_reg(TAR, len(iface.memory) - 8)
+        buf = bytearray(16)
+        with pytest.raises(DAPAccess.TransferFaultError):
+            dap.reg_read_repeat_into(DRW, buf)
+
+@pytest.fixture(scope='function')
+def mem_ap(dap):
+    probe = CMSISDAPProbe(dap)
+    # Error handling clears sticky errors, which depends on the wire protocol.
+    probe._protocol = DebugProbe.Protocol.SWD
+    target = mock.Mock()
+    dp = DebugPort(probe, target)
+    ap = MEM_AP(dp, APv1Address(0))
+    ap._transfer_sizes = {8, 16, 32}
+    return ap
+
+class TestMemAPBuffers:
+    @pytest.mark.parametrize(("addr", "size"), [
+            (0x100, 0x400),
+            (0x3f0, 0x20),      # crosses auto-increment boundary
+            (0x101, 0x2ff),     # unaligned start and end
+            (0x103, 1),
+            (0x102, 3),
+        ])
+    def test_read_memory_into(self, iface, mem_ap, addr, size):
+        fill_pattern(iface)
+        buf = bytearray(size)
+        mem_ap.read_memory_into(addr, buf)
+        assert buf == iface.memory[addr:addr + size]
+        assert mem_ap.read_memory_block8(addr, size) == list(iface.memory[addr:addr + size])
+
+    @pytest.mark.parametrize(("addr", "size"), [
+            (0x200, 0x800),
+            (0x3f9, 0x11),
+            (0x101, 2),
+        ])
+    def test_write_memory_from(self, iface, mem_ap, addr, size):
+        data = bytes((i * 7) & 0xff for i in range(size))
+        mem_ap.write_memory_from(addr, memoryview(data))
+        mem_ap.dp.flush()
+        assert iface.memory[addr:addr + size] == data
+        assert iface.memory[addr - 1] == 0
+        assert iface.memory[addr + size] == 0
+
+    def test_block32(self, iface, mem_ap):
+        words = list(range(1000, 1300))
+        mem_ap.write_memory_block32(0x380, words)
+        assert mem_ap.read_memory_block32(0x380, len(words)) == words
+
+    def test_read_memory_into_queue_fault(self, iface, mem_ap):
+        fill_pattern(iface)
+        read_ap_multiple_into = mem_ap.dp.read_ap_multiple_into
+        queued = []
+        completed = []
+
+        def faulting_read_ap_multiple_into(addr, buf, now=True):
+            # Fail queueing the read of the second auto-increment page.
+            if queued:
+                raise exceptions.TransferError("injected fault")
+            queued.append(len(buf))
+            cb = read_ap_multiple_into(addr, buf, now=now)
+
+            def read_cb():
+                completed.append(len(buf))
+                return cb()
+            return read_cb
+
+        with mock.patch.object(mem_ap.dp, 'read_ap_multiple_into', faulting_read_ap_multiple_into):
+            with pytest.raises(exceptions.TransferError):
+                mem_ap.read_memory_into(0x300, bytearray(0x200))
+        # The read queued for the first page was completed.
+        assert completed == [0x100]
+        # The AP is usable after the fault.
+        assert mem_ap.read_memory_block8(0x100, 8) == list(iface.memory[0x100:0x108])
+
+class TestPipeline:
+    @pytest.fixture(params=[True, False], ids=['reader', 'noreader'])
+    def reader_thread(self, request):
+        return request.param
+
+    def make_dap(self, iface, reader_thread, max_packets_in_flight=0):
+        # Keep a reference to the session, as Session.get_current() only holds a weak reference.
+        self.session = Session(None, options={
+                'cmsis_dap.reader_thread': reader_thread,
+                'cmsis_dap.max_packets_in_flight': max_packets_in_flight,
+                })
+        return create_mock_dap_access(iface)
+
+    @pytest.mark.parametrize(("packet_count", "max_in_flight", "expected_depth"), [
+            (4, 0, 4),
+            (4, 2, 2),
+            (4, 1, 1),
+            (2, 8, 2),
+        ])
+    def test_depth(self, reader_thread, packet_count, max_in_flight, expected_depth):
+        iface = MockDAPInterface(packet_count=packet_count)
+        dap = self.make_dap(iface, reader_thread, max_in_flight)
+        try:
+            data = bytes(range(256)) * 16
+            dap.write_reg(TAR, 0)
+            dap.reg_write_repeat_from(DRW, data)
+            dap.flush()
+            assert iface.memory[:len(data)] == data
+            stats = dap.pipeline_statistics
+            assert stats.max_depth == expected_depth
+            assert stats.packets == iface.packets_written
+            assert stats.responses == stats.packets
+            assert stats.stalls > 0
+            assert stats.errors == 0
+            assert 1 <= stats.average_depth <= expected_depth
+            assert 0 <= stats.min_latency <= stats.average_latency <= stats.max_latency
+        finally:
+            close_mock_dap_access(dap)
+        assert iface.max_outstanding <= expected_depth
+
+    def test_session_options(self):
+        # The options given to the probe take precedence over those of the current session.
+        own_session = Session(None, options={'cmsis_dap.max_packets_in_flight': 2})
+        self.session = Session(None, options={'cmsis_dap.max_packets_in_flight': 1})
+        dap = create_mock_dap_access(MockDAPInterface(packet_count=4), own_session.options)
+        try:
+            assert dap._pipeline.depth == 2
+        finally:
+            close_mock_dap_access(dap)
+
+    def test_deferred_reads(self, iface, reader_thread):
+        fill_pattern(iface)
+        dap = self.make_dap(iface, reader_thread)
+        try:
+            buf = bytearray(0x1000)
+            callbacks = []
+            for offset in range(0, len(buf), 0x100):
+                dap.write_reg(TAR, 0x2000 + offset)
+                callbacks.append(dap.reg_read_repeat_into(DRW, memoryview(buf)[offset:offset + 0x100], now=False))
+            for cb in callbacks:
+                cb()
+            assert buf == iface.memory[0x2000:0x3000]
+            assert dap.pipeline_statistics.max_depth == iface.packet_count
+        finally:
+            close_mock_dap_access(dap)
+
+    def test_fault_aborts_in_flight(self, iface, reader_thread):
+        fill_pattern(iface)
+        dap = self.make_dap(iface, reader_thread)
+        try:
+            # The fault may be raised when the response is received either while filling the
+            # pipeline with the following packets or from the callback.
+            with pytest.raises(DAPAccess.TransferFaultError):
+                dap.write_reg(TAR, len(iface.memory) - 8)
+                cb = dap.reg_read_repeat(4, DRW, now=False)
+                dap.write_reg(TAR, 0)
+                dap.reg_write_repeat_from(DRW, bytes(0x400))
+                cb()
+            assert dap.pipeline_statistics.errors >= 1
+            assert dap._pipeline.in_flight == 0
+
+            # The pipeline must be usable again after the error.
+            dap.write_reg(TAR, 0x40)
+            assert dap.reg_read_repeat(2, DRW) == list(struct.unpack_from("<2I", iface.memory, 0x40))
+        finally:
+            close_mock_dap_access(dap)
+
+    def test_simulated_link(self, reader_thread):
+        iface = MockDAPInterface(packet_size=512, latency=0.001, bandwidth=1e6)
+        dap = self.make_dap(iface, reader_thread)
+        try:
+            data = bytes(range(256)) * 16
+            start = perf_counter()
+            dap.write_reg(TAR, 0)
+            dap.reg_write_repeat_from(DRW, data)
+            dap.flush()
+            elapsed = perf_counter() - start
+            assert iface.memory[:len(data)] == data
+            assert iface.bytes_transferred > len(data)
+            assert iface.link_time == pytest.approx(iface.bytes_transferred / 1e6)
+            # Packets are pipelined, so the latency is only seen once.
+            assert elapsed >= iface.link_time + iface.latency
+        finally:
+            close_mock_dap_access(dap)
+
+class TestBankedTransfers:
+    def test_banked_ops(self, iface, mem_ap):
+        fill_pattern(iface)
+        assert mem_ap.supports_banked_transfers
+        cb = mem_ap.transfer_banked(0x200, [
+                (0x204, 0x12345678),
+                (0x200, None),
+                (0x208, None),
+                (0x204, None),
+                (0x20c, 0xcafebabe),
+                ])
+        assert cb() == [0x01020304 * 0x80 & 0xffffffff, 0x01020304 * 0x82 & 0xffffffff, 0x12345678]
+        assert struct.unpack_from("<I", iface.memory, 0x20c)[0] == 0xcafebabe
+        # Normal memory accesses still work after TAR was left pointing at the bank.
+        assert mem_ap.read32(0x40) == 0x01020304 * 0x10 & 0xffffffff
+
+    def test_banked_fewer_packets(self, iface, mem_ap):
+        # Model of the Cortex-M DCRSR/DHCSR/DCRDR register read sequence.
+        count = 40
+        ops = []
+        for i in range(count):
+            ops += [(0x104, i), (0x100, None), (0x108, None)]
+        mem_ap.transfer_banked(0x100, ops)()
+        banked_packets = iface.packets_written
+
+        iface.packets_written = 0
+        cbs = []
+        for i in range(count):
+            mem_ap.write32(0x104, i)
+            cbs.append(mem_ap.read32(0x100, now=False))
+            cbs.append(mem_ap.read32(0x108, now=False))
+        for cb in cbs:
+            cb()
+        assert banked_packets * 2 <= iface.packets_written
+
+    def test_banked_fault(self, iface, mem_ap):
+        cb = mem_ap.transfer_banked(len(iface.memory), [(len(iface.memory), None)])
+        with pytest.raises(exceptions.TransferFaultError) as excinfo:
+            cb()
+        assert excinfo.value.fault_address == len(iface.memory)
+        # The AP is usable after the fault.
+        assert mem_ap.transfer_banked(0, [(0x4, 5), (0x4, None)])() == [5]
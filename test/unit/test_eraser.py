@@ -0,0 +1,69 @@
+# pyOCD debugger
+# Copyright (c) 2026 PyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest import mock
+
+from pyocd.core.memory_map import (FlashRegion, MemoryMap)
+from pyocd.flash.eraser import FlashEraser
+from .mockflash import MockFlash
+
+SECTOR_SIZE = 0x400
+
+def make_session(options=None, **kwargs):
+    region = FlashRegion(start=0x0, length=0x4000, sector_size=SECTOR_SIZE, page_size=0x100, name="flash")
+    flash = MockFlash(region, options=options, **kwargs)
+    region.flash = flash
+    session = mock.Mock()
+    session.options = flash.session.options
+    session.target.memory_map = MemoryMap(region)
+    # Sectors 1 and 5 have data.
+    flash.memory[0x400] = 0
+    flash.memory[0x17ff] = 0
+    return session, flash
+
+class TestBlankCheck:
+    def test_skip_blank(self):
+        session, flash = make_session(blank_check_supported=True)
+        FlashEraser(session, FlashEraser.Mode.SECTOR).erase(["0x0-0x4000"])
+        assert flash.ops['erase_sector'] == 2
+        assert flash.memory == bytes([0xff]) * 0x4000
+        assert flash.ops['blank_check'] == 16
+        assert flash.target.bytes_read == 0
+
+    def test_crc_disabled_by_default(self):
+        session, flash = make_session(crc_supported=True)
+        FlashEraser(session, FlashEraser.Mode.SECTOR).erase(["0x0-0x4000"])
+        assert flash.ops['compute_crcs'] == 0
+        assert flash.ops['erase_sector'] == 16
+
+    def test_crc_skip_blank(self):
+        session, flash = make_session({'flash.erase_crc_blank_check': True}, crc_supported=True)
+        FlashEraser(session, FlashEraser.Mode.SECTOR).erase(["0x0-0x4000"])
+        assert flash.ops['erase_sector'] == 2
+        assert flash.memory == bytes([0xff]) * 0x4000
+        assert flash.ops['compute_crcs'] == 1
+        assert flash.target.bytes_read == 0
+
+    def test_no_blank_check(self):
+        session, flash = make_session(crc_supported=False)
+        FlashEraser(session, FlashEraser.Mode.SECTOR).erase(["0x0-0x4000"])
+        assert flash.ops['erase_sector'] == 16
+
+    def test_disabled(self):
+        session, flash = make_session({'flash.erase_blank_check': False}, blank_check_supported=True)
+        FlashEraser(session, FlashEraser.Mode.SECTOR).erase([(0x0, 0x800)])
+        assert flash.ops['blank_check'] == 0
+        assert flash.ops['erase_sector'] == 2
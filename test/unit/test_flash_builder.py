@@ -0,0 +1,309 @@
+# pyOCD debugger
+# Copyright (c) 2026 PyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+import tracemalloc
+
+from pyocd.core.memory_map import FlashRegion
+from pyocd.flash.builder import FlashBuilder
+from .mockflash import MockFlash
+
+PAGE_SIZE = 0x100
+
+def make_data(size, seed=0):
+    return bytes((i * 13 + seed) & 0xff for i in range(size))
+
+def make_flash(options=None, crc_supported=True, double_buffer=False, sector_size=0x1000):
+    region = FlashRegion(start=0x0, length=0x8000, sector_size=sector_size, page_size=PAGE_SIZE, name="flash")
+    return MockFlash(region, options=options, crc_supported=crc_supported, double_buffer=double_buffer)
+
+def make_subregion_flash(options=None):
+    # Small 0x400 sectors in the first 0x1000 bytes, then 0x2000 sectors.
+    region = FlashRegion(start=0x0, length=0x8000, sector_size=0x2000, page_size=PAGE_SIZE, name="flash")
+    region.submap.add_regions(
+            FlashRegion(start=0x0, length=0x1000, sector_size=0x400, page_size=PAGE_SIZE),
+            FlashRegion(start=0x1000, length=0x7000, sector_size=0x1000, page_size=PAGE_SIZE),
+            )
+    return MockFlash(region, options=options)
+
+def program(flash, addr, data, chip_erase="sector"):
+    builder = FlashBuilder(flash)
+    builder.add_data(addr, data)
+    return builder.program(chip_erase=chip_erase)
+
+@pytest.fixture(params=[(True, False), (False, False), (True, True)], ids=['crc', 'read', 'crc-dbuf'])
+def flash_args(request):
+    crc_supported, double_buffer = request.param
+    return dict(crc_supported=crc_supported, double_buffer=double_buffer)
+
+DELTA_OPTIONS = {'flash.delta_program': True}
+
+class TestDeltaProgram:
+    def test_append_without_erase(self, flash_args):
+        flash = make_flash(DELTA_OPTIONS, **flash_args)
+        first = make_data(0x200)
+        program(flash, 0x1000, first)
+
+        flash.ops.clear()
+        second = first + make_data(0x200, 5)
+        info = program(flash, 0x1000, second)
+        assert flash.memory[0x1000:0x1400] == second
+        assert flash.ops['erase_sector'] == 0
+        assert flash.ops['program_page'] == 2
+        assert info.erase_sector_count == 0
+        assert info.program_page_count == 2
+        assert info.predicted_erase_time == 0
+        assert info.predicted_write_time > 0
+
+    def test_changed_page_requires_erase(self, flash_args):
+        flash = make_flash(DELTA_OPTIONS, **flash_args)
+        data = make_data(0x400)
+        program(flash, 0x1000, data)
+
+        flash.ops.clear()
+        changed = bytearray(data)
+        changed[0x10] ^= 1
+        info = program(flash, 0x1000, bytes(changed))
+        assert flash.memory[0x1000:0x1400] == changed
+        assert flash.ops['erase_sector'] == 1
+        assert info.erase_sector_count == 1
+        assert info.predicted_erase_time == pytest.approx(flash.region.erase_sector_weight)
+
+    def test_unwritten_contents_kept(self, flash_args):
+        flash = make_flash(DELTA_OPTIONS, **flash_args)
+        old = make_data(0x1000, 3)
+        program(flash, 0x2000, old)
+        flash.memory[0x2800:0x2900] = b'\xff' * 0x100
+
+        # Only the erased page is written; the rest of the sector is not touched.
+        new_page = make_data(0x100, 9)
+        program(flash, 0x2800, new_page)
+        assert flash.memory[0x2000:0x2800] == old[:0x800]
+        assert flash.memory[0x2800:0x2900] == new_page
+        assert flash.memory[0x2900:0x3000] == old[0x900:]
+
+    def test_disabled_by_default(self):
+        flash = make_flash()
+        first = make_data(0x200)
+        program(flash, 0x1000, first)
+        flash.ops.clear()
+        program(flash, 0x1000, first + make_data(0x200, 5))
+        # The whole sector is erased and reprogrammed, including its unwritten pages.
+        assert flash.ops['erase_sector'] == 1
+        assert flash.ops['program_page'] == 0x1000 // PAGE_SIZE
+
+    def test_subregion_sectors(self):
+        flash = make_subregion_flash()
+        data = make_data(0x2000)
+        program(flash, 0, data)
+        assert flash.memory[:0x2000] == data
+
+        # A change in the small sector area only erases one 0x400 sector.
+        changed = bytearray(data)
+        changed[0x500] ^= 0xff
+        flash.ops.clear()
+        info = program(flash, 0, bytes(changed))
+        assert flash.memory[:0x2000] == changed
+        assert flash.ops['erase_sector'] == 1
+        assert info.erase_byte_count == 0x400
+        assert info.program_page_count == 4
+
+        # A change in the large sector area erases a 0x1000 sector.
+        changed[0x1500] ^= 0xff
+        flash.ops.clear()
+        info = program(flash, 0, bytes(changed))
+        assert flash.memory[:0x2000] == changed
+        assert info.erase_byte_count == 0x1000
+
+    def test_timing_breakdown(self):
+        flash = make_flash()
+        info = program(flash, 0, make_data(0x2000), chip_erase="chip")
+        assert info.predicted_erase_time == pytest.approx(flash.region.erase_all_weight)
+        assert info.predicted_write_time > 0
+        assert info.erase_time >= 0
+        assert info.write_time > 0
+
+class TestImageBuffer:
+    def test_pages_share_buffer(self):
+        flash = make_flash()
+        builder = FlashBuilder(flash)
+        builder.add_data(0x1010, make_data(0x300))
+        builder.add_data(0x1800, list(make_data(0x10, 1)))
+        builder._build_sectors_and_pages(keep_unwritten=False)
+        # Both operations are in one sector, so they share a buffer.
+        assert len(builder._images) == 1
+        assert all(page.data.obj is builder._images[0] for page in builder.page_list)
+        assert [page.addr for page in builder.page_list] == [0x1000, 0x1100, 0x1200, 0x1300, 0x1800]
+        # Gaps are filled with the erased value.
+        assert builder.page_list[0].data[:0x10] == b'\xff' * 0x10
+        assert builder.page_list[0].data[0x10:] == make_data(0xf0)
+        assert builder.page_list[4].data == make_data(0x10, 1) + b'\xff' * 0xf0
+        assert builder.program_byte_count == 5 * PAGE_SIZE
+
+    def test_sparse_image_memory(self):
+        region = FlashRegion(start=0x0, length=0x1000000, sector_size=0x1000, page_size=PAGE_SIZE, name="flash")
+        flash = MockFlash(region)
+        builder = FlashBuilder(flash)
+        builder.add_data(0x0, make_data(0x10))
+        builder.add_data(0x1000, make_data(0x10, 1))
+        builder.add_data(0xfff000, make_data(0x10, 2))
+        tracemalloc.start()
+        try:
+            builder._build_sectors_and_pages(keep_unwritten=False)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        # Only the sectors with data are allocated, with adjacent sectors sharing a buffer.
+        assert [len(image) for image in builder._images] == [0x2000, 0x1000]
+        assert peak < 0x10000
+        assert [page.addr for page in builder.page_list] == [0x0, 0x1000, 0xfff000]
+        assert builder.page_list[2].data == make_data(0x10, 2) + b'\xff' * 0xf0
+
+    def test_keep_unwritten(self):
+        flash = make_flash()
+        old = make_data(0x1000, 7)
+        flash.memory[0x1000:0x2000] = old
+        builder = FlashBuilder(flash)
+        builder.add_data(0x1110, b'\x00' * 0x20)
+        builder._build_sectors_and_pages(keep_unwritten=True)
+        assert len(builder.page_list) == 0x1000 // PAGE_SIZE
+        expected = bytearray(old)
+        expected[0x110:0x130] = b'\x00' * 0x20
+        assert b''.join(page.data for page in sorted(builder.page_list, key=lambda p: p.addr)) == expected
+
+    def test_crc_thread_pool(self, monkeypatch):
+        from binascii import crc32
+        from pyocd.flash import builder as builder_module
+        flash = make_flash()
+        builder = FlashBuilder(flash)
+        builder.add_data(0, make_data(0x4000))
+        builder._build_sectors_and_pages(keep_unwritten=False)
+        expected = [crc32(page.data) for page in builder.page_list]
+        monkeypatch.setattr(builder_module, 'CRC_THREAD_MIN_PAGE_SIZE', PAGE_SIZE)
+        monkeypatch.setattr(builder_module, 'CRC_THREAD_MIN_TOTAL_SIZE', PAGE_SIZE)
+        assert builder._compute_page_crcs(builder.page_list) == expected
+
+class TestPagePipeline:
+    @pytest.mark.parametrize("buffer_count", [2, 3, 4])
+    @pytest.mark.parametrize("chip_erase", ["sector", "chip"])
+    def test_program(self, buffer_count, chip_erase):
+        region = FlashRegion(start=0x0, length=0x8000, sector_size=0x1000, page_size=PAGE_SIZE, name="flash")
+        flash = MockFlash(region, double_buffer=True, page_buffer_count=buffer_count)
+        data = make_data(0x2000)
+        info = program(flash, 0, data, chip_erase=chip_erase)
+        assert flash.memory[:0x2000] == data
+        assert flash.ops['program_page'] == 0x2000 // PAGE_SIZE
+        assert info.page_buffer_count == buffer_count
+        assert 0 < info.pipeline_occupancy <= 1
+        # Only the first page is loaded while the target is idle.
+        busy = False
+        loads = []
+        for op, addr in flash.trace:
+            if op == 'load':
+                loads.append(addr)
+                assert busy or addr == 0
+            busy = (op == 'start') or (busy and op != 'done')
+        assert loads == list(range(0, 0x2000, PAGE_SIZE))
+
+    def test_occupancy(self):
+        region = FlashRegion(start=0x0, length=0x8000, sector_size=0x1000, page_size=PAGE_SIZE, name="flash")
+        flash = MockFlash(region, double_buffer=True, page_buffer_count=3)
+        info = program(flash, 0, make_data(0x1000))
+        # The first and last page programs start with one loaded buffer, and all others with two.
+        pages = 0x1000 // PAGE_SIZE
+        assert info.pipeline_occupancy == pytest.approx((2 / 3 + (pages - 2) * 2 / 3) / pages)
+
+    def test_verify_after_program(self):
+        flash = make_flash(options={'flash.verify': 'read'}, double_buffer=True)
+        data = make_data(0x1000)
+        info = program(flash, 0x1000, data)
+        assert info.verified_page_count == 0x1000 // PAGE_SIZE
+        # Each page is read back after it is programmed, and before the following page program starts.
+        for addr in range(0x1000, 0x1f00, PAGE_SIZE):
+            read = flash.trace.index(('read', addr))
+            assert flash.trace.index(('done', addr)) < read < flash.trace.index(('start', addr + PAGE_SIZE))
+        assert flash.trace[-1] == ('read', 0x1f00)
+
+    @pytest.mark.parametrize("double_buffer", [False, True])
+    def test_verify_failure(self, double_buffer):
+        from pyocd.core.exceptions import FlashProgramFailure
+        flash = make_flash(options={'flash.verify': 'read'}, double_buffer=double_buffer)
+        program_page = flash.program_page
+
+        def bad_program_page(address, data):
+            program_page(address, data)
+            if address == 0x1200:
+                flash.memory[address] ^= 0x01
+        flash.program_page = bad_program_page
+
+        with pytest.raises(FlashProgramFailure) as err:
+            program(flash, 0x1000, make_data(0x400))
+        assert err.value.address == 0x1200
+
+    def test_invalid_verify(self):
+        flash = make_flash(options={'flash.verify': 'always'})
+        with pytest.raises(ValueError):
+            program(flash, 0, make_data(0x100))
+
+class TestCrcVerify:
+    def test_split_ranges(self):
+        from pyocd.flash.builder import _split_crc_ranges
+        assert list(_split_crc_ranges(0x100, 0x700)) == [(0x100, 0x100), (0x200, 0x200), (0x400, 0x200), (0x600, 0x100)]
+        assert list(_split_crc_ranges(0, 0x3000)) == [(0, 0x2000), (0x2000, 0x1000)]
+        assert list(_split_crc_ranges(0x1000, 0x2000)) == [(0x1000, 0x1000)]
+
+    @pytest.mark.parametrize("double_buffer", [False, True])
+    def test_verify(self, double_buffer):
+        flash = make_flash(options={'flash.verify': 'crc'}, double_buffer=double_buffer)
+        data = make_data(0x3000)
+        info = program(flash, 0x1000, data)
+        assert flash.memory[0x1000:0x4000] == data
+        assert info.verified_page_count == 0x3000 // PAGE_SIZE
+        # No pages were read back, and a single analyzer call verified the 0x1000-0x4000 range.
+        assert ('read', 0x1000) not in flash.trace
+        assert flash.ops['compute_crcs'] == 2
+
+    @pytest.mark.parametrize("double_buffer", [False, True])
+    def test_mismatch(self, double_buffer):
+        from pyocd.core.exceptions import FlashProgramFailure
+        flash = make_flash(options={'flash.verify': 'crc'}, double_buffer=double_buffer)
+        program_page = flash.program_page
+
+        def bad_program_page(address, data):
+            program_page(address, data)
+            if address == 0x2300:
+                flash.memory[address] ^= 0x01
+        flash.program_page = bad_program_page
+
+        with pytest.raises(FlashProgramFailure) as err:
+            program(flash, 0x1000, make_data(0x3000))
+        assert err.value.address == 0x2300
+        # Only pages of the mismatched range are read back.
+        assert all(0x2000 <= addr < 0x4000 for op, addr in flash.trace if op == 'read')
+
+    def test_not_supported(self):
+        flash = make_flash(options={'flash.verify': 'crc'}, crc_supported=False)
+        data = make_data(0x1000)
+        info = program(flash, 0x1000, data)
+        assert flash.ops['compute_crcs'] == 0
+        assert info.verified_page_count == 0x1000 // PAGE_SIZE
+
+def test_compress_uses_single_buffer():
+    flash = make_flash(options={'flash.compress': True}, double_buffer=True)
+    data = make_data(0x400)
+    program(flash, 0x1000, data)
+    assert flash.memory[0x1000:0x1400] == data
+    assert not any(op == 'start' for op, addr in flash.trace)
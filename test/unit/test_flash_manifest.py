@@ -0,0 +1,195 @@
+# pyOCD debugger
+# Copyright (c) 2026 PyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import errno
+import multiprocessing
+import os
+import pytest
+
+from pyocd.core.memory_map import FlashRegion
+from pyocd.flash.builder import FlashBuilder
+from pyocd.flash import manifest as manifest_module
+from pyocd.flash.manifest import (FlashManifest, page_crc)
+from .mockflash import MockFlash
+
+SECTOR_SIZE = 0x400
+PAGE_SIZE = 0x100
+FLASH_SIZE = 0x4000
+
+def make_image(seed=0):
+    return bytes((i * 7 + seed) & 0xff for i in range(0x2000))
+
+@pytest.fixture
+def manifest_path(tmp_path):
+    return str(tmp_path / "manifest.json")
+
+def make_flash(manifest_path, crc_supported=True, samples=4):
+    region = FlashRegion(start=0x8000, length=FLASH_SIZE, sector_size=SECTOR_SIZE, page_size=PAGE_SIZE,
+            name="flash")
+    return MockFlash(region, options={
+            'flash.manifest_path': manifest_path,
+            'flash.manifest_samples': samples,
+            }, crc_supported=crc_supported)
+
+def update_entries(path, index, count):
+    manifest = FlashManifest(path)
+    for i in range(count):
+        manifest.update(FlashManifest.make_key("uid%d" % index, "k64f", "flash", 0), {i * 4: i})
+
+def program(flash, data, addr=0x8000):
+    builder = FlashBuilder(flash)
+    builder.add_data(addr, data)
+    return builder.program(chip_erase="sector")
+
+class TestFlashManifest:
+    def test_update_and_erased_ranges(self, manifest_path):
+        manifest = FlashManifest(manifest_path)
+        key = FlashManifest.make_key("uid", "k64f", "flash", 0)
+        assert manifest.get(key) is None
+        manifest.update(key, {0: 1, 0x100: 2, 0x400: 3})
+        manifest.update(key, {0x100: 4}, erased_ranges=[(0, 0x400)])
+        assert manifest.get(key) == {0x100: 4, 0x400: 3}
+
+        other = FlashManifest.make_key("uid", "k64f", "flash2", 0x1000)
+        manifest.update(other, {0x1000: 5})
+        manifest.remove(FlashManifest.make_target_prefix("uid", "k64f"))
+        assert manifest.get(key) is None
+        assert manifest.get(other) is None
+
+    def test_corrupt_file_ignored(self, manifest_path):
+        with open(manifest_path, 'w') as f:
+            f.write("{not json")
+        manifest = FlashManifest(manifest_path)
+        key = FlashManifest.make_key("uid", "t", "r", 0)
+        assert manifest.get(key) is None
+        manifest.update(key, {0: 1})
+        assert manifest.get(key) == {0: 1}
+
+    @pytest.mark.skipif(not hasattr(os, 'fork'), reason="requires fork")
+    def test_concurrent_processes(self, manifest_path):
+        # Each process updates its own entry. None of the updates may be lost.
+        count = 20
+        context = multiprocessing.get_context('fork')
+        processes = [context.Process(target=update_entries, args=(manifest_path, i, count)) for i in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(30)
+            assert process.exitcode == 0
+        manifest = FlashManifest(manifest_path)
+        for i in range(len(processes)):
+            key = FlashManifest.make_key("uid%d" % i, "k64f", "flash", 0)
+            assert manifest.get(key) == {j * 4: j for j in range(count)}
+
+    def test_lock_errors(self, manifest_path, monkeypatch):
+        calls = []
+
+        def try_lock_file(f):
+            calls.append(f)
+            raise OSError(error_number, "lock failed")
+
+        monkeypatch.setattr(manifest_module, '_try_lock_file', try_lock_file)
+        with open(manifest_path + ".lock", 'a+') as f:
+            # Errors other than contention are raised without retrying.
+            error_number = errno.EBADF
+            with pytest.raises(OSError) as excinfo:
+                manifest_module._lock_file(f, f.name)
+            assert excinfo.value.errno == errno.EBADF
+            assert len(calls) == 1
+
+            # Contention is retried until the timeout.
+            error_number = manifest_module._LOCK_CONTENTION_ERRNOS[0]
+            with pytest.raises(TimeoutError):
+                manifest_module._lock_file(f, f.name, timeout=0.2)
+            assert len(calls) > 2
+
+        # The manifest is still usable without the lock.
+        monkeypatch.setattr(manifest_module, 'LOCK_TIMEOUT', 0.1)
+        key = FlashManifest.make_key("uid", "t", "r", 0)
+        FlashManifest(manifest_path).update(key, {0: 1})
+        assert FlashManifest(manifest_path).get(key) == {0: 1}
+
+    def test_page_crc_padding(self):
+        assert page_crc([1, 2], 4) == page_crc([1, 2, 0xff, 0xff], 4)
+
+class TestBuilderManifest:
+    @pytest.mark.parametrize("crc_supported", [True, False])
+    def test_unchanged_reflash(self, manifest_path, crc_supported):
+        flash = make_flash(manifest_path, crc_supported)
+        image = make_image()
+        program(flash, image)
+        assert flash.memory[:len(image)] == image
+
+        flash.ops.clear()
+        flash.target.bytes_read = 0
+        info = program(flash, image)
+        assert info.analyze_type == FlashBuilder.FLASH_ANALYSIS_MANIFEST
+        assert info.program_byte_count == 0
+        assert flash.ops['erase_sector'] == 0
+        if crc_supported:
+            assert flash.ops['compute_crcs'] == 1
+            assert flash.target.bytes_read == 0
+        else:
+            # Only the sampled pages are read.
+            assert flash.target.bytes_read == 4 * PAGE_SIZE
+
+    def test_small_delta(self, manifest_path):
+        flash = make_flash(manifest_path)
+        image = make_image()
+        program(flash, image)
+
+        changed = bytearray(image)
+        changed[0x1234] ^= 0xff
+        flash.ops.clear()
+        info = program(flash, bytes(changed))
+        assert flash.memory[:len(changed)] == changed
+        assert flash.ops['erase_sector'] == 1
+        assert info.program_page_count == SECTOR_SIZE // PAGE_SIZE
+
+        # The manifest was updated with the new contents.
+        flash.ops.clear()
+        info = program(flash, bytes(changed))
+        assert info.program_byte_count == 0
+
+    def test_stale_manifest_discarded(self, manifest_path):
+        flash = make_flash(manifest_path, samples=0)
+        image = make_image()
+        program(flash, image)
+
+        # Modify flash behind the manifest's back.
+        flash.memory[0x1800] ^= 0xff
+        info = program(flash, image)
+        assert info.analyze_type == FlashBuilder.FLASH_ANALYSIS_CRC32
+        assert flash.memory[:len(image)] == image
+        assert info.program_page_count == SECTOR_SIZE // PAGE_SIZE
+
+    def test_keyed_by_probe(self, manifest_path):
+        flash = make_flash(manifest_path)
+        image = make_image()
+        program(flash, image)
+
+        other = make_flash(manifest_path)
+        other.session.probe.unique_id = "otherprobe"
+        info = program(other, image)
+        assert info.analyze_type == FlashBuilder.FLASH_ANALYSIS_CRC32
+        assert info.program_byte_count == len(image)
+
+    def test_disabled(self):
+        flash = make_flash(None)
+        image = make_image()
+        program(flash, image)
+        info = program(flash, image)
+        assert info.analyze_type == FlashBuilder.FLASH_ANALYSIS_CRC32
@@ -0,0 +1,113 @@
+# pyOCD debugger
+# Copyright (c) 2026 PyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+import threading
+from unittest import mock
+
+from pyocd.core import exceptions
+from pyocd.core.session import Session
+from pyocd.core.target import Target
+from pyocd.gdbserver.halt_watch import HaltWatcher
+
+RUNNING = Target.State.RUNNING
+HALTED = Target.State.HALTED
+
+@pytest.fixture(scope='function')
+def session():
+    return Session(None, options={
+            'gdbserver.halt_poll_min_interval': 0.0001,
+            'gdbserver.halt_poll_max_interval': 0.001,
+            'debug.status_fault_retry_timeout': 0.05,
+            })
+
+class WatcherFixture:
+    def __init__(self, session, states):
+        self.target = mock.Mock()
+        self.target.get_state.side_effect = states
+        self.lock = threading.Lock()
+        self.interrupt_event = threading.Event()
+        self.shutdown_event = threading.Event()
+        self.watcher = HaltWatcher(session, self.target, self.lock, self.interrupt_event, self.shutdown_event)
+
+    def run(self):
+        self.watcher.arm()
+        try:
+            return self.watcher.wait()
+        finally:
+            self.watcher.stop()
+
+def states_then(count, state):
+    return [RUNNING] * count + [state]
+
+class TestHaltWatcher:
+    def test_halt(self, session):
+        f = WatcherFixture(session, states_then(5, HALTED))
+        assert f.run() == (HaltWatcher.Result.HALTED, None)
+        assert f.watcher.poll_count == 6
+
+    def test_rearm(self, session):
+        f = WatcherFixture(session, states_then(2, HALTED) + states_then(3, HALTED))
+        f.watcher.arm()
+        assert f.watcher.wait()[0] == HaltWatcher.Result.HALTED
+        f.watcher.arm()
+        assert f.watcher.wait()[0] == HaltWatcher.Result.HALTED
+        f.watcher.stop()
+        assert f.watcher.poll_count == 7
+
+    def test_services(self, session):
+        f = WatcherFixture(session, states_then(3, HALTED))
+        service = mock.Mock(return_value=False)
+        f.watcher.add_service(service)
+        f.run()
+        # Services are not run once the core has halted.
+        assert service.call_count == 3
+
+    def test_service_interval(self, session):
+        f = WatcherFixture(session, states_then(3, HALTED))
+        intervals = []
+        wait = f.interrupt_event.wait
+        f.interrupt_event.wait = lambda timeout: intervals.append(timeout) or wait(timeout)
+        f.watcher.add_service(mock.Mock(return_value=False), lambda: 0.00005)
+        f.run()
+        assert intervals == [0.00005] * 4
+
+    def test_interrupt(self, session):
+        f = WatcherFixture(session, lambda: RUNNING)
+        f.interrupt_event.set()
+        assert f.run() == (HaltWatcher.Result.INTERRUPTED, None)
+        f.target.halt.assert_not_called()
+
+    def test_shutdown(self, session):
+        f = WatcherFixture(session, lambda: RUNNING)
+        f.shutdown_event.set()
+        assert f.run()[0] == HaltWatcher.Result.SHUTDOWN
+
+    def test_fault_retry(self, session):
+        f = WatcherFixture(session, [exceptions.TransferError(), exceptions.TransferError(), RUNNING, HALTED])
+        assert f.run() == (HaltWatcher.Result.HALTED, None)
+        assert not f.watcher.is_retrying_faults
+
+    def test_fault_timeout(self, session):
+        f = WatcherFixture(session, exceptions.TransferFaultError())
+        result, error = f.run()
+        assert result == HaltWatcher.Result.FAULT_TIMEOUT
+        assert isinstance(error, exceptions.TransferFaultError)
+
+    def test_error(self, session):
+        err = exceptions.CoreRegisterAccessError()
+        f = WatcherFixture(session, err)
+        assert f.run() == (HaltWatcher.Result.ERROR, err)
@@ -0,0 +1,101 @@
+# pyOCD debugger
+# Copyright (c) 2026 PyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+from unittest import mock
+
+from pyocd.core.memory_map import (FlashRegion, MemoryMap)
+from pyocd.flash.file_programmer import ranges
+from pyocd.flash.loader import MemoryLoader
+from .mockflash import MockFlash
+
+@pytest.fixture
+def loader():
+    regions = [
+        FlashRegion(start=0x0, length=0x1000, sector_size=0x400, page_size=0x100, name="flash0"),
+        FlashRegion(start=0x1000, length=0x1000, sector_size=0x400, page_size=0x100, name="flash1"),
+        ]
+    for region in regions:
+        region.flash = MockFlash(region)
+    session = mock.Mock()
+    session.options = {}
+    session.board.target.memory_map = MemoryMap(*regions)
+    return MemoryLoader(session, progress=lambda amount: None)
+
+def operations(loader):
+    return {region.name: builder.flash_operation_list for region, builder in loader._builders.items()}
+
+class TestMemoryLoader:
+    def test_split_without_copy(self, loader):
+        data = bytes(range(256)) * 16
+        loader.add_data(0xc00, data)
+        ops = operations(loader)
+        assert [(op.addr, len(op.data)) for op in ops['flash0']] == [(0xc00, 0x400)]
+        assert [(op.addr, len(op.data)) for op in ops['flash1']] == [(0x1000, 0xc00)]
+        # Both operations are views of the caller's buffer.
+        assert ops['flash0'][0].data.obj is data
+        assert ops['flash1'][0].data.obj is data
+        assert bytes(ops['flash1'][0].data) == data[0x400:]
+
+    def test_mutable_data_copied(self, loader):
+        data = bytearray(b'\x11' * 0x200)
+        loader.add_data(0xf00, data)
+        loader.add_data(0x200, memoryview(data))
+        data[:] = b'\x22' * 0x200
+        ops = operations(loader)
+        assert [bytes(op.data) for op in ops['flash0']] == [b'\x11' * 0x200, b'\x11' * 0x100]
+        assert bytes(ops['flash1'][0].data) == b'\x11' * 0x100
+
+    def test_add_chunks_reused_buffer(self, loader):
+        def chunks():
+            buf = bytearray(0x100)
+            for addr in range(0, 0x2000, 0x100):
+                buf[:] = bytes([addr >> 8]) * 0x100
+                yield addr, buf
+        loader.add_chunks(chunks())
+        ops = operations(loader)
+        assert [bytes(op.data) for op in ops['flash0'] + ops['flash1']] == \
+                [bytes([addr >> 8]) * 0x100 for addr in range(0, 0x2000, 0x100)]
+
+    def test_add_chunks(self, loader):
+        def chunks():
+            for addr in range(0x1800, 0x800, -0x200):
+                yield addr, memoryview(bytes([addr >> 8]) * 0x200)
+        loader.add_chunks(chunks())
+        ops = operations(loader)
+        # Operations are sorted by address regardless of the order they were added.
+        assert [op.addr for op in ops['flash0']] == [0xa00, 0xc00, 0xe00]
+        assert [op.addr for op in ops['flash1']] == [0x1000, 0x1200, 0x1400, 0x1600, 0x1800]
+        assert loader._total_data_size == 8 * 0x200
+
+    def test_overlap(self, loader):
+        loader.add_data(0x200, b'\x00' * 0x100)
+        loader.add_data(0x400, b'\x00' * 0x100)
+        with pytest.raises(ValueError):
+            loader.add_data(0x2f0, b'\x00' * 0x20)
+        with pytest.raises(ValueError):
+            loader.add_data(0x4f0, b'\x00' * 0x20)
+
+    def test_list_data(self, loader):
+        loader.add_data(0xffe, [1, 2, 3, 4])
+        ops = operations(loader)
+        assert bytes(ops['flash0'][0].data) == b'\x01\x02'
+        assert bytes(ops['flash1'][0].data) == b'\x03\x04'
+
+def test_ranges():
+    assert list(ranges([0, 1, 2, 3, 32, 33, 34, 35])) == [(0, 3), (32, 35)]
+    assert list(ranges(iter([5]))) == [(5, 5)]
+    assert list(ranges([])) == []
@@ -20,6 +20,9 @@ import logging
 from pyocd.cache.memory import MemoryCache
 from pyocd.debug.context import DebugContext
 from pyocd.core import memory_map
+from pyocd.core.exceptions import TransferFaultError
+from pyocd.core.target import Target
+from pyocd.utility.notification import Notifier
 from pyocd.utility import conversion
 from pyocd.utility import mask
 
@@ -181,6 +184,162 @@ class TestMemoryCache:
         assert block == data[0x7e:0x82]
 
 
+class FaultingContext(DebugContext):
+    """@brief Context that faults on reads touching a given address range."""
+    def __init__(self, parent, fault_begin, fault_end):
+        super().__init__(parent)
+        self.fault_begin = fault_begin
+        self.fault_end = fault_end
+        self.reads = []
+
+    def read_memory_into(self, addr, buf):
+        self.reads.append((addr, len(buf)))
+        if addr < self.fault_end and addr + len(buf) > self.fault_begin:
+            raise TransferFaultError()
+        return super().read_memory_into(addr, buf)
+
+class TestMemoryCacheLines:
+    def test_line_fill(self, mockcore):
+        ctx = FaultingContext(mockcore, 0, 0)
+        memcache = MemoryCache(ctx, mockcore, line_size=64)
+        mockcore.write_memory_block8(0x20000040, list(range(64)))
+        assert memcache.read_memory_block8(0x20000045, 2) == [5, 6]
+        assert ctx.reads == [(0x20000040, 64)]
+        # Further reads within the line are hits.
+        assert memcache.read_memory_block8(0x20000041, 8) == list(range(1, 9))
+        assert memcache.read_memory_block8(0x2000007f, 1) == [63]
+        assert len(ctx.reads) == 1
+        assert memcache._metrics.fills == 1
+
+    def test_line_fill_clipped_to_region(self, mockcore):
+        ctx = FaultingContext(mockcore, 0, 0)
+        memcache = MemoryCache(ctx, mockcore, line_size=4096)
+        memcache.read_memory_block8(0x20000100, 4)
+        assert ctx.reads == [(0x20000000, 1024)]
+
+    def test_line_fill_skips_cached(self, mockcore):
+        ctx = FaultingContext(mockcore, 0, 0)
+        memcache = MemoryCache(ctx, mockcore, line_size=16)
+        memcache.write_memory_block8(0x20000004, [1, 2, 3, 4])
+        assert memcache.read_memory_block8(0x20000002, 8) == [0, 0, 1, 2, 3, 4, 0, 0]
+        assert ctx.reads == [(0x20000000, 4), (0x20000008, 8)]
+
+    def test_line_fill_fault_retry(self, mockcore):
+        ctx = FaultingContext(mockcore, 0x20000020, 0x20000040)
+        memcache = MemoryCache(ctx, mockcore, line_size=64)
+        assert memcache.read_memory_block8(0x20000000, 4) == [0] * 4
+        assert ctx.reads == [(0x20000000, 64), (0x20000000, 4)]
+        with pytest.raises(TransferFaultError):
+            memcache.read_memory_block8(0x20000020, 4)
+
+    def test_merge_intervals(self, mockcore):
+        memcache = MemoryCache(DebugContext(mockcore), mockcore)
+        for offset in range(0, 64, 4):
+            memcache.read_memory_block8(0x20000000 + offset, 4)
+        memcache.write_memory_block8(0x20000040, [1, 2])
+        assert len(memcache._cache) == 1
+        iv, = memcache._cache
+        assert (iv.begin, iv.end) == (0x20000000, 0x20000042)
+
+    def test_no_merge_across_regions(self, mockcore):
+        mockcore.memory_map.add_region(memory_map.RamRegion(start=0x20000800, length=1024, name='ram3'))
+        mockcore.memory_map.add_region(memory_map.RamRegion(start=0x20000c00, length=1024, name='ram4'))
+        memcache = MemoryCache(DebugContext(mockcore), mockcore)
+        memcache.write_memory_block8(0x20000bfc, [1, 2, 3, 4])
+        memcache.write_memory_block8(0x20000c00, [5, 6, 7, 8])
+        assert len(memcache._cache) == 2
+
+    def test_lru_eviction(self, mockcore):
+        memcache = MemoryCache(DebugContext(mockcore), mockcore, max_size=32)
+        memcache.read_memory_block8(0x20000000, 16)
+        memcache.read_memory_block8(0x20000100, 16)
+        # Touch the first interval so the second is least recently used.
+        memcache.read_memory_block8(0x20000000, 4)
+        memcache.read_memory_block8(0x20000200, 16)
+        assert memcache._cache.overlap(0x20000000, 0x20000010)
+        assert not memcache._cache.overlap(0x20000100, 0x20000110)
+        assert memcache._cache.overlap(0x20000200, 0x20000210)
+        assert memcache._metrics.evictions == 1
+        # Flash region has its own budget.
+        memcache.read_memory_block8(0, 32)
+        assert len(memcache._cache) == 3
+
+    def test_eviction_trims_merged_interval(self, mockcore):
+        memcache = MemoryCache(DebugContext(mockcore), mockcore, max_size=32)
+        mockcore.write_memory_block8(0x20000000, list(range(64)))
+        for offset in range(0, 64, 8):
+            assert memcache.read_memory_block8(0x20000000 + offset, 8) == list(range(offset, offset + 8))
+        iv, = memcache._cache
+        assert (iv.begin, iv.end) == (0x20000020, 0x20000040)
+        assert iv.data == bytearray(range(32, 64))
+
+    def test_oversize_access_bypasses_cache(self, mockcore):
+        memcache = MemoryCache(DebugContext(mockcore), mockcore, max_size=16)
+        memcache.read_memory_block8(0x20000000, 8)
+        memcache.write_memory_block8(0x20000000, list(range(32)))
+        assert memcache.read_memory_block8(0x20000000, 32) == list(range(32))
+        assert memcache.read_memory_block8(0x20000004, 4) == [4, 5, 6, 7]
+        assert len(memcache._cache) == 1
+
+    def test_line_span_larger_than_max_size(self, mockcore):
+        ctx = FaultingContext(mockcore, 0, 0)
+        memcache = MemoryCache(ctx, mockcore, line_size=64, max_size=256)
+        mockcore.write_memory_block8(0x20000000, [i & 0xff for i in range(512)])
+        # Extended to lines, the read would be 320 bytes, so only the requested bytes are read.
+        assert memcache.read_memory_block8(0x20000010, 250) == [i & 0xff for i in range(0x10, 0x10a)]
+        assert ctx.reads == [(0x20000010, 250)]
+
+    def test_eviction_keeps_requested_range(self, mockcore):
+        memcache = MemoryCache(DebugContext(mockcore), mockcore, line_size=64, max_size=256)
+        mockcore.write_memory_block8(0x20000000, [i & 0xff for i in range(512)])
+        assert memcache.read_memory_block8(0x20000000, 64) == list(range(64))
+        # The merged interval is trimmed, but not the part of it that was requested.
+        assert memcache.read_memory_block8(0x20000030, 250) == [i & 0xff for i in range(0x30, 0x12a)]
+        iv, = memcache._cache
+        assert iv.begin <= 0x20000030 and iv.end >= 0x2000012a
+        assert iv.end - iv.begin <= 256
+
+class TestMemoryCacheWriteBack:
+    @pytest.fixture(scope='function')
+    def wbcache(self, mockcore):
+        mockcore.session = Notifier()
+        return MemoryCache(DebugContext(mockcore), mockcore, line_size=16, write_back=True)
+
+    def test_deferred_until_flush(self, mockcore, wbcache):
+        wbcache.write_memory_block8(0x20000010, [1, 2, 3, 4])
+        wbcache.write_memory_block8(0x20000014, [5, 6])
+        assert wbcache.read_memory_block8(0x20000010, 8) == [1, 2, 3, 4, 5, 6, 0, 0]
+        assert mockcore.read_memory_block8(0x20000010, 6) == [0] * 6
+        wbcache.flush()
+        assert mockcore.read_memory_block8(0x20000010, 8) == [1, 2, 3, 4, 5, 6, 0, 0]
+
+    def test_fill_preserves_dirty(self, mockcore, wbcache):
+        wbcache.write_memory_block8(0x20000004, [9])
+        mockcore.write_memory_block8(0x20000000, [7] * 16)
+        assert wbcache.read_memory_block8(0x20000000, 8) == [7, 7, 7, 7, 9, 7, 7, 7]
+
+    def test_flush_on_pre_run(self, mockcore, wbcache):
+        wbcache.write_memory_block8(0x20000020, [1, 2])
+        mockcore.session.notify(Target.Event.PRE_RUN, mockcore, Target.RunType.RESUME)
+        assert mockcore.read_memory_block8(0x20000020, 2) == [1, 2]
+
+    def test_flush_on_invalidate(self, mockcore, wbcache):
+        wbcache.write_memory_block8(0x20000020, [1, 2])
+        mockcore.run_token += 1
+        assert wbcache.read_memory_block8(0x20000020, 2) == [1, 2]
+        assert mockcore.read_memory_block8(0x20000020, 2) == [1, 2]
+
+    def test_flush_on_eviction(self, mockcore):
+        mockcore.session = Notifier()
+        wbcache = MemoryCache(DebugContext(mockcore), mockcore, max_size=16, write_back=True)
+        wbcache.write_memory_block8(0x20000000, [1, 2])
+        wbcache.write_memory_block8(0x20000100, [3] * 16)
+        assert mockcore.read_memory_block8(0x20000000, 2) == [1, 2]
+        assert mockcore.read_memory_block8(0x20000100, 2) == [0, 0]
+
+    def test_noncacheable_write_through(self, mockcore, wbcache):
+        wbcache.write_memory_block8(0x20000410, [1, 2])
+        assert mockcore.read_memory_block8(0x20000410, 2) == [1, 2]
 
 # TODO test read32/16/8 with and without callbacks
 
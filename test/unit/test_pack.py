@@ -23,6 +23,7 @@ from pathlib import Path
 from unittest.mock import MagicMock
 
 from pyocd.target.pack import (cmsis_pack, flash_algo, pack_target)
+from pyocd.target.pack.algo_cache import FlashAlgoCache
 from pyocd.target.pack.flm_region_builder import FlmFlashRegionBuilder
 from pyocd.target import TARGET
 from pyocd.core import memory_map
@@ -261,6 +262,29 @@ class TestFLM:
         buf1 = buf_top - k64algo.page_size
         assert d['page_buffers'] == [buf1]
 
+    def test_algo_dict_max_page_bufs(self, k64algo):
+        ram = memory_map.RamRegion(0x20000000, length=0x10000)
+        d = k64algo.get_pyocd_flash_algo(k64algo.page_size, ram, max_page_buffers=4)
+        buf_top = align_down(d['load_address'], flash_algo.PackFlashAlgo._PAGE_BUFFER_ALIGN)
+        assert d['page_buffers'] == [buf_top - n * k64algo.page_size for n in range(1, 5)]
+        assert d['begin_stack'] == d['page_buffers'][-1]
+
+        # Only as many buffers as leave room for the minimum stack are allocated.
+        min_ram_size = (len(d['instructions']) * 4 + 3 * k64algo.page_size
+                + flash_algo.PackFlashAlgo._MIN_STACK_SIZE + flash_algo.PackFlashAlgo._PAGE_BUFFER_ALIGN)
+        min_ram = memory_map.RamRegion(0x20000000, length=min_ram_size)
+        d = k64algo.get_pyocd_flash_algo(k64algo.page_size, min_ram, max_page_buffers=4)
+        assert len(d['page_buffers']) == 3
+
+    def test_algo_blank_check(self, nrf5340appflm, stm32f42mflm):
+        from pyocd.flash.flash import Flash
+        ram = memory_map.RamRegion(0x20000000, length=0x10000)
+        d = nrf5340appflm.get_pyocd_flash_algo(nrf5340appflm.page_size, ram)
+        assert d['pc_blank_check'] == d['load_address'] + 4 + 0x26d
+        assert Flash(None, d).is_blank_check_supported
+        d = stm32f42mflm.get_pyocd_flash_algo(0x4000, memory_map.RamRegion(0x20000000, length=0x20000))
+        assert not Flash(None, d).is_blank_check_supported
+
     # Flash Device:
     #   name=b'nRF53xxx_app'
     #   version=0x101
@@ -307,11 +331,49 @@ class TestFLM:
             (memory_map.MemoryRange(0x8120000, length=(0x100000 - 0x20000)), 0x20000),
         ]
 
+    def test_algo_cache(self, tmp_path, monkeypatch):
+        algo_cache = FlashAlgoCache(str(tmp_path))
+        parsed = flash_algo.PackFlashAlgo(open(STM32F4_2M0_FLM, 'rb'), cache=algo_cache)
+        assert len(list(tmp_path.glob("*.json"))) == 1
+
+        # Load only from the file, without parsing the ELF.
+        FlashAlgoCache._memory_cache.clear()
+        monkeypatch.setattr(flash_algo, 'ELFBinaryFile', MagicMock(side_effect=AssertionError("ELF parsed")))
+        cached = flash_algo.PackFlashAlgo(str(STM32F4_2M0_FLM), cache=algo_cache)
+
+        assert vars(cached.flash_info) == vars(parsed.flash_info)
+        assert cached.symbols == parsed.symbols
+        assert cached.algo_data == parsed.algo_data
+        assert list(cached.iter_sector_size_ranges()) == list(parsed.iter_sector_size_ranges())
+        ram = memory_map.RamRegion(0x20000000, length=0x20000)
+        assert cached.get_pyocd_flash_algo(0x4000, ram, 3) == parsed.get_pyocd_flash_algo(0x4000, ram, 3)
+
+    def test_algo_cache_invalid_entry(self, tmp_path):
+        algo_cache = FlashAlgoCache(str(tmp_path))
+        data = STM32F4_2M0_FLM.read_bytes()
+        entry_path = tmp_path / (FlashAlgoCache.make_key(data) + ".json")
+        for contents in ("{", '{"version": 1, "algo": {"symbols": {}}}'):
+            FlashAlgoCache._memory_cache.clear()
+            entry_path.write_text(contents)
+            algo = flash_algo.PackFlashAlgo(open(STM32F4_2M0_FLM, 'rb'), cache=algo_cache)
+            assert algo.flash_info.start == 0x8000000
+            # The invalid entry was replaced.
+            FlashAlgoCache._memory_cache.clear()
+            assert algo_cache.get(FlashAlgoCache.make_key(data))['symbols'] == algo.symbols
+
+    def test_algo_cache_default(self, tmp_path):
+        session = MagicMock()
+        session.options = {'pack.algo_cache_dir': str(tmp_path)}
+        assert FlashAlgoCache.get_default(session).path == str(tmp_path)
+        session.options = {'pack.algo_cache_dir': None}
+        assert FlashAlgoCache.get_default(session) is None
+
 class TestFlmRegionBuilder:
     @pytest.fixture(scope='module')
     def builder(self):
         mock_target = MagicMock()
         mock_target.part_number = "TestPartNumber"
+        mock_target.session.options = {'flash.page_buffers': 2}
         ram = memory_map.RamRegion(0x20000000, length=0x10000, is_default=True)
         ram2 = memory_map.RamRegion(0x30010000, length=0x10000, is_default=False)
         memmap = memory_map.MemoryMap(ram, ram2)
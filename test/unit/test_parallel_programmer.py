@@ -0,0 +1,133 @@
+# pyOCD debugger
+# Copyright (c) 2026 PyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import json
+import pytest
+import threading
+from unittest import mock
+
+from intelhex import IntelHex
+
+from pyocd.core.memory_map import (FlashRegion, MemoryMap, RamRegion)
+from pyocd.flash.builder import ProgrammingInfo
+from pyocd.flash.file_programmer import (FileProgrammer, ImageSegment, ProgramImage)
+from pyocd.flash.parallel_programmer import ParallelProgrammer
+
+def make_hex(chunks):
+    hexfile = IntelHex()
+    for addr, data in chunks:
+        hexfile.puts(addr, data)
+    f = io.StringIO()
+    hexfile.write_hex_file(f)
+    f.seek(0)
+    return f
+
+class FakeProbe:
+    def __init__(self, unique_id):
+        self.unique_id = unique_id
+        self.description = "probe " + unique_id
+
+class TestReadImage:
+    def test_bin(self):
+        image = FileProgrammer.read_image(io.BytesIO(bytes(range(16))), 'bin', skip=4)
+        assert image.format == 'bin'
+        assert image.segments == [ImageSegment(None, bytes(range(4, 16)))]
+        assert image.size == 12
+
+    def test_bin_base_address(self):
+        image = FileProgrammer.read_image(io.BytesIO(b'abcd'), 'bin', base_address=0x1000)
+        assert image.segments == [ImageSegment(0x1000, b'abcd')]
+
+    def test_hex(self):
+        image = FileProgrammer.read_image(make_hex([(0x100, b'\x01\x02'), (0x200, b'\x03')]), 'hex')
+        assert image.segments == [ImageSegment(0x100, b'\x01\x02'), ImageSegment(0x200, b'\x03')]
+
+    def test_unknown_format(self):
+        with pytest.raises(ValueError):
+            FileProgrammer.read_image(io.BytesIO(b''), 'srec')
+
+class TestProgramImage:
+    @pytest.fixture
+    def session(self):
+        session = mock.Mock()
+        session.options = {}
+        session.target.memory_map = MemoryMap(
+                FlashRegion(start=0x8000, length=0x1000, blocksize=0x100, is_boot_memory=True),
+                RamRegion(start=0x20000000, length=0x1000))
+        return session
+
+    def test_boot_memory_and_result(self, session):
+        info = [ProgrammingInfo(total_byte_count=4)]
+        with mock.patch('pyocd.flash.file_programmer.FlashLoader') as loader_class:
+            loader = loader_class.return_value
+            loader.commit.return_value = info
+            result = FileProgrammer(session).program_image(ProgramImage('bin', [ImageSegment(None, b'abcd')]))
+        loader.add_data.assert_called_once_with(0x8000, b'abcd')
+        assert result is info
+
+    def test_invalid_address_ignored_for_hex(self, session):
+        with mock.patch('pyocd.flash.file_programmer.FlashLoader') as loader_class:
+            loader = loader_class.return_value
+            loader.add_data.side_effect = [ValueError("no region"), None]
+            FileProgrammer(session).program_image(ProgramImage('hex',
+                    [ImageSegment(0x100, b'x'), ImageSegment(0x8000, b'y')]))
+            assert loader.add_data.call_count == 2
+
+            loader.add_data.side_effect = ValueError("no region")
+            with pytest.raises(ValueError):
+                FileProgrammer(session).program_image(ProgramImage('bin', [ImageSegment(0x100, b'x')]))
+
+class TestParallelProgrammer:
+    def test_program_all(self):
+        probes = [FakeProbe(str(i)) for i in range(4)]
+        progress = []
+        programmed = {}
+        barrier = threading.Barrier(len(probes), timeout=5)
+
+        def program_probe(self, index, images, result):
+            # All probes must be programmed concurrently to pass the barrier.
+            barrier.wait()
+            self._update_progress(index, 0.5)
+            if result.unique_id == '2':
+                raise RuntimeError("target not responding")
+            result.target_type = 'cortex_m'
+            programmed[result.unique_id] = images
+            return [ProgrammingInfo(total_byte_count=16, program_byte_count=8, skipped_byte_count=8)]
+
+        image = FileProgrammer.read_image(io.BytesIO(bytes(16)), 'bin')
+        with mock.patch.object(ParallelProgrammer, '_program_probe', program_probe):
+            programmer = ParallelProgrammer(probes, progress=progress.append)
+            results = programmer.program(image)
+
+        assert [r.unique_id for r in results] == ['0', '1', '2', '3']
+        assert [r.success for r in results] == [True, True, False, True]
+        assert results[2].error == "target not responding"
+        # The image is parsed once and shared.
+        assert all(images[0] is image for images in programmed.values())
+
+        assert progress[0] == 0.0
+        assert progress[-1] == 1.0
+        assert progress == sorted(progress)
+
+        report = json.loads(json.dumps(programmer.report(results)))
+        assert report['succeeded'] == 3
+        assert report['failed'] == 1
+        assert report['images'] == [{'format': 'bin', 'size': 16}]
+        assert report['probes'][0]['status'] == 'ok'
+        assert report['probes'][0]['programmed_bytes'] == 8
+        assert report['probes'][2]['status'] == 'failed'
+        assert report['probes'][2]['total_bytes'] == 0
@@ -0,0 +1,157 @@
+# pyOCD debugger
+# Copyright (c) 2026 PyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from pyocd.cache.memory import MemoryCache
+from pyocd.cache.prefetch import AccessPatternDetector
+from pyocd.core.session import Session
+from pyocd.debug.cache import CachingDebugContext
+from .test_memcache import FaultingContext
+
+class TestAccessPatternDetector:
+    def test_first_read(self):
+        d = AccessPatternDetector(64, 1024)
+        assert d.observe(0x1000, 8) is None
+
+    def test_sequential(self):
+        d = AccessPatternDetector(64, 1024)
+        d.observe(0x1000, 8)
+        assert d.observe(0x1008, 16) == (0x1018, 64)
+
+    def test_ascending_stride(self):
+        d = AccessPatternDetector(64, 1024)
+        d.observe(0x1000, 4)
+        assert d.observe(0x1010, 4) is None
+        assert d.observe(0x1020, 4) == (0x1024, 64)
+
+    def test_descending_stride(self):
+        d = AccessPatternDetector(64, 1024)
+        d.observe(0x1040, 4)
+        assert d.observe(0x1030, 4) is None
+        assert d.observe(0x1020, 4) == (0x1020 - 64, 64)
+
+    def test_descending_clipped_at_zero(self):
+        d = AccessPatternDetector(64, 1024)
+        d.observe(0x20, 4)
+        d.observe(0x10, 4)
+        assert d.observe(0x0, 4) is None
+
+    def test_changed_stride(self):
+        d = AccessPatternDetector(64, 1024)
+        d.observe(0x1000, 4)
+        d.observe(0x1010, 4)
+        assert d.observe(0x1030, 4) is None
+
+    def test_large_jump_resets(self):
+        d = AccessPatternDetector(64, 1024)
+        d.observe(0x1000, 4)
+        d.observe(0x1010, 4)
+        assert d.observe(0x8000, 4) is None
+        assert d.observe(0x8010, 4) is None
+
+    def test_reset(self):
+        d = AccessPatternDetector(64, 1024)
+        d.observe(0x1000, 8)
+        d.reset()
+        assert d.observe(0x1008, 8) is None
+
+class TestMemoryCachePrefetch:
+    def test_prefetch_hits(self, mockcore):
+        ctx = FaultingContext(mockcore, 0, 0)
+        memcache = MemoryCache(ctx, mockcore)
+        mockcore.write_memory_block8(0x20000000, list(range(64)))
+        memcache.prefetch(0x20000000, 32)
+        assert ctx.reads == [(0x20000000, 32)]
+        assert memcache.read_memory_block8(0x20000008, 8) == list(range(8, 16))
+        assert memcache.read_memory_block8(0x20000008, 8) == list(range(8, 16))
+        assert memcache.read_memory_block8(0x2000001c, 8) == list(range(28, 36))
+        assert ctx.reads == [(0x20000000, 32), (0x20000020, 4)]
+        metrics = memcache.metrics
+        assert metrics.prefetches == 1
+        assert metrics.prefetched == 32
+        # Repeated reads of the same prefetched bytes are only counted once.
+        assert metrics.prefetch_hits == 12
+        assert metrics.percent_prefetch_hit == 12 * 100.0 / 32
+
+    def test_prefetch_skips_cached(self, mockcore):
+        ctx = FaultingContext(mockcore, 0, 0)
+        memcache = MemoryCache(ctx, mockcore)
+        memcache.read_memory_block8(0x20000000, 16)
+        memcache.prefetch(0x20000008, 32)
+        assert ctx.reads == [(0x20000000, 16), (0x20000010, 24)]
+        assert memcache.metrics.prefetched == 24
+
+    def test_prefetch_waits_for_half_window(self, mockcore):
+        ctx = FaultingContext(mockcore, 0, 0)
+        memcache = MemoryCache(ctx, mockcore)
+        memcache.read_memory_block8(0x20000000, 16)
+        memcache.prefetch(0x20000000, 32)
+        assert ctx.reads == [(0x20000000, 16)]
+
+    def test_prefetch_clipped_to_region(self, mockcore):
+        ctx = FaultingContext(mockcore, 0, 0)
+        memcache = MemoryCache(ctx, mockcore)
+        memcache.prefetch(0x200003f0, 256)
+        assert ctx.reads == [(0x200003f0, 16)]
+
+    def test_prefetch_noncacheable(self, mockcore):
+        ctx = FaultingContext(mockcore, 0, 0)
+        memcache = MemoryCache(ctx, mockcore)
+        memcache.prefetch(0x20000400, 16)
+        memcache.prefetch(0x30000000, 16)
+        assert ctx.reads == []
+
+    def test_prefetch_fault_ignored(self, mockcore):
+        ctx = FaultingContext(mockcore, 0x20000000, 0x20000400)
+        memcache = MemoryCache(ctx, mockcore)
+        memcache.prefetch(0x20000000, 16)
+        assert memcache.metrics.prefetches == 0
+        assert len(memcache._cache) == 0
+
+class TestCachingContextPrefetch:
+    @pytest.fixture(scope='function')
+    def session(self, mockcore):
+        session = Session(None, options={
+                'cache.memory_line_size': 1,
+                'cache.memory_prefetch_size': 64,
+                })
+        mockcore.session = session
+        return session
+
+    def test_sequential_reads_prefetched(self, mockcore, session):
+        ctx = FaultingContext(mockcore, 0, 0)
+        caching_ctx = CachingDebugContext(ctx, enable_register=False)
+        mockcore.write_memory_block8(0x20000100, list(range(256)))
+        for offset in range(0, 128, 16):
+            assert caching_ctx.read_memory_block8(0x20000100 + offset, 16) == list(range(offset, offset + 16))
+        # Only the first two reads miss; the rest are served by read-ahead.
+        assert ctx.reads[:3] == [(0x20000100, 16), (0x20000110, 16), (0x20000120, 64)]
+        # Later read-aheads are made once half of the window has been consumed, and only read the
+        # part of the window that isn't already cached.
+        assert ctx.reads[3:] == [(0x20000160, 48), (0x20000190, 48)]
+        metrics = caching_ctx.memory_cache_metrics
+        assert metrics.prefetch_hits == 128 - 32
+        assert metrics.misses == 32
+
+    def test_prefetch_disabled(self, mockcore, session):
+        session.options['cache.memory_prefetch_size'] = 0
+        ctx = FaultingContext(mockcore, 0, 0)
+        caching_ctx = CachingDebugContext(ctx, enable_register=False)
+        for offset in range(0, 64, 16):
+            caching_ctx.read_memory_block8(0x20000100 + offset, 16)
+        assert len(ctx.reads) == 4
+        assert caching_ctx.memory_cache_metrics.prefetched == 0
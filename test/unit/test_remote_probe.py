@@ -0,0 +1,292 @@
+# pyOCD debugger
+# Copyright (c) 2026 PyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from pyocd.core import exceptions
+from pyocd.core.memory_interface import MemoryInterface
+from pyocd.core.session import Session
+from pyocd.coresight.ap import APv1Address
+from pyocd.probe.debug_probe import DebugProbe
+from pyocd.probe.tcp_client_probe import TCPClientProbe
+from pyocd.probe.tcp_probe_server import (DebugProbeRequestHandler, DebugProbeServer)
+
+## AP register address that faults when accessed.
+FAULT_ADDR = 0xbad0
+
+class FakeMemory(MemoryInterface):
+    def __init__(self, size=0x1000):
+        self.data = bytearray(size)
+
+    def write_memory(self, addr, data, transfer_size=32, **attrs):
+        self.data[addr:addr + transfer_size // 8] = data.to_bytes(transfer_size // 8, 'little')
+
+    def read_memory(self, addr, transfer_size=32, now=True, **attrs):
+        return int.from_bytes(self.data[addr:addr + transfer_size // 8], 'little')
+
+    def write_memory_block32(self, addr, data, **attrs):
+        for i, w in enumerate(data):
+            self.write_memory(addr + i * 4, w)
+
+    def read_memory_block32(self, addr, size, **attrs):
+        return [self.read_memory(addr + i * 4) for i in range(size)]
+
+    def write_memory_block8(self, addr, data, **attrs):
+        if addr + len(data) > len(self.data):
+            raise exceptions.TransferFaultError(fault_address=addr)
+        self.data[addr:addr + len(data)] = bytes(data)
+
+    def read_memory_block8(self, addr, size, **attrs):
+        return list(self.data[addr:addr + size])
+
+class FakeProbe(DebugProbe):
+    """@brief Probe with a register file for DP and AP accesses."""
+
+    def __init__(self):
+        super().__init__()
+        self.regs = {}
+        self.memory = FakeMemory()
+        self.requests = []
+
+    @property
+    def vendor_name(self):
+        return "Fake"
+
+    @property
+    def product_name(self):
+        return "Probe"
+
+    @property
+    def unique_id(self):
+        return "fake"
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def connect(self, protocol=None):
+        pass
+
+    def disconnect(self):
+        pass
+
+    def flush(self):
+        pass
+
+    def read_dp(self, addr, now=True):
+        return self.read_ap(addr | 0x10000, now)
+
+    def write_dp(self, addr, data):
+        self.write_ap(addr | 0x10000, data)
+
+    def read_ap(self, addr, now=True):
+        self.requests.append(('read', addr))
+        if addr == FAULT_ADDR:
+            raise exceptions.TransferFaultError()
+        value = self.regs.get(addr, 0)
+        return value if now else (lambda: value)
+
+    def write_ap(self, addr, data):
+        self.requests.append(('write', addr))
+        if addr == FAULT_ADDR:
+            raise exceptions.TransferFaultError()
+        self.regs[addr] = data
+
+    def read_ap_multiple(self, addr, count=1, now=True):
+        values = [self.read_ap(addr) for _ in range(count)]
+        return values if now else (lambda: values)
+
+    def write_ap_multiple(self, addr, values):
+        for v in values:
+            self.write_ap(addr, v)
+
+    def get_memory_interface_for_ap(self, ap_address):
+        return self.memory
+
+# The server is shared by all tests, as stopping it takes a while.
+@pytest.fixture(scope='module')
+def server():
+    session = Session(None)
+    server = DebugProbeServer(session, FakeProbe(), port=0, serve_local_only=True)
+    server.start()
+    yield server
+    server.stop()
+
+@pytest.fixture(scope='function')
+def probe(server):
+    probe = server._probe
+    probe.regs.clear()
+    probe.requests.clear()
+    return probe
+
+@pytest.fixture(scope='function')
+def client(server, probe):
+    client = TCPClientProbe("localhost:%d" % server.port)
+    client.open()
+    yield client
+    client.close()
+
+class TestRemoteProbe:
+    def test_negotiate(self, client):
+        assert client.protocol_version == 2
+
+    def test_fallback_to_v1(self, server, monkeypatch):
+        # Model a server that only supports version 1.
+        monkeypatch.setattr(DebugProbeRequestHandler, 'PROTOCOL_VERSION', 1)
+        client = TCPClientProbe("localhost:%d" % server.port)
+        client.open()
+        try:
+            assert client.protocol_version == 1
+            client.write_ap(0x4, 0x1234)
+            assert client.read_ap(0x4) == 0x1234
+            memif = client.get_memory_interface_for_ap(APv1Address(0))
+            memif.write_memory_block8(0x10, b'\x01\x02\x03')
+            assert memif.read_memory_block8(0x10, 3) == [1, 2, 3]
+        finally:
+            client.close()
+
+    def test_deferred_reads(self, client, probe):
+        client.write_dp(0x8, 0x10)
+        for i in range(10):
+            client.write_ap(i * 4, i + 100)
+        callbacks = [client.read_ap(i * 4, now=False) for i in range(10)]
+        dp_cb = client.read_dp(0x8, now=False)
+        multiple_cb = client.read_ap_multiple(0x4, 3, now=False)
+        # Callbacks may be invoked in any order.
+        assert multiple_cb() == [101] * 3
+        assert [cb() for cb in reversed(callbacks)] == list(reversed(range(100, 110)))
+        assert dp_cb() == 0x10
+
+    def test_many_posted(self, client, probe):
+        count = TCPClientProbe.MAX_PENDING_REQUESTS * 3
+        for i in range(count):
+            client.write_ap(0x20, i)
+        client.flush()
+        assert probe.regs[0x20] == count - 1
+        assert len(probe.requests) == count
+
+    def test_posted_write_error(self, client, probe):
+        client.write_ap(FAULT_ADDR, 1)
+        client.write_ap(0x4, 2)
+        with pytest.raises(exceptions.TransferFaultError):
+            client.flush()
+        # The error is only raised once.
+        client.flush()
+        # The fault aborted the rest of the batch.
+        assert 0x4 not in probe.regs
+
+    def test_posted_write_error_unbatched(self, client, probe):
+        memif = client.get_memory_interface_for_ap(APv1Address(0))
+        memif.write_memory_block8(0x10000, b'\x01')
+        memif.write_memory_block8(0x10, b'\x02')
+        with pytest.raises(exceptions.Error):
+            client.flush()
+        client.flush()
+        assert probe.memory.data[0x10] == 2
+
+    def test_posted_write_error_from_read(self, client):
+        client.write_ap(FAULT_ADDR, 1)
+        cb = client.read_ap(0x4, now=False)
+        with pytest.raises(exceptions.TransferFaultError):
+            cb()
+
+    def test_deferred_read_error(self, client):
+        cb = client.read_ap(FAULT_ADDR, now=False)
+        # Both reads are in the same batch, which fails.
+        with pytest.raises(exceptions.TransferFaultError):
+            client.read_ap(0x4)
+        with pytest.raises(exceptions.TransferFaultError):
+            cb()
+        assert client.read_ap(0x4) == 0
+
+    def test_binary_blocks(self, client, probe):
+        memif = client.get_memory_interface_for_ap(APv1Address(0))
+        data = bytes(range(256))
+        memif.write_memory_block8(0x100, data)
+        memif.write_memory_block32(0x200, [0x11223344, 0xffffffff])
+        assert memif.read_memory_block8(0x100, 256) == list(data)
+        assert memif.read_memory_block32(0x200, 2) == [0x11223344, 0xffffffff]
+        assert probe.memory.data[0x200:0x208] == b'\x44\x33\x22\x11\xff\xff\xff\xff'
+        memif.write32(0x300, 0xcafe)
+        assert memif.read32(0x300) == 0xcafe
+
+class TestRemoteProbeBatch:
+    @pytest.fixture(scope='function')
+    def requests(self, client, monkeypatch):
+        requests = []
+        send_request = client._send_request
+        def counting_send_request(request, *args, **kwargs):
+            # Record after sending, as queued batch operations are sent first.
+            rid = send_request(request, *args, **kwargs)
+            requests.append(request)
+            return rid
+        monkeypatch.setattr(client, '_send_request', counting_send_request)
+        return requests
+
+    def test_one_batch(self, client, probe, requests):
+        memif = client.get_memory_interface_for_ap(APv1Address(0))
+        requests.clear()
+        callbacks = []
+        for i in range(20):
+            client.write_ap(0x100 + i * 4, i)
+            memif.write32(0x40 + i * 4, i * 3)
+            callbacks.append(client.read_ap(0x100 + i * 4, now=False))
+            callbacks.append(memif.read32(0x40 + i * 4, now=False))
+        results = [cb() for cb in callbacks]
+        assert results[0::2] == list(range(20))
+        assert results[1::2] == [i * 3 for i in range(20)]
+        assert requests == ['batch']
+
+    def test_flush_sends_batch(self, client, probe, requests):
+        client.write_dp(0x8, 0xf0)
+        client.write_ap(0x4, 5)
+        assert probe.regs == {}
+        client.flush()
+        assert requests == ['batch']
+        assert probe.regs == {0x10008: 0xf0, 0x4: 5}
+
+    def test_batch_size_limit(self, client, probe, requests):
+        for i in range(TCPClientProbe.MAX_BATCH_SIZE * 2 + 1):
+            client.write_ap(0x4, i)
+        client.flush()
+        assert requests == ['batch'] * 3
+        assert probe.regs[0x4] == TCPClientProbe.MAX_BATCH_SIZE * 2
+
+    def test_order_with_other_requests(self, client, probe, requests):
+        memif = client.get_memory_interface_for_ap(APv1Address(0))
+        memif.write32(0x20, 0x11111111)
+        memif.write_memory_block8(0x21, b'\x22')
+        assert memif.read_memory_block8(0x20, 4) == [0x11, 0x22, 0x11, 0x11]
+        assert requests[-3:] == ['batch', 'write_block8', 'read_block8']
+
+    def test_poll(self, client, probe):
+        probe.regs[0x8] = 0x10
+        assert client._perform_request('batch', [
+                ['write_ap', 0x4, 0x3],
+                ['poll_ap', 0x4, 0x1, 0x1, 0.1],
+                ['poll_dp', 0x0, 0, 0, 0.1],
+                ['read_ap', 0x8],
+                ]) == [None, 0x3, 0, 0x10]
+        with pytest.raises(exceptions.TransferTimeoutError):
+            client._perform_request('batch', [['poll_ap', 0x4, 0x4, 0x4, 0.01]])
+
+    def test_malformed(self, client):
+        with pytest.raises(exceptions.Error):
+            client._perform_request('batch', [['read_ap']])
+        with pytest.raises(exceptions.Error):
+            client._perform_request('batch', [['swj_sequence', 1, 1]])
@@ -0,0 +1,141 @@
+# pyOCD debugger
+# Copyright (c) 2026 PyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+import random
+import struct
+from unittest import mock
+
+from pyocd.core.memory_map import FlashRegion
+from pyocd.core.options_manager import OptionsManager
+from pyocd.flash.flash import (Flash, _RLE_DECOMPRESSOR_CODE)
+from pyocd.utility.rle import (rle_decode, rle_encode)
+
+def make_data(seed, size):
+    rng = random.Random(seed)
+    data = bytearray()
+    while len(data) < size:
+        if rng.random() < 0.5:
+            data += bytes([rng.choice([0x00, 0xff, rng.randrange(256)])]) * rng.randrange(1, 300)
+        else:
+            data += bytes(rng.randrange(256) for _ in range(rng.randrange(1, 200)))
+    return bytes(data[:size])
+
+class TestRle:
+    def test_encoding(self):
+        assert rle_encode(b'') == b''
+        assert rle_encode(b'\xff' * 3) == b'\x80\xff'
+        assert rle_encode(b'ab') == b'\x01ab'
+        assert rle_encode(b'a' + b'\x00' * 130 + b'\x00\x00b') == b'\x00a\xff\x00\x02\x00\x00b'
+
+    def test_long_literal(self):
+        data = bytes(range(256)) * 2
+        encoded = rle_encode(data)
+        assert len(encoded) == len(data) + 4
+        assert rle_decode(encoded) == data
+
+    @pytest.mark.parametrize("seed", range(20))
+    def test_round_trip(self, seed):
+        data = make_data(seed, 1024)
+        assert rle_decode(rle_encode(data)) == data
+
+    def test_truncated(self):
+        with pytest.raises(ValueError):
+            rle_decode(b'\x05abc')
+        with pytest.raises(ValueError):
+            rle_decode(b'\x80')
+
+class RamTarget:
+    def __init__(self, options):
+        self.session = mock.Mock()
+        self.session.options = OptionsManager()
+        self.session.options.add_front(options)
+        self.ram = bytearray(0x10000)
+
+    def write_memory_block32(self, addr, data):
+        self.ram[addr:addr + len(data) * 4] = struct.pack('<%dI' % len(data), *data)
+
+    def write_memory_from(self, addr, data):
+        self.ram[addr:addr + len(data)] = data
+
+class TestCompressedProgram:
+    PAGE_SIZE = 0x400
+    ALGO = {
+        'load_address': 0x0,
+        'instructions': [0xE7FDBE00] * 32,
+        'pc_init': 0x11,
+        'pc_unInit': 0x21,
+        'pc_erase_sector': 0x31,
+        'pc_program_page': 0x41,
+        'page_buffers': [0x8000, 0x8400],
+        'begin_data': 0x8000,
+        'begin_stack': 0x7000,
+        'static_base': 0x100,
+        'analyzer_supported': False,
+        }
+
+    def make_flash(self, compress=True):
+        target = RamTarget({'flash.compress': compress})
+        flash = Flash(target, self.ALGO)
+        flash.region = FlashRegion(start=0, length=0x10000, sector_size=self.PAGE_SIZE, page_size=self.PAGE_SIZE,
+                flash_class=Flash, algo=self.ALGO)
+        flash._active_operation = Flash.Operation.PROGRAM
+        calls = []
+
+        def call_function_and_wait(pc, r0=None, r1=None, r2=None, r3=None, init=False, timeout=None):
+            calls.append((pc, r0, r1, r2, r3))
+            return 0
+        flash._call_function_and_wait = call_function_and_wait
+        return flash, target, calls
+
+    def test_compressed(self):
+        flash, target, calls = self.make_flash()
+        data = b'\x12\x34' + b'\xff' * (self.PAGE_SIZE - 2)
+        flash.program_page(0x400, data)
+
+        stub = 0x8400 + self.PAGE_SIZE - len(_RLE_DECOMPRESSOR_CODE) * 4
+        assert calls == [(stub, 0x400, self.PAGE_SIZE, 0x8400, 0x8000)]
+        code = struct.unpack_from('<%dI' % len(_RLE_DECOMPRESSOR_CODE), target.ram, stub)
+        assert code[:-1] == _RLE_DECOMPRESSOR_CODE[:-1]
+        assert code[-1] == 0x41
+        encoded = rle_encode(data)
+        assert rle_decode(target.ram[0x8400:0x8400 + len(encoded)]) == data
+
+    def test_incompressible(self):
+        flash, target, calls = self.make_flash()
+        data = bytes(range(256)) * (self.PAGE_SIZE // 256)
+        flash.program_page(0x400, data)
+        assert calls == [(0x41, 0x400, self.PAGE_SIZE, 0x8000, None)]
+        assert target.ram[0x8000:0x8000 + self.PAGE_SIZE] == data
+
+    def test_decompressor_reloaded(self):
+        flash, target, calls = self.make_flash()
+        data = b'\xff' * self.PAGE_SIZE
+        stub = 0x8400 + self.PAGE_SIZE - len(_RLE_DECOMPRESSOR_CODE) * 4
+        flash.program_page(0x0, data)
+        target.ram[stub:stub + 4] = b'\0\0\0\0'
+        flash.program_page(0x400, data)
+        # Not reloaded while the second buffer is only used by the decompressor.
+        assert target.ram[stub:stub + 4] == b'\0\0\0\0'
+        flash.load_page_buffer(1, 0x800, data)
+        flash.program_page(0x800, data)
+        assert struct.unpack_from('<I', target.ram, stub)[0] == _RLE_DECOMPRESSOR_CODE[0]
+
+    def test_disabled(self):
+        flash, target, calls = self.make_flash(compress=False)
+        assert not flash.is_compressed_programming_enabled
+        flash.program_page(0x400, b'\xff' * self.PAGE_SIZE)
+        assert calls == [(0x41, 0x400, self.PAGE_SIZE, 0x8000, None)]
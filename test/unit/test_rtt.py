@@ -0,0 +1,450 @@
+# pyOCD debugger
+# Copyright (c) 2026 PyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+import struct
+from collections import Counter
+from unittest import mock
+
+from pyocd.core import exceptions
+from pyocd.core.memory_map import (MemoryMap, RamRegion)
+from pyocd.core.session import Session
+from pyocd.debug.rtt import (GenericRTTControlBlock, RTTControlBlock)
+from pyocd.debug.rtt_scheduler import RTTPollScheduler
+from pyocd.utility.rtt_server import (RTTChanWorker, RTTServer)
+
+RAM_START = 0x20000000
+RAM_SIZE = 0x4000
+CB_ADDR = RAM_START + 0x100
+BUFFER_SIZE = 64
+
+DESC_SIZE = 24
+WR_OFF = 12
+RD_OFF = 16
+
+class RTTTarget:
+    """@brief Target with RAM containing an RTT control block.
+
+    The `ops` counter records the number of each memory operation.
+    """
+    def __init__(self, num_up, num_down, populated=True):
+        self.memory = bytearray(RAM_SIZE)
+        self.memory_map = MemoryMap(RamRegion(start=RAM_START, length=RAM_SIZE))
+        self.elf = None
+        self.ops = Counter()
+        self.session = Session(None, options={
+                'rtt.poll_min_interval': 0.001,
+                'rtt.poll_max_interval': 0.064,
+                })
+        self.memory[CB_ADDR - RAM_START:CB_ADDR - RAM_START + 16] = b'SEGGER RTT'.ljust(16, b'\0')
+        struct.pack_into("<II", self.memory, CB_ADDR - RAM_START + 16, num_up, num_down)
+        if populated:
+            for i in range(num_up + num_down):
+                self.populate(i)
+
+    def desc_addr(self, index):
+        return CB_ADDR + 24 + index * DESC_SIZE
+
+    def buffer_addr(self, index):
+        return RAM_START + 0x1000 + index * BUFFER_SIZE
+
+    def populate(self, index):
+        struct.pack_into("<6I", self.memory, self.desc_addr(index) - RAM_START,
+                0, self.buffer_addr(index), BUFFER_SIZE, 0, 0, 0)
+
+    def get_offsets(self, index):
+        return struct.unpack_from("<II", self.memory, self.desc_addr(index) + WR_OFF - RAM_START)
+
+    def set_offsets(self, index, write_off, read_off):
+        struct.pack_into("<II", self.memory, self.desc_addr(index) + WR_OFF - RAM_START, write_off, read_off)
+
+    def target_write(self, index, data):
+        """@brief Simulate the target writing to an up channel."""
+        write_off, read_off = self.get_offsets(index)
+        for b in data:
+            self.memory[self.buffer_addr(index) + write_off - RAM_START] = b
+            write_off = (write_off + 1) % BUFFER_SIZE
+        self.set_offsets(index, write_off, read_off)
+
+    def buffer(self, index):
+        offset = self.buffer_addr(index) - RAM_START
+        return bytes(self.memory[offset:offset + BUFFER_SIZE])
+
+    def get_memory_map(self):
+        return self.memory_map
+
+    def read_memory_block8(self, addr, size):
+        self.ops['read'] += 1
+        return list(self.memory[addr - RAM_START:addr - RAM_START + size])
+
+    def read_memory_block32(self, addr, size):
+        self.ops['read'] += 1
+        return list(struct.unpack_from("<%dI" % size, self.memory, addr - RAM_START))
+
+    def read_memory_into(self, addr, buf):
+        self.ops['read'] += 1
+        if not (RAM_START <= addr and addr + len(buf) <= RAM_START + RAM_SIZE):
+            raise exceptions.TransferFaultError(fault_address=addr)
+        buf[:] = self.memory[addr - RAM_START:addr - RAM_START + len(buf)]
+
+    def read32(self, addr):
+        return self.read_memory_block32(addr, 1)[0]
+
+    def write32(self, addr, value):
+        self.ops['write'] += 1
+        struct.pack_into("<I", self.memory, addr - RAM_START, value)
+
+    def write_memory_block8(self, addr, data):
+        self.ops['write'] += 1
+        self.memory[addr - RAM_START:addr - RAM_START + len(data)] = bytes(data)
+
+    def flush(self):
+        self.ops['flush'] += 1
+
+def start_control_block(target):
+    cb = RTTControlBlock.from_target(target, address=CB_ADDR, size=0)
+    cb.start()
+    target.ops.clear()
+    return cb
+
+def make_elf(build_id, symbol_address=None):
+    elf = mock.Mock()
+    elf.build_id = build_id
+    if symbol_address is None:
+        elf.symbol_decoder.get_symbol_for_name.return_value = None
+    else:
+        elf.symbol_decoder.get_symbol_for_name.return_value.address = symbol_address
+    return elf
+
+@pytest.fixture(autouse=True)
+def address_cache(monkeypatch):
+    cache = {}
+    monkeypatch.setattr(GenericRTTControlBlock, '_address_cache', cache)
+    return cache
+
+class ListWorker(RTTChanWorker):
+    def __init__(self, down_data=b'', max_write=None):
+        self.up_data = b''
+        self.down_data = down_data
+        self.max_write = max_write
+
+    def write_up_data(self, data):
+        data = data[:self.max_write]
+        self.up_data += data
+        return len(data)
+
+    def get_down_data(self):
+        data, self.down_data = self.down_data, b''
+        return data
+
+    def close(self):
+        pass
+
+class TestRTTControlBlock:
+    def test_poll_up_channels(self):
+        target = RTTTarget(4, 2)
+        cb = start_control_block(target)
+        target.target_write(0, b'hello')
+        target.set_offsets(2, 10, 60)
+        target.target_write(2, bytes(range(20)))
+        up_data, bytes_written = cb.poll(range(4))
+        assert up_data == {0: b'hello', 2: target.buffer(2)[60:] + target.buffer(2)[:30]}
+        assert bytes_written == {}
+        assert target.get_offsets(0) == (5, 5)
+        assert target.get_offsets(2) == (30, 30)
+        # One descriptor read, one segment for channel 0 and two for the wrapped channel 2.
+        assert target.ops == Counter(read=4, write=2, flush=1)
+
+    def test_poll_empty(self):
+        target = RTTTarget(8, 8)
+        cb = start_control_block(target)
+        assert cb.poll(range(8), {}) == ({}, {})
+        assert target.ops == Counter(read=1, flush=1)
+
+    def test_poll_matches_channel_read(self):
+        target = RTTTarget(2, 0)
+        cb = start_control_block(target)
+        target.set_offsets(1, 50, 50)
+        target.target_write(1, b'0123456789abcdefghijklmnopqrstuvwxyz')
+        expected = target.buffer(1)[50:] + target.buffer(1)[:22]
+        offsets = target.get_offsets(1)
+        assert cb.poll([1])[0] == {1: expected}
+        target.set_offsets(1, *offsets)
+        assert cb.up_channels[1].read() == expected
+
+    def test_poll_down_channels(self):
+        target = RTTTarget(1, 2)
+        cb = start_control_block(target)
+        target.set_offsets(2, 60, 0)
+        up_data, bytes_written = cb.poll([], {0: b'abc', 1: b'x' * 10})
+        assert up_data == {}
+        # Channel 1 is full once the write offset is one behind the read offset.
+        assert bytes_written == {0: 3, 1: 3}
+        assert target.buffer(1)[:3] == b'abc'
+        assert target.buffer(2)[60:63] == b'xxx'
+        assert target.get_offsets(1) == (3, 0)
+        assert target.get_offsets(2) == (63, 0)
+        assert target.ops['flush'] == 1
+
+    def test_poll_unpopulated(self):
+        target = RTTTarget(2, 1, populated=False)
+        cb = start_control_block(target)
+        assert cb.poll([0, 1], {0: b'abc'}) == ({}, {0: 0})
+        target.populate(1)
+        target.populate(2)
+        target.target_write(1, b'data')
+        assert cb.poll([0, 1], {0: b'abc'}) == ({1: b'data'}, {0: 3})
+
+    def test_poll_invalid_offsets(self):
+        target = RTTTarget(1, 0)
+        cb = start_control_block(target)
+        target.set_offsets(0, BUFFER_SIZE, 0)
+        with pytest.raises(exceptions.RTTError):
+            cb.poll([0])
+        assert target.ops['flush'] == 1
+
+    def test_poll_not_started(self):
+        cb = GenericRTTControlBlock(RTTTarget(1, 1), address=CB_ADDR, size=0)
+        with pytest.raises(exceptions.RTTError):
+            cb.poll([0])
+
+class TestControlBlockSearch:
+    def move_control_block(self, target, addr):
+        offset = target.memory.find(b'SEGGER RTT')
+        header = bytes(target.memory[offset:offset + 24])
+        target.memory[offset:offset + 24] = bytes(24)
+        target.memory[addr - RAM_START:addr - RAM_START + 24] = header
+
+    def test_search_ram(self):
+        target = RTTTarget(2, 1)
+        cb = RTTControlBlock.from_target(target)
+        cb.start()
+        assert len(cb.up_channels) == 2
+        assert len(cb.down_channels) == 1
+        assert cb.up_channels[0].size == BUFFER_SIZE
+
+    @pytest.mark.parametrize("cb_offset", [0, 0x3, 0x3c, 0x3f, 0x7a, RAM_SIZE - 10])
+    def test_search_chunk_boundaries(self, monkeypatch, cb_offset):
+        monkeypatch.setattr(GenericRTTControlBlock, 'SEARCH_CHUNK_SIZE', 64)
+        target = RTTTarget(0, 0)
+        target.memory[:] = bytes(RAM_SIZE)
+        target.memory[cb_offset:cb_offset + 10] = b'SEGGER RTT'
+        cb = GenericRTTControlBlock(target)
+        assert cb._find_control_block() == RAM_START + cb_offset
+
+    def test_search_not_found(self, address_cache):
+        target = RTTTarget(0, 0)
+        target.memory[:] = bytes(RAM_SIZE)
+        cb = GenericRTTControlBlock(target)
+        assert cb._find_control_block() is None
+        assert target.ops['read'] == 1
+        assert address_cache == {}
+        with pytest.raises(exceptions.RTTError):
+            cb.start()
+
+    def test_search_range(self):
+        target = RTTTarget(0, 0)
+        cb = GenericRTTControlBlock(target, address=CB_ADDR + 4, size=0x1000)
+        assert cb._find_control_block() is None
+        cb = GenericRTTControlBlock(target, address=CB_ADDR - 0x20, size=0x2a)
+        assert cb._find_control_block() == CB_ADDR
+
+    def test_elf_symbol(self):
+        target = RTTTarget(1, 0)
+        target.elf = make_elf('abcd', CB_ADDR)
+        cb = GenericRTTControlBlock(target)
+        assert cb._find_control_block() == CB_ADDR
+        assert target.ops['read'] == 1
+        target.elf.symbol_decoder.get_symbol_for_name.assert_called_with('_SEGGER_RTT')
+
+    def test_elf_symbol_not_initialized(self):
+        # The control block is not initialized by the target yet, or the symbol is invalid.
+        target = RTTTarget(1, 0)
+        self.move_control_block(target, RAM_START + 0x800)
+        for symbol_address in (CB_ADDR, 0x1000):
+            target.elf = make_elf('abcd', symbol_address)
+            cb = GenericRTTControlBlock(target)
+            assert cb._find_control_block() == RAM_START + 0x800
+
+    def test_address_cache(self, address_cache):
+        target = RTTTarget(1, 0)
+        self.move_control_block(target, RAM_START + 0x2000)
+        target.elf = make_elf('1234')
+        assert GenericRTTControlBlock(target)._find_control_block() == RAM_START + 0x2000
+        assert address_cache == {'1234': RAM_START + 0x2000}
+
+        target.ops.clear()
+        assert GenericRTTControlBlock(target)._find_control_block() == RAM_START + 0x2000
+        assert target.ops['read'] == 1
+
+        # A stale entry is ignored.
+        self.move_control_block(target, RAM_START + 0x3000)
+        assert GenericRTTControlBlock(target)._find_control_block() == RAM_START + 0x3000
+        assert address_cache == {'1234': RAM_START + 0x3000}
+
+class TestRTTServer:
+    def test_poll(self):
+        target = RTTTarget(3, 3)
+        server = RTTServer(target, CB_ADDR, 0, b'SEGGER RTT')
+        server.start()
+        workers = [ListWorker(b'down0'), None, ListWorker(b'down2')]
+        server.add_worker(0, workers[0])
+        server.add_worker(2, workers[2])
+        target.target_write(0, b'up0')
+        target.target_write(1, b'up1')
+        target.target_write(2, b'up2')
+        target.ops.clear()
+        assert server.poll()
+        assert workers[0].up_data == b'up0'
+        assert workers[2].up_data == b'up2'
+        assert target.buffer(3)[:5] == b'down0'
+        assert target.buffer(5)[:5] == b'down2'
+        # The inactive channel is not read.
+        assert target.get_offsets(1) == (3, 0)
+        assert target.ops['flush'] == 1
+        assert not server.poll()
+
+    def test_poll_interval(self):
+        target = RTTTarget(1, 1)
+        server = RTTServer(target, CB_ADDR, 0, b'SEGGER RTT')
+        with pytest.raises(exceptions.RTTError):
+            server.poll_interval
+        server.start()
+        server.add_worker(0, ListWorker())
+        assert not server.poll()
+        assert not server.poll()
+        idle_interval = server.poll_interval
+        assert idle_interval > 0.001
+        # Data sent to the target returns to the minimum interval.
+        server.workers[0].down_data = b'cmd'
+        assert server.poll()
+        assert server.poll_interval == 0.001
+        assert server.scheduler.channels[0].total_bytes == 0
+
+class TestRTTPollScheduler:
+    CAPACITY = BUFFER_SIZE - 1
+
+    def make_scheduler(self):
+        scheduler = RTTPollScheduler(0.001, 0.064)
+        scheduler.add_channel(0, BUFFER_SIZE)
+        scheduler.add_channel(1, BUFFER_SIZE)
+        scheduler.update({}, now=0.0)
+        return scheduler
+
+    def test_idle_backoff(self):
+        scheduler = self.make_scheduler()
+        now = 0.0
+        intervals = []
+        for _ in range(10):
+            now += scheduler.interval
+            intervals.append(scheduler.update({}, now=now))
+        assert intervals == sorted(intervals)
+        assert intervals[-1] == 0.064
+        assert scheduler.efficiency == 0.0
+        assert scheduler.channels[0].overflow_risk == 0.0
+
+    def test_steady_rate(self):
+        scheduler = self.make_scheduler()
+        rate = 2000.0
+        now = 0.0
+        for _ in range(50):
+            interval = scheduler.interval
+            now += interval
+            scheduler.update({0: round(rate * interval)}, now=now)
+        stats = scheduler.channels[0]
+        # The interval converges on filling half of the buffer between polls.
+        assert stats.bytes_per_second == pytest.approx(rate, rel=0.05)
+        assert scheduler.interval == pytest.approx(0.5 * self.CAPACITY / rate, rel=0.05)
+        assert stats.overflow_risk == pytest.approx(0.5, rel=0.05)
+        assert stats.last_fill == pytest.approx(0.5, rel=0.1)
+        assert stats.active_polls == 50
+        assert scheduler.channels[1].polls == stats.polls
+        assert scheduler.channels[1].total_bytes == 0
+
+    def test_interval_limits(self):
+        scheduler = self.make_scheduler()
+        # Very slow data is polled at the maximum interval.
+        assert scheduler.update({1: 1}, now=1.0) == 0.064
+        # Very fast data is polled at the minimum interval.
+        scheduler.update({1: 60}, now=1.0001)
+        assert scheduler.update({1: 60}, now=1.0002) == 0.001
+        assert scheduler.channels[1].overflow_risk > 1.0
+
+    def test_saturated(self):
+        scheduler = self.make_scheduler()
+        for i in range(6):
+            scheduler.update({}, now=float(i))
+        assert scheduler.interval == 0.064
+        assert scheduler.update({0: self.CAPACITY}, now=100.0) == 0.001
+        stats = scheduler.channels[0]
+        assert stats.saturated_polls == 1
+        assert stats.peak_fill == 1.0
+
+    def test_remove_channel(self):
+        scheduler = self.make_scheduler()
+        scheduler.remove_channel(1)
+        scheduler.remove_channel(5)
+        scheduler.update({1: 10}, now=1.0)
+        assert list(scheduler.channels) == [0]
+        assert scheduler.active_polls == 1
+
+    def test_slow_worker(self):
+        target = RTTTarget(2, 0)
+        server = RTTServer(target, CB_ADDR, 0, b'SEGGER RTT')
+        server.start()
+        fast = ListWorker()
+        slow = ListWorker(max_write=0)
+        server.add_worker(0, fast)
+        server.add_worker(1, slow)
+        subscription = server.get_bus(0).subscribe(max_bytes=10)
+        received = []
+        server.get_bus(1).add_callback(lambda data: received.append(bytes(data)))
+        for i in range(4):
+            target.target_write(0, b'message%d' % i)
+            target.target_write(1, b'slow%d' % i)
+            server.poll()
+        # The up channels are drained whether or not their consumers keep up.
+        assert fast.up_data == b'message0message1message2message3'
+        assert b''.join(received) == b'slow0slow1slow2slow3'
+        assert target.get_offsets(1)[0] == target.get_offsets(1)[1]
+        assert bytes(subscription.get()) == b'message0'
+        assert subscription.dropped_chunks == 3
+        slow.max_write = 3
+        server.poll()
+        assert slow.up_data == b'slo'
+        slow.max_write = None
+        server.poll()
+        assert slow.up_data == b'slow0slow1slow2slow3'
+
+    def test_bus_consumers(self):
+        target = RTTTarget(2, 0)
+        server = RTTServer(target, CB_ADDR, 0, b'SEGGER RTT')
+        server.start()
+        with pytest.raises(exceptions.RTTError):
+            server.get_bus(2)
+        target.target_write(0, b'abc')
+        # Channels without consumers are not read.
+        assert not server.poll()
+        assert target.get_offsets(0) == (3, 0)
+        subscription = server.get_bus(0).subscribe()
+        assert server.poll()
+        assert bytes(subscription.get()) == b'abc'
+        assert list(server.scheduler.channels) == [0]
+        subscription.close()
+        server.poll()
+        assert list(server.scheduler.channels) == []
+        server.stop()
+        assert subscription.is_closed
@@ -0,0 +1,131 @@
+# pyOCD debugger
+# Copyright (c) 2026 PyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+
+from pyocd.utility.rtt_bus import (RTTChannelBus, RTTSubscription)
+
+BLOCK = RTTSubscription.Policy.BLOCK
+
+class TestRTTChannelBus:
+    def test_shared_buffer(self):
+        bus = RTTChannelBus(1)
+        subs = [bus.subscribe(), bus.subscribe()]
+        received = []
+        bus.add_callback(received.append)
+        data = b'hello world'
+        bus.publish(data)
+        views = [sub.get() for sub in subs]
+        for view in views + received:
+            assert view.obj is data
+            assert view.readonly
+        assert subs[0].channel_id == 1
+        assert bus.total_bytes == len(data)
+        assert subs[0].get() is None
+
+    def test_mutable_data_read_only(self):
+        bus = RTTChannelBus(0)
+        sub = bus.subscribe()
+        received = []
+        bus.add_callback(received.append)
+        bus.publish(bytearray(b'data'))
+        for view in (sub.get(), received[0]):
+            assert view.readonly
+            assert view == b'data'
+
+    def test_no_consumers(self):
+        bus = RTTChannelBus(0)
+        assert not bus.has_consumers
+        bus.add_callback(print)
+        assert bus.has_consumers
+        bus.remove_callback(print)
+        sub = bus.subscribe()
+        assert bus.has_consumers
+        sub.close()
+        assert not bus.has_consumers
+        bus.publish(b'data')
+        assert sub.get() is None
+
+    def test_drop(self):
+        bus = RTTChannelBus(0)
+        sub = bus.subscribe(max_bytes=8)
+        for chunk in (b'12345', b'678', b'9', b'abcdefghijkl'):
+            bus.publish(chunk)
+        assert sub.pending_bytes == 8
+        assert sub.dropped_chunks == 2
+        assert sub.dropped_bytes == 13
+        assert bytes(sub.get()) == b'12345'
+        assert bytes(sub.get()) == b'678'
+        # A chunk larger than the limit is accepted by an empty queue.
+        bus.publish(b'abcdefghijkl')
+        assert bytes(sub.get()) == b'abcdefghijkl'
+
+    def test_peek_consume(self):
+        bus = RTTChannelBus(0)
+        sub = bus.subscribe()
+        bus.publish(b'abcdef')
+        bus.publish(b'gh')
+        sub.consume(2)
+        assert bytes(sub.peek()) == b'cdef'
+        assert sub.pending_bytes == 6
+        sub.consume(4)
+        assert bytes(sub.peek()) == b'gh'
+        assert bytes(sub.get()) == b'gh'
+        assert sub.peek() is None
+
+    def test_slow_consumer_isolated(self):
+        bus = RTTChannelBus(0)
+        slow = bus.subscribe(max_bytes=4)
+        fast = bus.subscribe(max_bytes=4)
+        for i in range(10):
+            bus.publish(b'%d' % i)
+            assert bytes(fast.get()) == b'%d' % i
+        assert slow.pending_bytes == 4
+        assert fast.dropped_chunks == 0
+
+    def test_block(self):
+        bus = RTTChannelBus(0)
+        sub = bus.subscribe(max_bytes=4, policy=BLOCK, block_timeout=5.0)
+        chunks = [b'%04d' % i for i in range(20)]
+
+        def publish():
+            for chunk in chunks:
+                bus.publish(chunk)
+
+        thread = threading.Thread(target=publish)
+        thread.start()
+        received = [bytes(sub.get(timeout=5.0)) for _ in chunks]
+        thread.join()
+        assert received == chunks
+        assert sub.dropped_chunks == 0
+
+    def test_block_timeout(self):
+        bus = RTTChannelBus(0)
+        sub = bus.subscribe(max_bytes=4, policy=BLOCK, block_timeout=0.01)
+        bus.publish(b'1234')
+        bus.publish(b'5678')
+        assert sub.dropped_chunks == 1
+
+    def test_close_releases(self):
+        bus = RTTChannelBus(0)
+        sub = bus.subscribe(max_bytes=1, policy=BLOCK)
+        bus.publish(b'a')
+        thread = threading.Thread(target=bus.publish, args=(b'b',))
+        thread.start()
+        sub.close()
+        thread.join(5.0)
+        assert not thread.is_alive()
+        assert sub.get(timeout=None) is None
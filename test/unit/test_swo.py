@@ -0,0 +1,165 @@
+# pyOCD debugger
+# Copyright (c) 2026 PyOCD Authors
+# SPDX-License-Identifier: Apache-2.0
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+from unittest import mock
+
+from pyocd.trace import events
+from pyocd.trace.sink import TraceEventSink
+from pyocd.trace.swo import SWOParser
+from pyocd.trace.swo_decoder import (SWOBatchDecoder, SWOEventBuffer)
+
+B = SWOEventBuffer
+
+SYNC = b'\x00' * 5 + b'\x80'
+OVERFLOW = b'\x70'
+
+def itm(port, data, width=1):
+    return bytes([(port << 3) | {1: 1, 2: 2, 4: 3}[width]]) + data.to_bytes(width, 'little')
+
+def hw(a, data, width=4):
+    return bytes([(a << 3) | 0x4 | {1: 1, 2: 2, 4: 3}[width]]) + data.to_bytes(width, 'little')
+
+def local_ts(delta, tc=0):
+    if delta < 8 and tc == 0:
+        return bytes([delta << 4])
+    # Continuation bytes are accumulated most significant group first.
+    groups = [(delta >> 7) & 0x7f, delta & 0x7f] if delta >= 0x80 else [delta]
+    return bytes([0xc0 | (tc << 4)] + [g | 0x80 for g in groups[:-1]] + [groups[-1]])
+
+def page(n):
+    return bytes([0x08 | (n << 4)])
+
+class ListSink(TraceEventSink):
+    def __init__(self):
+        self.events = []
+
+    def receive(self, event):
+        self.events.append(event)
+
+STREAM = (SYNC + itm(0, 0x41) + itm(1, 0x4443, 2) + local_ts(5)
+        + itm(3, 0x12345678, 4) + local_ts(300, tc=1)
+        + page(1) + itm(2, 0x7a) + OVERFLOW
+        + SYNC + itm(2, 0x7b)
+        + hw(0, 0x21, 1) + hw(1, 0x1000 | 15, 2) + hw(1, 0x0000 | 3, 2) + hw(2, 0x1234)
+        + hw(0b01010, 0x4000) + hw(0b01011, 0xbeef, 2) + hw(0b10100, 0x55, 1)
+        + local_ts(1))
+
+EXPECTED_ROWS = [
+    (B.ITM, 0, 0, 0x41, 1),
+    (B.ITM, 0, 1, 0x4443, 2),
+    (B.TIMESTAMP, 5, 0, 5, 0),
+    (B.ITM, 5, 3, 0x12345678, 4),
+    (B.TIMESTAMP, 305, 1, 300, 0),
+    (B.ITM, 305, 34, 0x7a, 1),
+    (B.OVERFLOW, 305, 0, 0, 0),
+    (B.ITM, 305, 2, 0x7b, 1),
+    (B.EVENT_COUNTER, 305, 0, 0x21, 1),
+    (B.EXCEPTION, 305, 15, 1, 2),
+    (B.PERIODIC_PC, 305, 0, 0x1234, 4),
+    (B.DATA_PC, 305, 1, 0x4000, 4),
+    (B.DATA_ADDRESS, 305, 1, 0xbeef, 2),
+    (B.DATA_READ, 305, 2, 0x55, 1),
+    (B.TIMESTAMP, 306, 0, 1, 0),
+    ]
+
+def rows(buffer):
+    return [buffer.row(i) for i in range(len(buffer))]
+
+class TestSWOBatchDecoder:
+    def test_decode(self):
+        decoder = SWOBatchDecoder()
+        buffer = decoder.decode(STREAM)
+        assert rows(buffer) == EXPECTED_ROWS
+        assert decoder.bytes_decoded == len(STREAM)
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 7])
+    def test_split_packets(self, chunk_size):
+        decoder = SWOBatchDecoder()
+        buffer = SWOEventBuffer()
+        for offset in range(0, len(STREAM), chunk_size):
+            decoder.decode(bytearray(STREAM[offset:offset + chunk_size]), buffer)
+        assert rows(buffer) == EXPECTED_ROWS
+
+    @pytest.mark.parametrize("convert", [list, memoryview])
+    def test_decode_sequence(self, convert):
+        decoder = SWOBatchDecoder()
+        buffer = SWOEventBuffer()
+        decoder.decode(convert(STREAM[:5]), buffer)
+        decoder.decode(convert(STREAM[5:]), buffer)
+        assert rows(buffer) == EXPECTED_ROWS
+        assert decoder.bytes_decoded == len(STREAM)
+
+    def test_reset(self):
+        decoder = SWOBatchDecoder()
+        decoder.decode(page(2) + local_ts(3) + itm(0, 1, 4)[:3])
+        decoder.reset()
+        assert decoder.bytes_decoded == 0
+        assert rows(decoder.decode(itm(1, 2) + local_ts(1))) == [(B.ITM, 0, 1, 2, 1), (B.TIMESTAMP, 1, 0, 1, 0)]
+
+    def test_itm_data(self):
+        buffer = SWOBatchDecoder().decode(itm(0, 0x41) + hw(2, 0) + itm(1, 0x42) + itm(0, 0x44434241, 4)
+                + page(1) + itm(0, 0x45))
+        assert buffer.itm_data() == b'ABABCDE'
+        assert buffer.itm_data(port=0) == b'AABCD'
+        assert buffer.itm_data(port=32) == b'E'
+
+    def test_events(self):
+        core = mock.Mock()
+        core.exception_number_to_name.return_value = "SysTick"
+        buffer = SWOBatchDecoder().decode(STREAM)
+        event_list = list(buffer.events(core))
+        assert len(event_list) == len(EXPECTED_ROWS)
+        assert isinstance(event_list[3], events.TraceITMEvent)
+        assert (event_list[3].port, event_list[3].data, event_list[3].width, event_list[3].timestamp) == \
+                (3, 0x12345678, 4, 5)
+        exc = event_list[9]
+        assert isinstance(exc, events.TraceExceptionEvent)
+        assert (exc.exception_number, exc.action, exc.exception_name) == (15, exc.ENTERED, "SysTick")
+        core.exception_number_to_name.assert_called_once_with(15)
+        read = event_list[13]
+        assert (read.comparator, read.value, read.is_read, read.transfer_size) == (2, 0x55, True, 1)
+        assert buffer.event(9).exception_name == ""
+
+class TestSWOParser:
+    def test_parse(self):
+        sink = ListSink()
+        parser = SWOParser(mock.Mock(), sink)
+        for offset in range(0, len(STREAM), 4):
+            parser.parse(bytearray(STREAM[offset:offset + 4]))
+        assert parser.bytes_parsed == len(STREAM)
+        assert [type(e) for e in sink.events] == [
+            events.TraceITMEvent, events.TraceITMEvent,
+            events.TraceITMEvent,
+            events.TraceITMEvent, events.TraceOverflow,
+            events.TraceITMEvent, events.TraceEventCounter, events.TraceExceptionEvent,
+            events.TracePeriodicPC, events.TraceDataTraceEvent, events.TraceDataTraceEvent,
+            ]
+        # Events get the timestamp of the following timestamp packet.
+        assert [e.timestamp for e in sink.events[:3]] == [5, 5, 305]
+        assert all(e.timestamp == 306 for e in sink.events[5:])
+        # The PC and address packets from the same comparator are merged.
+        merged = sink.events[9]
+        assert (merged.comparator, merged.pc, merged.address) == (1, 0x4000, 0xbeef)
+
+    def test_reset(self):
+        sink = ListSink()
+        parser = SWOParser(mock.Mock(), sink)
+        parser.parse(itm(0, 1) + itm(0, 2, 4)[:2])
+        parser.reset()
+        parser.parse(itm(0, 3) + local_ts(2))
+        assert parser.bytes_parsed == 3
+        assert [(e.data, e.timestamp) for e in sink.events] == [(3, 2)]
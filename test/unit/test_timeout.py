@@ -18,7 +18,7 @@ from time import (time, sleep)
 import pytest
 from unittest.mock import Mock
 
-from pyocd.utility.timeout import Timeout
+from pyocd.utility.timeout import (Backoff, Timeout)
 
 @pytest.fixture(scope='function')
 def mock_time(monkeypatch):
@@ -100,3 +100,15 @@ class TestTimeout:
         assert cnta == 3 and cnt == 0
         assert not to.did_time_out
 
+
+class TestBackoff:
+    def test_backoff(self):
+        b = Backoff(0.001, 0.005)
+        assert [b.next() for _ in range(5)] == [0.001, 0.002, 0.004, 0.005, 0.005]
+        assert b.interval == 0.005
+        b.reset()
+        assert b.next() == 0.001
+
+    def test_fixed(self):
+        b = Backoff(0.01, 0.001, factor=3)
+        assert [b.next() for _ in range(3)] == [0.01] * 3